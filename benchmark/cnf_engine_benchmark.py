@@ -0,0 +1,121 @@
+'''
+    Node visits and wall time of the single pass CNF engine (cnf_engine.py) against the
+    four pass pipeline eliminate_implies, push_not_down, push_or_below_and,
+    make_and_or_right_deep, on random formulas of growing size, then wall time on long
+    chains: left deep conjunctions, right deep disjunctions and implications under double
+    negations, whose CNF is linear in their size.
+
+    Visits of the four pass pipeline are the nodes yielded by the traversals of every
+    pass (including the copies made by distribution) plus the nodes created by the passes,
+    each of which is examined once more by the pass creating it.
+
+    Run from the project root:
+
+        PYTHONPATH=. python benchmark/cnf_engine_benchmark.py
+
+'''
+import random
+import time
+
+from plt_src import NodeType, PLTreeNode, symbols
+from plt_src import pl_tree_node, traversal
+from plt_src.cnf_engine import cnf_clauses
+from plt_src.formula_generator import random_formula
+
+REPEATS = 3
+
+CHAIN_LENGTHS = (10000, 40000, 160000)
+
+
+def chains(length):
+    variables = [symbols.variable("x%d" % k) for k in range(length)]
+    negated = [nodetype for k, variable in enumerate(variables) for nodetype in ([variable, NodeType.NOT] if k % 2 else [variable])]
+    yield "left deep AND", [variables[0]] + [nodetype for variable in variables[1:] for nodetype in (variable, NodeType.AND)]
+    yield "right deep OR", variables + [NodeType.OR] * (length - 1)
+    yield "NOT NOT IMPLIES", negated + [NodeType.IMPLIES, NodeType.NOT, NodeType.NOT] * (length - 1)
+
+
+def four_pass(pltree):
+    pltree.eliminate_implies()
+    pltree.push_not_down()
+    pltree.push_or_below_and()
+    pltree.make_and_or_right_deep()
+
+
+def fused(pltree):
+    pltree._replace_with(PLTreeNode.build_from_clauses(cnf_clauses(pltree)))
+
+
+def best_time(function, typeList):
+    best = None
+    for _ in range(REPEATS):
+        pltree = PLTreeNode.build_from_reverse_polish(typeList)
+        start = time.perf_counter()
+        function(pltree)
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best, pltree
+
+
+def four_pass_visits(typeList):
+    pltree = PLTreeNode.build_from_reverse_polish(typeList)
+    counts = [0]
+
+    def counting(generator):
+        def traverse(*args, **kwargs):
+            for node in generator(*args, **kwargs):
+                counts[0] += 1
+                yield node
+        return traverse
+
+    original_init = PLTreeNode.__init__
+
+    def counting_init(self, *args, **kwargs):
+        counts[0] += 1
+        original_init(self, *args, **kwargs)
+
+    saved = (pl_tree_node.post_order, pl_tree_node.pre_order)
+    pl_tree_node.post_order = counting(traversal.post_order)
+    pl_tree_node.pre_order = counting(traversal.pre_order)
+    PLTreeNode.__init__ = counting_init
+    try:
+        four_pass(pltree)
+    finally:
+        pl_tree_node.post_order, pl_tree_node.pre_order = saved
+        PLTreeNode.__init__ = original_init
+
+    return counts[0]
+
+
+def main():
+    rng = random.Random(0)
+
+    print("%8s %10s %14s %14s %12s %12s %8s" % ("leaves", "cnf nodes", "4-pass visits", "fused visits",
+                                                 "4-pass ms", "fused ms", "speedup"))
+    for num_leaves in (8, 16, 24, 32, 40, 48):
+        typeList = random_formula(num_leaves, negation = 0.3, rng = rng)
+
+        stats = {}
+        cnf_clauses(PLTreeNode.build_from_reverse_polish(typeList), stats = stats)
+        visits = four_pass_visits(typeList)
+
+        four_pass_seconds, expected = best_time(four_pass, typeList)
+        fused_seconds, result = best_time(fused, typeList)
+        assert result.get_reverse_polish() == expected.get_reverse_polish()
+
+        print("%8d %10d %14d %14d %12.3f %12.3f %7.1fx" % (num_leaves, len(result.get_reverse_polish()), visits,
+                                                           stats["nodes_visited"], four_pass_seconds * 1000,
+                                                           fused_seconds * 1000, four_pass_seconds / fused_seconds))
+
+    print()
+    print("%-16s %8s %12s %12s" % ("chain", "length", "4-pass s", "fused s"))
+    for length in CHAIN_LENGTHS:
+        for name, typeList in chains(length):
+            four_pass_seconds, expected = best_time(four_pass, typeList)
+            fused_seconds, result = best_time(fused, typeList)
+            assert result.get_reverse_polish() == expected.get_reverse_polish()
+            print("%-16s %8d %12.3f %12.3f" % (name, length, four_pass_seconds, fused_seconds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+'''
+    Evaluation of one formula under many bindings: compiled function (PLTreeNode.compile)
+    against binding then folding the tree (with_variable_bindings), binding a copy in
+    place (apply_variable_bindings + evaluate_constant_subtrees) and PLFlatFormula.evaluate.
+
+    Run from the project root:
+
+        PYTHONPATH=. python benchmark/compiler_benchmark.py
+
+'''
+import random
+import time
+
+from plt_src import NodeType, PLTreeNode, PLFlatFormula
+from plt_src.binding_index import BindingIndex
+from plt_src.compiler import clear_compile_cache
+from plt_src.formula_generator import random_formula
+
+ASSIGNMENTS = 2000
+
+
+def with_bindings(pltree, variables, assignments):
+    return [pltree.with_variable_bindings(BindingIndex(zip(variables, values)))._type is NodeType.TRUE
+            for values in assignments]
+
+
+def apply_bindings(pltree, variables, assignments):
+    results = []
+    for values in assignments:
+        bound = pltree.copy()
+        bound.apply_variable_bindings(list(zip(variables, values)))
+        results.append(bound.evaluate_constant_subtrees())
+    return results
+
+
+def flat_evaluate(flat, variables, assignments):
+    return [flat.evaluate(BindingIndex(zip(variables, values))) for values in assignments]
+
+
+def compiled(function, assignments):
+    return [function(values) for values in assignments]
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    rng = random.Random(0)
+
+    print("%8s %12s %12s %12s %12s %12s %12s %9s" % ("leaves", "compile ms", "cached us", "bind us", "apply us",
+                                                      "flat us", "compiled us", "speedup"))
+    for num_leaves in (10, 100, 1000, 10000):
+        pltree = PLTreeNode.build_from_reverse_polish(random_formula(num_leaves, num_variables = 8, rng = rng))
+        count = max(20, ASSIGNMENTS * 10 // num_leaves)
+
+        clear_compile_cache()
+        function, compile_seconds = timed(pltree.compile)
+        _, cached_seconds = timed(pltree.compile)
+
+        variables = function.variables
+        assignments = [tuple(rng.random() < 0.5 for _ in variables) for _ in range(count)]
+        flat = PLFlatFormula.from_tree(pltree)
+
+        expected, bind_seconds = timed(with_bindings, pltree, variables, assignments)
+        applied, apply_seconds = timed(apply_bindings, pltree, variables, assignments)
+        evaluated, flat_seconds = timed(flat_evaluate, flat, variables, assignments)
+        results, compiled_seconds = timed(compiled, function, assignments)
+        assert results == expected == applied == evaluated
+
+        print("%8d %12.2f %12.1f %12.2f %12.2f %12.2f %12.3f %8.0fx" % (
+            num_leaves, compile_seconds * 1e3, cached_seconds * 1e6, bind_seconds / count * 1e6,
+            apply_seconds / count * 1e6, flat_seconds / count * 1e6, compiled_seconds / count * 1e6,
+            bind_seconds / compiled_seconds))
+
+
+if __name__ == "__main__":
+    main()
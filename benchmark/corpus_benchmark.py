@@ -0,0 +1,93 @@
+'''
+    Loading a corpus of formulas: parsing the text file (parser.parse_lines) against
+    mapping the binary corpus (binary_corpus.Corpus), both for reading every formula, into
+    reverse polish sequences and into trees, and for random access to a few of them, with
+    the sizes of both files.
+
+    Run from the project root:
+
+        PYTHONPATH=. python benchmark/corpus_benchmark.py
+
+'''
+import os
+import random
+import tempfile
+import time
+
+from plt_src import PLTreeNode
+from plt_src.binary_corpus import Corpus, index_path, write_corpus
+from plt_src.formula_generator import random_formula
+from plt_src.parser import parse_lines, parse_reverse_polish
+
+NUM_FORMULAS = 20000
+LEAVES = 30
+VARIABLES = 40
+RANDOM_ACCESSES = 100
+
+
+def main():
+    rng = random.Random(0)
+    formulas = [random_formula(rng.randint(1, LEAVES), num_variables = VARIABLES, negation = 0.2, rng = rng)
+                for _ in range(NUM_FORMULAS)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        text_path = os.path.join(directory, "formulas.txt")
+        binary_path = os.path.join(directory, "formulas.plc")
+
+        with open(text_path, "w") as file:
+            for typeList in formulas:
+                file.write(PLTreeNode.build_from_reverse_polish(typeList).in_prefix_notation() + "\n")
+        write_corpus(binary_path, formulas)
+
+        text_bytes = os.path.getsize(text_path)
+        binary_bytes = os.path.getsize(binary_path) + os.path.getsize(index_path(binary_path))
+        print("%d formulas: text %d bytes, binary %d bytes (%.1fx smaller)" %
+              (NUM_FORMULAS, text_bytes, binary_bytes, text_bytes / binary_bytes))
+
+        # ----- to reverse polish sequences, then to trees (building the nodes costs the same)
+        start = time.perf_counter()
+        with open(text_path) as file:
+            sequences = [parse_reverse_polish(line) for line in file]
+        parse_sequences = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with Corpus(binary_path) as corpus:
+            decoded = [corpus.reverse_polish(k) for k in range(len(corpus))]
+        decode_sequences = time.perf_counter() - start
+        assert decoded == sequences
+
+        start = time.perf_counter()
+        trees = list(parse_lines(text_path))
+        parse_all = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with Corpus(binary_path) as corpus:
+            decoded = list(corpus)
+        decode_all = time.perf_counter() - start
+        assert [pltree.get_reverse_polish() for pltree in decoded] == [pltree.get_reverse_polish() for pltree in trees]
+
+        print("reverse polish  parse text %8.3fs   decode binary %8.3fs   %.1fx" %
+              (parse_sequences, decode_sequences, parse_sequences / decode_sequences))
+        print("trees           parse text %8.3fs   decode binary %8.3fs   %.1fx" % (parse_all, decode_all, parse_all / decode_all))
+
+        indices = [rng.randrange(NUM_FORMULAS) for _ in range(RANDOM_ACCESSES)]
+
+        # ----- text has no index: reaching formula k means reading the lines before it
+        start = time.perf_counter()
+        with open(text_path) as file:
+            lines = file.readlines()
+        text_trees = [PLTreeNode.build_from_text(lines[k]) for k in indices]
+        text_random = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with Corpus(binary_path) as corpus:
+            binary_trees = [corpus[k] for k in indices]
+        binary_random = time.perf_counter() - start
+        assert [pltree.get_reverse_polish() for pltree in text_trees] == [pltree.get_reverse_polish() for pltree in binary_trees]
+
+        print("%d random      open + read text %8.4fs   open + map binary %8.4fs   %.1fx" %
+              (RANDOM_ACCESSES, text_random, binary_random, text_random / binary_random))
+
+
+if __name__ == "__main__":
+    main()
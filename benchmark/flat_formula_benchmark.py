@@ -0,0 +1,54 @@
+'''
+    Memory per node and CNF conversion time of PLFlatFormula against PLTreeNode.
+
+    Run from the project root:
+
+        python benchmark/flat_formula_benchmark.py
+
+'''
+import random
+import time
+import tracemalloc
+
+from plt_src import PLTreeNode, PLFlatFormula
+from plt_src.formula_generator import random_formula
+
+
+def traced_size(function):
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    result = function()
+    size = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    return result, size
+
+
+def main():
+    rng = random.Random(0)
+
+    print("%10s %16s %16s %8s" % ("nodes", "tree bytes/node", "flat bytes/node", "ratio"))
+    for num_leaves in (1000, 10000, 100000):
+        typeList = random_formula(num_leaves, negation = 0.3, rng = rng)
+        _, tree_size = traced_size(lambda: PLTreeNode.build_from_reverse_polish(typeList))
+        _, flat_size = traced_size(lambda: PLFlatFormula.build_from_reverse_polish(typeList))
+        print("%10d %16.1f %16.1f %7.1fx" % (len(typeList), tree_size / len(typeList), flat_size / len(typeList), tree_size / flat_size))
+
+    print("\n%10s %14s %14s" % ("leaves", "tree CNF", "flat CNF"))
+    for num_leaves in (8, 12, 16):
+        formulas = [random_formula(num_leaves, negation = 0.3, rng = rng) for _ in range(50)]
+
+        start = time.perf_counter()
+        for typeList in formulas:
+            PLTreeNode.build_from_reverse_polish(typeList).reduce_to_CNF()
+        tree_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for typeList in formulas:
+            PLFlatFormula.build_from_reverse_polish(typeList).reduce_to_CNF()
+        flat_time = time.perf_counter() - start
+
+        print("%10d %13.4fs %13.4fs" % (num_leaves, tree_time, flat_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+'''
+    Compares the interned, slotted NodeType with the dict based implementation it
+    replaced: time to execute the module (building all NodeTypes), == comparisons and
+    dict lookups keyed by NodeType.
+
+    Run from the project root:
+
+        python benchmark/node_type_benchmark.py
+
+'''
+import os
+import timeit
+
+import plt_src.node_type
+
+# ----- node_type.py as it was before interning: __eq__ compares __dict__, and the
+# ----- variables are created by exec in the class body
+LEGACY_SOURCE = """
+class NodeTypeBase():
+
+    def __init__(self, prefix_name, infix_name, arity, is_var = False):
+        self._prefix_name = prefix_name
+        self._infix_name = infix_name
+        self._arity = arity
+        self._is_var = is_var
+
+    @property
+    def prefix_name(self):
+        return self._prefix_name
+
+    @property
+    def infix_name(self):
+        return self._infix_name
+
+    @property
+    def arity(self):
+        return self._arity
+
+    def is_var(self):
+        return self._is_var
+
+    @classmethod
+    def Variable(cls, val : str):
+        if isinstance(val,str) and val.isalpha and len(val) == 1:
+            return cls(val.upper(), val.upper(), 0, True)
+        else:
+            raise ValueError("%s is not a valid name for NodeType object"%val)
+
+    def __str__(self):
+        return self.prefix_name
+
+    def __repr__(self):
+        return self.prefix_name
+
+    def __eq__(self, other):
+        return self.__dict__ == other.__dict__
+
+    def __hash__(self):
+        return hash((self._prefix_name, self._arity, self._is_var))
+
+
+class NodeType():
+
+    IMPLIES = NodeTypeBase( "implies",   u"\\u2192" , 2 )
+    AND     = NodeTypeBase( "and",       u"\\u2227" , 2 )
+    OR      = NodeTypeBase( "or",        u"\\u2228" , 2 )
+    NOT     = NodeTypeBase( "not",       u"\\u00AC" , 1 )
+
+    TRUE    = NodeTypeBase( "true",      u"\\u22A4" , 0 )
+    FALSE   = NodeTypeBase( "false",     u"\\u22A5" , 0 )
+
+    import string
+    for a in list(string.ascii_letters):
+        exec("%s = NodeTypeBase.Variable('%s')" % (a, a))
+"""
+
+COMPARISONS = 1000000
+MODULE_RUNS = 200
+
+
+def module_time(source, name):
+    code = compile(source, name, "exec")
+
+    def run():
+        exec(code, {"__name__": "benchmark_node_type"})
+
+    return min(timeit.repeat(run, number = MODULE_RUNS, repeat = 3)) / MODULE_RUNS
+
+
+def operation_times(NodeType):
+    namespace = {"AND": NodeType.AND, "OR": NodeType.OR, "A": NodeType.A, "B": NodeType.B,
+                 "table": {NodeType.AND: 1, NodeType.OR: 2, NodeType.A: 3}}
+
+    times = []
+    for statement in ("AND == AND", "AND == OR", "A == B", "table[A]"):
+        times.append(min(timeit.repeat(statement, globals = namespace, number = COMPARISONS, repeat = 3)) / COMPARISONS)
+    return times
+
+
+def main():
+    with open(os.path.splitext(plt_src.node_type.__file__)[0] + ".py") as file:
+        current_source = file.read()
+
+    legacy = {}
+    exec(LEGACY_SOURCE, legacy)
+
+    print("%-24s %14s %14s" % ("", "before", "after"))
+    print("%-24s %13.1fus %13.1fus" % ("execute module", module_time(LEGACY_SOURCE, "legacy") * 1e6,
+                                       module_time(current_source, "node_type") * 1e6))
+
+    labels = ["== (same type)", "== (operators)", "== (variables)", "dict lookup"]
+    for label, before, after in zip(labels, operation_times(legacy["NodeType"]), operation_times(plt_src.node_type.NodeType)):
+        print("%-24s %13.1fns %13.1fns" % (label, before * 1e9, after * 1e9))
+
+
+if __name__ == '__main__':
+    main()
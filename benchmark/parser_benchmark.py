@@ -0,0 +1,63 @@
+'''
+    Parser throughput on files of random formulas in prefix, infix and ASCII infix notation.
+
+    Run from the project root:
+
+        python benchmark/parser_benchmark.py
+
+'''
+import io
+import random
+import time
+
+from plt_src import PLTreeNode, PLFlatFormula
+from plt_src.formula_generator import random_formula
+from plt_src.parser import parse_reverse_polish, parse_lines
+
+ASCII = {u"→": " -> ", u"∧": " & ", u"∨": " | ", u"¬": "~", u"⊤": "true", u"⊥": "false"}
+
+NUM_FORMULAS = 20000
+
+
+def to_ascii(text):
+    for symbol, alias in ASCII.items():
+        text = text.replace(symbol, alias)
+    return text
+
+
+def main():
+    rng = random.Random(0)
+    trees = [PLTreeNode.build_from_reverse_polish(random_formula(rng.randint(4, 32), negation = 0.3, rng = rng)) for _ in range(NUM_FORMULAS)]
+
+    texts = {
+        "prefix": "\n".join(tree.in_prefix_notation() for tree in trees) + "\n",
+        "infix": "\n".join(tree.in_infix_notation() for tree in trees) + "\n",
+    }
+    texts["ascii infix"] = to_ascii(texts["infix"])
+
+    print("%12s %10s %16s %12s %16s %16s" % ("notation", "MB", "reverse polish/s", "MB/s", "PLTreeNode/s", "PLFlatFormula/s"))
+    for notation, text in texts.items():
+        lines = text.splitlines()
+
+        start = time.perf_counter()
+        for line in lines:
+            parse_reverse_polish(line)
+        rpn_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in parse_lines(io.StringIO(text)):
+            pass
+        tree_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in parse_lines(io.StringIO(text), PLFlatFormula):
+            pass
+        flat_time = time.perf_counter() - start
+
+        size = len(text.encode("utf-8")) / 1e6
+        print("%12s %10.2f %16.0f %12.2f %16.0f %16.0f" % (notation, size, NUM_FORMULAS / rpn_time, size / rpn_time,
+                                                        NUM_FORMULAS / tree_time, NUM_FORMULAS / flat_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+'''
+    CDCL solver on uniform random 3-SAT near the satisfiability phase transition
+    (clause / variable ratio 4.26), where instances are hardest.
+
+    Run from the project root:
+
+        python benchmark/sat_solver_benchmark.py
+
+'''
+import random
+import time
+
+from plt_src.sat_solver import SATSolver
+
+RATIO = 4.26
+INSTANCES = 10
+
+
+def random_3sat(num_variables, rng):
+    num_clauses = int(round(RATIO * num_variables))
+    return [[rng.choice([-1, 1]) * v for v in rng.sample(range(1, num_variables + 1), 3)] for _ in range(num_clauses)]
+
+
+def check_model(clauses, model):
+    return all(any(model[abs(literal) - 1] == (literal > 0) for literal in clause) for clause in clauses)
+
+
+def main():
+    rng = random.Random(0)
+
+    print("%10s %8s %6s %6s %12s %12s %12s" % ("variables", "clauses", "sat", "unsat", "conflicts", "mean time", "max time"))
+    for num_variables in (50, 75, 100, 125, 150):
+        sat = unsat = conflicts = 0
+        times = []
+
+        for _ in range(INSTANCES):
+            clauses = random_3sat(num_variables, rng)
+            solver = SATSolver()
+
+            start = time.perf_counter()
+            for clause in clauses:
+                solver.add_clause(clause)
+            result = solver.solve()
+            times.append(time.perf_counter() - start)
+
+            if result:
+                assert check_model(clauses, solver.model())
+                sat += 1
+            else:
+                unsat += 1
+            conflicts += solver.stats["conflicts"]
+
+        print("%10d %8d %6d %6d %12d %11.4fs %11.4fs" % (num_variables, len(clauses), sat, unsat,
+                                                        conflicts // INSTANCES, sum(times) / len(times), max(times)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+'''
+    Load on the formula service (service.FormulaService) over a local Unix socket: CLIENTS
+    concurrent clients, each keeping PIPELINE requests in flight, send a mix of cnf,
+    evaluate and solve requests over a pool of FORMULAS formulas (so that identical
+    requests arrive concurrently and are coalesced). Client side throughput and latency
+    percentiles are printed with the server statistics, without evaluation batching
+    (batch_size 1) and with it.
+
+    Run from the project root:
+
+        PYTHONPATH=. python benchmark/service_benchmark.py
+
+'''
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from plt_src import PLTreeNode
+from plt_src.formula_generator import formula_variables, random_formula
+from plt_src.service import FormulaService, ServiceClient
+
+CLIENTS = 16
+PIPELINE = 8
+REQUESTS_PER_CLIENT = 500
+FORMULAS = 200
+LEAVES = 20
+VARIABLES = 10
+WORKERS = 4
+MIX = ["evaluate"] * 8 + ["cnf", "solve"]
+
+
+def make_requests(rng, formulas, variables):
+    requests = []
+    for _ in range(REQUESTS_PER_CLIENT):
+        op = rng.choice(MIX)
+        formula = rng.choice(formulas)
+        if op == "evaluate":
+            requests.append((op, {"formula": formula, "bindings": {name: rng.random() < 0.5 for name in variables}}))
+        else:
+            requests.append((op, {"formula": formula}))
+    return requests
+
+
+async def run_client(path, requests, latencies):
+    async with await ServiceClient.connect_unix(path) as client:
+        queue = list(reversed(requests))
+
+        async def lane():
+            while queue:
+                op, fields = queue.pop()
+                start = time.perf_counter()
+                response = await client.request(op, **fields)
+                latencies.append(time.perf_counter() - start)
+                assert "result" in response, response
+
+        await asyncio.gather(*[lane() for _ in range(PIPELINE)])
+
+
+async def run_load(path, workload, **options):
+    async with FormulaService(workers = WORKERS, **options) as service:
+        await service.listen_unix(path)
+        latencies = []
+        start = time.perf_counter()
+        await asyncio.gather(*[run_client(path, requests, latencies) for requests in workload])
+        seconds = time.perf_counter() - start
+        report = service.report()
+    os.unlink(path)
+
+    latencies.sort()
+    percentile = lambda fraction: 1000.0 * latencies[min(len(latencies) - 1, int(fraction * len(latencies)))]
+    print("%-40s %6d requests %7.2fs %8.0f req/s   p50 %7.2fms  p90 %7.2fms  p99 %7.2fms   coalesced %5d  batches %5d (mean %.1f)" %
+          (options, len(latencies), seconds, len(latencies) / seconds, percentile(0.5), percentile(0.9), percentile(0.99),
+           report["coalesced"], report["evaluation_batches"], report["mean_batch_size"]))
+
+
+def main():
+    rng = random.Random(0)
+    trees = [PLTreeNode.build_from_reverse_polish(random_formula(rng.randint(2, LEAVES), num_variables = VARIABLES, rng = rng))
+             for _ in range(FORMULAS)]
+    formulas = [pltree.in_prefix_notation() for pltree in trees]
+    variables = [variable.prefix_name for variable in formula_variables(VARIABLES)]
+    workload = [make_requests(rng, formulas, variables) for _ in range(CLIENTS)]
+
+    print("%d clients x %d requests, %d in flight each, %d workers" % (CLIENTS, REQUESTS_PER_CLIENT, PIPELINE, WORKERS))
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "service.sock")
+        asyncio.run(run_load(path, workload, batch_size = 1))
+        asyncio.run(run_load(path, workload, batch_size = 64, batch_delay = 0.002))
+
+
+if __name__ == "__main__":
+    main()
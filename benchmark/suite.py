@@ -0,0 +1,234 @@
+'''
+    Benchmark suite of the PLTreeNode stages on seeded random formulas.
+
+    For every shape and size of the sweep, a formula is generated with
+    formula_generator.random_formula and each stage is timed (best of --repeats runs, each
+    on a fresh tree) and run once more under tracemalloc to record its peak memory:
+
+        build_from_reverse_polish, eliminate_implies, push_not_down, push_or_below_and,
+        make_and_or_right_deep, reduce_to_CNF, evaluate_constant_subtrees,
+        in_prefix_notation, in_infix_notation, get_reverse_polish
+
+    Each CNF pass runs on the output of the previous ones. Distribution grows
+    exponentially on random formulas of more than a few dozen leaves, so the CNF stages
+    run on a conjunction of random clusters of CLUSTER_LEAVES leaves (of the same shape and
+    total size) instead, whose CNF grows linearly. As a safeguard, the distribution stages
+    are skipped (and reported as such) when cnf_size() exceeds --cnf-limit literals.
+
+    The results are written as JSON. Given a baseline written by an earlier run, every
+    stage is compared with it and the run fails when one is slower, or uses more memory,
+    by more than --tolerance.
+
+    Run from the project root:
+
+        PYTHONPATH=. python benchmark/suite.py --output baseline.json
+        PYTHONPATH=. python benchmark/suite.py --baseline baseline.json --output current.json
+
+'''
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+from plt_src import NodeType, PLTreeNode
+from plt_src.formula_generator import SHAPES, random_formula
+
+FORMAT_VERSION = 1
+
+STAGES = ("build_from_reverse_polish", "eliminate_implies", "push_not_down", "push_or_below_and",
+          "make_and_or_right_deep", "reduce_to_CNF", "evaluate_constant_subtrees",
+          "in_prefix_notation", "in_infix_notation", "get_reverse_polish")
+
+# ----- stages run on the clustered formula, those needing the CNF size check, and the
+# ----- CNF passes each stage starts from
+CNF_STAGES = ("eliminate_implies", "push_not_down", "push_or_below_and", "make_and_or_right_deep", "reduce_to_CNF")
+DISTRIBUTION_STAGES = ("push_or_below_and", "make_and_or_right_deep", "reduce_to_CNF")
+PREVIOUS_PASSES = {
+    "push_not_down": ("eliminate_implies",),
+    "push_or_below_and": ("eliminate_implies", "push_not_down"),
+    "make_and_or_right_deep": ("eliminate_implies", "push_not_down", "push_or_below_and"),
+}
+
+CLUSTER_LEAVES = 6
+
+# ----- stages too fast to time on their own are repeated to run at least this long
+MINIMUM_SECONDS = 0.01
+
+
+def clustered_formula(num_leaves, shape, num_variables, seed):
+    '''
+        Return the reverse polish of a balanced conjunction of random formulas of
+        CLUSTER_LEAVES leaves each (fewer for the last one), num_leaves leaves in all
+
+    '''
+    rng = random.Random(seed)
+    level = []
+    for start in range(0, num_leaves, CLUSTER_LEAVES):
+        leaves = min(CLUSTER_LEAVES, num_leaves - start)
+        level.append(random_formula(leaves, num_variables = num_variables, shape = shape, constants = 0.05, rng = rng))
+
+    while len(level) > 1:
+        level = [level[i] + level[i + 1] + [NodeType.AND] if i + 1 < len(level) else level[i] for i in range(0, len(level), 2)]
+    return level[0]
+
+
+def stage_setup(stage, typeList):
+    '''
+        Return (function, argument): the stage as a function of one argument, and a fresh
+        argument to run it on
+
+    '''
+    if stage == "build_from_reverse_polish":
+        return PLTreeNode.build_from_reverse_polish, typeList
+
+    pltree = PLTreeNode.build_from_reverse_polish(typeList)
+    for name in PREVIOUS_PASSES.get(stage, ()):
+        getattr(pltree, name)()
+    return getattr(PLTreeNode, stage), pltree
+
+
+def time_stage(stage, typeList, repeats):
+    best = None
+    for _ in range(repeats):
+        function, argument = stage_setup(stage, typeList)
+        start = time.perf_counter()
+        function(argument)
+        seconds = time.perf_counter() - start
+
+        # ----- printing leaves the tree unchanged, so short stages can be run in a loop
+        if seconds < MINIMUM_SECONDS and stage in ("build_from_reverse_polish", "in_prefix_notation",
+                                                   "in_infix_notation", "get_reverse_polish"):
+            loops = int(MINIMUM_SECONDS / max(seconds, 1e-7)) + 1
+            start = time.perf_counter()
+            for _ in range(loops):
+                function(argument)
+            seconds = (time.perf_counter() - start) / loops
+
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+
+def peak_memory(stage, typeList):
+    function, argument = stage_setup(stage, typeList)
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    start = tracemalloc.get_traced_memory()[0]
+    result = function(argument)
+    peak = tracemalloc.get_traced_memory()[1] - start
+    tracemalloc.stop()
+    del result
+    return peak
+
+
+def run_suite(sizes, shapes, repeats, seed, cnf_limit, num_variables, progress = None):
+    '''
+        Time every stage on every shape and size
+
+        @Return: the JSON-ready dict of results
+
+    '''
+    results = []
+    for shape in shapes:
+        for size in sizes:
+            formula = random_formula(size, num_variables = num_variables, shape = shape, constants = 0.05, seed = seed)
+            clustered = clustered_formula(size, shape, num_variables, seed)
+            num_clauses, num_literals = PLTreeNode.build_from_reverse_polish(clustered).cnf_size()
+
+            for stage in STAGES:
+                typeList = clustered if stage in CNF_STAGES else formula
+                result = {"shape": shape, "size": size, "formula": "clustered" if stage in CNF_STAGES else "random",
+                          "nodes": len(typeList), "stage": stage}
+                if stage in DISTRIBUTION_STAGES and num_literals > cnf_limit:
+                    result["skipped"] = "CNF of %d literals" % num_literals
+                else:
+                    result["seconds"] = time_stage(stage, typeList, repeats)
+                    result["peak_bytes"] = peak_memory(stage, typeList)
+                results.append(result)
+
+                if progress is not None:
+                    progress.write("%-10s %8d %-28s %s\n" % (shape, size, stage, result.get("skipped") or
+                                                            "%.6fs %10d bytes" % (result["seconds"], result["peak_bytes"])))
+                    progress.flush()
+
+    return {
+        "version": FORMAT_VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {"sizes": sizes, "shapes": shapes, "repeats": repeats, "seed": seed,
+                     "cnf_limit": cnf_limit, "num_variables": num_variables},
+        "results": results,
+    }
+
+
+def compare(current, baseline, tolerance):
+    '''
+        Compare the results of two runs
+
+        @Return: list of (shape, size, stage, measure, baseline value, current value, ratio)
+                 for every measure worse than the baseline by more than tolerance
+
+    '''
+    if baseline.get("version") != FORMAT_VERSION:
+        raise ValueError("Unsupported baseline version %s" % baseline.get("version"))
+
+    previous = {(result["shape"], result["size"], result["stage"]): result for result in baseline["results"]}
+    regressions = []
+
+    for result in current["results"]:
+        old = previous.get((result["shape"], result["size"], result["stage"]))
+        if old is None:
+            continue
+        for measure in ("seconds", "peak_bytes"):
+            if measure not in result or not old.get(measure):
+                continue
+            ratio = result[measure] / old[measure]
+            if ratio > 1 + tolerance:
+                regressions.append((result["shape"], result["size"], result["stage"], measure, old[measure], result[measure], ratio))
+
+    return regressions
+
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Benchmark the PLTreeNode stages on random formulas")
+    parser.add_argument("--sizes", default = "1000,10000,100000", help = "comma separated numbers of leaves")
+    parser.add_argument("--shapes", default = ",".join(SHAPES), help = "comma separated shapes")
+    parser.add_argument("--repeats", type = int, default = 3, help = "timed runs per stage, the best is kept")
+    parser.add_argument("--seed", type = int, default = 0)
+    parser.add_argument("--variables", type = int, default = 8, help = "number of distinct variables")
+    parser.add_argument("--cnf-limit", type = int, default = 10 ** 6, help = "largest CNF, in literals, to distribute")
+    parser.add_argument("--output", "-o", help = "JSON file to write (default: standard output)")
+    parser.add_argument("--baseline", help = "JSON file of an earlier run to compare with")
+    parser.add_argument("--tolerance", type = float, default = 0.25, help = "allowed slowdown, 0.25 for 25%%")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    shapes = args.shapes.split(",")
+    for shape in shapes:
+        if shape not in SHAPES:
+            parser.error("unknown shape %s" % shape)
+
+    current = run_suite(sizes, shapes, args.repeats, args.seed, args.cnf_limit, args.variables, progress = sys.stderr)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(current, file, indent = 1)
+    else:
+        json.dump(current, sys.stdout, indent = 1)
+        sys.stdout.write("\n")
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(current, json.load(file), args.tolerance)
+        for shape, size, stage, measure, old, new, ratio in regressions:
+            sys.stderr.write("REGRESSION %-10s %8d %-28s %-10s %12.6g -> %12.6g (%.2fx)\n" % (shape, size, stage, measure, old, new, ratio))
+        sys.stderr.write("%d regressions against %s\n" % (len(regressions), args.baseline))
+        return 1 if regressions else 0
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
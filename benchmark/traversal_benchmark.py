@@ -0,0 +1,222 @@
+'''
+    Compares the explicit-stack traversals of PLTreeNode with the recursive
+    implementations they replaced.
+
+    Run from the project root:
+
+        python benchmark/traversal_benchmark.py
+
+'''
+import copy
+import random
+import sys
+import time
+
+from plt_src import NodeType, PLTreeNode
+
+
+class RecursivePLTreeNode(PLTreeNode):
+    '''
+        The recursive (and deepcopy based) passes as they were before the traversal core
+
+    '''
+
+    # ----- fall back to the recursive copy.deepcopy machinery
+    __deepcopy__ = None
+
+    def get_reverse_polish(self, node_queue = None):
+        if node_queue is None:
+            node_queue = []
+        if self._child1 is not None:
+            self._child1.get_reverse_polish(node_queue)
+        if self._child2 is not None:
+            self._child2.get_reverse_polish(node_queue)
+        node_queue.append(self._type)
+        return node_queue
+
+    def in_prefix_notation(self):
+        arity = self._type.arity
+        if arity == 0:
+            return self._type.prefix_name
+        elif arity == 1:
+            return "%s(%s)"%(self._type.prefix_name, self._child1.in_prefix_notation())
+        return "%s(%s,%s)"%(self._type.prefix_name, self._child1.in_prefix_notation(), self._child2.in_prefix_notation())
+
+    def in_infix_notation(self):
+        arity = self._type.arity
+        if arity == 0:
+            return self._type.infix_name
+        elif arity == 1:
+            return "%s%s"%(self._type.infix_name, self._child1.in_infix_notation())
+        return "(%s%s%s)"%(self._child1.in_infix_notation(), self._type.infix_name, self._child2.in_infix_notation())
+
+    def apply_variable_bindings(self, val_bindings_map):
+        if not self._type.is_var():
+            if self._child1 is not None:
+                self._child1.apply_variable_bindings(val_bindings_map)
+            if self._child2 is not None:
+                self._child2.apply_variable_bindings(val_bindings_map)
+        else:
+            for val, binding in val_bindings_map:
+                if val == self._type:
+                    self._type = NodeType.TRUE if binding == True else NodeType.FALSE
+
+    def eliminate_implies(self):
+        if self._child1 is not None:
+            self._child1.eliminate_implies()
+        if self._child2 is not None:
+            self._child2.eliminate_implies()
+        if self._type == NodeType.IMPLIES:
+            self._type = NodeType.OR
+            new_child = copy.deepcopy(self._child1)
+            self._child1._type = NodeType.NOT
+            self._child1._child1 = new_child
+            self._child1._child2 = None
+
+    def push_not_down(self):
+        if self._type == NodeType.NOT:
+            if self._child1._type == NodeType.NOT:
+                childcopy = copy.deepcopy(self._child1._child1)
+                self._type = childcopy._type
+                self._child1 = childcopy._child1
+                self._child2 = childcopy._child2
+            elif self._child1._type in (NodeType.AND, NodeType.OR):
+                self_copy1 = copy.deepcopy(self)
+                self_copy1._child1 = copy.deepcopy(self._child1._child1)
+                self_copy1._child2 = None
+                self_copy2 = copy.deepcopy(self)
+                self_copy2._child1 = copy.deepcopy(self._child1._child2)
+                self_copy2._child2 = None
+                self._type = NodeType.OR if self._child1._type == NodeType.AND else NodeType.AND
+                self._child1 = self_copy1
+                self._child2 = self_copy2
+        if self._child1 is not None:
+            self._child1.push_not_down()
+        if self._child2 is not None:
+            self._child2.push_not_down()
+
+    def push_or_below_and(self):
+        if self._child1 is not None:
+            self._child1.push_or_below_and()
+        if self._child2 is not None:
+            self._child2.push_or_below_and()
+        if self._type == NodeType.OR:
+            if self._child1._type == NodeType.AND:
+                childcopy = copy.deepcopy(self._child2)
+                child12_copy = copy.deepcopy(self._child1._child2)
+                self._type = NodeType.AND
+                self._child1._type = NodeType.OR
+                self._child1._child2 = copy.deepcopy(childcopy)
+                self._child2._type = NodeType.OR
+                self._child2._child1 = copy.deepcopy(child12_copy)
+                self._child2._child2 = copy.deepcopy(childcopy)
+            elif self._child2._type == NodeType.AND:
+                childcopy = copy.deepcopy(self._child1)
+                child21_copy = copy.deepcopy(self._child2._child1)
+                self._type = NodeType.AND
+                self._child2._type = NodeType.OR
+                self._child2._child1 = copy.deepcopy(childcopy)
+                self._child1._type = NodeType.OR
+                self._child1._child2 = copy.deepcopy(child21_copy)
+                self._child1._child1 = copy.deepcopy(childcopy)
+            self._child1.push_or_below_and()
+            self._child2.push_or_below_and()
+
+    def make_and_or_right_deep(self):
+        if self._type in (NodeType.OR, NodeType.AND) and self._child1._type == self._type:
+            child11copy = copy.deepcopy(self._child1._child1)
+            child12copy = copy.deepcopy(self._child1._child2)
+            child2copy = copy.deepcopy(self._child2)
+            self._child1 = child11copy
+            self._child2._type = self._type
+            self._child2._child1 = child12copy
+            self._child2._child2 = child2copy
+        if self._child1 is not None:
+            self._child1.make_and_or_right_deep()
+        if self._child2 is not None:
+            self._child2.make_and_or_right_deep()
+
+
+VARIABLES = [NodeType.A, NodeType.B, NodeType.C, NodeType.D, NodeType.E, NodeType.F, NodeType.G, NodeType.H]
+
+
+def random_clause_conjunction(num_clauses, rng):
+    '''
+        RPN of a balanced conjunction of clauses of the form (x→y)∨¬z, whose CNF stays small
+
+    '''
+    level = []
+    for _ in range(num_clauses):
+        x, y, z = rng.sample(VARIABLES, 3)
+        level.append([x, y, NodeType.IMPLIES, z, NodeType.NOT, NodeType.OR])
+
+    while len(level) > 1:
+        level = [level[i] + level[i + 1] + [NodeType.AND] if i + 1 < len(level) else level[i] for i in range(0, len(level), 2)]
+
+    return level[0]
+
+
+def left_deep_chain(depth, rng):
+    rpn = [rng.choice(VARIABLES)]
+    for _ in range(depth):
+        rpn += [rng.choice(VARIABLES), NodeType.OR]
+    return rpn
+
+
+def time_call(setup, function, repeat = 3):
+    best = None
+    for _ in range(repeat):
+        argument = setup()
+        start = time.perf_counter()
+        function(argument)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def compare(label, rpn, recursive_cnf = True):
+    bindings = [(VARIABLES[0], True), (VARIABLES[1], False)]
+    print("\n%s (%d nodes)" % (label, len(rpn)))
+    print("  %-26s %12s %12s %8s" % ("operation", "recursive", "iterative", "ratio"))
+
+    operations = [
+        ("get_reverse_polish",      lambda tree: tree.get_reverse_polish()),
+        ("in_prefix_notation",      lambda tree: tree.in_prefix_notation()),
+        ("in_infix_notation",       lambda tree: tree.in_infix_notation()),
+        ("apply_variable_bindings", lambda tree: tree.apply_variable_bindings(bindings)),
+        ("reduce_to_CNF",           lambda tree: tree.reduce_to_CNF()),
+    ]
+
+    for name, operation in operations:
+        timings = []
+        for cls in (RecursivePLTreeNode, PLTreeNode):
+            if cls is RecursivePLTreeNode and name == "reduce_to_CNF" and not recursive_cnf:
+                timings.append("skipped")
+                continue
+            try:
+                timings.append(time_call(lambda: cls.build_from_reverse_polish(rpn), operation, 1 if len(rpn) > 10 ** 5 else 3))
+            except RecursionError:
+                timings.append("RecursionError")
+
+        recursive, iterative = timings
+        if isinstance(recursive, str):
+            print("  %-26s %12s %11.4fs %8s" % (name, recursive, iterative, "-"))
+        else:
+            print("  %-26s %11.4fs %11.4fs %7.2fx" % (name, recursive, iterative, recursive / iterative))
+
+
+def main():
+    rng = random.Random(0)
+
+    for num_clauses in (64, 512, 4096):
+        compare("balanced conjunction of %d clauses" % num_clauses, random_clause_conjunction(num_clauses, rng))
+
+    # ----- the recursive push_or_below_and re-walks both children after every
+    # ----- disjunction, which is exponential in the depth of a disjunction chain
+    for depth in (8, 16, 500, 10 ** 4, 10 ** 6):
+        compare("left deep disjunction of depth %d" % depth, left_deep_chain(depth, rng), recursive_cnf = depth <= 16)
+
+
+if __name__ == '__main__':
+    sys.setrecursionlimit(1000)
+    main()
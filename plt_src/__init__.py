@@ -1,2 +1,6 @@
-from .node_type import NodeType
+from .instrumentation import metrics
+from .node_type import NodeType, symbols
+from .binding_index import BindingIndex
 from .pl_tree_node import PLTreeNode
+from .pl_dag_node import PLDagNode, PLDagNodeTable
+from .pl_flat_formula import PLFlatFormula
@@ -0,0 +1,60 @@
+'''
+    Command line entry point: process a file of formulas, one per line, in parallel.
+
+        python -m plt_src formulas.txt --ops simplify,cnf --notation infix -o cnf.txt
+        python -m plt_src formulas.txt --ops evaluate --bind A=1,B=0
+        python -m plt_src formulas.txt --ops solve --workers 8 --memory-limit 2048
+
+    Results are written in input order, one line per formula; formulas that fail give a
+    line starting with "error: ". A throughput report is printed to stderr.
+
+'''
+import argparse
+import sys
+
+from plt_src.batch import OPERATIONS, FORMATS, NOTATIONS, parse_bindings, run_batch
+
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(prog = "python -m plt_src", description = "Batch processing of propositional logic formulas")
+    parser.add_argument("input", nargs = "?", default = "-", help = "input file, one formula per line (default: stdin)")
+    parser.add_argument("-o", "--output", default = "-", help = "output file (default: stdout)")
+    parser.add_argument("--ops", default = "cnf", help = "comma separated operations among %s (default: cnf)" % ", ".join(OPERATIONS))
+    parser.add_argument("--format", default = "text", choices = FORMATS, help = "input format: prefix / infix text or blank separated reverse polish tokens")
+    parser.add_argument("--notation", default = "prefix", choices = NOTATIONS, help = "output notation")
+    parser.add_argument("--bind", default = "", help = "bindings for evaluate, e.g. A=1,B=0")
+    parser.add_argument("--workers", type = int, default = None, help = "worker processes (default: number of CPUs)")
+    parser.add_argument("--chunk-size", type = int, default = 1000, help = "formulas per work unit")
+    parser.add_argument("--max-pending", type = int, default = None, help = "work units in flight (default: 2 per worker)")
+    parser.add_argument("--memory-limit", type = int, default = None, help = "address space limit per worker, in MB")
+    parser.add_argument("--quiet", action = "store_true", help = "no progress or throughput report")
+    args = parser.parse_args(argv)
+
+    operations = [operation.strip() for operation in args.ops.split(",") if operation.strip()]
+
+    source = sys.stdin if args.input == "-" else open(args.input, "r")
+    target = sys.stdout if args.output == "-" else open(args.output, "w")
+
+    try:
+        run_batch(source, target, operations,
+                  progress = None if args.quiet else sys.stderr,
+                  input_format = args.format,
+                  notation = args.notation,
+                  bindings = parse_bindings(args.bind),
+                  workers = args.workers,
+                  chunk_size = args.chunk_size,
+                  max_pending = args.max_pending,
+                  memory_limit = args.memory_limit * 1024 * 1024 if args.memory_limit else None)
+    except ValueError as error:
+        parser.error(str(error))
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if target is not sys.stdout:
+            target.close()
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,344 @@
+'''
+    Multi-process batch processing of formulas, one formula per line.
+
+    Lines are read lazily, grouped into chunks and sent to a pool of worker processes,
+    which parse them and apply a sequence of operations. Results come back in input
+    order. At most max_pending chunks are in flight at any time, so reading the input
+    never runs ahead of the workers (backpressure) and memory use stays bounded however
+    long the input is. Each worker may be given an address space limit: a formula that
+    exceeds it fails with a MemoryError reported on its output line instead of bringing
+    down the machine. A worker that dies all the same (killed, or out of memory outside
+    the interpreter) breaks the pool: a new pool is started and the chunks lost with the
+    old one are run again one at a time, so that only a chunk that kills a worker on its
+    own is reported, with an error on each of its lines.
+
+    Used by the command line entry point:
+
+        python -m plt_src formulas.txt --ops cnf --workers 8 > cnf.txt
+
+'''
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from plt_src import PLTreeNode
+from plt_src.binding_index import BindingIndex
+from plt_src.node_type import variable_named
+from plt_src.parser import parse_reverse_polish, parse_rpn
+
+OPERATIONS = ("simplify", "cnf", "tseitin", "evaluate", "solve")
+FORMATS = ("text", "rpn")
+NOTATIONS = ("prefix", "infix", "rpn")
+
+ERROR_PREFIX = "error: "
+
+# ----- settings of the current worker process, set by _initialize_worker
+_settings = None
+
+
+class BatchReport:
+
+    def __init__(self):
+        '''
+            Throughput counters of a batch run, updated as results are produced
+
+        '''
+        self.formulas = 0
+        self.errors = 0
+        self.chunks = 0
+        self.start = time.perf_counter()
+        self.end = None
+
+    @property
+    def seconds(self):
+        end = time.perf_counter() if self.end is None else self.end
+        return end - self.start
+
+    @property
+    def formulas_per_second(self):
+        seconds = self.seconds
+        return self.formulas / seconds if seconds > 0 else 0.0
+
+    def __str__(self):
+        return "%d formulas (%d errors) in %d chunks, %.2fs: %.0f formulas/s" % (self.formulas, self.errors, self.chunks,
+                                                                               self.seconds, self.formulas_per_second)
+
+
+def parse_bindings(text):
+    '''
+        Parse variable bindings written as "A=1,B=0" (also true / false, T / F)
+
+        @Return: list of (NodeType, bool) pairs
+
+    '''
+    bindings = []
+    for item in text.split(","):
+        if not item.strip():
+            continue
+        name, _, value = item.partition("=")
+        value = value.strip().lower()
+        if value not in ("1", "0", "true", "false", "t", "f"):
+            raise ValueError("Invalid binding %s" % item)
+        bindings.append((variable_named(name.strip()), value in ("1", "true", "t")))
+    return bindings
+
+
+def format_bindings(bindings):
+    return " ".join("%s=%d" % (variable.prefix_name, value) for variable, value in bindings)
+
+
+def process_formula(line, operations, input_format = "text", notation = "prefix", bindings = None):
+    '''
+        Parse one formula and apply operations to it in order
+
+        @Args:
+            line            : The formula
+            operations      : Sequence of names from OPERATIONS:
+                                  simplify  evaluate_constant_subtrees
+                                  cnf       reduce_to_CNF
+                                  tseitin   reduce_to_CNF(mode = "tseitin", polarity_aware = True)
+                                  evaluate  bind the variables in bindings and fold constants
+                                  solve     output "sat" and a model, or "unsat" (must be last)
+            input_format    : "text" (prefix or infix notation) or "rpn" (blank separated tokens)
+            notation        : Output notation: "prefix", "infix" or "rpn"
+            bindings        : BindingIndex (or list of (NodeType, bool) pairs) used by evaluate
+
+        @Return: the resulting formula printed in notation
+
+    '''
+    if input_format == "rpn":
+        pltree = PLTreeNode.build_from_reverse_polish(parse_rpn(line))
+    else:
+        pltree = PLTreeNode.build_from_reverse_polish(parse_reverse_polish(line))
+
+    for operation in operations:
+        if operation == "simplify":
+            pltree.evaluate_constant_subtrees()
+        elif operation == "cnf":
+            pltree.reduce_to_CNF()
+        elif operation == "tseitin":
+            pltree.reduce_to_CNF(mode = "tseitin", polarity_aware = True)
+        elif operation == "evaluate":
+            pltree = pltree.with_variable_bindings(bindings or [])
+        elif operation == "solve":
+            from plt_src.sat_solver import find_model
+            model = find_model(pltree)
+            return "unsat" if model is None else ("sat " + format_bindings(model)).rstrip()
+        else:
+            raise ValueError("Unknown operation %s" % operation)
+
+    if notation == "infix":
+        return pltree.in_infix_notation()
+    elif notation == "rpn":
+        return " ".join(nodetype.prefix_name for nodetype in pltree.get_reverse_polish())
+    return pltree.in_prefix_notation()
+
+
+def process_chunk(lines, settings):
+    '''
+        Process a chunk of lines with process_formula
+
+        @Args: settings : (operations, input_format, notation, bindings)
+
+        @Return: (list of output lines, number of errors). A formula that fails, whatever
+                 the exception, gives an output line starting with ERROR_PREFIX
+
+    '''
+    operations, input_format, notation, bindings = settings
+    results = []
+    errors = 0
+
+    for line in lines:
+        try:
+            results.append(process_formula(line, operations, input_format, notation, bindings))
+        except Exception as error:
+            # ----- near an address space limit even the interpreter fails, e.g. with SystemError
+            results.append(_error_line(error))
+            errors += 1
+
+    return results, errors
+
+
+def _error_line(error):
+    return "%s%s: %s" % (ERROR_PREFIX, error.__class__.__name__, str(error).splitlines()[0] if str(error) else "")
+
+
+def _resolve_settings(settings):
+    # ----- bindings travel as (name, bool) pairs: var_ids are numbered per process
+    operations, input_format, notation, bindings = settings
+    return operations, input_format, notation, BindingIndex([(variable_named(name), value) for name, value in bindings])
+
+
+def _initialize_worker(settings, memory_limit):
+    global _settings
+    _settings = _resolve_settings(settings)
+
+    if memory_limit:
+        import resource
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+
+
+def _process_chunk_in_worker(lines):
+    return process_chunk(lines, _settings)
+
+
+def _submit(pool, chunk):
+    try:
+        return pool.submit(_process_chunk_in_worker, chunk)
+    except BrokenProcessPool as error:
+        future = Future()
+        future.set_exception(error)
+        return future
+
+
+def _chunks(lines, chunk_size):
+    chunk = []
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        chunk.append(line)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def process_batch(lines, operations, input_format = "text", notation = "prefix", bindings = None,
+                  workers = None, chunk_size = 1000, max_pending = None, memory_limit = None, report = None,
+                  mp_context = None):
+    '''
+        Process formulas in parallel, yielding one result line per formula in input order.
+        Blank lines are skipped.
+
+        @Args:
+            lines           : Iterable of formulas, one per line, such as an open file. It is
+                              consumed lazily
+            operations, input_format, notation, bindings
+                            : As in process_formula
+            workers         : Number of worker processes, os.cpu_count() by default. With 1
+                              everything runs in the current process
+            chunk_size      : Number of formulas sent to a worker at a time
+            max_pending     : Maximum number of chunks submitted but not yet written out,
+                              2 * workers by default
+            memory_limit    : Optional address space limit of each worker, in bytes (Unix only)
+            report          : Optional BatchReport to update
+            mp_context      : Optional multiprocessing context of the pool, such as
+                              multiprocessing.get_context("spawn")
+
+    '''
+    for operation in operations:
+        if operation not in OPERATIONS:
+            raise ValueError("Unknown operation %s" % operation)
+    if "solve" in operations[:-1]:
+        raise ValueError("solve must be the last operation")
+    if input_format not in FORMATS:
+        raise ValueError("Unknown input format %s" % input_format)
+    if notation not in NOTATIONS:
+        raise ValueError("Unknown notation %s" % notation)
+
+    bindings = [(variable.prefix_name, value) for variable, value in BindingIndex.of(bindings or [])]
+    settings = (tuple(operations), input_format, notation, bindings)
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or 2 * workers
+    report = BatchReport() if report is None else report
+
+    if workers == 1:
+        settings = _resolve_settings(settings)
+        for chunk in _chunks(lines, chunk_size):
+            results, errors = process_chunk(chunk, settings)
+            report.chunks += 1
+            report.errors += errors
+            for result in results:
+                report.formulas += 1
+                yield result
+        report.end = time.perf_counter()
+        return
+
+    def start():
+        return ProcessPoolExecutor(workers, mp_context = mp_context, initializer = _initialize_worker,
+                                   initargs = (settings, memory_limit))
+
+    pool = start()
+    try:
+        # ----- (chunk, future, alone): chunks lost with a broken pool are retried alone
+        pending = deque()
+        retry = deque()
+        chunks = _chunks(lines, chunk_size)
+
+        while True:
+            # ----- only read more input while fewer than max_pending chunks are in flight
+            while len(pending) < (1 if retry or (pending and pending[0][2]) else max_pending):
+                alone = bool(retry)
+                chunk = retry.popleft() if alone else next(chunks, None)
+                if chunk is None:
+                    break
+                pending.append((chunk, _submit(pool, chunk), alone))
+
+            if not pending:
+                break
+
+            chunk, future, alone = pending.popleft()
+            try:
+                results, errors = future.result()
+            except BrokenProcessPool as error:
+                pool.shutdown()
+                pool = start()
+                if not alone:
+                    retry.extend([chunk] + [entry[0] for entry in pending])
+                    pending.clear()
+                    continue
+                results, errors = [_error_line(error)] * len(chunk), len(chunk)
+
+            report.chunks += 1
+            report.errors += errors
+            for result in results:
+                report.formulas += 1
+                yield result
+    finally:
+        pool.shutdown()
+
+    report.end = time.perf_counter()
+
+
+def run_batch(lines, output, operations, progress = None, **options):
+    '''
+        Process formulas with process_batch and write the results, one per line, to output
+
+        @Args:
+            lines       : Iterable of formulas, one per line
+            output      : Text file object to write to
+            operations  : As in process_formula
+            progress    : Optional text file object (e.g. sys.stderr) receiving a throughput
+                          line after every chunk
+            options     : Keyword arguments of process_batch
+
+        @Return: the BatchReport of the run
+
+    '''
+    report = options.pop("report", None) or BatchReport()
+    chunks = report.chunks
+    buffer = []
+
+    for result in process_batch(lines, operations, report = report, **options):
+        # ----- write out each chunk once the next one starts
+        if report.chunks != chunks and buffer:
+            output.write("\n".join(buffer) + "\n")
+            buffer = []
+            if progress is not None:
+                progress.write("\r%s" % report)
+                progress.flush()
+        chunks = report.chunks
+        buffer.append(result)
+
+    if buffer:
+        output.write("\n".join(buffer) + "\n")
+    output.flush()
+
+    if progress is not None:
+        progress.write("\r%s\n" % report)
+
+    return report
@@ -0,0 +1,77 @@
+'''
+    Vectorised evaluation of one formula under many variable assignments at once.
+
+    Requires NumPy, which is an optional dependency of this package.
+
+'''
+import numpy as np
+
+from plt_src.pl_flat_formula import PLFlatFormula, OP_IMPLIES, OP_AND, OP_OR, OP_NOT, OP_TRUE, OP_FALSE, OP_VAR
+
+
+def evaluate_batch(formula, assignments, variables = None):
+    '''
+        Evaluate a formula under every row of a boolean matrix of assignments.
+
+        Every node of the formula is evaluated once for the whole batch with NumPy
+        boolean operations: there is no loop over the rows and the formula is not modified.
+
+        @Args:
+            formula         : A PLTreeNode, PLDagNode or PLFlatFormula
+            assignments     : 2-D array-like of booleans, one row per assignment and one
+                              column per variable
+            variables       : List of the variable NodeTypes, in column order. Defaults to
+                              the variables of the formula in order of first appearance
+
+        @Return: 1-D numpy boolean array with the value of the formula for each row
+
+    '''
+    if not isinstance(formula, PLFlatFormula):
+        formula = PLFlatFormula.from_tree(formula)
+
+    assignments = np.asarray(assignments, dtype = bool)
+    if assignments.ndim != 2:
+        raise ValueError("assignments must be a 2-D matrix, got %d dimension(s)"%assignments.ndim)
+
+    if variables is None:
+        variables = formula.variables
+    if len(variables) != assignments.shape[1]:
+        raise ValueError("%d variables given for %d columns"%(len(variables), assignments.shape[1]))
+
+    column_of = {variable: column for column, variable in enumerate(variables)}
+    columns = []
+    for variable in formula.variables:
+        if variable not in column_of:
+            raise ValueError("No column given for variable %s"%variable)
+        columns.append(assignments[:, column_of[variable]])
+
+    child1 = formula.child1
+    child2 = formula.child2
+    values = [None] * len(formula)
+
+    for i, opcode in enumerate(formula.opcodes):
+        if opcode == OP_VAR:
+            values[i] = columns[child1[i]]
+        elif opcode == OP_TRUE:
+            values[i] = np.True_
+        elif opcode == OP_FALSE:
+            values[i] = np.False_
+        elif opcode == OP_NOT:
+            values[i] = np.logical_not(values[child1[i]])
+        else:
+            first = values[child1[i]]
+            second = values[child2[i]]
+            if opcode == OP_AND:
+                values[i] = np.logical_and(first, second)
+            elif opcode == OP_OR:
+                values[i] = np.logical_or(first, second)
+            elif opcode == OP_IMPLIES:
+                values[i] = np.logical_or(np.logical_not(first), second)
+
+        # ----- each node has a single parent: release the children's vectors
+        if opcode < OP_TRUE:
+            values[child1[i]] = None
+            if opcode != OP_NOT:
+                values[child2[i]] = None
+
+    return np.broadcast_to(values[-1], (assignments.shape[0],)).copy()
@@ -0,0 +1,756 @@
+'''
+    Reduced ordered binary decision diagrams (ROBDD).
+
+    A BDDManager stores every BDD node once, in a unique table per variable, so two
+    formulas are equivalent exactly when their BDDs are the same node: once built,
+    equivalence is an O(1) comparison. All operations go through if-then-else (ITE),
+    whose results are kept in a computed table with bounded LRU eviction.
+
+        manager = BDDManager()
+        f = manager.from_tree(PLTreeNode.build_from_text("A -> B"))
+        g = manager.from_tree(PLTreeNode.build_from_text("~A | B"))
+        f == g                                      True
+        f.restrict([(NodeType.A, True)]).value      None (the value of B)
+        f.sat_count()                               3
+
+    Nodes are integers indexing parallel lists (variable, low child, high child, reference
+    count); 0 and 1 are the terminals ⊥ and ⊤. Nodes carry their variable, not their level,
+    so the variable order can change in place, by swapping adjacent levels, without
+    invalidating any BDD: reorder() sets an order and sift() searches a smaller one with
+    Rudell's sifting. static_order() computes a starting order from the formula.
+
+    BDD objects are the external references to nodes. collect_garbage() frees the nodes
+    no longer reachable from a live BDD object.
+
+    All operations use explicit stacks, so the number of variables is not limited by the
+    Python recursion limit.
+
+'''
+from collections import OrderedDict
+
+from plt_src import NodeType
+from plt_src.binding_index import BindingIndex
+from plt_src.traversal import post_order
+
+FALSE = 0
+TRUE = 1
+
+DEFAULT_CACHE_SIZE = 1 << 16
+
+# ----- level of the terminals, below every variable
+_TERMINAL_LEVEL = 1 << 30
+
+HEURISTICS = ("dfs", "frequency")
+
+
+class BDD:
+
+    __slots__ = ('manager', 'node')
+
+    def __init__(self, manager, node):
+        '''
+            An external reference to a node of a BDDManager, keeping it alive through garbage
+            collection. Create them with the manager's methods rather than directly
+
+        '''
+        self.manager = manager
+        self.node = node
+        manager._external[node] = manager._external.get(node, 0) + 1
+
+    def __del__(self):
+        external = self.manager._external
+        count = external.get(self.node, 0) - 1
+        if count > 0:
+            external[self.node] = count
+        else:
+            external.pop(self.node, None)
+
+    def _other(self, other):
+        if isinstance(other, bool):
+            return TRUE if other else FALSE
+        if other.manager is not self.manager:
+            raise ValueError("BDDs of different managers")
+        return other.node
+
+    def __and__(self, other):
+        return self.manager._wrap(self.manager._ite(self.node, self._other(other), FALSE))
+
+    def __or__(self, other):
+        return self.manager._wrap(self.manager._ite(self.node, TRUE, self._other(other)))
+
+    def __invert__(self):
+        return self.manager._wrap(self.manager._ite(self.node, FALSE, TRUE))
+
+    def __xor__(self, other):
+        manager = self.manager
+        other = self._other(other)
+        return manager._wrap(manager._ite(self.node, manager._ite(other, FALSE, TRUE), other))
+
+    def implies(self, other):
+        return self.manager._wrap(self.manager._ite(self.node, self._other(other), TRUE))
+
+    def ite(self, then_bdd, else_bdd):
+        '''
+            Return the BDD of "if self then then_bdd else else_bdd"
+
+        '''
+        return self.manager._wrap(self.manager._ite(self.node, self._other(then_bdd), self._other(else_bdd)))
+
+    def __eq__(self, other):
+        return isinstance(other, BDD) and other.manager is self.manager and other.node == self.node
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((id(self.manager), self.node))
+
+    @property
+    def value(self):
+        '''
+            True or False for a constant BDD, None otherwise
+
+        '''
+        return True if self.node == TRUE else (False if self.node == FALSE else None)
+
+    def restrict(self, val_bindings_map):
+        '''
+            Condition the BDD on a set of variable bindings (the BDD counterpart of
+            apply_variable_bindings followed by evaluate_constant_subtrees)
+
+            @Args: val_bindings_map : A BindingIndex, dict, or list of (NodeType, bool) pairs.
+                                      Variables unknown to the manager are ignored
+
+            @Return: the BDD of the formula with the bound variables replaced by their values
+
+        '''
+        return self.manager._wrap(self.manager._restrict(self.node, val_bindings_map))
+
+    def sat_count(self, variables = None):
+        '''
+            Count the models of the BDD
+
+            @Args: variables    : The variables to count assignments of, which must include
+                                  every variable the BDD depends on. All the variables of
+                                  the manager by default
+
+            @Return: the number of satisfying assignments
+
+        '''
+        return self.manager._sat_count(self.node, variables)
+
+    def support(self):
+        '''
+            Return the variables the BDD depends on, in the current variable order
+
+        '''
+        manager = self.manager
+        variables = set(manager._var[node] for node in manager._reachable(self.node) if node > TRUE)
+        return [manager._variables[var] for var in manager._var_at_level if var in variables]
+
+    def node_count(self):
+        '''
+            Return the number of nodes of the BDD, terminals included
+
+        '''
+        return len(self.manager._reachable(self.node))
+
+    def __repr__(self):
+        return "BDD(node %d, %d nodes)" % (self.node, self.node_count())
+
+
+class BDDManager:
+
+    def __init__(self, variables = None, cache_size = DEFAULT_CACHE_SIZE):
+        '''
+            Create a manager holding the unique table and the computed table
+
+            @Args:
+                variables   : Optional list of variable NodeTypes giving the initial order,
+                              first at the top. Other variables are added below them as
+                              they are met
+                cache_size  : Maximum number of entries of the computed table
+
+        '''
+        # ----- terminals have variable -1: _level_of ends with the terminal level, so
+        # ----- _level_of[-1] is the level of a terminal
+        self._var = [-1, -1]
+        self._low = [FALSE, TRUE]
+        self._high = [FALSE, TRUE]
+        self._refs = [0, 0]
+        self._free = []
+        self._external = {}
+
+        self._variables = []
+        self._var_of = {}
+        self._level_of = [_TERMINAL_LEVEL]
+        self._var_at_level = []
+        self._unique = []
+        self._num_nodes = 0
+
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+        self.stats = {"cache_hits": 0, "cache_misses": 0, "garbage_collections": 0, "nodes_freed": 0, "swaps": 0}
+
+        for variable in variables or ():
+            self.add_variable(variable)
+
+    # ----- variables and order
+
+    def add_variable(self, variable):
+        '''
+            Add a variable NodeType at the bottom of the order, if it is new
+
+            @Return: the index of the variable in the manager
+
+        '''
+        var = self._var_of.get(variable)
+        if var is not None:
+            return var
+        if not variable.is_var():
+            raise ValueError("%s is not a variable" % variable)
+
+        var = len(self._variables)
+        self._variables.append(variable)
+        self._var_of[variable] = var
+        self._level_of.insert(var, len(self._var_at_level))
+        self._var_at_level.append(var)
+        self._unique.append({})
+        return var
+
+    def variable(self, variable):
+        '''
+            Return the BDD of a single variable
+
+        '''
+        return self._wrap(self._make(self.add_variable(variable), FALSE, TRUE))
+
+    @property
+    def true(self):
+        return self._wrap(TRUE)
+
+    @property
+    def false(self):
+        return self._wrap(FALSE)
+
+    @property
+    def order(self):
+        '''
+            The variables from the top level to the bottom one
+
+        '''
+        return [self._variables[var] for var in self._var_at_level]
+
+    @property
+    def num_variables(self):
+        return len(self._variables)
+
+    @property
+    def num_nodes(self):
+        '''
+            Number of nodes in the unique table, terminals excluded, including dead nodes
+            not collected yet
+
+        '''
+        return self._num_nodes
+
+    # ----- building
+
+    def from_tree(self, formula):
+        '''
+            Build the BDD of a formula
+
+            @Args: formula  : A PLTreeNode, or a PLDagNode whose shared sub-formulas are
+                              built only once
+
+        '''
+        from plt_src.pl_dag_node import PLDagNode
+
+        ite = self._ite
+        results = []
+        push = results.append
+        pop = results.pop
+
+        if isinstance(formula, PLDagNode):
+            built = {}
+            for node in post_order(formula, distinct = True):
+                nodetype = node._type
+                if nodetype.arity == 0:
+                    result = self._leaf(nodetype)
+                elif nodetype is NodeType.NOT:
+                    result = ite(built[node._child1], FALSE, TRUE)
+                else:
+                    result = self._apply(nodetype, built[node._child1], built[node._child2])
+                built[node] = result
+            return self._wrap(built[formula])
+
+        for node in post_order(formula):
+            nodetype = node._type
+            if nodetype.arity == 0:
+                push(self._leaf(nodetype))
+            elif nodetype is NodeType.NOT:
+                push(ite(pop(), FALSE, TRUE))
+            else:
+                second = pop()
+                push(self._apply(nodetype, pop(), second))
+        return self._wrap(pop())
+
+    def equivalent(self, formula1, formula2):
+        '''
+            Return True if two formulas (trees or BDDs of this manager) are equivalent
+
+        '''
+        bdd1 = formula1 if isinstance(formula1, BDD) else self.from_tree(formula1)
+        bdd2 = formula2 if isinstance(formula2, BDD) else self.from_tree(formula2)
+        return bdd1 == bdd2
+
+    def ite(self, f, g, h):
+        '''
+            Return the BDD of "if f then g else h"
+
+        '''
+        return self._wrap(self._ite(f.node, g.node, h.node))
+
+    def _leaf(self, nodetype):
+        if nodetype is NodeType.TRUE:
+            return TRUE
+        if nodetype is NodeType.FALSE:
+            return FALSE
+        return self._make(self.add_variable(nodetype), FALSE, TRUE)
+
+    def _apply(self, nodetype, f, g):
+        if nodetype is NodeType.AND:
+            return self._ite(f, g, FALSE)
+        if nodetype is NodeType.OR:
+            return self._ite(f, TRUE, g)
+        if nodetype is NodeType.IMPLIES:
+            return self._ite(f, g, TRUE)
+        raise ValueError("Invalid NodeType %s" % nodetype)
+
+    def _wrap(self, node):
+        return BDD(self, node)
+
+    def _make(self, var, low, high):
+        '''
+            Return the unique node (var, low, high), creating it if needed
+
+        '''
+        if low == high:
+            return low
+        table = self._unique[var]
+        key = (low, high)
+        node = table.get(key)
+        if node is not None:
+            return node
+
+        if self._free:
+            node = self._free.pop()
+            self._var[node] = var
+            self._low[node] = low
+            self._high[node] = high
+            self._refs[node] = 0
+        else:
+            node = len(self._var)
+            self._var.append(var)
+            self._low.append(low)
+            self._high.append(high)
+            self._refs.append(0)
+
+        self._refs[low] += 1
+        self._refs[high] += 1
+        table[key] = node
+        self._num_nodes += 1
+        return node
+
+    def _ite(self, f, g, h):
+        var_of = self._var
+        low_of = self._low
+        high_of = self._high
+        level_of = self._level_of
+        var_at_level = self._var_at_level
+        cache = self._cache
+        cache_size = self._cache_size
+        make = self._make
+        stats = self.stats
+
+        results = []
+        push = results.append
+        stack = [(f, g, h)]
+
+        # ----- a 3-tuple is a call; a 2-tuple (call, var) builds its node once both
+        # ----- cofactors are on the results stack
+        while stack:
+            item = stack.pop()
+
+            if len(item) == 2:
+                key, var = item
+                high = results.pop()
+                node = make(var, results.pop(), high)
+                cache[key] = node
+                if len(cache) > cache_size:
+                    cache.popitem(last = False)
+                push(node)
+                continue
+
+            f, g, h = item
+            if f == TRUE or g == h:
+                push(g)
+                continue
+            if f == FALSE:
+                push(h)
+                continue
+            if g == TRUE and h == FALSE:
+                push(f)
+                continue
+
+            node = cache.get(item)
+            if node is not None:
+                cache.move_to_end(item)
+                stats["cache_hits"] += 1
+                push(node)
+                continue
+            stats["cache_misses"] += 1
+
+            var = var_at_level[min(level_of[var_of[f]], level_of[var_of[g]], level_of[var_of[h]])]
+            if var_of[f] == var:
+                f0, f1 = low_of[f], high_of[f]
+            else:
+                f0 = f1 = f
+            if var_of[g] == var:
+                g0, g1 = low_of[g], high_of[g]
+            else:
+                g0 = g1 = g
+            if var_of[h] == var:
+                h0, h1 = low_of[h], high_of[h]
+            else:
+                h0 = h1 = h
+
+            stack.append((item, var))
+            stack.append((f1, g1, h1))
+            stack.append((f0, g0, h0))
+
+        return results.pop()
+
+    # ----- queries
+
+    def _restrict(self, root, val_bindings_map):
+        index = BindingIndex.of(val_bindings_map)
+        values = {}
+        for var, variable in enumerate(self._variables):
+            value = index.get(variable)
+            if value is not None:
+                values[var] = value
+
+        var_of = self._var
+        low_of = self._low
+        high_of = self._high
+        done = {}
+        stack = [root]
+
+        while stack:
+            node = stack[-1]
+            if node <= TRUE:
+                done[node] = node
+                stack.pop()
+                continue
+
+            var = var_of[node]
+            value = values.get(var)
+            if value is not None:
+                child = high_of[node] if value else low_of[node]
+                if child in done:
+                    done[node] = done[child]
+                    stack.pop()
+                else:
+                    stack.append(child)
+                continue
+
+            low = low_of[node]
+            high = high_of[node]
+            if low not in done:
+                stack.append(low)
+            elif high not in done:
+                stack.append(high)
+            else:
+                done[node] = self._ite(self._make(var, FALSE, TRUE), done[high], done[low])
+                stack.pop()
+
+        return done[root]
+
+    def _sat_count(self, root, variables = None):
+        num_variables = len(self._variables)
+        level_of = self._level_of
+        var_of = self._var
+
+        def level(node):
+            return num_variables if node <= TRUE else level_of[var_of[node]]
+
+        counts = {FALSE: 0, TRUE: 1}
+        for node in self._post_order(root):
+            if node <= TRUE:
+                continue
+            node_level = level(node)
+            low = self._low[node]
+            high = self._high[node]
+            counts[node] = (counts[low] << (level(low) - node_level - 1)) + (counts[high] << (level(high) - node_level - 1))
+
+        total = counts[root] << level(root)
+        if variables is None:
+            return total
+
+        variables = set(variables)
+        support = set(self._var[node] for node in counts if node > TRUE)
+        for var in support:
+            if self._variables[var] not in variables:
+                raise ValueError("%s is not among the variables to count" % self._variables[var])
+        missing = num_variables - sum(1 for variable in variables if variable in self._var_of)
+        return (total >> missing) << sum(1 for variable in variables if variable not in self._var_of)
+
+    def _post_order(self, root):
+        '''
+            Yield the nodes reachable from root, each one after its children
+
+        '''
+        seen = set()
+        stack = [(root, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if expanded:
+                yield node
+                continue
+            if node in seen:
+                continue
+            seen.add(node)
+            stack.append((node, True))
+            if node > TRUE:
+                stack.append((self._high[node], False))
+                stack.append((self._low[node], False))
+
+    def _reachable(self, root):
+        seen = {root}
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            if node > TRUE:
+                for child in (self._low[node], self._high[node]):
+                    if child not in seen:
+                        seen.add(child)
+                        stack.append(child)
+        return seen
+
+    # ----- garbage collection
+
+    def collect_garbage(self):
+        '''
+            Free the nodes not reachable from a live BDD object, and clear the computed table
+
+            @Return: the number of nodes freed
+
+        '''
+        marked = set()
+        for root in self._external:
+            if root not in marked:
+                marked |= self._reachable(root)
+
+        refs = self._refs
+        freed = 0
+        for table in self._unique:
+            for key, node in list(table.items()):
+                if node not in marked:
+                    del table[key]
+                    self._var[node] = -1
+                    self._free.append(node)
+                    freed += 1
+
+        # ----- recount the references from the surviving nodes
+        for node in range(len(refs)):
+            refs[node] = 0
+        for node in marked:
+            if node > TRUE:
+                refs[self._low[node]] += 1
+                refs[self._high[node]] += 1
+
+        self._num_nodes -= freed
+        self._cache.clear()
+        self.stats["garbage_collections"] += 1
+        self.stats["nodes_freed"] += freed
+        return freed
+
+    def _dereference(self, node):
+        '''
+            Drop one internal reference to node, freeing it, and in turn its children, once
+            nothing refers to it. Only used while reordering, after a garbage collection
+
+        '''
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            self._refs[node] -= 1
+            if node <= TRUE or self._refs[node] > 0 or node in self._external:
+                continue
+            low = self._low[node]
+            high = self._high[node]
+            del self._unique[self._var[node]][(low, high)]
+            self._var[node] = -1
+            self._free.append(node)
+            self._num_nodes -= 1
+            stack.append(low)
+            stack.append(high)
+
+    # ----- reordering
+
+    def _swap(self, level):
+        '''
+            Exchange the variables at level and level + 1, rewriting the nodes of the upper
+            variable in place so that every node keeps its function
+
+        '''
+        x = self._var_at_level[level]
+        y = self._var_at_level[level + 1]
+        var_of = self._var
+        low_of = self._low
+        high_of = self._high
+        refs = self._refs
+
+        nodes = self._unique[x]
+        kept = {}
+        moved = []
+        for key, node in nodes.items():
+            if var_of[key[0]] == y or var_of[key[1]] == y:
+                moved.append(node)
+            else:
+                kept[key] = node
+        self._unique[x] = kept
+
+        self._var_at_level[level] = y
+        self._var_at_level[level + 1] = x
+        self._level_of[x] = level + 1
+        self._level_of[y] = level
+
+        y_table = self._unique[y]
+        for node in moved:
+            f0 = low_of[node]
+            f1 = high_of[node]
+            if var_of[f1] == y:
+                f10, f11 = low_of[f1], high_of[f1]
+            else:
+                f10 = f11 = f1
+            if var_of[f0] == y:
+                f00, f01 = low_of[f0], high_of[f0]
+            else:
+                f00 = f01 = f0
+
+            # ----- node = x ? (y ? f11 : f10) : (y ? f01 : f00) = y ? (x ? f11 : f01) : (x ? f10 : f00)
+            low = self._make(x, f00, f10)
+            high = self._make(x, f01, f11)
+            refs[low] += 1
+            refs[high] += 1
+
+            var_of[node] = y
+            low_of[node] = low
+            high_of[node] = high
+            y_table[(low, high)] = node
+
+            self._dereference(f0)
+            self._dereference(f1)
+
+        self.stats["swaps"] += 1
+
+    def _prepare_reordering(self):
+        self.collect_garbage()
+        # ----- external references count as references, so that _dereference keeps them
+        for node in self._external:
+            self._refs[node] += 1
+
+    def _finish_reordering(self):
+        for node in self._external:
+            self._refs[node] -= 1
+        self._cache.clear()
+
+    def reorder(self, order):
+        '''
+            Change the variable order in place. Every BDD keeps its function
+
+            @Args: order    : List of variable NodeTypes, top first. Variables of the manager
+                              missing from it keep their relative order below them
+
+        '''
+        target = [self.add_variable(variable) for variable in order]
+        listed = set(target)
+        target += [var for var in self._var_at_level if var not in listed]
+
+        self._prepare_reordering()
+        for level, var in enumerate(target):
+            # ----- bubble var up to its level
+            for current in range(self._level_of[var] - 1, level - 1, -1):
+                self._swap(current)
+        self._finish_reordering()
+
+    def sift(self, max_growth = 1.2):
+        '''
+            Reduce the number of nodes by Rudell's sifting: each variable in turn, largest
+            first, is moved through all levels and left where the diagram was smallest
+
+            @Args: max_growth   : A variable stops moving in a direction once the diagram
+                                  grows beyond max_growth times its best size so far
+
+            @Return: the number of nodes after sifting
+
+        '''
+        self._prepare_reordering()
+        num_levels = len(self._var_at_level)
+
+        by_size = sorted(range(len(self._variables)), key = lambda var: -len(self._unique[var]))
+        for var in by_size:
+            best_size = self._num_nodes
+            best_level = self._level_of[var]
+
+            # ----- down to the bottom, then up to the top
+            while self._level_of[var] < num_levels - 1 and self._num_nodes <= max_growth * best_size:
+                self._swap(self._level_of[var])
+                if self._num_nodes < best_size:
+                    best_size, best_level = self._num_nodes, self._level_of[var]
+
+            while self._level_of[var] > 0 and self._num_nodes <= max_growth * best_size:
+                self._swap(self._level_of[var] - 1)
+                if self._num_nodes < best_size:
+                    best_size, best_level = self._num_nodes, self._level_of[var]
+
+            while self._level_of[var] < best_level:
+                self._swap(self._level_of[var])
+            while self._level_of[var] > best_level:
+                self._swap(self._level_of[var] - 1)
+
+        self._finish_reordering()
+        return self._num_nodes
+
+    def __repr__(self):
+        return "BDDManager(%d variables, %d nodes)" % (len(self._variables), self._num_nodes)
+
+
+def static_order(formula, heuristic = "dfs"):
+    '''
+        Compute a variable order for a formula, to pass to BDDManager or reorder()
+
+        @Args:
+            formula     : A PLTreeNode (or PLDagNode)
+            heuristic   : "dfs", the order in which a depth first traversal meets the
+                          variables, which keeps variables of the same sub-formula close;
+                          or "frequency", the most frequent variables first (ties in dfs order)
+
+        @Return: list of variable NodeTypes, top first
+
+    '''
+    if heuristic not in HEURISTICS:
+        raise ValueError("Unknown ordering heuristic %s" % heuristic)
+
+    counts = {}
+    for node in post_order(formula):
+        nodetype = node._type
+        if nodetype.is_var():
+            counts[nodetype] = counts.get(nodetype, 0) + 1
+
+    order = list(counts)
+    if heuristic == "frequency":
+        order.sort(key = lambda variable: -counts[variable])
+    return order
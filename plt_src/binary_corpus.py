@@ -0,0 +1,301 @@
+'''
+    Compact binary corpora of formulas, loaded lazily through mmap.
+
+    A corpus is two files. The data file holds every formula in reverse polish order, one
+    byte per node: the NodeType opcode (OP_IMPLIES ... OP_VAR, see node_type.py), an OP_VAR
+    byte being followed by the index of the variable as an unsigned LEB128 varint (one byte
+    for the first 128 variables of the corpus):
+
+        data    b"PLCDATA1" | formula 0 | formula 1 | ...
+
+    The index file (data path + ".idx") holds the offsets of the formulas and the names of
+    the corpus variables, so that variable indices do not depend on the process symbol
+    table:
+
+        index   b"PLCINDX1" | num_formulas (q) | num_variables (q) | names_bytes (q)
+                | num_formulas + 1 offsets (q) | names, UTF-8, newline separated
+
+    Corpus maps both files read only. Opening costs O(1) (plus reading the variable
+    names), corpus[i] decodes formula i alone, and processes mapping the same files share
+    their pages through the OS page cache instead of each holding a copy. A Corpus pickles
+    as its path, so it can be handed to pool workers cheaply:
+
+        write_corpus("formulas.plc", parse_lines("formulas.txt"))
+        corpus = Corpus("formulas.plc")
+        corpus[123456].reduce_to_CNF()
+
+    Integers are stored in native byte order: corpora are meant to be read on the machine
+    family that wrote them.
+
+'''
+import mmap
+import struct
+
+from plt_src.node_type import OP_VAR, variable_named
+from plt_src.pl_flat_formula import OPCODE_TYPES
+
+DATA_MAGIC = b"PLCDATA1"
+INDEX_MAGIC = b"PLCINDX1"
+
+_HEADER = struct.Struct("=8sqqq")
+_OFFSET = struct.Struct("=q")
+
+
+def index_path(path):
+    return path + ".idx"
+
+
+def encode(list_of_nodetypes, variable_index, output = None):
+    '''
+        Encode a formula given in reverse polish notation
+
+        @Args:
+            list_of_nodetypes   : List of NodeType objects in reverse polish notation
+            variable_index      : Dict mapping variables to their corpus indices. New
+                                  variables are added to it
+            output              : Optional bytearray to append to
+
+        @Return: the bytearray
+
+    '''
+    output = bytearray() if output is None else output
+    append = output.append
+
+    for nodetype in list_of_nodetypes:
+        opcode = nodetype.opcode
+        append(opcode)
+        if opcode == OP_VAR:
+            index = variable_index.get(nodetype)
+            if index is None:
+                index = variable_index[nodetype] = len(variable_index)
+            while index >= 0x80:
+                append((index & 0x7f) | 0x80)
+                index >>= 7
+            append(index)
+
+    return output
+
+
+def decode(buffer, start, end, variables):
+    '''
+        Decode the formula stored in buffer[start:end]
+
+        @Args: variables    : Indexable mapping corpus variable indices to NodeTypes
+
+        @Return: list of NodeType objects in reverse polish notation
+
+    '''
+    output = []
+    append = output.append
+    types = OPCODE_TYPES
+    position = start
+
+    while position < end:
+        opcode = buffer[position]
+        position += 1
+        if opcode != OP_VAR:
+            append(types[opcode])
+            continue
+
+        index = 0
+        shift = 0
+        byte = buffer[position]
+        position += 1
+        while byte & 0x80:
+            index |= (byte & 0x7f) << shift
+            shift += 7
+            byte = buffer[position]
+            position += 1
+        append(variables[index | (byte << shift)])
+
+    return output
+
+
+class CorpusWriter:
+
+    def __init__(self, path):
+        '''
+            Create (or overwrite) a corpus. Formulas are appended with add() and the index
+            is written by close()
+
+        '''
+        self.path = path
+        self._file = open(path, "wb")
+        self._file.write(DATA_MAGIC)
+        self._offsets = [len(DATA_MAGIC)]
+        self._variable_index = {}
+        self._buffer = bytearray()
+
+    def add(self, formula):
+        '''
+            Append a formula: a PLTreeNode, PLDagNode or PLFlatFormula, or a list of NodeType
+            objects in reverse polish notation
+
+            @Return: the index of the formula in the corpus
+
+        '''
+        typeList = formula if isinstance(formula, list) else formula.get_reverse_polish()
+        if not typeList:
+            raise ValueError("NodeType list empty")
+
+        buffer = self._buffer
+        encode(typeList, self._variable_index, buffer)
+        self._offsets.append(self._offsets[-1] + len(buffer))
+        self._file.write(buffer)
+        del buffer[:]
+        return len(self._offsets) - 2
+
+    def add_all(self, formulas):
+        for formula in formulas:
+            self.add(formula)
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def close(self):
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+
+        names = sorted(self._variable_index, key = self._variable_index.get)
+        names = "\n".join(variable.prefix_name for variable in names).encode("utf-8")
+        with open(index_path(self.path), "wb") as index:
+            index.write(_HEADER.pack(INDEX_MAGIC, len(self._offsets) - 1, len(self._variable_index), len(names)))
+            index.write(struct.pack("=%dq" % len(self._offsets), *self._offsets))
+            index.write(names)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def write_corpus(path, formulas):
+    '''
+        Write a corpus from an iterable of formulas (see CorpusWriter.add), such as the trees
+        yielded by parser.parse_lines
+
+        @Return: the number of formulas written
+
+    '''
+    with CorpusWriter(path) as writer:
+        writer.add_all(formulas)
+        return len(writer)
+
+
+class Corpus:
+
+    def __init__(self, path):
+        '''
+            Map a corpus written by CorpusWriter, read only
+
+        '''
+        self.path = path
+        with open(path, "rb") as data_file:
+            self._data = mmap.mmap(data_file.fileno(), 0, access = mmap.ACCESS_READ)
+        with open(index_path(path), "rb") as index_file:
+            self._index = mmap.mmap(index_file.fileno(), 0, access = mmap.ACCESS_READ)
+
+        if self._data[:len(DATA_MAGIC)] != DATA_MAGIC:
+            raise ValueError("%s is not a formula corpus" % path)
+        magic, self._count, num_variables, names_bytes = _HEADER.unpack_from(self._index, 0)
+        if magic != INDEX_MAGIC:
+            raise ValueError("%s is not a formula corpus index" % index_path(path))
+
+        names_start = _HEADER.size + (self._count + 1) * _OFFSET.size
+        names = self._index[names_start:names_start + names_bytes].decode("utf-8")
+        self._names = names.split("\n") if num_variables else []
+        self._variables = _Variables(self._names)
+
+    def __len__(self):
+        return self._count
+
+    def _span(self, index):
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("formula index %d out of range" % index)
+        start, end = struct.unpack_from("=2q", self._index, _HEADER.size + index * _OFFSET.size)
+        return start, end
+
+    def reverse_polish(self, index):
+        '''
+            Decode formula index into a list of NodeType objects in reverse polish notation
+
+        '''
+        start, end = self._span(index)
+        return decode(self._data, start, end, self._variables)
+
+    def tree(self, index, builder = None):
+        '''
+            Decode formula index into a tree
+
+            @Args: builder  : Class with a build_from_reverse_polish classmethod: PLTreeNode
+                              by default, or PLDagNode, PLFlatFormula
+
+        '''
+        if builder is None:
+            from plt_src import PLTreeNode
+            builder = PLTreeNode
+        return builder.build_from_reverse_polish(self.reverse_polish(index))
+
+    def __getitem__(self, index):
+        return self.tree(index)
+
+    def __iter__(self):
+        for index in range(self._count):
+            yield self.tree(index)
+
+    def raw(self, index):
+        '''
+            Return the encoded bytes of formula index
+
+        '''
+        start, end = self._span(index)
+        return self._data[start:end]
+
+    @property
+    def variables(self):
+        '''
+            The variable NodeTypes of the corpus, by corpus index
+
+        '''
+        return [self._variables[k] for k in range(len(self._names))]
+
+    def close(self):
+        self._data.close()
+        self._index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __reduce__(self):
+        # ----- workers map the files themselves, sharing the pages
+        return (Corpus, (self.path,))
+
+    def __repr__(self):
+        return "Corpus(%s, %d formulas, %d variables)" % (self.path, self._count, len(self._names))
+
+
+class _Variables:
+    '''
+        NodeTypes of the corpus variables, created on first use
+
+    '''
+
+    __slots__ = ('_names', '_nodetypes')
+
+    def __init__(self, names):
+        self._names = names
+        self._nodetypes = [None] * len(names)
+
+    def __getitem__(self, index):
+        nodetype = self._nodetypes[index]
+        if nodetype is None:
+            nodetype = self._nodetypes[index] = variable_named(self._names[index])
+        return nodetype
@@ -0,0 +1,101 @@
+class BindingIndex:
+
+    def __init__(self, val_bindings_map):
+        '''
+            A precompiled set of variable bindings, looked up in O(1) per variable.
+
+            Build one once and pass it to PLTreeNode.with_variable_bindings (or anything
+            else taking bindings) as often as needed. Iterating over it yields the
+            (NodeType, bool) pairs, so it can also be given to apply_variable_bindings.
+
+            The values are held in a list indexed by the variables' var_id (see
+            node_type.symbols), so a lookup is a single array access. Since var_ids
+            differ between processes, a BindingIndex pickles as its bindings and is
+            rebuilt against the symbol table of the process unpickling it.
+
+            @Args: val_bindings_map
+                       A dict, another BindingIndex, or a list of (NodeType, bool) pairs.
+                       As in apply_variable_bindings, the first binding of a variable wins
+                       and NodeTypes that are not variables are ignored.
+
+        '''
+        if isinstance(val_bindings_map, BindingIndex):
+            self._values = list(val_bindings_map._values)
+            self._count = val_bindings_map._count
+            return
+
+        if isinstance(val_bindings_map, dict):
+            val_bindings_map = val_bindings_map.items()
+
+        values = []
+        count = 0
+        for val, binding in val_bindings_map:
+            var_id = val.var_id
+            if var_id is None:
+                continue
+            if var_id >= len(values):
+                values.extend([None] * (var_id + 1 - len(values)))
+            if values[var_id] is None:
+                values[var_id] = binding == True
+                count += 1
+
+        self._values = values
+        self._count = count
+
+    @classmethod
+    def of(cls, val_bindings_map):
+        '''
+            Return val_bindings_map itself if it already is a BindingIndex, else compile it
+
+        '''
+        if isinstance(val_bindings_map, cls):
+            return val_bindings_map
+        return cls(val_bindings_map)
+
+    @classmethod
+    def from_values(cls, values):
+        '''
+            Wrap a list indexed by var_id holding True, False or None (unbound) for each
+            variable. The list is used as is, not copied
+
+        '''
+        index = cls.__new__(cls)
+        index._values = values
+        index._count = sum(1 for value in values if value is not None)
+        return index
+
+    @property
+    def values(self):
+        '''
+            The list of values indexed by var_id: True, False, or None for unbound variables
+
+        '''
+        return self._values
+
+    def get(self, variable, default = None):
+        '''
+            Return the bool bound to variable, or default if it is not bound
+
+        '''
+        var_id = variable.var_id
+        if var_id is None or var_id >= len(self._values):
+            return default
+        value = self._values[var_id]
+        return default if value is None else value
+
+    def __contains__(self, variable):
+        return self.get(variable) is not None
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        from plt_src.node_type import symbols
+        return ((symbols[var_id], value) for var_id, value in enumerate(self._values) if value is not None)
+
+    def __reduce__(self):
+        # ----- var_ids are numbered per process: rebuild from the variables, which pickle by name
+        return (BindingIndex, (list(self),))
+
+    def __repr__(self):
+        return "BindingIndex(%s)"%list(self)
@@ -0,0 +1,352 @@
+'''
+    Compact clause storage and streaming DIMACS input / output.
+
+    A ClauseDatabase keeps every literal of every clause in one array('i') of DIMACS
+    literals (v or -v for the variable numbered v >= 1), with an array('q') of offsets
+    marking where each clause starts: 4 bytes per literal and 8 per clause, instead of
+    several PLTreeNode objects per literal.
+
+    The DIMACS functions read and write one clause at a time through a buffer, so files
+    far larger than memory can be produced and consumed.
+
+'''
+from array import array
+
+from plt_src import NodeType
+from plt_src.node_type import variable_named
+
+# ----- clauses written per file write
+WRITE_BUFFER_CLAUSES = 4096
+
+# ----- "p cnf" header reserved when the counts are only known at the end
+HEADER_WIDTH = 48
+
+
+class ClauseDatabase:
+
+    __slots__ = ('literals', 'offsets', 'variables', 'auxiliary', '_numbers', '_num_variables')
+
+    def __init__(self, variables = None, auxiliary = None):
+        '''
+            Create an empty database
+
+            @Args:
+                variables   : Optional list of variable NodeTypes to number first (1, 2, ...)
+                auxiliary   : Optional dict mapping auxiliary variables to the sub-formula they
+                              stand for, as returned by the Tseitin encoding
+
+        '''
+        self.literals = array('i')
+        self.offsets = array('q', [0])
+        self.variables = []
+        self.auxiliary = {} if auxiliary is None else auxiliary
+        self._numbers = {}
+        self._num_variables = 0
+
+        for variable in variables or ():
+            self.number(variable)
+
+    @classmethod
+    def from_clauses(cls, clauses, auxiliary = None):
+        '''
+            Build a database from a list of clauses of (NodeType, bool) literals, such as the
+            output of tseitin_clauses or clauses_from_cnf
+
+        '''
+        database = cls(auxiliary = auxiliary)
+        for clause in clauses:
+            database.add_literal_clause(clause)
+        return database
+
+    def number(self, variable):
+        '''
+            Return the DIMACS number of a variable NodeType, numbering it if it is new
+
+        '''
+        number = self._numbers.get(variable)
+        if number is None:
+            self.variables.append(variable)
+            number = len(self.variables)
+            self._numbers[variable] = number
+            self._num_variables = max(self._num_variables, number)
+        return number
+
+    def variable(self, number):
+        '''
+            Return the NodeType of a DIMACS variable number. Variables read from DIMACS
+            without a name are named x<number> (x<number>_<k> if that name is taken)
+
+        '''
+        while len(self.variables) < number:
+            self.number(self._unnamed(len(self.variables) + 1))
+        return self.variables[number - 1]
+
+    def _unnamed(self, number, reserved = ()):
+        name = "x%d" % number
+        suffix = 0
+        while name in reserved or variable_named(name) in self._numbers:
+            suffix += 1
+            name = "x%d_%d" % (number, suffix)
+        return variable_named(name)
+
+    @property
+    def num_variables(self):
+        return self._num_variables
+
+    def add_clause(self, literals):
+        '''
+            Append a clause of DIMACS literals
+
+        '''
+        start = len(self.literals)
+        self.literals.extend(literals)
+
+        for k in range(start, len(self.literals)):
+            literal = self.literals[k]
+            if literal == 0:
+                del self.literals[start:]
+                raise ValueError("0 is not a valid literal")
+            if abs(literal) > self._num_variables:
+                self._num_variables = abs(literal)
+
+        self.offsets.append(len(self.literals))
+
+    def add_literal_clause(self, clause):
+        '''
+            Append a clause of (NodeType, bool) literals. A clause holding ⊤ (or ¬⊥) is
+            satisfied and skipped, and ⊥ (or ¬⊤) literals are dropped
+
+        '''
+        literals = []
+        for nodetype, positive in clause:
+            if nodetype is NodeType.TRUE or nodetype is NodeType.FALSE:
+                if (nodetype is NodeType.TRUE) == positive:
+                    return
+                continue
+            number = self.number(nodetype)
+            literals.append(number if positive else -number)
+        self.add_clause(literals)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def clause(self, index):
+        '''
+            Return the clause at index as a list of DIMACS literals
+
+        '''
+        return self.literals[self.offsets[index]:self.offsets[index + 1]].tolist()
+
+    def __iter__(self):
+        literals = self.literals
+        offsets = self.offsets
+        for index in range(len(offsets) - 1):
+            yield literals[offsets[index]:offsets[index + 1]].tolist()
+
+    def to_clauses(self):
+        '''
+            Return the clauses as lists of (NodeType, bool) literals
+
+        '''
+        return [[(self.variable(abs(literal)), literal > 0) for literal in clause] for clause in self]
+
+    def to_tree(self):
+        '''
+            Build the CNF PLTreeNode of the clauses, as reduce_to_CNF would
+
+        '''
+        from plt_src import PLTreeNode
+        return PLTreeNode.build_from_clauses(self.to_clauses())
+
+    def memory_size(self):
+        '''
+            Return the number of bytes used by the literal and offset arrays
+
+        '''
+        return len(self.literals) * self.literals.itemsize + len(self.offsets) * self.offsets.itemsize
+
+    def write_dimacs(self, file, names = True):
+        '''
+            Write the clauses to a DIMACS CNF file
+
+            @Args:
+                file    : A path or a text file object
+                names   : If True, precede the header with "c var <number> <name>" comment lines
+
+        '''
+        with DimacsWriter(file, self._num_variables, len(self), self.variables if names else None) as writer:
+            for clause in self:
+                writer.write_clause(clause)
+
+    @classmethod
+    def read_dimacs(cls, file):
+        '''
+            Read a DIMACS CNF file into a new database. Variable names written by
+            write_dimacs are restored. The variables declared by the "p cnf" header are
+            all numbered, and a literal beyond them raises a ValueError
+
+        '''
+        reader = DimacsReader(file)
+        database = cls()
+        for clause in reader:
+            if reader.num_variables is not None and clause and max(max(clause), -min(clause)) > reader.num_variables:
+                raise ValueError("Literal beyond the %d variables of the DIMACS header in clause %s" % (reader.num_variables, clause))
+            database.add_clause(clause)
+
+        names = reader.names
+        reserved = set(names.values())
+        count = max(max(names, default = 0), reader.num_variables or 0, database._num_variables)
+        for number in range(1, count + 1):
+            if number in names:
+                variable = variable_named(names[number])
+                if variable in database._numbers:
+                    raise ValueError("DIMACS variable name %s given to several variables" % names[number])
+            else:
+                variable = database._unnamed(number, reserved)
+            database.number(variable)
+
+        return database
+
+    def __repr__(self):
+        return "ClauseDatabase(%d variables, %d clauses)" % (self._num_variables, len(self))
+
+
+class DimacsWriter:
+
+    def __init__(self, file, num_variables = None, num_clauses = None, variables = None):
+        '''
+            Write clauses to a DIMACS CNF file one at a time, in bounded memory.
+            Use as a context manager, or call close() when done.
+
+            @Args:
+                file            : A path or a text file object
+                num_variables   : Number of variables for the header
+                num_clauses     : Number of clauses for the header
+                variables       : Optional list of variable NodeTypes, written as
+                                  "c var <number> <name>" comment lines
+
+            When the counts are not given, a blank header is reserved and filled in by
+            close(), which requires a seekable file.
+
+        '''
+        self._owned = isinstance(file, str)
+        self._file = open(file, "w") if self._owned else file
+        self._buffer = []
+        self._num_variables = 0
+        self._num_clauses = 0
+        self._expected = num_clauses
+
+        for number, variable in enumerate(variables or (), 1):
+            self._file.write("c var %d %s\n" % (number, variable.prefix_name))
+
+        if num_variables is None or num_clauses is None:
+            self._header_position = self._file.tell()
+            self._file.write(" " * (HEADER_WIDTH - 1) + "\n")
+        else:
+            self._header_position = None
+            self._file.write("p cnf %d %d\n" % (num_variables, num_clauses))
+
+    def write_clause(self, literals):
+        '''
+            Write one clause of DIMACS literals
+
+        '''
+        line = " ".join(map(str, literals))
+        self._buffer.append(line + " 0\n" if line else "0\n")
+        self._num_clauses += 1
+
+        if self._header_position is not None and line:
+            self._num_variables = max(self._num_variables, max(literals), -min(literals))
+
+        if len(self._buffer) >= WRITE_BUFFER_CLAUSES:
+            self._flush()
+
+    def write_comment(self, text):
+        self._buffer.append("c %s\n" % text)
+
+    def _flush(self):
+        self._file.write("".join(self._buffer))
+        self._buffer = []
+
+    def close(self):
+        self._flush()
+
+        if self._header_position is not None:
+            end = self._file.tell()
+            self._file.seek(self._header_position)
+            self._file.write(("p cnf %d %d" % (self._num_variables, self._num_clauses)).ljust(HEADER_WIDTH - 1))
+            self._file.seek(end)
+        elif self._num_clauses != self._expected:
+            raise ValueError("%d clauses written, %d declared in the header" % (self._num_clauses, self._expected))
+
+        if self._owned:
+            self._file.close()
+        else:
+            self._file.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        elif self._owned:
+            self._file.close()
+
+
+class DimacsReader:
+
+    def __init__(self, file):
+        '''
+            Iterate over the clauses of a DIMACS CNF file, one list of DIMACS literals at a
+            time, reading the file line by line
+
+            @Args: file : A path or a text file object
+
+            After iteration, num_variables and num_clauses hold the header counts and names
+            maps variable numbers to the names found in "c var <number> <name>" comments.
+
+        '''
+        self._file = file
+        self.num_variables = None
+        self.num_clauses = None
+        self.names = {}
+
+    def __iter__(self):
+        owned = isinstance(self._file, str)
+        file = open(self._file, "r") if owned else self._file
+
+        try:
+            clause = []
+            for line in file:
+                tokens = line.split()
+                if not tokens:
+                    continue
+
+                first = tokens[0]
+                if first == "c":
+                    if len(tokens) == 4 and tokens[1] == "var":
+                        self.names[int(tokens[2])] = tokens[3]
+                    continue
+                if first == "p":
+                    if len(tokens) != 4 or tokens[1] != "cnf":
+                        raise ValueError("Invalid DIMACS header: %s" % line.strip())
+                    self.num_variables = int(tokens[2])
+                    self.num_clauses = int(tokens[3])
+                    continue
+                if first == "%":
+                    break
+
+                for token in tokens:
+                    literal = int(token)
+                    if literal == 0:
+                        yield clause
+                        clause = []
+                    else:
+                        clause.append(literal)
+
+            if clause:
+                yield clause
+        finally:
+            if owned:
+                file.close()
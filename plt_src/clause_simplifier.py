@@ -0,0 +1,173 @@
+'''
+    Clause level simplification of a CNF.
+
+    evaluate_constant_subtrees deliberately avoids deep comparisons, so the clauses produced
+    by reduce_to_CNF may repeat literals and whole clauses, hold tautologies such as ¬Q∨Q, or
+    be implied by shorter clauses. simplify_clauses removes all of these and returns a set
+    of clauses equivalent to its input:
+
+        duplicate literals          A∨A∨B becomes A∨B
+        tautologies                 clauses holding a literal and its negation are dropped
+        duplicate clauses           found by hashing the sorted literals of each clause
+        subsumption                 a clause holding all the literals of another is dropped
+        self-subsuming resolution   A∨B∨C with ¬A∨B gives B∨C: the resolvent replaces the
+                                    longer clause, which it subsumes
+
+    Shortest first, every clause removes the clauses it subsumes or strengthens (backward
+    subsumption and self-subsuming resolution), strengthened clauses being checked again.
+    Candidates come from occurrence lists, the clauses holding each literal, taking the
+    shortest list of the clause's literals and filtering with a 64 bit signature of the
+    variables of each clause, so the work grows close to linearly with the number of literals
+    on typical CNFs. A clause shared by every other clause, such as 1 in 1∨2∨3, 1∨3∨4, ...,
+    is never scanned through its long occurrence list.
+
+'''
+from collections import deque
+
+from plt_src.clause_database import ClauseDatabase
+
+STATISTICS = ("clauses_in", "literals_in", "clauses_out", "literals_out", "duplicate_literals",
+              "tautologies", "duplicate_clauses", "subsumed", "strengthened")
+
+
+def simplify_clauses(clauses, stats = None):
+    '''
+        Simplify a CNF, removing duplicate literals, tautologies, duplicate and subsumed
+        clauses, and applying self-subsuming resolution
+
+        @Args:
+            clauses     : A ClauseDatabase, a list of clauses of DIMACS literals, or a list of
+                          clauses of (NodeType, bool) literals, False meaning negated
+            stats       : Optional dict, whose STATISTICS entries are increased by the counts
+                          of this call
+
+        @Return: the simplified clauses, of the same kind as clauses. Clauses keep their
+                 relative order and literals their first occurrence order. An unsatisfiable
+                 input may be reduced to a single empty clause
+
+    '''
+    if isinstance(clauses, ClauseDatabase):
+        database = ClauseDatabase(clauses.variables, clauses.auxiliary)
+        for clause in _simplify(clauses, stats):
+            database.add_clause(clause)
+        return database
+
+    clauses = list(clauses)
+    if all(isinstance(literal, int) for clause in clauses for literal in clause[:1]):
+        return _simplify(clauses, stats)
+
+    # ----- (NodeType, bool) literals: constants are folded by the database
+    database = ClauseDatabase.from_clauses(clauses)
+    variable = database.variable
+    return [[(variable(abs(literal)), literal > 0) for literal in clause] for clause in _simplify(database, stats)]
+
+
+def _signature(literals):
+    signature = 0
+    for literal in literals:
+        signature |= 1 << (abs(literal) & 63)
+    return signature
+
+
+def _simplify(clauses, stats):
+    counts = dict.fromkeys(STATISTICS, 0)
+
+    # ----- normalise: drop duplicate literals, tautologies and duplicate clauses
+    seen = set()
+    normalised = []
+    for clause in clauses:
+        counts["clauses_in"] += 1
+        counts["literals_in"] += len(clause)
+
+        literals = list(dict.fromkeys(clause))
+        counts["duplicate_literals"] += len(clause) - len(literals)
+
+        literal_set = set(literals)
+        if any(-literal in literal_set for literal in literals):
+            counts["tautologies"] += 1
+            continue
+
+        key = tuple(sorted(literals))
+        if key in seen:
+            counts["duplicate_clauses"] += 1
+            continue
+        seen.add(key)
+        normalised.append(literals)
+
+    seen = None
+    if any(len(literals) == 0 for literals in normalised):
+        counts["subsumed"] += len(normalised) - 1
+        return _finish([[]], counts, stats)
+
+    sets = [set(literals) for literals in normalised]
+    signatures = [_signature(literals) for literals in normalised]
+    occurrences = {}
+    for i, literals in enumerate(normalised):
+        for literal in literals:
+            occurrences.setdefault(literal, set()).add(i)
+
+    # ----- backward subsumption and self-subsuming resolution
+    empty = ()
+    queue = deque(sorted(range(len(normalised)), key = lambda i: len(normalised[i])))
+    queued = set(queue)
+
+    while queue:
+        i = queue.popleft()
+        queued.discard(i)
+        clause = sets[i]
+        if clause is None:
+            continue
+
+        # ----- every candidate holds the variable of the literal with fewest occurrences
+        best = min(clause, key = lambda literal: len(occurrences.get(literal, empty)) + len(occurrences.get(-literal, empty)))
+        candidates = list(occurrences.get(best, empty)) + list(occurrences.get(-best, empty))
+        signature = signatures[i]
+
+        for j in candidates:
+            other = sets[j]
+            if j == i or other is None or len(other) < len(clause) or signature & ~signatures[j]:
+                continue
+
+            # ----- clause ⊆ other, except for at most one literal found negated in other
+            flipped = None
+            for literal in clause:
+                if literal in other:
+                    continue
+                if flipped is None and -literal in other:
+                    flipped = literal
+                    continue
+                break
+            else:
+                if flipped is None:
+                    sets[j] = None
+                    for literal in other:
+                        occurrences[literal].discard(j)
+                    counts["subsumed"] += 1
+                    continue
+
+                other.discard(-flipped)
+                occurrences[-flipped].discard(j)
+                normalised[j].remove(-flipped)
+                signatures[j] = _signature(other)
+                counts["strengthened"] += 1
+
+                if not other:
+                    counts["subsumed"] += sum(1 for k in range(len(sets)) if sets[k] is not None) - 1
+                    return _finish([[]], counts, stats)
+
+                if j not in queued:
+                    queued.add(j)
+                    queue.append(j)
+
+    return _finish([normalised[i] for i in range(len(normalised)) if sets[i] is not None], counts, stats)
+
+
+def _finish(result, counts, stats):
+    counts["clauses_out"] = len(result)
+    counts["literals_out"] = sum(len(clause) for clause in result)
+
+    if stats is not None:
+        for key, count in counts.items():
+            stats[key] = stats.get(key, 0) + count
+
+    return result
@@ -0,0 +1,344 @@
+'''
+    Persistent content-addressed cache of CNF conversions.
+
+    Results of reduce_to_CNF are stored under a SHA-256 hash of the reverse polish sequence
+    of the input tree (see formula_key) and of the conversion options, so any tree of the
+    same structure hits the cache, whichever process built it:
+
+        cache = CNFCache("cnf_cache.sqlite")
+        database = cache.reduce_to_CNF(pltree, output = "clauses")
+        pltree.reduce_to_CNF(cache = cache)           the same, rewriting the tree
+
+    Two tiers are searched in turn:
+
+        memory      an LRU dict of the last memory_entries results of this process
+        disk        an SQLite database (optional), shared by later runs and concurrent
+                    processes. It runs in WAL mode, so readers never block and never see a
+                    partial write; writers wait up to timeout seconds for each other. When
+                    max_disk_bytes is set, the least recently used results are deleted
+                    beyond it. The access times of disk hits are written ACCESS_BATCH at a
+                    time, or with the next store, so that reads seldom take the write lock
+
+    A CNF is stored as the literal and offset arrays of its ClauseDatabase (native byte
+    order, the cache is meant for one machine) or as the reverse polish of the CNF tree,
+    with the variable names and the auxiliary sub-formulas as JSON. Hit and miss counts
+    are kept in the stats dict, and counted by the instrumentation as cnf_cache.<stat>.
+
+'''
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from array import array
+from collections import OrderedDict
+
+from plt_src.instrumentation import metrics
+
+# ----- part of every key: changing the stored format invalidates older entries
+FORMAT_VERSION = 1
+
+DEFAULT_MEMORY_ENTRIES = 1024
+
+# ----- disk hits whose access time is kept in memory before being written
+ACCESS_BATCH = 64
+
+# ----- the total size of the results is kept up to date by triggers, the replaced row of an
+# ----- INSERT OR REPLACE being deleted through them under PRAGMA recursive_triggers
+_SCHEMA = ['''
+    CREATE TABLE IF NOT EXISTS cnf (
+        key         TEXT PRIMARY KEY,
+        meta        TEXT NOT NULL,
+        literals    BLOB,
+        offsets     BLOB,
+        size        INTEGER NOT NULL,
+        accessed    REAL NOT NULL
+    )
+''', '''
+    CREATE INDEX IF NOT EXISTS cnf_accessed ON cnf (accessed)
+''', '''
+    CREATE TABLE IF NOT EXISTS cnf_total (
+        id          INTEGER PRIMARY KEY CHECK (id = 0),
+        size        INTEGER NOT NULL
+    )
+''', '''
+    INSERT OR IGNORE INTO cnf_total SELECT 0, COALESCE(SUM(size), 0) FROM cnf
+''', '''
+    CREATE TRIGGER IF NOT EXISTS cnf_insert AFTER INSERT ON cnf BEGIN
+        UPDATE cnf_total SET size = size + new.size;
+    END
+''', '''
+    CREATE TRIGGER IF NOT EXISTS cnf_delete AFTER DELETE ON cnf BEGIN
+        UPDATE cnf_total SET size = size - old.size;
+    END
+''']
+
+
+def formula_key(pltree, options = None):
+    '''
+        Return the hex SHA-256 digest identifying a tree by its structure
+
+        @Args:
+            pltree      : A PLTreeNode (or PLDagNode, hashed as the tree it stands for)
+            options     : Optional dict of the conversion options, part of the key
+
+    '''
+    digest = hashlib.sha256()
+    digest.update(("%d %s\n" % (FORMAT_VERSION, json.dumps(options or {}, sort_keys = True))).encode())
+    digest.update(" ".join(nodetype.prefix_name for nodetype in pltree.get_reverse_polish()).encode())
+    return digest.hexdigest()
+
+
+class CNFCache:
+
+    def __init__(self, path = None, memory_entries = DEFAULT_MEMORY_ENTRIES, max_disk_bytes = None, timeout = 30.0):
+        '''
+            Create a cache
+
+            @Args:
+                path            : SQLite file of the disk tier, created if needed. None for a
+                                  memory only cache
+                memory_entries  : Maximum number of results kept in memory
+                max_disk_bytes  : Optional limit of the stored results on disk
+                timeout         : Seconds to wait for a concurrent writer
+
+        '''
+        self.path = path
+        self.memory_entries = memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.timeout = timeout
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0,
+                      "memory_evictions": 0, "disk_evictions": 0}
+
+        self._memory = OrderedDict()
+        self._accessed = {}
+        self._connection = None
+        self._pid = None
+
+    # ----- conversions
+
+    def reduce_to_CNF(self, pltree, mode = "distribute", polarity_aware = False, output = "tree", budget = None,
+                      on_budget = "raise", simplify = False):
+        '''
+            PLTreeNode.reduce_to_CNF through the cache: same arguments and same results.
+            Statistics of simplify are only collected on a miss
+
+        '''
+        options = {"mode": mode, "polarity_aware": polarity_aware, "output": output, "budget": budget,
+                   "on_budget": on_budget, "simplify": simplify is not False}
+        key = formula_key(pltree, options)
+
+        entry = self.get(key)
+        if entry is None:
+            result = pltree.reduce_to_CNF(mode, polarity_aware, output, budget, on_budget, simplify)
+            if output == "clauses":
+                entry = _database_entry(result)
+            else:
+                entry = _tree_entry(pltree, result)
+            self.put(key, entry)
+            return result
+
+        if output == "clauses":
+            return _database_of(entry)
+
+        from plt_src import PLTreeNode
+        from plt_src.parser import parse_rpn
+        meta = entry[0]
+        pltree._replace_with(PLTreeNode.build_from_reverse_polish(parse_rpn(meta["rpn"])))
+        return _auxiliary_of(meta)
+
+    # ----- tiers
+
+    def get(self, key):
+        '''
+            Return the entry (meta dict, literals bytes, offsets bytes) stored under key, from
+            memory or else from disk, or None
+
+        '''
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+            self._count("memory_hits")
+            return entry
+
+        connection = self._connect()
+        if connection is not None:
+            row = connection.execute("SELECT meta, literals, offsets FROM cnf WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self._accessed[key] = time.time()
+                if len(self._accessed) >= ACCESS_BATCH:
+                    with connection:
+                        self._write_accessed(connection)
+                entry = (json.loads(row[0]), row[1], row[2])
+                self._remember(key, entry)
+                self._count("disk_hits")
+                return entry
+
+        self._count("misses")
+        return None
+
+    def put(self, key, entry):
+        '''
+            Store an entry in memory and on disk
+
+        '''
+        self._remember(key, entry)
+        self._count("stores")
+
+        connection = self._connect()
+        if connection is None:
+            return
+        meta, literals, offsets = entry
+        text = json.dumps(meta)
+        size = len(key) + len(text) + len(literals or b"") + len(offsets or b"")
+        with connection:
+            connection.execute("INSERT OR REPLACE INTO cnf VALUES (?, ?, ?, ?, ?, ?)",
+                               (key, text, literals, offsets, size, time.time()))
+            self._write_accessed(connection)
+            if self.max_disk_bytes is not None:
+                self._evict(connection)
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last = False)
+            self._count("memory_evictions")
+
+    def _write_accessed(self, connection):
+        if self._accessed:
+            connection.executemany("UPDATE cnf SET accessed = ? WHERE key = ?",
+                                   [(accessed, key) for key, accessed in self._accessed.items()])
+            self._accessed.clear()
+
+    def _evict(self, connection):
+        total = connection.execute("SELECT size FROM cnf_total").fetchone()[0]
+        if total <= self.max_disk_bytes:
+            return
+        evicted = []
+        for key, size in connection.execute("SELECT key, size FROM cnf ORDER BY accessed"):
+            if total <= self.max_disk_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        connection.executemany("DELETE FROM cnf WHERE key = ?", evicted)
+        self._count("disk_evictions", len(evicted))
+
+    def _connect(self):
+        '''
+            Return the SQLite connection of this process, None without a disk tier. A
+            process forked from the one that opened it gets its own
+
+        '''
+        if self.path is None:
+            return None
+        if self._connection is None or self._pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout = self.timeout)
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.execute("PRAGMA recursive_triggers = ON")
+            with connection:
+                for statement in _SCHEMA:
+                    connection.execute(statement)
+            self._connection = connection
+            self._pid = os.getpid()
+            self._accessed.clear()
+        return self._connection
+
+    def _count(self, stat, increment = 1):
+        self.stats[stat] += increment
+        metrics.count("cnf_cache." + stat, increment)
+
+    # ----- maintenance
+
+    def __len__(self):
+        '''
+            Number of results stored: on disk if there is a disk tier, else in memory
+
+        '''
+        connection = self._connect()
+        if connection is None:
+            return len(self._memory)
+        return connection.execute("SELECT COUNT(*) FROM cnf").fetchone()[0]
+
+    def disk_bytes(self):
+        '''
+            Size of the results stored on disk, as counted against max_disk_bytes
+
+        '''
+        connection = self._connect()
+        if connection is None:
+            return 0
+        return connection.execute("SELECT size FROM cnf_total").fetchone()[0]
+
+    def clear(self):
+        '''
+            Remove every result, from memory and from disk
+
+        '''
+        self._memory.clear()
+        self._accessed.clear()
+        connection = self._connect()
+        if connection is not None:
+            with connection:
+                connection.execute("DELETE FROM cnf")
+
+    def close(self):
+        '''
+            Write the pending access times and close the disk tier
+
+        '''
+        if self._connection is not None and self._pid == os.getpid():
+            with self._connection:
+                self._write_accessed(self._connection)
+            self._connection.close()
+        self._connection = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __repr__(self):
+        return "CNFCache(%s, %d in memory)" % (self.path or "memory only", len(self._memory))
+
+
+def _rpn(formula):
+    from plt_src.traversal import post_order
+    return " ".join(node._type.prefix_name for node in post_order(formula))
+
+
+def _auxiliary_meta(auxiliary):
+    return {variable.prefix_name: _rpn(node) for variable, node in auxiliary.items()}
+
+
+def _auxiliary_of(meta):
+    from plt_src import PLTreeNode
+    from plt_src.node_type import variable_named
+    from plt_src.parser import parse_rpn
+    from plt_src.pl_dag_node import PLDagNode
+    return {variable_named(name): PLDagNode.from_tree(PLTreeNode.build_from_reverse_polish(parse_rpn(text)))
+            for name, text in meta["auxiliary"].items()}
+
+
+def _tree_entry(pltree, auxiliary):
+    return ({"rpn": _rpn(pltree), "auxiliary": _auxiliary_meta(auxiliary)}, None, None)
+
+
+def _database_entry(database):
+    meta = {"variables": [variable.prefix_name for variable in database.variables],
+            "auxiliary": _auxiliary_meta(database.auxiliary)}
+    return (meta, database.literals.tobytes(), database.offsets.tobytes())
+
+
+def _database_of(entry):
+    from plt_src.clause_database import ClauseDatabase
+    from plt_src.node_type import variable_named
+
+    meta, literals, offsets = entry
+    database = ClauseDatabase([variable_named(name) for name in meta["variables"]], _auxiliary_of(meta))
+    database.literals = array('i')
+    database.literals.frombytes(literals)
+    database.offsets = array('q')
+    database.offsets.frombytes(offsets)
+    return database
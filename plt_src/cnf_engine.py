@@ -0,0 +1,282 @@
+'''
+    Single pass conversion to Conjunctive Normal Form by distribution.
+
+    The four pass pipeline (eliminate_implies, push_not_down, push_or_below_and and
+    make_and_or_right_deep) rewrites the tree in place once per pass, the distribution
+    step revisiting every disjunction it creates. Here implication
+    elimination, negation normal form and distribution are done in one depth first
+    traversal: the polarity of each node (the parity of the negations above it, an
+    implication negating its left operand) is known on the way down, and on the way up each
+    node combines the clause lists of its children:
+
+        conjunction (AND, or OR / IMPLIES under an odd number of negations): concatenate
+        disjunction (OR / IMPLIES, or AND under negation): all pairwise unions of clauses
+
+    Clauses come out already flat, as lists of (NodeType, bool) literals, so no right deep
+    pass is needed. The result is the same CNF, with the same clause and literal order,
+    as the four pass pipeline.
+
+    While distributing, clause lists and clauses are deques grown in place: a conjunction
+    extends the longer clause list by the shorter one (on the left if need be), and a
+    disjunction with a single clause operand extends the clauses of the other operand by
+    its literals. Chains of the same connective, left or right deep, thus take linear time
+    instead of copying the growing operand at every level.
+
+'''
+from collections import deque
+
+from plt_src import NodeType
+from plt_src.pl_dag_node import PLDagNode
+from plt_src.traversal import pre_order
+from plt_src.tseitin import auxiliary_variable
+
+
+def _bottom_up(pltree, stats = None):
+    '''
+        Yield (node, negated) for the leaves and binary nodes of a formula in post-order,
+        negated telling whether the node is under an odd number of negations (the left
+        operand of an implication counting as negated). NOT nodes are only passed through
+
+    '''
+    visits = 0
+    double_negations = 0
+    de_morgans = 0
+
+    # ----- (node, negated, exiting): children are pushed after their parent's exit entry
+    stack = [(pltree, False, False)]
+    pop = stack.pop
+    push = stack.append
+
+    while stack:
+        node, negated, exiting = pop()
+        if exiting:
+            yield node, negated
+            continue
+
+        visits += 1
+        nodetype = node._type
+        if nodetype.arity == 0:
+            yield node, negated
+        elif nodetype is NodeType.NOT:
+            double_negations += negated
+            push((node._child1, not negated, False))
+        else:
+            # ----- ¬(x→y) is ¬(¬x∨y), whose left operand becomes ¬¬x
+            de_morgans += negated
+            double_negations += negated and nodetype is NodeType.IMPLIES
+            push((node, negated, True))
+            push((node._child2, negated, False))
+            push((node._child1, negated != (nodetype is NodeType.IMPLIES), False))
+
+    if stats is not None:
+        stats["nodes_visited"] = stats.get("nodes_visited", 0) + visits
+        # ----- under the names of the rules push_not_down would have applied
+        stats["push_not_down.double_negation"] = stats.get("push_not_down.double_negation", 0) + double_negations
+        stats["push_not_down.de_morgan"] = stats.get("push_not_down.de_morgan", 0) + de_morgans
+
+
+def cnf_size(pltree):
+    '''
+        Count the clauses and literals of the CNF that distribution (cnf_clauses or
+        reduce_to_CNF) would produce, without producing it. The count is exact, and takes a
+        single traversal whatever the size of the CNF.
+
+        @Args: pltree   : The PLTreeNode (or PLDagNode) of the formula
+
+        @Return: (number of clauses, number of literals)
+
+    '''
+    sizes = []
+    pop = sizes.pop
+
+    for node, negated in _bottom_up(pltree):
+        nodetype = node._type
+        if nodetype.arity == 0:
+            sizes.append((1, 1))
+            continue
+
+        clauses2, literals2 = pop()
+        clauses1, literals1 = pop()
+
+        if (nodetype is NodeType.AND) != negated:
+            sizes.append((clauses1 + clauses2, literals1 + literals2))
+        else:
+            sizes.append((clauses1 * clauses2, literals1 * clauses2 + literals2 * clauses1))
+
+    return sizes[0]
+
+
+def cnf_clauses(pltree, variables = None, stats = None):
+    '''
+        Compute the clauses of the CNF of a formula by distribution. The tree is not modified.
+
+        @Args:
+            pltree      : The PLTreeNode (or PLDagNode) of the formula
+            variables   : Optional list, to which the variables of the formula are appended
+                          in order of first occurrence (reverse polish order)
+            stats       : Optional dict, whose "nodes_visited" entry is increased by the number
+                          of nodes visited, and the "push_not_down.double_negation",
+                          "push_not_down.de_morgan" and "push_or_below_and.distribution"
+                          entries by the number of rewrites the separate passes would make
+
+        @Return: list of clauses, each a list of (NodeType, bool) literals, False meaning
+                 negated. Constants are kept as literals, ⊤ and ⊥ (or their negations)
+
+    '''
+    return _distribute(pltree, variables, stats)
+
+
+def budgeted_cnf_clauses(pltree, budget, variables = None, stats = None):
+    '''
+        Compute the clauses of the CNF of a formula by distribution, except that a sub-formula
+        whose distribution would produce more than budget literals is replaced by an auxiliary
+        variable x, defined by the clauses of x → F for the CNF F of the replaced operand (as
+        in the Plaisted-Greenbaum encoding, see tseitin.py). The result is equisatisfiable with
+        the formula, and equivalent to it when no replacement was needed. The tree is not modified.
+
+        @Args:
+            pltree      : The PLTreeNode (or PLDagNode) of the formula
+            budget      : Maximum number of literals produced by distributing one disjunction,
+                          at least 2
+            variables, stats
+                        : As in cnf_clauses. Auxiliary variables are not added to variables
+
+        @Return: (clauses, auxiliary) as returned by tseitin_clauses: the clauses, followed by
+                 the definitions of the auxiliary variables, and a dict mapping each auxiliary
+                 NodeType to the PLDagNode of the sub-formula it stands for
+
+    '''
+    # ----- replacing both operands of a disjunction still leaves 2 literals
+    if budget < 2:
+        raise ValueError("Invalid CNF budget %s: the Tseitin fallback needs at least 2 literals" % budget)
+
+    auxiliary = {}
+    clauses = _distribute(pltree, variables, stats, budget, auxiliary)
+    return clauses, auxiliary
+
+
+def _distribute(pltree, variables = None, stats = None, budget = None, auxiliary = None):
+    seen = None if variables is None else set(variables)
+    results = []
+    sizes = []
+    pop = results.pop
+    distributions = 0
+
+    if budget is not None:
+        # ----- fresh names must not clash with variables of the formula itself
+        used_names = set(node._type.prefix_name for node in pre_order(pltree) if node._type.is_var())
+        definitions = []
+        index = 0
+
+    for node, negated in _bottom_up(pltree, stats):
+        nodetype = node._type
+
+        if nodetype.arity == 0:
+            results.append(deque([deque([(nodetype, not negated)])]))
+            sizes.append(1)
+            if seen is not None and nodetype.is_var() and nodetype not in seen:
+                seen.add(nodetype)
+                variables.append(nodetype)
+            continue
+
+        second = pop()
+        first = pop()
+        literals2 = sizes.pop()
+        literals1 = sizes.pop()
+
+        if (nodetype is NodeType.AND) != negated:
+            results.append(concatenate(first, second))
+            sizes.append(literals1 + literals2)
+            continue
+
+        if budget is not None and literals1 * len(second) + literals2 * len(first) > budget:
+            # ----- replace the larger operand, then if needed the other, by an auxiliary variable
+            operands = [[first, literals1, node._child1, negated != (nodetype is NodeType.IMPLIES)],
+                        [second, literals2, node._child2, negated]]
+            for operand in sorted(operands, key = lambda operand: -operand[1]):
+                if operands[0][1] * len(operands[1][0]) + operands[1][1] * len(operands[0][0]) <= budget:
+                    break
+
+                index += 1
+                while "aux%d" % index in used_names:
+                    index += 1
+                aux = auxiliary_variable(index)
+
+                operand_clauses, _, child, child_negated = operand
+                formula = PLDagNode.from_tree(child)
+                auxiliary[aux] = formula.table.make(NodeType.NOT, formula) if child_negated else formula
+                definitions.extend([(aux, False)] + list(clause) for clause in operand_clauses)
+                operand[0] = deque([deque([(aux, True)])])
+                operand[1] = 1
+
+            first, literals1 = operands[0][0], operands[0][1]
+            second, literals2 = operands[1][0], operands[1][1]
+
+        sizes.append(literals1 * len(second) + literals2 * len(first))
+        # ----- the pairwise distributions push_or_below_and would have applied
+        distributions += len(first) * len(second) - 1
+        results.append(disjoin(first, second))
+
+    if stats is not None:
+        stats["push_or_below_and.distribution"] = stats.get("push_or_below_and.distribution", 0) + distributions
+
+    clauses = [list(clause) for clause in results[0]]
+    if budget is not None:
+        return clauses + definitions
+    return clauses
+
+
+def concatenate(first, second):
+    '''
+        Concatenate two deques, extending the longer one in place: the conjunction of two
+        deques of clauses, or the disjunction of two clauses
+
+    '''
+    if len(first) >= len(second):
+        first.extend(second)
+        return first
+    second.extendleft(reversed(first))
+    return second
+
+
+def disjoin(first, second):
+    '''
+        Return the clauses of the disjunction of two deques of clauses (deques of literals),
+        extending the clauses of one operand in place when the other is a single clause
+
+    '''
+    if len(second) == 1:
+        clause = second[0]
+        if len(first) == 1:
+            return deque([concatenate(first[0], clause)])
+        for a in first:
+            a.extend(clause)
+        return first
+    if len(first) == 1:
+        clause = first[0]
+        for b in second:
+            b.extendleft(reversed(clause))
+        return second
+    return deque(a + b for a in first for b in second)
+
+
+def cnf_clause_database(pltree, stats = None, budget = None):
+    '''
+        Compute the clauses of the CNF of a formula by distribution into a ClauseDatabase,
+        numbering the variables in order of first occurrence. With a budget, the clauses of
+        budgeted_cnf_clauses are stored and the database's auxiliary attribute holds the
+        auxiliary variable dict
+
+    '''
+    from plt_src.clause_database import ClauseDatabase
+
+    variables = []
+    if budget is None:
+        clauses, auxiliary = cnf_clauses(pltree, variables, stats), None
+    else:
+        clauses, auxiliary = budgeted_cnf_clauses(pltree, budget, variables, stats)
+
+    database = ClauseDatabase(variables, auxiliary)
+    for clause in clauses:
+        database.add_literal_clause(clause)
+    return database
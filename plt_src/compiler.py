@@ -0,0 +1,184 @@
+'''
+    Compilation of formulas into Python functions for repeated evaluation.
+
+    compile_formula generates the source of a function taking a sequence of variable
+    values (tuple, list, array, ...) and evaluating the formula with Python's own
+    short-circuiting and / or / not, then compiles it with exec:
+
+        ((R∨P)→(⊤∧¬Q)) with variables [R, P, Q] becomes
+
+        def compiled(v):
+            return True if not (v[0] or v[1]) or True and not v[2] else False
+
+    Evaluating it costs no tree walk, attribute lookup or NodeType comparison. Chains of
+    the same operator, such as the right deep conjunctions and disjunctions of a CNF, are
+    emitted flat (a and b and c ...) and double negations are dropped, so parentheses
+    only nest where operators alternate. Where they would nest deeper than NESTING_LIMIT
+    (which Python's parser cannot handle), the sub-formula is computed into a local
+    variable first, giving up short-circuiting across that boundary only.
+
+    Compiled functions are cached by the structure of the formula (its reverse polish
+    sequence) and the variable positions, in an LRU cache of COMPILE_CACHE_SIZE entries.
+
+'''
+from collections import OrderedDict, deque
+
+from plt_src import NodeType
+from plt_src.traversal import post_order
+
+NESTING_LIMIT = 50
+COMPILE_CACHE_SIZE = 1024
+
+_cache = OrderedDict()
+
+# ----- kinds of generated expressions, from tightest to loosest binding
+_ATOM = 0
+_NOT = 1
+_AND = 2
+_OR = 3
+
+
+def formula_variables(formula):
+    '''
+        Return the variables of a formula in order of first occurrence (reverse polish
+        order): the default positions of the values taken by a compiled function
+
+    '''
+    seen = set()
+    variables = []
+    for node in post_order(formula):
+        nodetype = node._type
+        if nodetype.is_var() and nodetype not in seen:
+            seen.add(nodetype)
+            variables.append(nodetype)
+    return variables
+
+
+def compile_formula(formula, variables = None):
+    '''
+        Compile a formula into a Python function evaluating it
+
+        @Args:
+            formula     : The PLTreeNode of the formula (a PLDagNode is expanded as a tree)
+            variables   : List of the variable NodeTypes, in the order of the values the
+                          function takes; by default formula_variables(formula). Pass
+                          list(symbols) to take the values indexed by var_id, such as
+                          BindingIndex.values
+
+        @Return: a function f(values) returning True or False. Its variables attribute
+                 holds the variable order and its source attribute the generated code.
+                 Every variable of the formula must have a value
+
+    '''
+    typeList = tuple(node._type for node in post_order(formula))
+    key = (typeList, None if variables is None else tuple(variables))
+
+    function = _cache.get(key)
+    if function is not None:
+        _cache.move_to_end(key)
+        return function
+
+    if variables is None:
+        variables = formula_variables(formula)
+    positions = {variable: k for k, variable in enumerate(variables)}
+
+    source = _source(typeList, positions)
+    namespace = {}
+    exec(compile(source, "<compiled formula>", "exec"), namespace)
+
+    function = namespace["compiled"]
+    function.variables = list(variables)
+    function.source = source
+
+    _cache[key] = function
+    if len(_cache) > COMPILE_CACHE_SIZE:
+        _cache.popitem(last = False)
+    return function
+
+
+def clear_compile_cache():
+    _cache.clear()
+
+
+def _text(entry, kind):
+    '''
+        Source of an expression used as operand of an operator of the given kind,
+        parenthesised when it binds more loosely
+
+    '''
+    entry_kind, code, nesting = entry
+    if entry_kind == _NOT:
+        code = code[0]
+    elif entry_kind != _ATOM:
+        code = (" and " if entry_kind == _AND else " or ").join(code)
+    if entry_kind > kind:
+        return "(" + code + ")", nesting + 1
+    return code, nesting
+
+
+def _source(typeList, positions):
+    statements = []
+    entries = []
+    pop = entries.pop
+    push = entries.append
+
+    def hoisted(entry, kind):
+        # ----- compute a deeply nested operand into a local variable first
+        code, nesting = _text(entry, kind)
+        if nesting <= NESTING_LIMIT:
+            return code, nesting
+        name = "t%d" % len(statements)
+        statements.append("    %s = %s" % (name, _text(entry, _OR)[0]))
+        return name, 0
+
+    def negate(entry):
+        # ----- a NOT entry keeps its operand, so that a double negation gives it back
+        if entry[0] == _NOT:
+            return entry[1][1]
+        code, nesting = hoisted(entry, _NOT)
+        return (_NOT, ("not " + code, entry), nesting)
+
+    def chain(kind, first, second):
+        parts = []
+        nesting = 0
+        for entry in (first, second):
+            if entry[0] == kind:
+                parts.append(entry[1])
+                nesting = max(nesting, entry[2])
+            else:
+                code, code_nesting = hoisted(entry, kind)
+                parts.append(deque([code]))
+                nesting = max(nesting, code_nesting)
+
+        # ----- merge the shorter part into the longer one, linear time overall
+        first_parts, second_parts = parts
+        if len(first_parts) >= len(second_parts):
+            first_parts.extend(second_parts)
+            return (kind, first_parts, nesting)
+        second_parts.extendleft(reversed(first_parts))
+        return (kind, second_parts, nesting)
+
+    for nodetype in typeList:
+        if nodetype is NodeType.TRUE:
+            push((_ATOM, "True", 0))
+        elif nodetype is NodeType.FALSE:
+            push((_ATOM, "False", 0))
+        elif nodetype.arity == 0:
+            position = positions.get(nodetype)
+            if position is None:
+                raise ValueError("No value position for variable %s" % nodetype)
+            push((_ATOM, "v[%d]" % position, 0))
+        elif nodetype is NodeType.NOT:
+            push(negate(pop()))
+        else:
+            second = pop()
+            first = pop()
+            if nodetype is NodeType.AND:
+                push(chain(_AND, first, second))
+            elif nodetype is NodeType.OR:
+                push(chain(_OR, first, second))
+            else:
+                push(chain(_OR, negate(first), second))
+
+    code = _text(pop(), _OR)[0]
+    return "def compiled(v):\n%s    return True if %s else False\n" % ("".join(line + "\n" for line in statements), code)
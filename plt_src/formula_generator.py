@@ -0,0 +1,117 @@
+'''
+    Seeded random formulas for tests and benchmarks.
+
+    A formula is generated as a binary tree of a given number of leaves (or depth) and
+    shape, in reverse polish order as taken by build_from_reverse_polish:
+
+        balanced        both operands of every operator have (nearly) the same number of leaves
+        left-deep       (((A∧B)∨C)→D)...: the right operand of every operator is a leaf
+        right-deep      A∧(B∨(C→(D...))): the left operand of every operator is a leaf
+        random          the leaves are split between the operands uniformly at random
+
+    Generation uses an explicit stack, so formulas of any depth can be produced, and the
+    same arguments and seed always give the same formula.
+
+'''
+import random
+
+from plt_src import NodeType
+from plt_src.node_type import symbols
+
+SHAPES = ("balanced", "left-deep", "right-deep", "random")
+
+DEFAULT_OPERATORS = {NodeType.AND: 1, NodeType.OR: 1, NodeType.IMPLIES: 1}
+
+
+def formula_variables(num_variables):
+    '''
+        Return num_variables variable NodeTypes: A - Z, or x0, x1, ... beyond 26 variables
+
+    '''
+    if num_variables <= 26:
+        return [symbols[k] for k in range(num_variables)]
+    return [symbols.variable("x%d" % k) for k in range(num_variables)]
+
+
+def random_formula(num_leaves = None, depth = None, num_variables = 8, operators = None, shape = "balanced",
+                   negation = 0.2, constants = 0.0, seed = None, rng = None):
+    '''
+        Generate a random formula
+
+        @Args:
+            num_leaves      : Number of leaves (variables and constants) of the formula
+            depth           : Alternatively, the number of binary operator levels: 2^depth
+                              leaves for "balanced", depth + 1 for "left-deep" and "right-deep".
+                              Negations do not count towards the depth
+            num_variables   : Number of distinct variables to draw the leaves from
+            operators       : Dict mapping the binary operator NodeTypes (AND, OR, IMPLIES) to
+                              their relative weights, all equal by default
+            shape           : One of SHAPES
+            negation        : Probability of negating each sub-formula (leaves included)
+            constants       : Probability of a leaf being ⊤ or ⊥ instead of a variable
+            seed            : Seed of the random generator
+            rng             : Alternatively, a random.Random instance to draw from
+
+        @Return: list of NodeType objects in reverse polish notation
+
+    '''
+    if shape not in SHAPES:
+        raise ValueError("Unknown shape %s" % shape)
+    if (num_leaves is None) == (depth is None):
+        raise ValueError("Give exactly one of num_leaves and depth")
+    if depth is not None:
+        if shape == "random":
+            raise ValueError("The depth of a random shape cannot be chosen")
+        num_leaves = 2 ** depth if shape == "balanced" else depth + 1
+    if num_leaves < 1 or num_variables < 1:
+        raise ValueError("A formula needs at least one leaf and one variable")
+
+    operators = DEFAULT_OPERATORS if operators is None else operators
+    for nodetype in operators:
+        if nodetype.arity != 2:
+            raise ValueError("%s is not a binary operator" % nodetype)
+    operator_types = list(operators)
+    weights = [operators[nodetype] for nodetype in operator_types]
+
+    rng = random.Random(seed) if rng is None else rng
+    variables = formula_variables(num_variables)
+
+    output = []
+    append = output.append
+
+    # ----- an int is a sub-formula of that many leaves still to generate, a list is the
+    # ----- operator (and negation) to emit once both operands are done
+    stack = [num_leaves]
+    while stack:
+        item = stack.pop()
+        if item.__class__ is list:
+            output.extend(item)
+            continue
+
+        if item == 1:
+            if constants and rng.random() < constants:
+                append(NodeType.TRUE if rng.random() < 0.5 else NodeType.FALSE)
+            else:
+                append(variables[rng.randrange(num_variables)])
+            if negation and rng.random() < negation:
+                append(NodeType.NOT)
+            continue
+
+        if shape == "balanced":
+            left = (item + 1) // 2
+        elif shape == "left-deep":
+            left = item - 1
+        elif shape == "right-deep":
+            left = 1
+        else:
+            left = rng.randint(1, item - 1)
+
+        operator = [rng.choices(operator_types, weights)[0]]
+        if negation and rng.random() < negation:
+            operator.append(NodeType.NOT)
+
+        stack.append(operator)
+        stack.append(item - left)
+        stack.append(left)
+
+    return output
@@ -0,0 +1,194 @@
+'''
+    Incremental evaluation of a formula under changing variable bindings.
+
+    The evaluator keeps the (three-valued) value of every node together with a parent
+    link per node. When the binding of a variable changes, only its leaves and their
+    ancestors are re-evaluated, and the walk up from a leaf stops as soon as a node keeps
+    its previous value. Each affected ancestor is re-evaluated once per update, even when
+    the variable occurs many times, so a change costs O(depth) per occurrence at most
+    instead of a pass over the whole formula. The formula itself is never modified.
+
+'''
+import heapq
+from array import array
+
+from plt_src.binding_index import BindingIndex
+from plt_src.pl_flat_formula import PLFlatFormula, OP_IMPLIES, OP_AND, OP_NOT, OP_TRUE, OP_FALSE, OP_VAR, NONE
+
+
+class IncrementalEvaluator:
+
+    def __init__(self, formula, val_bindings_map = None):
+        '''
+            Evaluate a formula once and prepare it for incremental updates
+
+            @Args:
+                formula             : A PLTreeNode, PLDagNode or PLFlatFormula. It is copied into
+                                      flat arrays and left untouched
+                val_bindings_map    : Optional initial bindings, a BindingIndex, dict or list of
+                                      (NodeType, bool) pairs. Variables without a binding are
+                                      unknown (None)
+
+        '''
+        if not isinstance(formula, PLFlatFormula):
+            formula = PLFlatFormula.from_tree(formula)
+
+        self._opcodes = formula.opcodes
+        self._child1 = formula.child1
+        self._child2 = formula.child2
+        self._variables = list(formula.variables)
+        self._index = {variable: k for k, variable in enumerate(self._variables)}
+
+        count = len(formula)
+        parent = array('i', [NONE]) * count
+        leaves = [[] for _ in self._variables]
+
+        for i, opcode in enumerate(self._opcodes):
+            if opcode == OP_VAR:
+                leaves[self._child1[i]].append(i)
+            elif opcode < OP_TRUE:
+                parent[self._child1[i]] = i
+                if opcode != OP_NOT:
+                    parent[self._child2[i]] = i
+
+        self._parent = parent
+        self._leaves = leaves
+        self._bindings = [None] * len(self._variables)
+        self._values = [None] * count
+        self.nodes_evaluated = 0
+
+        if val_bindings_map is not None:
+            index = BindingIndex.of(val_bindings_map)
+            self._bindings = [index.get(variable) for variable in self._variables]
+
+        self._evaluate_all()
+
+    @property
+    def variables(self):
+        return self._variables
+
+    @property
+    def value(self):
+        '''
+            Current value of the formula: True, False, or None when not determined by the bindings
+
+        '''
+        return self._values[-1]
+
+    def binding(self, variable):
+        '''
+            Return the value bound to variable, or None if it is unbound
+
+        '''
+        k = self._index.get(variable)
+        return None if k is None else self._bindings[k]
+
+    def bindings(self):
+        '''
+            Return the current bindings as a list of (NodeType, bool) pairs
+
+        '''
+        return [(variable, value) for variable, value in zip(self._variables, self._bindings) if value is not None]
+
+    def _compute(self, i):
+        opcode = self._opcodes[i]
+        values = self._values
+
+        if opcode == OP_VAR:
+            return self._bindings[self._child1[i]]
+        if opcode == OP_TRUE:
+            return True
+        if opcode == OP_FALSE:
+            return False
+
+        val1 = values[self._child1[i]]
+        if opcode == OP_NOT:
+            return None if val1 is None else not val1
+
+        val2 = values[self._child2[i]]
+        if opcode == OP_IMPLIES:
+            val1 = None if val1 is None else not val1
+        if opcode == OP_AND:
+            return False if val1 is False or val2 is False else (True if val1 and val2 else None)
+        return True if val1 is True or val2 is True else (False if val1 is False and val2 is False else None)
+
+    def _evaluate_all(self):
+        values = self._values
+        for i in range(len(values)):
+            values[i] = self._compute(i)
+        self.nodes_evaluated = len(values)
+
+    def set(self, variable, value):
+        '''
+            Change the binding of one variable and update the value of the formula
+
+            @Args:
+                variable    : The variable NodeType. Variables not in the formula are ignored
+                value       : True, False, or None to unbind the variable
+
+            @Return: the new value of the formula
+
+        '''
+        self.nodes_evaluated = 0
+        k = self._index.get(variable)
+        if k is None:
+            return self._values[-1]
+
+        value = None if value is None else value == True
+        if self._bindings[k] is value:
+            return self._values[-1]
+        self._bindings[k] = value
+
+        values = self._values
+        parent = self._parent
+        evaluated = 0
+
+        # ----- parents have larger indices than their children: re-evaluating dirty nodes
+        # ----- smallest index first computes each ancestor once, after all of its children
+        dirty = []
+        queued = set()
+        for leaf in self._leaves[k]:
+            values[leaf] = value
+            evaluated += 1
+            node = parent[leaf]
+            if node != NONE and node not in queued:
+                queued.add(node)
+                heapq.heappush(dirty, node)
+
+        while dirty:
+            node = heapq.heappop(dirty)
+            new_value = self._compute(node)
+            evaluated += 1
+            if new_value is values[node]:
+                continue
+            values[node] = new_value
+            node = parent[node]
+            if node != NONE and node not in queued:
+                queued.add(node)
+                heapq.heappush(dirty, node)
+
+        self.nodes_evaluated = evaluated
+        return values[-1]
+
+    def update(self, val_bindings_map):
+        '''
+            Change the bindings of several variables
+
+            @Args: val_bindings_map : A dict or list of (NodeType, bool or None) pairs
+
+            @Return: the new value of the formula
+
+        '''
+        if isinstance(val_bindings_map, dict):
+            val_bindings_map = val_bindings_map.items()
+
+        evaluated = 0
+        for variable, value in val_bindings_map:
+            self.set(variable, value)
+            evaluated += self.nodes_evaluated
+        self.nodes_evaluated = evaluated
+
+        return self._values[-1]
+
+    def __repr__(self):
+        return "IncrementalEvaluator(%s -> %s)" % (self.bindings(), self.value)
@@ -0,0 +1,199 @@
+'''
+    Optional instrumentation of the tree transforms.
+
+    When enabled, the PLTreeNode passes, reduce_to_CNF and the CNF helpers record into the
+    module instance metrics:
+
+        counters    nodes visited per pass (<pass>.nodes_visited), rewrites applied per
+                    rule (push_not_down.de_morgan, push_or_below_and.distribution, ...),
+                    copies, nodes_copied and nodes_allocated
+        timers      calls and total seconds of each pass and of each reduce_to_CNF stage
+                    (reduce_to_CNF.distribute, reduce_to_CNF.simplify, ...)
+
+    Registered callbacks receive every measure as it is recorded, e.g. to export it to a
+    monitoring system:
+
+        from plt_src.instrumentation import metrics
+
+        metrics.add_callback(lambda kind, name, value: print(kind, name, value))
+        with metrics:
+            pltree.reduce_to_CNF()
+        print(metrics.snapshot())
+
+    When disabled (the default), the transforms only test metrics.enabled once per pass,
+    and count rewrites in local variables they already hold, so the cost is negligible.
+
+'''
+import functools
+import time
+
+
+class Metrics:
+
+    def __init__(self):
+        '''
+            Counters, timers and callbacks, disabled until enable() is called
+
+        '''
+        self.enabled = False
+        self.counters = {}
+        self.timers = {}
+        self._callbacks = []
+        self._previous = []
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        '''
+            Clear all counters and timers. Callbacks stay registered
+
+        '''
+        self.counters = {}
+        self.timers = {}
+
+    def __enter__(self):
+        '''
+            Enable the metrics for the duration of a with statement, then restore the
+            previous setting
+
+        '''
+        self._previous.append(self.enabled)
+        self.enabled = True
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.enabled = self._previous.pop()
+
+    def add_callback(self, callback):
+        '''
+            Register a function called as callback(kind, name, value) for every measure
+            recorded: kind "count" with the increment, or "time" with the seconds elapsed
+
+        '''
+        self._callbacks.append(callback)
+
+    def remove_callback(self, callback):
+        self._callbacks.remove(callback)
+
+    def count(self, name, increment = 1):
+        '''
+            Increase a counter. Does nothing when disabled or when increment is 0
+
+        '''
+        if not self.enabled or not increment:
+            return
+        self.counters[name] = self.counters.get(name, 0) + increment
+        for callback in self._callbacks:
+            callback("count", name, increment)
+
+    def add_time(self, name, seconds):
+        '''
+            Record one call of a timed stage
+
+        '''
+        if not self.enabled:
+            return
+        timer = self.timers.get(name)
+        if timer is None:
+            timer = self.timers[name] = [0, 0.0]
+        timer[0] += 1
+        timer[1] += seconds
+        for callback in self._callbacks:
+            callback("time", name, seconds)
+
+    def timer(self, name):
+        '''
+            Return a context manager timing its block as stage name
+
+        '''
+        return _Timer(self, name) if self.enabled else _NO_TIMER
+
+    def counting(self, nodes, name):
+        '''
+            Wrap an iterable of nodes, such as a traversal, counting each node it yields
+            as <name>.nodes_visited. Returns nodes itself when disabled
+
+        '''
+        if not self.enabled:
+            return nodes
+        return self._counting(nodes, name + ".nodes_visited")
+
+    def _counting(self, nodes, counter):
+        visited = 0
+        try:
+            for node in nodes:
+                visited += 1
+                yield node
+        finally:
+            self.count(counter, visited)
+
+    def snapshot(self):
+        '''
+            Return the current measures as a dict, ready for JSON:
+
+                {"counters": {name: count}, "timers": {name: {"calls": n, "seconds": s}}}
+
+        '''
+        return {
+            "counters": dict(self.counters),
+            "timers": {name: {"calls": calls, "seconds": seconds} for name, (calls, seconds) in self.timers.items()},
+        }
+
+    def __repr__(self):
+        return "Metrics(%s, %d counters, %d timers)" % ("enabled" if self.enabled else "disabled",
+                                                        len(self.counters), len(self.timers))
+
+
+class _Timer:
+
+    __slots__ = ('_metrics', '_name', '_start')
+
+    def __init__(self, metrics, name):
+        self._metrics = metrics
+        self._name = name
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._metrics.add_time(self._name, time.perf_counter() - self._start)
+
+
+class _NoTimer:
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+
+_NO_TIMER = _NoTimer()
+
+metrics = Metrics()
+
+
+def timed(name):
+    '''
+        Decorator timing every call of a function as stage name while metrics are enabled
+
+    '''
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not metrics.enabled:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                metrics.add_time(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
@@ -0,0 +1,548 @@
+'''
+    Enumeration and exact counting of the models of a formula.
+
+    iter_models() is a lazy generator of the satisfying assignments, searching depth first
+    over partial assignments and yielding cubes: a cube binds only some variables and
+    stands for every assignment of the others, so don't-care variables do not multiply
+    the output. Cubes are disjoint, and memory stays proportional to the number of
+    variables times the size of the formula however many models there are:
+
+        for cube in iter_models(PLTreeNode.build_from_text("A | (B & C)")):
+            [(A, True)]  [(A, False), (B, True), (C, True)]
+
+    Formulas in CNF (and clause lists or a ClauseDatabase) are searched DPLL style, with
+    unit propagation on the clauses; other formulas are searched by three-valued
+    evaluation of the tree, branching only on variables the value still depends on.
+
+    count_models() is an exact #SAT counter for formulas far beyond enumeration. It works
+    on the CNF, or on the (full, not polarity aware) Tseitin encoding, whose models match
+    those of the formula one for one. After unit propagation the clauses are split into
+    connected components, counted separately and multiplied, and the count of every
+    component is cached so that a sub-problem met again along another branch is not
+    searched twice.
+
+    The auxiliary variables of a ClauseDatabase need not be determined by the others (the
+    polarity aware Tseitin encoding, or the budgeted distribution, only implies them one
+    way), so both project them out: they are never branched on, and clauses left with
+    auxiliary variables only are checked for satisfiability, standing for one assignment
+    of the formula variables.
+
+    Both use explicit stacks, so the number of variables is not limited by the Python
+    recursion limit.
+
+'''
+from collections import OrderedDict
+
+from plt_src import NodeType
+from plt_src.clause_database import ClauseDatabase
+
+DEFAULT_CACHE_SIZE = 1 << 18
+
+# ----- opcodes of the flattened tree searched by _tree_cubes
+_VAR = 0
+_TRUE = 1
+_FALSE = 2
+_NOT = 3
+_AND = 4
+_OR = 5
+_IMPLIES = 6
+
+_OPCODES = {NodeType.TRUE: _TRUE, NodeType.FALSE: _FALSE, NodeType.NOT: _NOT,
+            NodeType.AND: _AND, NodeType.OR: _OR, NodeType.IMPLIES: _IMPLIES}
+
+
+def iter_models(formula, variables = None, cubes = True):
+    '''
+        Lazily yield the models of a formula
+
+        @Args:
+            formula     : A PLTreeNode or PLDagNode, a ClauseDatabase, or a list of clauses
+                          of (NodeType, bool) literals
+            variables   : The variables of the assignments, which must include those of the
+                          formula. By default the variables of the formula in order of first
+                          occurrence (auxiliary variables of a ClauseDatabase excluded)
+            cubes       : If True, yield cubes: lists of (NodeType, bool) bindings such that
+                          every assignment extending them is a model. If False, yield every
+                          model as a complete list of bindings of variables
+
+        @Return: a generator of lists of (NodeType, bool) bindings, usable with
+                 apply_variable_bindings
+
+    '''
+    if isinstance(formula, (ClauseDatabase, list)):
+        database = formula if isinstance(formula, ClauseDatabase) else ClauseDatabase.from_clauses(formula)
+        generator = _clause_cubes(database)
+        formula_variables = [variable for variable in database.variables if variable not in database.auxiliary]
+    else:
+        from plt_src.sat_solver import clauses_from_cnf
+        formula_variables = _variables(formula)
+        try:
+            clauses = clauses_from_cnf(formula)
+        except ValueError:
+            generator = _tree_cubes(formula)
+        else:
+            database = ClauseDatabase(formula_variables)
+            for clause in clauses:
+                database.add_literal_clause(clause)
+            generator = _clause_cubes(database)
+
+    if variables is None:
+        variables = formula_variables
+    else:
+        missing = set(formula_variables).difference(variables)
+        if missing:
+            raise ValueError("%s missing from the variables" % ", ".join(sorted(str(variable) for variable in missing)))
+
+    if cubes:
+        return generator
+    return _expand(generator, variables)
+
+
+def count_models(formula, variables = None, stats = None, cache_size = DEFAULT_CACHE_SIZE):
+    '''
+        Count the models of a formula exactly
+
+        @Args:
+            formula     : A PLTreeNode or PLDagNode, a ClauseDatabase, or a list of clauses
+                          of (NodeType, bool) literals
+            variables   : The variables to count assignments of, which must include those of
+                          the formula. By default the variables of the formula (auxiliary
+                          variables of a ClauseDatabase excluded)
+            stats       : Optional dict, incremented with the number of "decisions",
+                          "components" and "cache_hits"
+            cache_size  : Maximum number of cached component counts
+
+        @Return: the number of satisfying assignments, an int of any size
+
+    '''
+    if isinstance(formula, (ClauseDatabase, list)):
+        database = formula if isinstance(formula, ClauseDatabase) else ClauseDatabase.from_clauses(formula)
+        formula_variables = [variable for variable in database.variables if variable not in database.auxiliary]
+        hidden = _hidden(database)
+    else:
+        # ----- the full Tseitin encoding determines its auxiliary variables: no projection
+        database = _clause_database(formula)
+        formula_variables = _variables(formula)
+        hidden = frozenset()
+
+    if variables is None:
+        variables = formula_variables
+    else:
+        missing = set(formula_variables).difference(variables)
+        if missing:
+            raise ValueError("%s missing from the variables" % ", ".join(sorted(str(variable) for variable in missing)))
+
+    counter = _Counter(cache_size, hidden)
+    count = counter.count([tuple(sorted(clause)) for clause in database], database.num_variables)
+
+    if stats is not None:
+        for key, value in counter.stats.items():
+            stats[key] = stats.get(key, 0) + value
+
+    # ----- from the variables of the database to the requested ones: the auxiliary
+    # ----- variables are determined by the others or projected out, and extra variables
+    # ----- are free
+    return count << (len(set(variables)) - len(formula_variables))
+
+
+def _variables(formula):
+    from plt_src.traversal import post_order
+    seen = set()
+    variables = []
+    for node in post_order(formula):
+        nodetype = node._type
+        if nodetype.is_var() and nodetype not in seen:
+            seen.add(nodetype)
+            variables.append(nodetype)
+    return variables
+
+
+def _hidden(database):
+    '''
+        The DIMACS numbers of the auxiliary variables of a database
+
+    '''
+    auxiliary = database.auxiliary
+    if not auxiliary:
+        return frozenset()
+    return frozenset(index + 1 for index, variable in enumerate(database.variables) if variable in auxiliary)
+
+
+def _num_visible(literals, hidden):
+    if not hidden:
+        return len(literals)
+    return sum(1 for lit in literals if abs(lit) not in hidden)
+
+
+def _satisfiable(clauses):
+    '''
+        Whether DIMACS clauses have a model, their variables renumbered from 1 for the solver
+
+    '''
+    from plt_src.sat_solver import SATSolver
+    numbers = {}
+    solver = SATSolver()
+    for clause in clauses:
+        solver.add_clause([numbers.setdefault(abs(lit), len(numbers) + 1) * (1 if lit > 0 else -1) for lit in clause])
+    return solver.solve()
+
+
+def _clause_database(formula):
+    '''
+        Clauses with exactly the models of the formula: its own clauses if it is in CNF,
+        otherwise the full Tseitin encoding
+
+    '''
+    from plt_src.sat_solver import clauses_from_cnf
+    database = ClauseDatabase(_variables(formula))
+    try:
+        clauses = clauses_from_cnf(formula)
+    except ValueError:
+        from plt_src.tseitin import tseitin_clauses
+        clauses, database.auxiliary = tseitin_clauses(formula)
+    for clause in clauses:
+        database.add_literal_clause(clause)
+    return database
+
+
+def _expand(generator, variables):
+    '''
+        Yield every complete assignment of variables covered by each cube
+
+    '''
+    for cube in generator:
+        bound = dict(cube)
+        free = [variable for variable in variables if variable not in bound]
+        for index in range(1 << len(free)):
+            bound.update((variable, bool((index >> j) & 1)) for j, variable in enumerate(free))
+            yield [(variable, bound[variable]) for variable in variables]
+
+
+def _propagate(clauses, literal):
+    '''
+        Assign literal and unit propagate, through occurrence lists so that only the
+        clauses of the assigned variables are looked at
+
+        @Return: (remaining clauses, list of the literals assigned), or None on a conflict.
+                 Satisfied clauses are removed and false literals dropped from the others
+
+    '''
+    occurrences = {}
+    for index, clause in enumerate(clauses):
+        for lit in clause:
+            occurrences.setdefault(lit, []).append(index)
+
+    satisfied = [False] * len(clauses)
+    false_count = [0] * len(clauses)
+    true = {literal}
+    assigned = [literal]
+    head = 0
+
+    while head < len(assigned):
+        lit = assigned[head]
+        head += 1
+        for index in occurrences.get(lit, ()):
+            satisfied[index] = True
+        for index in occurrences.get(-lit, ()):
+            if satisfied[index]:
+                continue
+            false_count[index] += 1
+            clause = clauses[index]
+            if false_count[index] == len(clause):
+                return None
+            if false_count[index] == len(clause) - 1:
+                for unit in clause:
+                    if -unit not in true:
+                        break
+                else:
+                    return None
+                if unit not in true:
+                    true.add(unit)
+                    assigned.append(unit)
+
+    remaining = []
+    for index, clause in enumerate(clauses):
+        if satisfied[index]:
+            continue
+        if false_count[index]:
+            clause = tuple(lit for lit in clause if -lit not in true)
+        remaining.append(clause)
+    return remaining, assigned
+
+
+def _branch_variable(clauses, hidden = frozenset()):
+    '''
+        The variable occurring in most clauses, preferring short clauses, hidden variables
+        excepted. None if there is no other
+
+    '''
+    scores = {}
+    for clause in clauses:
+        weight = 1.0 / len(clause)
+        for lit in clause:
+            var = abs(lit)
+            if var not in hidden:
+                scores[var] = scores.get(var, 0.0) + weight
+    if not scores:
+        return None
+    return max(scores, key = scores.get)
+
+
+def _initial(clauses):
+    '''
+        Drop the tautological clauses of a clause list and propagate its unit clauses
+
+        @Return: (clauses, literals assigned), or None if unsatisfiable
+
+    '''
+    assigned = []
+    for clause in clauses:
+        if not clause:
+            return None
+    clauses = [clause for clause in clauses if not any(-lit in clause for lit in clause)]
+    units = [clause[0] for clause in clauses if len(clause) == 1]
+    for unit in units:
+        if -unit in assigned:
+            return None
+        if unit in assigned:
+            continue
+        result = _propagate(clauses, unit)
+        if result is None:
+            return None
+        clauses, literals = result
+        assigned += literals
+    return clauses, assigned
+
+
+def _clause_cubes(database):
+    variables = database.variables
+    auxiliary = database.auxiliary
+
+    def cube(literals):
+        return [(variables[abs(lit) - 1], lit > 0) for lit in sorted(literals, key = abs)
+                if variables[abs(lit) - 1] not in auxiliary]
+
+    start = _initial([tuple(clause) for clause in database])
+    if start is None:
+        return
+    hidden = _hidden(database)
+
+    # ----- depth first over (clauses left, literals assigned so far)
+    stack = [start]
+    while stack:
+        clauses, assigned = stack.pop()
+        var = _branch_variable(clauses, hidden)
+        if var is None:
+            # ----- no formula variable left: the auxiliary ones only have to exist
+            if not clauses or _satisfiable(clauses):
+                yield cube(assigned)
+            continue
+        for literal in (-var, var):
+            result = _propagate(clauses, literal)
+            if result is not None:
+                stack.append((result[0], assigned + result[1]))
+
+
+def _tree_cubes(formula):
+    from plt_src.traversal import post_order
+
+    # ----- the formula as parallel lists in post order; children are indices
+    opcodes = []
+    first = []
+    second = []
+    leaves = []
+    indices = []
+    for node in post_order(formula):
+        nodetype = node._type
+        if nodetype.is_var():
+            opcodes.append(_VAR)
+            leaves.append(nodetype)
+            first.append(-1)
+            second.append(-1)
+        else:
+            opcodes.append(_OPCODES[nodetype])
+            leaves.append(None)
+            b = indices.pop() if nodetype.arity == 2 else -1
+            a = indices.pop() if nodetype.arity >= 1 else -1
+            first.append(a)
+            second.append(b)
+        indices.append(len(opcodes) - 1)
+
+    size = len(opcodes)
+    root = size - 1
+    values = [None] * size
+
+    def evaluate(assignment):
+        for k in range(size):
+            opcode = opcodes[k]
+            if opcode == _VAR:
+                values[k] = assignment.get(leaves[k])
+            elif opcode == _TRUE:
+                values[k] = True
+            elif opcode == _FALSE:
+                values[k] = False
+            elif opcode == _NOT:
+                a = values[first[k]]
+                values[k] = None if a is None else not a
+            else:
+                a = values[first[k]]
+                b = values[second[k]]
+                if opcode == _IMPLIES:
+                    a = None if a is None else not a
+                if opcode == _AND:
+                    values[k] = False if a is False or b is False else (True if a is True and b is True else None)
+                else:
+                    values[k] = True if a is True or b is True else (False if a is False and b is False else None)
+        return values[root]
+
+    def undecided_variable():
+        # ----- follow undecided children down to an unassigned leaf, taking a leaf child
+        # ----- when there is one: shallow variables decide more and give shorter cubes
+        k = root
+        while opcodes[k] != _VAR:
+            a = first[k]
+            b = second[k]
+            if values[a] is not None or (b >= 0 and values[b] is None and opcodes[b] == _VAR and opcodes[a] != _VAR):
+                k = b
+            else:
+                k = a
+        return leaves[k]
+
+    stack = [{}]
+    while stack:
+        assignment = stack.pop()
+        value = evaluate(assignment)
+        if value is True:
+            yield list(assignment.items())
+        elif value is None:
+            variable = undecided_variable()
+            for boolean in (False, True):
+                branch = dict(assignment)
+                branch[variable] = boolean
+                stack.append(branch)
+
+
+class _Counter:
+
+    def __init__(self, cache_size, hidden = frozenset()):
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+        self._hidden = hidden
+        self.stats = {"decisions": 0, "components": 0, "cache_hits": 0}
+
+    def count(self, clauses, num_variables):
+        '''
+            Count the models of DIMACS clauses over variables 1 .. num_variables, projected
+            on the variables that are not hidden
+
+        '''
+        hidden = self._hidden
+        start = _initial(clauses)
+        if start is None:
+            return 0
+        clauses, assigned = start
+        components, num_remaining = _components(clauses, hidden)
+
+        total = 1 << (num_variables - len(hidden) - _num_visible(assigned, hidden) - num_remaining)
+        for component in components:
+            total *= self._count_component(component)
+            if not total:
+                break
+        return total
+
+    def _count_component(self, clauses):
+        '''
+            Count the models of a connected set of clauses over the variables they contain.
+            Each frame of the explicit stack is a generator that yields the components it
+            needs counted and receives their counts
+
+        '''
+        stack = [self._frame(clauses, _key(clauses))]
+        result = None
+        while stack:
+            try:
+                component = stack[-1].send(result)
+            except StopIteration as stop:
+                stack.pop()
+                result = stop.value
+                continue
+
+            key = _key(component)
+            result = self._cache.get(key)
+            if result is None:
+                stack.append(self._frame(component, key))
+            else:
+                self._cache.move_to_end(key)
+                self.stats["cache_hits"] += 1
+        return result
+
+    def _frame(self, clauses, key):
+        self.stats["components"] += 1
+        hidden = self._hidden
+        variables = set(abs(lit) for clause in clauses for lit in clause)
+        num_variables = len(variables.difference(hidden)) if hidden else len(variables)
+        var = _branch_variable(clauses, hidden)
+
+        total = 0
+        if var is None:
+            # ----- hidden variables only: one assignment of the others if they have a model
+            total = 1 if _satisfiable(clauses) else 0
+
+        for literal in () if var is None else (var, -var):
+            self.stats["decisions"] += 1
+            result = _propagate(clauses, literal)
+            if result is None:
+                continue
+            remaining, assigned = result
+            components, num_remaining = _components(remaining, hidden)
+            count = 1 << (num_variables - _num_visible(assigned, hidden) - num_remaining)
+            for component in components:
+                count *= yield component
+                if not count:
+                    break
+            total += count
+
+        self._cache[key] = total
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last = False)
+        return total
+
+
+def _key(clauses):
+    return tuple(sorted(clauses))
+
+
+def _components(clauses, hidden = frozenset()):
+    '''
+        Split clauses into lists sharing no variable, with a union-find over the variables
+
+        @Return: (list of the components, number of variables of the clauses, hidden
+                 variables excepted)
+
+    '''
+    parent = {}
+    for clause in clauses:
+        for lit in clause:
+            parent[abs(lit)] = abs(lit)
+
+    def find(var):
+        root = var
+        while parent[root] != root:
+            root = parent[root]
+        while parent[var] != root:
+            parent[var], var = root, parent[var]
+        return root
+
+    for clause in clauses:
+        root = find(abs(clause[0]))
+        for lit in clause[1:]:
+            other = find(abs(lit))
+            if other != root:
+                parent[other] = root
+
+    components = {}
+    for clause in clauses:
+        components.setdefault(find(abs(clause[0])), []).append(clause)
+    if hidden:
+        return list(components.values()), sum(1 for var in parent if var not in hidden)
+    return list(components.values()), len(parent)
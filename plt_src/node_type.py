@@ -1,8 +1,36 @@
+import re
+import string
+
+
+# ----- opcodes of the NodeTypes, also the opcodes stored in PLFlatFormula.opcodes
+OP_IMPLIES  = 0
+OP_AND      = 1
+OP_OR       = 2
+OP_NOT      = 3
+OP_TRUE     = 4
+OP_FALSE    = 5
+OP_VAR      = 6
+
+_OPERATOR_OPCODES = {"implies": OP_IMPLIES, "and": OP_AND, "or": OP_OR, "not": OP_NOT, "true": OP_TRUE, "false": OP_FALSE}
+
+# ----- variable names: anything that prints and parses back as a single token
+_VARIABLE_NAME = re.compile(r'[A-Za-z_][A-Za-z0-9_.\[\]]*')
 
 
 class NodeTypeBase():
+    '''
+        NodeTypes are interned: constructing one with the same prefix name, arity and
+        variable flag as an existing one returns the existing object. Two NodeTypes are
+        therefore equal exactly when they are the same object, so == and "is" are plain
+        identity checks, and NodeTypes can be used as dict keys at no cost.
+
+    '''
 
-    def __init__(self, prefix_name, infix_name, arity, is_var = False):
+    __slots__ = ('_prefix_name', '_infix_name', '_arity', '_is_var', '_opcode', '_hash', '_var_id')
+
+    _interned = {}
+
+    def __new__(cls, prefix_name, infix_name, arity, is_var = False):
         '''
             Construct an NodeType: this cannot be called by the programmer
             
@@ -13,10 +41,22 @@ class NodeTypeBase():
                 is_var (bool)   : True if this element is a variable
 
         '''
-        self._prefix_name = prefix_name
-        self._infix_name = infix_name
-        self._arity = arity
-        self._is_var = is_var
+        key = (prefix_name, arity, is_var)
+        nodetype = cls._interned.get(key)
+        if nodetype is not None:
+            return nodetype
+
+        nodetype = object.__new__(cls)
+        nodetype._prefix_name = prefix_name
+        nodetype._infix_name = infix_name
+        nodetype._arity = arity
+        nodetype._is_var = is_var
+        nodetype._opcode = OP_VAR if is_var else _OPERATOR_OPCODES.get(prefix_name)
+        nodetype._hash = hash(key)
+        nodetype._var_id = symbols._register(nodetype) if is_var else None
+
+        cls._interned[key] = nodetype
+        return nodetype
 
     @property
     def prefix_name(self):
@@ -33,15 +73,37 @@ class NodeTypeBase():
     def is_var(self):
         return self._is_var
 
+    @property
+    def opcode(self):
+        '''
+            Small integer identifying the NodeType: one of OP_IMPLIES ... OP_FALSE for the
+            operators and constants, OP_VAR for every variable
+
+        '''
+        return self._opcode
+
+    @property
+    def var_id(self):
+        '''
+            Dense integer ID of a variable (0, 1, 2, ... in order of creation), usable as an
+            index into arrays sized len(symbols); None for operators and constants
+
+        '''
+        return self._var_id
+
     @classmethod
     def Variable(cls, val : str):
         '''
-            Create a NodeType of Variables (any from A - Z)
+            Create (or look up) the NodeType of a variable
             @Args:
-                val (char): single char from "A" to "Z"
+                val (str): single char from "A" to "Z" (lower case letters give the same
+                           variable as upper case ones), or any longer name made of letters,
+                           digits and _ . [ ], such as aux1, x12 or valve_3.open
         '''
-        if isinstance(val,str) and val.isalpha and len(val) == 1:
+        if isinstance(val,str) and len(val) == 1 and val.isalpha():
             return cls(val.upper(), val.upper(), 0, True)
+        elif isinstance(val,str) and _VARIABLE_NAME.fullmatch(val) and val not in _OPERATOR_OPCODES:
+            return cls(val, val, 0, True)
         else:
             raise ValueError("%s is not a valid name for NodeType object"%val)
 
@@ -51,10 +113,93 @@ class NodeTypeBase():
     def __repr__(self):
         return self.prefix_name
 
-    def __eq__(self, other):
-        return self.__dict__ == other.__dict__
+    def __hash__(self):
+        return self._hash
 
-    
+    def __reduce__(self):
+        # ----- unpickling goes through __new__, so it returns the interned object
+        return (NodeTypeBase, (self._prefix_name, self._infix_name, self._arity, self._is_var))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+class SymbolTable():
+    '''
+        The variables of the process, in order of creation: maps names to variable
+        NodeTypes and dense integer IDs (NodeType.var_id) back to NodeTypes, all in O(1).
+        Use the module instance, symbols.
+
+            symbols.variable("pump_on")     the variable named pump_on, created if needed
+            symbols["pump_on"]              the same, raising KeyError if it does not exist
+            symbols[7]                      the variable with var_id 7
+
+        IDs are local to the process: a NodeType sent to another process (pickled) is
+        interned there by name and may get a different ID.
+
+    '''
+
+    def __init__(self):
+        self._variables = []
+        self._by_name = {}
+
+    def _register(self, nodetype):
+        var_id = len(self._variables)
+        self._variables.append(nodetype)
+        self._by_name[nodetype.prefix_name] = nodetype
+        return var_id
+
+    def variable(self, name):
+        '''
+            Return the variable named name, creating it if needed (see NodeTypeBase.Variable)
+
+        '''
+        nodetype = self._by_name.get(name)
+        if nodetype is None:
+            nodetype = NodeTypeBase.Variable(name)
+        return nodetype
+
+    def get(self, name, default = None):
+        '''
+            Return the existing variable named name, or default
+
+        '''
+        if len(name) == 1:
+            name = name.upper()
+        return self._by_name.get(name, default)
+
+    def fresh(self, prefix):
+        '''
+            Create a variable named prefix<N> that does not exist yet, for the smallest N >= 1
+
+        '''
+        index = 1
+        while "%s%d" % (prefix, index) in self._by_name:
+            index += 1
+        return self.variable("%s%d" % (prefix, index))
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return self._variables[key]
+        nodetype = self.get(key)
+        if nodetype is None:
+            raise KeyError(key)
+        return nodetype
+
+    def __contains__(self, name):
+        return self.get(name) is not None
+
+    def __len__(self):
+        return len(self._variables)
+
+    def __iter__(self):
+        return iter(self._variables)
+
+
+symbols = SymbolTable()
 
 
 class NodeType():
@@ -71,13 +216,19 @@ class NodeType():
     TRUE    = NodeTypeBase( "true",      u"\u22A4" , 0 )
     FALSE   = NodeTypeBase( "false",     u"\u22A5" , 0 )
 
-    
-    import string
+
+# ----- A - Z and a - z: lower case letters are the same objects as upper case ones
+for _letter in string.ascii_letters:
+    setattr(NodeType, _letter, NodeTypeBase.Variable(_letter))
+
+
+def variable_named(name):
     '''
-        Create NodeTypeBase objects of type A = NodeTypeBase.Variable("A") for all uppercase alphabets A - Z
+        Return the variable NodeType printed as name: NodeType.<name> for a single letter,
+        else the named variable of the symbol table (such as aux1 or x12)
+
     '''
-    for a in list(string.ascii_letters):
-        exec("%s = NodeTypeBase.Variable('%s')" % (a, a))
+    return symbols.variable(name)
 
 
 
@@ -0,0 +1,251 @@
+'''
+    Parser for formulas written in prefix or infix notation.
+
+    Both notations printed by in_prefix_notation and in_infix_notation are accepted, and
+    may be mixed:
+
+        implies(or(R,P),and(true,not(Q)))
+        ((R∨P)→(⊤∧¬Q))
+
+    Infix input may also use the ASCII aliases -> & | ~ for → ∧ ∨ ¬ and the names true and
+    false for ⊤ and ⊥. Parentheses may be left out: ¬ binds tightest, then ∧, then ∨,
+    then →; ∧ and ∨ group to the left and → to the right, so A→B∧C∨D means A→((B∧C)∨D).
+
+    Single letter names are the variables NodeType.A - NodeType.Z; longer names (such as
+    the auxiliary variables aux1, aux2, ... or pump_3.on) are looked up in, or added to,
+    the symbol table (node_type.symbols).
+
+    The text is split into tokens by one regular expression, each operator token is
+    resolved by a single dict lookup and each name by one symbol table lookup, and the tokens are parsed in a single pass with an operator stack
+    (shunting-yard) straight into reverse polish order, so nesting depth is not limited by
+    the Python recursion limit.
+
+'''
+import re
+
+from plt_src import NodeType
+from plt_src.node_type import symbols, variable_named
+
+_TOKENS = re.compile(r'[A-Za-z_][A-Za-z0-9_.\[\]]*(?:\s*\()?|->|\S')
+
+# ----- every token maps to an action (kind, precedence, NodeType)
+_OPERAND = 0
+_UNARY   = 1
+_BINARY  = 2
+_CALL    = 3
+_OPEN    = 4
+_CLOSE   = 5
+_COMMA   = 6
+
+# ----- binary operators group to the left, except implies; "(" and calls have precedence 0
+_IMPLIES = 1
+
+_ACTIONS = {
+    u"\u2192"  : (_BINARY, _IMPLIES, NodeType.IMPLIES),
+    "->"       : (_BINARY, _IMPLIES, NodeType.IMPLIES),
+    u"\u2228"  : (_BINARY, 2, NodeType.OR),
+    "|"        : (_BINARY, 2, NodeType.OR),
+    u"\u2227"  : (_BINARY, 3, NodeType.AND),
+    "&"        : (_BINARY, 3, NodeType.AND),
+    u"\u00AC"  : (_UNARY, 4, NodeType.NOT),
+    "~"        : (_UNARY, 4, NodeType.NOT),
+
+    "implies(" : (_CALL, 0, NodeType.IMPLIES),
+    "and("     : (_CALL, 0, NodeType.AND),
+    "or("      : (_CALL, 0, NodeType.OR),
+    "not("     : (_CALL, 0, NodeType.NOT),
+
+    "true"     : (_OPERAND, 0, NodeType.TRUE),
+    "false"    : (_OPERAND, 0, NodeType.FALSE),
+    u"\u22A4"  : (_OPERAND, 0, NodeType.TRUE),
+    u"\u22A5"  : (_OPERAND, 0, NodeType.FALSE),
+
+    "("        : (_OPEN, 0, None),
+    ")"        : (_CLOSE, 0, None),
+    ","        : (_COMMA, 0, None),
+}
+
+
+def _action(token):
+    '''
+        Action of a token missing from _ACTIONS: a variable name, or a call written with
+        blanks before its "(". Variables are resolved through the symbol table, _ACTIONS
+        holding the operators only
+
+    '''
+    variable = symbols.get(token)
+    if variable is not None:
+        return (_OPERAND, 0, variable)
+
+    if token[-1] == "(":
+        name = token[:-1].rstrip()
+        action = _ACTIONS.get(name + "(")
+        if action is None:
+            raise ValueError("Unknown operator %s" % name)
+        return action
+
+    if not (token[0].isalpha() or token[0] == "_"):
+        raise ValueError("Unknown symbol %s" % token)
+    if token + "(" in _ACTIONS:
+        raise ValueError("%s must be followed by (" % token)
+
+    return (_OPERAND, 0, variable_named(token))
+
+
+def parse_reverse_polish(text):
+    '''
+        Parse a formula in prefix or infix notation
+
+        @Args: text     : The formula, e.g. "implies(or(R,P),and(true,not(Q)))" or "(R | P) -> ~Q"
+
+        @Return: the list of NodeType objects of the formula in reverse polish notation, as
+                 taken by build_from_reverse_polish
+
+    '''
+    actions = _ACTIONS
+    output = []
+    append = output.append
+    operators = []
+    arguments = []
+    expect_operand = True
+
+    for token in _TOKENS.findall(text):
+        action = actions.get(token)
+        if action is None:
+            action = _action(token)
+        kind = action[0]
+
+        if kind == _OPERAND:
+            if not expect_operand:
+                raise ValueError("Unexpected %s in %s" % (token, text))
+            append(action[2])
+            expect_operand = False
+
+        elif kind == _BINARY:
+            if expect_operand:
+                raise ValueError("Missing operand before %s in %s" % (token, text))
+
+            # ----- pop tighter operators, and equal ones too unless right associative
+            precedence = action[1]
+            while operators and (operators[-1][1] > precedence or (operators[-1][1] == precedence and precedence != _IMPLIES)):
+                append(operators.pop()[2])
+            operators.append(action)
+            expect_operand = True
+
+        elif kind == _UNARY or kind == _OPEN or kind == _CALL:
+            if not expect_operand:
+                raise ValueError("Unexpected %s in %s" % (token, text))
+            operators.append(action)
+            if kind == _CALL:
+                arguments.append(1)
+
+        else:
+            if expect_operand:
+                raise ValueError("Missing operand before %s in %s" % (token, text))
+            while operators and operators[-1][1]:
+                append(operators.pop()[2])
+            if not operators:
+                raise ValueError("Unbalanced %s in %s" % (token, text))
+
+            top = operators[-1]
+            if kind == _COMMA:
+                if top[0] != _CALL or arguments[-1] >= top[2].arity:
+                    raise ValueError("Unexpected , in %s" % text)
+                arguments[-1] += 1
+                expect_operand = True
+            else:
+                operators.pop()
+                if top[0] == _CALL:
+                    if arguments.pop() != top[2].arity:
+                        raise ValueError("%s takes %d arguments in %s" % (top[2].prefix_name, top[2].arity, text))
+                    append(top[2])
+
+    if expect_operand:
+        raise ValueError("Incomplete formula %s" % text)
+
+    while operators:
+        action = operators.pop()
+        if action[1] == 0:
+            raise ValueError("Unbalanced ( in %s" % text)
+        append(action[2])
+
+    return output
+
+
+def parse_rpn(text):
+    '''
+        Parse a formula written in reverse polish notation as blank separated tokens: the
+        prefix names (and, or, not, implies, true, false), infix symbols or ASCII aliases
+        of the operators, and variable names
+
+            "R P or true Q not and implies" or "R P | ⊤ Q ~ & ->"
+
+        @Return: the list of NodeType objects, checked to describe a single formula
+
+    '''
+    output = []
+    depth = 0
+
+    for token in text.split():
+        action = _ACTIONS.get(token) or _ACTIONS.get(token + "(")
+        if action is None:
+            action = _action(token)
+
+        kind = action[0]
+        if kind == _OPERAND:
+            depth += 1
+        elif kind == _UNARY or kind == _BINARY or kind == _CALL:
+            arity = action[2].arity
+            if depth < arity:
+                raise ValueError("Missing operand for %s in %s" % (token, text))
+            depth += 1 - arity
+        else:
+            raise ValueError("Unexpected %s in %s" % (token, text))
+
+        output.append(action[2])
+
+    if depth != 1:
+        raise ValueError("Incomplete or wrong sequence %s" % text)
+
+    return output
+
+
+def parse(text, builder = None):
+    '''
+        Parse a formula in prefix or infix notation into a tree
+
+        @Args:
+            text        : The formula
+            builder     : Class with a build_from_reverse_polish classmethod (PLTreeNode by
+                          default, or PLDagNode, PLFlatFormula)
+
+    '''
+    if builder is None:
+        from plt_src import PLTreeNode
+        builder = PLTreeNode
+    return builder.build_from_reverse_polish(parse_reverse_polish(text))
+
+
+def parse_lines(file, builder = None):
+    '''
+        Parse a file (or any iterable of lines) holding one formula per line, skipping
+        blank lines. Yields one tree per formula, so any number of formulas can be read.
+
+        @Args:
+            file        : A path or an iterable of lines, such as an open text file
+            builder     : As in parse()
+
+    '''
+    if isinstance(file, str):
+        with open(file, "r") as lines:
+            yield from parse_lines(lines, builder)
+        return
+
+    if builder is None:
+        from plt_src import PLTreeNode
+        builder = PLTreeNode
+
+    build = builder.build_from_reverse_polish
+    for line in file:
+        if line and not line.isspace():
+            yield build(parse_reverse_polish(line))
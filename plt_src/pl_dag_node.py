@@ -0,0 +1,461 @@
+import weakref
+from plt_src import NodeType
+from plt_src.traversal import post_order, prefix_tokens, infix_tokens
+from plt_src.binding_index import BindingIndex
+
+
+class PLDagNodeTable:
+
+    def __init__(self):
+        '''
+            A unique table interning PLDagNode objects by (type, child1, child2).
+
+            Two structurally identical sub-formulas built through the same table are
+            always the same object, so a formula is stored as a DAG in which every
+            distinct sub-formula exists exactly once. Entries are held weakly and
+            disappear once no formula refers to them any more.
+
+        '''
+        self._table = weakref.WeakValueDictionary()
+
+    def __len__(self):
+        return len(self._table)
+
+    def make(self, nodetype, child1 = None, child2 = None):
+        '''
+            Return the unique node for (nodetype, child1, child2), creating it if needed
+
+            @Args:
+                nodetype        : The NodeType represented by the node
+                child1          : The first child (a PLDagNode of this table), or None
+                child2          : The second child (a PLDagNode of this table), or None
+
+            @Return: the interned PLDagNode
+
+        '''
+        key = (nodetype, child1, child2)
+        node = self._table.get(key)
+        if node is None:
+            node = PLDagNode(nodetype, child1, child2, self)
+            self._table[key] = node
+        return node
+
+    def build_from_reverse_polish(self, list_of_nodetypes):
+        '''
+            Same as PLTreeNode.build_from_reverse_polish, but builds interned nodes of this table
+
+            @Args: list_of_nodetypes    : List of NodeType objects in a valid propositional logic expression in reverse polish notation
+
+            @Return : the PLDagNode of the root of the expression
+
+        '''
+        if len(list_of_nodetypes) == 0:
+            raise ValueError("NodeType list empty")
+
+        retval = []
+
+        for node in list_of_nodetypes:
+            arity = node.arity
+
+            if arity == 0:
+                retval.append(self.make(node))
+            elif arity == 1:
+                child1 = retval.pop()
+                retval.append(self.make(node, child1))
+            elif arity == 2:
+                child2 = retval.pop()
+                child1 = retval.pop()
+                retval.append(self.make(node, child1, child2))
+
+        if len(retval) != 1:
+            raise ValueError("Incomplete or wrong sequence given. Tree creation failed.")
+
+        return retval.pop()
+
+
+class PLDagNode:
+    '''
+        Immutable, hash-consed propositional logic node.
+
+        Nodes are only created through a PLDagNodeTable, which guarantees that equal
+        sub-formulas are the same object. Equality is therefore identity, and the
+        rewrite passes below never copy: they return new (shared) nodes and leave
+        the input untouched. Each pass visits every distinct node once, without
+        recursion, so its cost is linear in the number of distinct sub-formulas.
+
+        The passes mirror the in-place passes of PLTreeNode and produce the same
+        formulas; use from_tree() and to_tree() to move between the two.
+
+    '''
+
+    __slots__ = ('_type', '_child1', '_child2', '_table', '__weakref__')
+
+    # ----- table used when none is given explicitly
+    default_table = PLDagNodeTable()
+
+    def __init__(self, nodetype, child1, child2, table):
+        '''
+            Internal constructor: use PLDagNodeTable.make() to obtain nodes.
+
+        '''
+        self._type = nodetype
+        self._child1 = child1
+        self._child2 = child2
+        self._table = table
+
+    @property
+    def nodetype(self):
+        return self._type
+
+    @property
+    def child1(self):
+        return self._child1
+
+    @property
+    def child2(self):
+        return self._child2
+
+    @property
+    def table(self):
+        return self._table
+
+    @classmethod
+    def build_from_reverse_polish(cls, list_of_nodetypes, table = None):
+        '''
+            Build an interned formula from a list of NodeType objects in reverse polish notation
+
+            @Args:
+                list_of_nodetypes   : List of NodeType objects in reverse polish notation
+                table               : PLDagNodeTable to intern into (default: PLDagNode.default_table)
+
+        '''
+        table = cls.default_table if table is None else table
+        return table.build_from_reverse_polish(list_of_nodetypes)
+
+    @classmethod
+    def from_tree(cls, pltree, table = None):
+        '''
+            Convert a PLTreeNode into an interned PLDagNode. The tree is not modified.
+
+            @Args:
+                pltree              : The PLTreeNode root to convert
+                table               : PLDagNodeTable to intern into (default: PLDagNode.default_table)
+
+        '''
+        return cls.build_from_reverse_polish(pltree.get_reverse_polish(), table)
+
+    def to_tree(self):
+        '''
+            Convert back into a freshly allocated PLTreeNode. Shared sub-formulas are
+            expanded into separate sub-trees, as PLTreeNode is mutable.
+
+        '''
+        from plt_src import PLTreeNode
+        return PLTreeNode.build_from_reverse_polish(self.get_reverse_polish())
+
+    def _make(self, nodetype, child1 = None, child2 = None):
+        return self._table.make(nodetype, child1, child2)
+
+    def get_reverse_polish(self, node_queue = None):
+        '''
+            Returns the list of NodeType entries describing this formula in reverse polish notation
+
+        '''
+        if node_queue is None:
+            node_queue = []
+
+        node_queue.extend([node._type for node in post_order(self)])
+
+        return node_queue
+
+    def in_prefix_notation(self):
+        '''
+            Returns the string of this formula in prefix notation, e.g. implies(or(R,P),and(true,not(Q)))
+
+        '''
+        return "".join(prefix_tokens(self))
+
+    def in_infix_notation(self):
+        '''
+            Returns the string of this formula in infix notation, e.g. ((R∨P)→(⊤∧¬Q))
+
+        '''
+        return "".join(infix_tokens(self))
+
+    def _rebuild(self, rule):
+        '''
+            Rebuild the formula bottom-up, once per distinct node
+
+            @Args:
+                rule            : function (node, new_child1, new_child2) -> new node
+
+        '''
+        memo = {}
+
+        for node in post_order(self, distinct = True):
+            child1 = memo[node._child1] if node._child1 is not None else None
+            child2 = memo[node._child2] if node._child2 is not None else None
+            memo[node] = rule(node, child1, child2)
+
+        return memo[self]
+
+    def eliminate_implies(self):
+        '''
+            Return the formula with every x→y replaced by ¬x∨y
+
+        '''
+        make = self._table.make
+
+        def rule(node, child1, child2):
+            if node._type is NodeType.IMPLIES:
+                return make(NodeType.OR, make(NodeType.NOT, child1), child2)
+            return make(node._type, child1, child2)
+
+        return self._rebuild(rule)
+
+    def push_not_down(self):
+        '''
+            Return the formula with negations pushed down to the leaves:
+            ¬¬x becomes x, ¬(x∨y) becomes (¬x∧¬y) and ¬(x∧y) becomes (¬x∨¬y)
+
+        '''
+        make = self._table.make
+        memo = {}
+
+        # ----- walk (node, negated) pairs: the polarity travels down, the result is built up
+        for key in post_order((self, False), children = _polarity_children, distinct = True):
+            node, negated = key
+            nodetype = node._type
+
+            if nodetype is NodeType.NOT:
+                result = memo[(node._child1, not negated)]
+            elif negated and nodetype is NodeType.AND:
+                result = make(NodeType.OR, memo[(node._child1, True)], memo[(node._child2, True)])
+            elif negated and nodetype is NodeType.OR:
+                result = make(NodeType.AND, memo[(node._child1, True)], memo[(node._child2, True)])
+            elif negated:
+                # ----- leaves and implications keep an explicit NOT on top
+                result = make(NodeType.NOT, memo[(node, False)])
+            elif nodetype.arity == 0:
+                result = node
+            else:
+                result = make(nodetype, memo[(node._child1, False)], memo[(node._child2, False)])
+
+            memo[key] = result
+
+        return memo[(self, False)]
+
+    def push_or_below_and(self):
+        '''
+            Return the formula with OR distributed over AND:
+            x∨(y∧z) becomes (x∨y)∧(x∨z) and (x∧y)∨z becomes (x∨z)∧(y∨z)
+
+        '''
+        make = self._table.make
+
+        def rule(node, child1, child2):
+            if node._type is not NodeType.OR:
+                return make(node._type, child1, child2)
+
+            # ----- both children are already distributed: pair up their conjuncts
+            return self._map_conjuncts(child1, lambda left: self._map_conjuncts(child2, lambda right: make(NodeType.OR, left, right)))
+
+        return self._rebuild(rule)
+
+    def _map_conjuncts(self, node, function):
+        '''
+            Rebuild the AND skeleton on top of node, replacing each operand x that is not
+            itself a conjunction by function(x)
+
+        '''
+        make = self._table.make
+        results = []
+
+        for current in post_order(node, children = _conjunct_children):
+            if current._type is NodeType.AND:
+                child2 = results.pop()
+                child1 = results.pop()
+                results.append(make(NodeType.AND, child1, child2))
+            else:
+                results.append(function(current))
+
+        return results.pop()
+
+    def make_and_or_right_deep(self):
+        '''
+            Return the formula with nested conjunctions and disjunctions turned into right deep chains:
+            (W∨X)∨(Y∨Z) and ((W∨X)∨Y)∨Z both become W∨(X∨(Y∨Z))
+
+        '''
+        make = self._table.make
+        operands = {}
+        memo = {}
+
+        def children(node):
+            # ----- a conjunction (disjunction) depends directly on the operands of the
+            # ----- whole cluster of conjunctions (disjunctions) below it
+            if node._type is not NodeType.AND and node._type is not NodeType.OR:
+                return tuple(child for child in (node._child1, node._child2) if child is not None)
+            if node not in operands:
+                operands[node] = _cluster_operands(node)
+            return operands[node]
+
+        for node in post_order(self, children = children, distinct = True):
+            nodetype = node._type
+
+            if nodetype is NodeType.AND or nodetype is NodeType.OR:
+                cluster = operands[node]
+                result = memo[cluster[-1]]
+                for operand in reversed(cluster[:-1]):
+                    result = make(nodetype, memo[operand], result)
+            elif nodetype.arity == 0:
+                result = node
+            else:
+                result = make(nodetype, memo[node._child1], memo[node._child2] if node._child2 is not None else None)
+
+            memo[node] = result
+
+        return memo[self]
+
+    def evaluate_constant_subtrees(self):
+        '''
+            Return the formula with constant sub-trees folded, without making deep comparisons,
+            e.g. ⊥∧(A∨B) becomes ⊥ and ⊤→A becomes A.
+
+        '''
+        make = self._table.make
+
+        def rule(node, child1, child2):
+            nodetype = node._type
+
+            if nodetype.arity == 0:
+                return node
+
+            elif nodetype.arity == 1:
+                if child1._type is NodeType.TRUE:
+                    return make(NodeType.FALSE)
+                elif child1._type is NodeType.FALSE:
+                    return make(NodeType.TRUE)
+                return make(nodetype, child1)
+
+            return self._fold_binary(nodetype, child1, child2)
+
+        return self._rebuild(rule)
+
+    def with_variable_bindings(self, val_bindings_map):
+        '''
+            Return the formula with a set of variable bindings applied and constant
+            sub-trees folded in the same pass. Unaffected sub-formulas are shared.
+
+            @Args: val_bindings_map    : A BindingIndex, dict, or list of (NodeType, bool) pairs
+
+        '''
+        index = BindingIndex.of(val_bindings_map)
+        make = self._table.make
+
+        def rule(node, child1, child2):
+            nodetype = node._type
+
+            if nodetype.arity == 0:
+                val = index.get(nodetype) if nodetype.is_var() else None
+                if val is None:
+                    return node
+                return make(NodeType.TRUE if val else NodeType.FALSE)
+
+            elif nodetype.arity == 1:
+                if child1._type is NodeType.TRUE:
+                    return make(NodeType.FALSE)
+                elif child1._type is NodeType.FALSE:
+                    return make(NodeType.TRUE)
+                return make(nodetype, child1)
+
+            return self._fold_binary(nodetype, child1, child2)
+
+        return self._rebuild(rule)
+
+    def _fold_binary(self, nodetype, child1, child2):
+        val1 = _constant_value(child1)
+        val2 = _constant_value(child2)
+
+        if val1 is None and val2 is None:
+            return self._make(nodetype, child1, child2)
+
+        if nodetype is NodeType.AND:
+            if val1 is False or val2 is False:
+                return self._make(NodeType.FALSE)
+            return child2 if val1 is True else child1
+
+        if nodetype is NodeType.OR:
+            if val1 is True or val2 is True:
+                return self._make(NodeType.TRUE)
+            return child2 if val1 is False else child1
+
+        # ----- IMPLIES
+        if val1 is False or val2 is True:
+            return self._make(NodeType.TRUE)
+        if val1 is True:
+            return child2
+        return self._make(NodeType.NOT, child1)
+
+    def reduce_to_CNF(self):
+        '''
+            Return the Conjunctive Normal Form of this formula, running the same steps as
+            PLTreeNode.reduce_to_CNF on shared nodes
+
+        '''
+        return self.eliminate_implies().push_not_down().push_or_below_and().make_and_or_right_deep()
+
+    def __str__(self):
+        return self.in_prefix_notation()
+
+    def __repr__(self):
+        return str(self._type)
+
+
+def _polarity_children(key):
+    node, negated = key
+    nodetype = node._type
+
+    if nodetype is NodeType.NOT:
+        return ((node._child1, not negated),)
+    elif nodetype is NodeType.AND or nodetype is NodeType.OR:
+        return ((node._child1, negated), (node._child2, negated))
+    elif negated:
+        return ((node, False),)
+    elif nodetype.arity == 2:
+        return ((node._child1, False), (node._child2, False))
+    return ()
+
+
+def _conjunct_children(node):
+    if node._type is NodeType.AND:
+        return (node._child1, node._child2)
+    return ()
+
+
+def _cluster_operands(node):
+    '''
+        Return, left to right, the operands of the maximal chain of node._type operators rooted at node
+
+    '''
+    nodetype = node._type
+    operands = []
+    stack = [node]
+
+    while stack:
+        current = stack.pop()
+        if current._type is nodetype:
+            stack.append(current._child2)
+            stack.append(current._child1)
+        else:
+            operands.append(current)
+
+    return tuple(operands)
+
+
+def _constant_value(node):
+    if node._type is NodeType.TRUE:
+        return True
+    elif node._type is NodeType.FALSE:
+        return False
+    return None
@@ -0,0 +1,407 @@
+from array import array
+from collections import deque
+from plt_src import NodeType
+from plt_src.binding_index import BindingIndex
+from plt_src.node_type import OP_IMPLIES, OP_AND, OP_OR, OP_NOT, OP_TRUE, OP_FALSE, OP_VAR
+
+# ----- opcodes stored in PLFlatFormula.opcodes are the NodeType opcodes
+OPCODE_TYPES = [NodeType.IMPLIES, NodeType.AND, NodeType.OR, NodeType.NOT, NodeType.TRUE, NodeType.FALSE]
+
+# ----- no child
+NONE = -1
+
+
+def opcode_of(nodetype):
+    '''
+        Return the opcode of a NodeType that is not a variable
+
+    '''
+    if nodetype.opcode is None or nodetype.opcode == OP_VAR:
+        raise ValueError("%s has no opcode"%nodetype)
+    return nodetype.opcode
+
+
+class PLFlatFormula:
+    '''
+        Compact, array backed representation of a propositional logic formula.
+
+        The formula is stored as three parallel typed arrays, one entry per node, in
+        reverse polish (post-) order, so that children always come before their parent
+        and the root is the last entry:
+
+            opcodes     : array('B') of OP_* values
+            child1      : array('i') index of the first child, or for OP_VAR nodes the
+                          index of the variable in self.variables
+            child2      : array('i') index of the second child, or NONE
+
+        This takes 9 bytes per node instead of a Python object with an attribute dict
+        per node as in PLTreeNode.
+
+    '''
+
+    __slots__ = ('opcodes', 'child1', 'child2', 'variables')
+
+    def __init__(self, opcodes, child1, child2, variables):
+        '''
+            Internal constructor: use build_from_reverse_polish() or from_tree()
+
+            @Args:
+                opcodes, child1, child2 : The parallel arrays described above
+                variables               : List of the variable NodeTypes referred to by OP_VAR nodes
+
+        '''
+        self.opcodes = opcodes
+        self.child1 = child1
+        self.child2 = child2
+        self.variables = variables
+
+    @classmethod
+    def build_from_reverse_polish(cls, list_of_nodetypes):
+        '''
+            Takes a list of NodeType values describing a valid propositional logic expression
+            in reverse polish notation and fills the arrays in a single pass
+
+            @Args: list_of_nodetypes    : List of NodeType objects in reverse polish notation
+
+            @Return : the PLFlatFormula of the expression
+
+        '''
+        if len(list_of_nodetypes) == 0:
+            raise ValueError("NodeType list empty")
+
+        opcodes = array('B')
+        child1 = array('i')
+        child2 = array('i')
+        variables = []
+        variable_index = {}
+        stack = []
+
+        for index, nodetype in enumerate(list_of_nodetypes):
+            arity = nodetype.arity
+            opcode = nodetype.opcode
+
+            if opcode == OP_VAR:
+                if nodetype not in variable_index:
+                    variable_index[nodetype] = len(variables)
+                    variables.append(nodetype)
+                opcodes.append(OP_VAR)
+                child1.append(variable_index[nodetype])
+                child2.append(NONE)
+            else:
+                if opcode is None:
+                    raise ValueError("%s has no opcode"%nodetype)
+                opcodes.append(opcode)
+
+                if arity == 0:
+                    child1.append(NONE)
+                    child2.append(NONE)
+                elif arity == 1:
+                    child1.append(stack.pop())
+                    child2.append(NONE)
+                elif arity == 2:
+                    second = stack.pop()
+                    child1.append(stack.pop())
+                    child2.append(second)
+
+            stack.append(index)
+
+        if len(stack) != 1:
+            raise ValueError("Incomplete or wrong sequence given. Tree creation failed.")
+
+        return cls(opcodes, child1, child2, variables)
+
+    @classmethod
+    def from_tree(cls, pltree):
+        '''
+            Convert a PLTreeNode (or PLDagNode) into a PLFlatFormula. The tree is not modified.
+
+        '''
+        return cls.build_from_reverse_polish(pltree.get_reverse_polish())
+
+    def to_tree(self):
+        '''
+            Convert into a freshly allocated PLTreeNode
+
+        '''
+        from plt_src import PLTreeNode
+        return PLTreeNode.build_from_reverse_polish(self.get_reverse_polish())
+
+    def __len__(self):
+        return len(self.opcodes)
+
+    def memory_size(self):
+        '''
+            Return the number of bytes used by the node arrays
+
+        '''
+        return sum(len(a) * a.itemsize for a in (self.opcodes, self.child1, self.child2))
+
+    def variable_ids(self):
+        '''
+            Return an array('i') with the var_id of each entry of self.variables, mapping the
+            local variable indices of the formula to the process wide dense IDs
+
+        '''
+        return array('i', [variable.var_id for variable in self.variables])
+
+    def nodetype(self, index):
+        '''
+            Return the NodeType of the node at index
+
+        '''
+        opcode = self.opcodes[index]
+        if opcode == OP_VAR:
+            return self.variables[self.child1[index]]
+        return OPCODE_TYPES[opcode]
+
+    def get_reverse_polish(self):
+        '''
+            Returns the list of NodeType entries describing this formula in reverse polish notation
+
+        '''
+        variables = self.variables
+        child1 = self.child1
+        return [variables[child1[i]] if opcode == OP_VAR else OPCODE_TYPES[opcode] for i, opcode in enumerate(self.opcodes)]
+
+    def in_prefix_notation(self):
+        '''
+            Returns the string of this formula in prefix notation, e.g. implies(or(R,P),and(true,not(Q)))
+
+        '''
+        out = []
+        stack = [len(self.opcodes) - 1]
+
+        while stack:
+            item = stack.pop()
+
+            if item.__class__ is str:
+                out.append(item)
+                continue
+
+            nodetype = self.nodetype(item)
+            out.append(nodetype.prefix_name)
+
+            if nodetype.arity == 1:
+                out.append("(")
+                stack.append(")")
+                stack.append(self.child1[item])
+            elif nodetype.arity == 2:
+                out.append("(")
+                stack.append(")")
+                stack.append(self.child2[item])
+                stack.append(",")
+                stack.append(self.child1[item])
+
+        return "".join(out)
+
+    def in_infix_notation(self):
+        '''
+            Returns the string of this formula in infix notation, e.g. ((R∨P)→(⊤∧¬Q))
+
+        '''
+        out = []
+        stack = [len(self.opcodes) - 1]
+
+        while stack:
+            item = stack.pop()
+
+            if item.__class__ is str:
+                out.append(item)
+                continue
+
+            nodetype = self.nodetype(item)
+
+            if nodetype.arity == 0:
+                out.append(nodetype.infix_name)
+            elif nodetype.arity == 1:
+                out.append(nodetype.infix_name)
+                stack.append(self.child1[item])
+            else:
+                out.append("(")
+                stack.append(")")
+                stack.append(self.child2[item])
+                stack.append(nodetype.infix_name)
+                stack.append(self.child1[item])
+
+        return "".join(out)
+
+    def evaluate(self, val_bindings_map):
+        '''
+            Evaluate the formula under a set of variable bindings, without modifying it.
+
+            @Args: val_bindings_map
+                       A BindingIndex, dict, or list of (NodeType, bool) pairs, giving the
+                       values of the variables. Variables without a binding are unknown.
+                       Use BindingIndex.from_values to pass a list indexed by var_id.
+
+            @Return:
+                    True or False if the value of the formula is determined by the bindings,
+                    None otherwise (in the same sense as PLTreeNode.evaluate_constant_subtrees)
+
+        '''
+        index = BindingIndex.of(val_bindings_map)
+        variable_values = [index.get(variable) for variable in self.variables]
+        child1 = self.child1
+        child2 = self.child2
+        values = []
+
+        for i, opcode in enumerate(self.opcodes):
+            if opcode == OP_VAR:
+                values.append(variable_values[child1[i]])
+            elif opcode == OP_TRUE:
+                values.append(True)
+            elif opcode == OP_FALSE:
+                values.append(False)
+            elif opcode == OP_NOT:
+                val = values[child1[i]]
+                values.append(None if val is None else not val)
+            else:
+                val1 = values[child1[i]]
+                val2 = values[child2[i]]
+                if opcode == OP_IMPLIES:
+                    val1 = None if val1 is None else not val1
+                if opcode == OP_AND:
+                    values.append(False if val1 is False or val2 is False else (True if val1 and val2 else None))
+                else:
+                    values.append(True if val1 is True or val2 is True else (False if val1 is False and val2 is False else None))
+
+        return values[-1]
+
+    def reduce_to_CNF(self, output = "formula"):
+        '''
+            Return the Conjunctive Normal Form of this formula, identical to the result of
+            PLTreeNode.reduce_to_CNF, computed directly on the arrays
+
+            @Args: output   : "formula" (default) for a new PLFlatFormula, or "clauses" for
+                              a ClauseDatabase of the clauses
+
+        '''
+        if output == "formula":
+            return self._build_from_literal_clauses(self._literal_clauses())
+        elif output == "clauses":
+            return self._literal_clause_database(self._literal_clauses())
+        raise ValueError("Unknown CNF output %s"%output)
+
+    def _literal_clauses(self):
+        '''
+            Clauses of the CNF of this formula, literals encoded as 2 * leaf index + (1 if negated),
+            as deques grown in place (see cnf_engine.py)
+
+        '''
+        from plt_src.cnf_engine import concatenate, disjoin
+
+        opcodes = self.opcodes
+        child1 = self.child1
+        child2 = self.child2
+        count = len(opcodes)
+
+        # ----- negated[i]: the node is under an odd number of negations. Parents come after
+        # ----- their children, so a backward scan propagates this top-down
+        negated = bytearray(count)
+        for i in range(count - 1, -1, -1):
+            opcode = opcodes[i]
+            if opcode == OP_NOT:
+                negated[child1[i]] = not negated[i]
+            elif opcode == OP_IMPLIES:
+                negated[child1[i]] = not negated[i]
+                negated[child2[i]] = negated[i]
+            elif opcode == OP_AND or opcode == OP_OR:
+                negated[child1[i]] = negated[i]
+                negated[child2[i]] = negated[i]
+
+        # ----- forward scan: clauses of each node under its polarity, literals encoded as
+        # ----- 2 * leaf index + (1 if negated)
+        clauses = [None] * count
+        for i in range(count):
+            opcode = opcodes[i]
+
+            if opcode >= OP_TRUE:
+                clauses[i] = deque([deque([2 * i + negated[i]])])
+                continue
+
+            if opcode == OP_NOT:
+                clauses[i] = clauses[child1[i]]
+                clauses[child1[i]] = None
+                continue
+
+            first = clauses[child1[i]]
+            second = clauses[child2[i]]
+            clauses[child1[i]] = clauses[child2[i]] = None
+
+            conjunction = (opcode == OP_AND) != bool(negated[i])
+            if opcode == OP_IMPLIES:
+                conjunction = bool(negated[i])
+
+            if conjunction:
+                clauses[i] = concatenate(first, second)
+            else:
+                clauses[i] = disjoin(first, second)
+
+        return clauses[-1]
+
+    def _literal_clause_database(self, clauses):
+        '''
+            Store encoded literal clauses in a ClauseDatabase numbering the variables in order
+
+        '''
+        from plt_src.clause_database import ClauseDatabase
+
+        database = ClauseDatabase(self.variables)
+        opcodes = self.opcodes
+        child1 = self.child1
+
+        for clause in clauses:
+            literals = []
+            for literal in clause:
+                leaf = literal >> 1
+                opcode = opcodes[leaf]
+                if opcode == OP_VAR:
+                    number = child1[leaf] + 1
+                    literals.append(-number if literal & 1 else number)
+                elif (opcode == OP_TRUE) != bool(literal & 1):
+                    break
+            else:
+                database.add_clause(literals)
+
+        return database
+
+    def _build_from_literal_clauses(self, clauses):
+        '''
+            Emit a right deep conjunction of right deep disjunctions of encoded literals
+
+        '''
+        opcodes = array('B')
+        child1 = array('i')
+        child2 = array('i')
+
+        def emit(opcode, first = NONE, second = NONE):
+            opcodes.append(opcode)
+            child1.append(first)
+            child2.append(second)
+            return len(opcodes) - 1
+
+        def emit_chain(opcode, roots):
+            result = roots[-1]
+            for root in reversed(roots[:-1]):
+                result = emit(opcode, root, result)
+            return result
+
+        clause_roots = []
+        for clause in clauses:
+            literal_roots = []
+            for literal in clause:
+                leaf = literal >> 1
+                index = emit(self.opcodes[leaf], self.child1[leaf])
+                if literal & 1:
+                    index = emit(OP_NOT, index)
+                literal_roots.append(index)
+            clause_roots.append(emit_chain(OP_OR, literal_roots))
+        emit_chain(OP_AND, clause_roots)
+
+        return PLFlatFormula(opcodes, child1, child2, list(self.variables))
+
+    def __str__(self):
+        return self.in_prefix_notation()
+
+    def __repr__(self):
+        return "PLFlatFormula(%s)"%self.in_prefix_notation()
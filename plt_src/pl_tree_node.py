@@ -1,5 +1,7 @@
-import copy
 from plt_src import NodeType
+from plt_src.traversal import post_order, pre_order, prefix_tokens, infix_tokens
+from plt_src.binding_index import BindingIndex
+from plt_src.instrumentation import metrics, timed
 
 
 class PLTreeNode:
@@ -55,15 +57,64 @@ class PLTreeNode:
         if len(retval) != 1:
             raise ValueError("Incomplete or wrong sequence given. Tree creation failed.")
 
+        if metrics.enabled:
+            metrics.count("nodes_allocated", len(list_of_nodetypes))
+
         return retval.pop()
-        
+
+    @classmethod
+    def build_from_text(cls, text):
+        '''
+            Constructs the tree of a formula written in prefix or infix notation, as printed
+            by in_prefix_notation and in_infix_notation (see parser.py)
+
+                "implies(or(R,P),and(true,not(Q)))", "((R∨P)→(⊤∧¬Q))" and "R | P -> true & ~Q"
+                all give the same tree
+
+        '''
+        from plt_src.parser import parse_reverse_polish
+        return cls.build_from_reverse_polish(parse_reverse_polish(text))
+
+    @classmethod
+    def build_from_clauses(cls, clauses):
+        '''
+            Constructs the Conjunctive Normal Form tree of a list of clauses, as a
+            right deep conjunction of right deep disjunctions (the shape produced by reduce_to_CNF)
+
+            @Args: clauses  : List of clauses, each a list of (NodeType, bool) literals where
+                              (P, True) stands for P and (P, False) stands for ¬P
+
+            @Return : the PLTreeNode of the root of the tree. No clauses give ⊤ and an
+                      empty clause gives ⊥
+
+                [ [(R, True), (S, True)], [(P, False)] ] represents (R∨S)∧¬P
+
+        '''
+        if len(clauses) == 0:
+            return cls(NodeType.TRUE)
+
+        list_of_nodetypes = []
+
+        for clause in clauses:
+            if len(clause) == 0:
+                list_of_nodetypes.append(NodeType.FALSE)
+                continue
+
+            for nodetype, value in clause:
+                list_of_nodetypes.append(nodetype)
+                if not value:
+                    list_of_nodetypes.append(NodeType.NOT)
+            list_of_nodetypes.extend([NodeType.OR] * (len(clause) - 1))
+
+        list_of_nodetypes.extend([NodeType.AND] * (len(clauses) - 1))
+
+        return cls.build_from_reverse_polish(list_of_nodetypes)
+
     def get_reverse_polish(self, node_queue = None):
         '''
             Returns the list of NodeType entries which, if provide to
             reversePolishBuilder, would construct the current tree.
-            Recurrence used to accumulate the elements of the reverse 
-            polish notation description of the current tree
-         
+
             @Args: nodeQueue
                     A list of NodeType objects used to accumulate
                     the values of the reverse polish notation description of the
@@ -71,296 +122,367 @@ class PLTreeNode:
 
             @Return  A NodeType array of the reverse polish notation
                       specification of this tree
-     
+
         '''
         if node_queue is None: # ----- setting default function arg value = [] does not work for some reason
             node_queue = []
 
-        if self._child1 is not None:
-            self._child1.get_reverse_polish(node_queue)
-        if self._child2 is not None:
-            self._child2.get_reverse_polish(node_queue)
-
-        node_queue.append(self._type)
-
-        # print(node_queue)
+        node_queue.extend([node._type for node in post_order(self)])
 
         return node_queue
 
     def in_prefix_notation(self):
         '''
-            Prints out the string in prefix notation. 
-            
+            Prints out the string in prefix notation.
+
             The following are examples of prefix notation:
-            
+
             implies(or(R,P),and(true,not(Q)))
             or(not(or(false,true)),and(true,not(Q)))
             and(or(not(false),true),and(or(not(false),not(Q)),and(or(not(true),true),or(not(true),not(Q)))))
-            
-            
+
+
             @Return:  the string representation of the tree rooted at this node in
                       prefix notation
-            
-        '''
-        arity = self._type.arity
 
-        if arity == 0:
-            return self._type.prefix_name
-        elif arity == 1:
-            return "%s(%s)"%(self._type.prefix_name, self._child1.in_prefix_notation())
-        elif arity == 2:
-            return "%s(%s,%s)"%(self._type.prefix_name, self._child1.in_prefix_notation(), self._child2.in_prefix_notation())
-        else:
-            raise ValueError("Invalid Arity")
+        '''
+        return "".join(prefix_tokens(self))
 
     def in_infix_notation(self):
         '''
-            Prints out the string in infix notation. 
-            
+            Prints out the string in infix notation.
+
             The following are examples of infix notations:
-            
+
             ((R∨P)→(⊤∧¬Q))
             (¬(⊥∨⊤)∨(⊤∧¬Q))
             ((¬⊥∨⊤)∧((¬⊥∨¬Q)∧((¬⊤∨⊤)∧(¬⊤∨¬Q))))
-            
+
 
             @Return:  the string representation of the tree rooted at this node in
                       infix notation
-            
+
         '''
-        arity = self._type.arity
+        return "".join(infix_tokens(self))
 
-        if arity == 0:
-            return self._type.infix_name
-        elif arity == 1:
-            return "%s%s"%(self._type.infix_name, self._child1.in_infix_notation())
-        elif arity == 2:
-            return "(%s%s%s)"%(self._child1.in_infix_notation(), self._type.infix_name, self._child2.in_infix_notation())
-        else:
-            raise ValueError("Invalid Arity")
+    def copy(self):
+        '''
+            Returns a deep copy of the tree rooted at this node. Unlike copy.deepcopy
+            this does not recurse, so it is safe on trees of any depth.
 
-    def apply_variable_bindings(self, val_bindings_map):
+        '''
+        list_of_nodetypes = self.get_reverse_polish()
+        if metrics.enabled:
+            metrics.count("copies")
+            metrics.count("nodes_copied", len(list_of_nodetypes))
+        return self.build_from_reverse_polish(list_of_nodetypes)
 
+    def compile(self, variables = None):
         '''
-            Applies a set of variable bindings recursively to the propositional logic
-            expression represented by the current <PLTreeNode>
-            
-            @Args: bindings
-                       A map that maps NodeType objects to boolean
-                       values. Any variable in bindings that does not
-                       appear in the tree will be ignored. Any NodeType
-                       in bindings that is not a variable will be ignored.
-            
+            Compile the formula into a Python function, for evaluating it many times under
+            different bindings (see compiler.py). Compiled functions are cached by the
+            structure of the tree, so compiling an equal tree again is cheap.
+
+            @Args: variables    : Optional list of the variable NodeTypes, in the order of
+                                  the values the function takes. By default, the variables in
+                                  order of first occurrence, as in the function's variables
+                                  attribute
+
+            @Return: a function f(values) returning True or False, where values is a tuple,
+                     list or array holding a value for every variable
+
+                PLTreeNode.build_from_text("A -> B").compile()((True, False)) is False
+
         '''
-        # print (self._type, self._child1, self._child2, "type")
+        from plt_src.compiler import compile_formula
+        return compile_formula(self, variables)
 
-        if not self._type.is_var():
-            if self._child1 is not None:
-                self._child1.apply_variable_bindings(val_bindings_map)
-            if self._child2 is not None:
-                self._child2.apply_variable_bindings(val_bindings_map)
+    def to_bdd(self, manager = None):
+        '''
+            Build the reduced ordered BDD of the formula (see bdd.py)
 
-        else:
-            for val, binding in val_bindings_map:
-                if val == self._type:
-                    self._type = NodeType.TRUE if binding == True else NodeType.FALSE
+            @Args: manager  : The BDDManager to build in. Formulas are only comparable within
+                              one manager. By default a new manager, with the variables in
+                              static_order(self)
 
-    def eliminate_implies(self):
+            @Return: a BDD
 
         '''
-            Recursively replace in place every occurrence of the
-            pattern x→y with ¬x∨y, for sub-trees x and y           
+        from plt_src.bdd import BDDManager, static_order
+        if manager is None:
+            manager = BDDManager(static_order(self))
+        return manager.from_tree(self)
 
+    def iter_models(self, cubes = True):
         '''
-        if self._child1 is not None:
-            self._child1.eliminate_implies()
-        if self._child2 is not None:
-            self._child2.eliminate_implies()
+            Lazily yield the satisfying assignments of the formula (see model_counting.py)
 
-        if self._type == NodeType.IMPLIES:
-            self._type = NodeType.OR
+            @Args: cubes    : If True, yield cubes, leaving out the variables every extension
+                              of the cube is a model for. If False, yield complete assignments
 
-            new_child = copy.deepcopy(self._child1)
-            self._child1._type = NodeType.NOT
-            self._child1._child1 = new_child
-            self._child1._child2 = None
+            @Return: a generator of lists of (NodeType, bool) bindings
 
+        '''
+        from plt_src.model_counting import iter_models
+        return iter_models(self, cubes = cubes)
 
-    def push_not_down(self):
+    def count_models(self, variables = None):
+        '''
+            Count the satisfying assignments of the formula exactly, with component
+            decomposition and caching rather than enumeration (see model_counting.py)
+
+            @Args: variables    : Optional list of the variables to count assignments of,
+                                  which must include those of the formula
 
         '''
-            Recursively replace in-place, for sub-trees
-            x and y, every occurrence of:
-            ¬¬x with x
-            ¬(x∨y) with (¬x∧¬y)
-            ¬(x∧y) with (¬x∨¬y)
-            ¬¬¬¬¬x should be reduced to x
-            
+        from plt_src.model_counting import count_models
+        return count_models(self, variables)
+
+    def apply_variable_bindings(self, val_bindings_map):
+
         '''
+            Applies a set of variable bindings to the propositional logic
+            expression represented by the current <PLTreeNode>
 
-        if self._type == NodeType.NOT:
-            if self._child1._type == NodeType.NOT:
+            @Args: bindings
+                       A map that maps NodeType objects to boolean
+                       values (a BindingIndex, dict or list of pairs). Any variable in bindings that does not
+                       appear in the tree will be ignored. Any NodeType
+                       in bindings that is not a variable will be ignored.
 
-                # print (self.in_infix_notation(),"this")
-                childcopy = copy.deepcopy(self._child1._child1)
-                self._type = childcopy._type
-                self._child1 = childcopy._child1
-                self._child2 = childcopy._child2
+        '''
+        index = BindingIndex.of(val_bindings_map)
 
-                # print (self.in_infix_notation(),"this")
+        for node in pre_order(self):
+            if node._type.is_var():
+                binding = index.get(node._type)
+                if binding is not None:
+                    node._type = NodeType.TRUE if binding else NodeType.FALSE
 
-            elif self._child1._type == NodeType.AND:
-                
-                self_copy1 = copy.deepcopy(self) 
-                self_copy1._child1 = copy.deepcopy(self._child1._child1)
-                self_copy1._child2 = None
+    def with_variable_bindings(self, val_bindings_map):
+        '''
+            Returns a new tree with a set of variable bindings applied and the resulting
+            constant sub-trees folded (as evaluate_constant_subtrees would), in a single pass.
+            The current tree is not modified.
 
-                self_copy2 = copy.deepcopy(self)
-                self_copy2._child1 = copy.deepcopy(self._child1._child2)
-                self_copy2._child2 = None
+            Sub-trees that are unaffected by the bindings are not copied: the returned
+            tree shares them with the current tree. Call copy() on the result before
+            modifying it in place if the current tree must stay intact.
 
-                self._type = NodeType.OR
+            @Args: val_bindings_map
+                       A BindingIndex, dict, or list of (NodeType, bool) pairs. Build a
+                       BindingIndex once to apply the same bindings to many trees.
 
-                self._child1 = self_copy1
+            @Return: the root of the bound tree
 
-                self._child2 = self_copy2
+        '''
+        index = BindingIndex.of(val_bindings_map)
+        results = []
 
-            elif self._child1._type == NodeType.OR:
-                
-                # ----- create new NOT TreeNodes 
-                self_copy1 = copy.deepcopy(self) 
-                self_copy1._child1 = copy.deepcopy(self._child1._child1)
-                self_copy1._child2 = None
+        for node in post_order(self):
+            nodetype = node._type
+            arity = nodetype.arity
 
-                self_copy2 = copy.deepcopy(self)
-                self_copy2._child1 = copy.deepcopy(self._child1._child2)
-                self_copy2._child2 = None
+            if arity == 0:
+                if nodetype is NodeType.TRUE:
+                    results.append((node, True))
+                elif nodetype is NodeType.FALSE:
+                    results.append((node, False))
+                else:
+                    val = index.get(nodetype)
+                    results.append((node, None) if val is None else _constant_node(val))
 
-                self._type = NodeType.AND
+            elif arity == 1:
+                child1, val = results.pop()
+                if val is not None:
+                    results.append(_constant_node(not val))
+                elif child1 is node._child1:
+                    results.append((node, None))
+                else:
+                    results.append((PLTreeNode(nodetype, child1), None))
 
-                self._child1 = self_copy1
+            else:
+                child2, val2 = results.pop()
+                child1, val1 = results.pop()
+                results.append(_fold_binary(node, child1, val1, child2, val2))
 
-                self._child2 = self_copy2
+        return results.pop()[0]
 
+    @timed("eliminate_implies")
+    def eliminate_implies(self):
 
-        if self._child1 is not None:
-            self._child1.push_not_down()
-        if self._child2 is not None:
-            self._child2.push_not_down()
+        '''
+            Replace in place every occurrence of the
+            pattern x→y with ¬x∨y, for sub-trees x and y
 
+        '''
+        implications = 0
+        for node in metrics.counting(post_order(self), "eliminate_implies"):
+            if node._type is NodeType.IMPLIES:
+                node._type = NodeType.OR
+                node._child1 = PLTreeNode(NodeType.NOT, node._child1)
+                implications += 1
 
+        if metrics.enabled:
+            metrics.count("eliminate_implies.implication", implications)
+            metrics.count("nodes_allocated", implications)
+
+
+    @timed("push_not_down")
+    def push_not_down(self):
+
+        '''
+            Replace in-place, for sub-trees
+            x and y, every occurrence of:
+            ¬¬x with x
+            ¬(x∨y) with (¬x∧¬y)
+            ¬(x∧y) with (¬x∨¬y)
+            ¬¬¬¬x should be reduced to x
+
+        '''
+        double_negations = 0
+        de_morgans = 0
+
+        for node in metrics.counting(pre_order(self), "push_not_down"):
+            if node._type is not NodeType.NOT:
+                continue
+
+            child = node._child1
+            while node._type is NodeType.NOT and child._type is NodeType.NOT:
+                double_negations += 1
+                grandchild = child._child1
+                node._type = grandchild._type
+                node._child1 = grandchild._child1
+                node._child2 = grandchild._child2
+                child = node._child1
+
+            if node._type is not NodeType.NOT:
+                continue
+
+            if child._type is NodeType.AND:
+                node._type = NodeType.OR
+                node._child1 = PLTreeNode(NodeType.NOT, child._child1)
+                node._child2 = PLTreeNode(NodeType.NOT, child._child2)
+                de_morgans += 1
+
+            elif child._type is NodeType.OR:
+                node._type = NodeType.AND
+                node._child1 = PLTreeNode(NodeType.NOT, child._child1)
+                node._child2 = PLTreeNode(NodeType.NOT, child._child2)
+                de_morgans += 1
+
+        if metrics.enabled:
+            metrics.count("push_not_down.double_negation", double_negations)
+            metrics.count("push_not_down.de_morgan", de_morgans)
+            metrics.count("nodes_allocated", 2 * de_morgans)
+
+
+    @timed("push_or_below_and")
     def push_or_below_and(self):
 
         '''
-            Recursively replace in place, for sub-trees x, y, and z, every occurrence of:
-            
+            Replace in place, for sub-trees x, y, and z, every occurrence of:
+
             x∨(y∧z) with (x∨y)∧(x∨z)
             (x∧y)∨z with (x∨z)∧(y∨z)
 
             This step is also knows as "distributing OR over AND"
-            
-        '''
 
-        if self._child1 is not None:
-            self._child1.push_or_below_and()
-        if self._child2 is not None:
-            self._child2.push_or_below_and()
+        '''
+        distributions = 0
 
+        for node in metrics.counting(post_order(self), "push_or_below_and"):
 
-        if self._type == NodeType.OR:
-            if self._child1._type == NodeType.AND:
-                self_copy = copy.deepcopy(self)
-                childcopy = copy.deepcopy(self._child2)
-                child12_copy = copy.deepcopy(self._child1._child2)
+            # ----- the children are already distributed, so only the newly created
+            # ----- disjunctions below this node can still have a conjunction as child
+            pending = [node]
+            while pending:
+                current = pending.pop()
+                if current._type is not NodeType.OR:
+                    continue
 
-                self._type = NodeType.AND
-                
-                self._child1._type = NodeType.OR
-                self._child1._child2 = copy.deepcopy(childcopy)
+                child1 = current._child1
+                child2 = current._child2
 
-                self._child2._type = NodeType.OR
-                self._child2._child1 = copy.deepcopy(child12_copy)
-                self._child2._child2 = copy.deepcopy(childcopy)
+                if child1._type is NodeType.AND:
+                    current._type = NodeType.AND
+                    current._child1 = PLTreeNode(NodeType.OR, child1._child1, child2)
+                    current._child2 = PLTreeNode(NodeType.OR, child1._child2, child2.copy())
 
-            elif self._child2._type == NodeType.AND:
-                self_copy = copy.deepcopy(self)
-                childcopy = copy.deepcopy(self._child1)
-                child21_copy = copy.deepcopy(self._child2._child1)
+                elif child2._type is NodeType.AND:
+                    current._type = NodeType.AND
+                    current._child1 = PLTreeNode(NodeType.OR, child1, child2._child1)
+                    current._child2 = PLTreeNode(NodeType.OR, child1.copy(), child2._child2)
 
-                self._type = NodeType.AND
-                
-                self._child2._type = NodeType.OR
-                self._child2._child1 = copy.deepcopy(childcopy)
+                else:
+                    continue
 
-                self._child1._type = NodeType.OR
-                self._child1._child2 = copy.deepcopy(child21_copy)
-                self._child1._child1 = copy.deepcopy(childcopy)
+                distributions += 1
+                pending.append(current._child2)
+                pending.append(current._child1)
 
-            self._child1.push_or_below_and()
-            self._child2.push_or_below_and()
+        if metrics.enabled:
+            # ----- each distribution revisits the two disjunctions it creates
+            metrics.count("push_or_below_and.nodes_visited", 2 * distributions)
+            metrics.count("push_or_below_and.distribution", distributions)
+            metrics.count("nodes_allocated", 2 * distributions)
 
+    @timed("make_and_or_right_deep")
     def make_and_or_right_deep(self):
 
         '''
-            Recursively replace in place, for sub-trees
+            Replace in place, for sub-trees
             W, X, Y and Z, every
             occurrence of:
-            
+
             (X∨Y)∨Z with X∨(Y∨Z)
             (X∧Y)∧Z with X∧(Y∧Z)
-           
+
             This is the closest we can come in a binary tree representation to
             "flattening" the conjunctions and disjunctions as the last step in
             producing Conjunctive Normal Form. The result is to turn complex trees of
             nested conjunctions into a simple right deep tree of conjunctions and
             similarly for disjunctions Thus this will change:
-            
+
             (W∨X)∨(Y∨Z) into W∨(X∨(Y∨Z))
             ((W∨X)∨Y)∨Z into W∨(X∨(Y∨Z))
-            
-        '''
 
-        if self._type == NodeType.OR and self._child1._type == NodeType.OR:
-            child11copy = copy.deepcopy(self._child1._child1)
-            child12copy = copy.deepcopy(self._child1._child2)
-            child2copy  = copy.deepcopy(self._child2)
-
-            self._child1 = child11copy
-
-            self._child2._type = NodeType.OR
-            self._child2._child1 = child12copy
-            self._child2._child2 = child2copy
-
-        elif self._type == NodeType.AND and self._child1._type == NodeType.AND:
-            child11copy = copy.deepcopy(self._child1._child1)
-            child12copy = copy.deepcopy(self._child1._child2)
-            child2copy  = copy.deepcopy(self._child2)
+        '''
+        rotations = 0
 
-            self._child1 = child11copy
+        for node in metrics.counting(pre_order(self), "make_and_or_right_deep"):
+            nodetype = node._type
+            if nodetype is not NodeType.OR and nodetype is not NodeType.AND:
+                continue
 
-            self._child2._type = NodeType.AND
-            self._child2._child1 = child12copy
-            self._child2._child2 = child2copy
+            # ----- rotate right until the left child is no longer of the same kind
+            child1 = node._child1
+            while child1._type is nodetype:
+                node._child1 = child1._child1
+                child1._child1 = child1._child2
+                child1._child2 = node._child2
+                node._child2 = child1
+                child1 = node._child1
+                rotations += 1
 
-        if self._child1 is not None:
-            self._child1.make_and_or_right_deep()
-        if self._child2 is not None:
-            self._child2.make_and_or_right_deep()
+        if metrics.enabled:
+            metrics.count("make_and_or_right_deep.rotation", rotations)
 
 
+    @timed("evaluate_constant_subtrees")
     def evaluate_constant_subtrees(self):
         '''
-            Evaluate the logical expression tree recursively, updating it in
+            Evaluate the logical expression tree, updating it in
             place to reduce constant sub-trees (i.e. those containing no
             variables) and make simplifications that do not require deep comparisons.
-            
+
             Thus ⊥∧A should be reduced to ⊥, as it has to
             be ⊥ no matter what value A takes.
-    
+
             Similarly ⊥∧(A∨B) should be reduced to ⊥, as it
             has to be ⊥ no matter what value the right sub-expression
             (A∨B) takes.
-            
+
             A further example: A tree that is the logical AND of one expression and
             the logical NOT of the same expression must be false. However, that can
             only be discovered by doing a deep comparison of the two sub-trees and
@@ -369,156 +491,233 @@ class PLTreeNode:
             same variable and are easy to compare, we should not make the evaluation
             to ⊥ because we should not make comparisons that two
             sub-expressions are equal
-    
-            
+
+
             @Return:
                     True if this tree evaluates to true,
                     False if this tree evaluates to false
                     None if this tree cannot be fully evaluated to either true or false
-            
+
         '''
+        values = []
+
+        for node in metrics.counting(post_order(self), "evaluate_constant_subtrees"):
+            nodetype = node._type
+            arity = nodetype.arity
+
+            if nodetype is NodeType.TRUE:
+                values.append(True)
+                continue
+            elif nodetype is NodeType.FALSE:
+                values.append(False)
+                continue
+            elif arity == 0:
+                values.append(None)
+                continue
+            elif arity == 1:
+                val = values.pop()
+                if val is not None:
+                    val = not val
+                    node._set_constant(val)
+                values.append(val)
+                continue
+
+            child2_val = values.pop()
+            child1_val = values.pop()
 
-        if self._type == NodeType.TRUE:
-            return True
-        elif self._type == NodeType.FALSE:
-            return False
+            if child1_val is None and child2_val is None:
+                values.append(None)
+                continue
+
+            if nodetype is NodeType.AND:
+                if child1_val == False or child2_val == False:
+                    val = False
+                elif child1_val == True and child2_val == True:
+                    val = True
+                elif child1_val == True:
+                    val = node._replace_with(node._child2)
+                else:
+                    val = node._replace_with(node._child1)
+
+            elif nodetype is NodeType.OR:
+                if child1_val == True or child2_val == True:
+                    val = True
+                elif child1_val == False and child2_val == False:
+                    val = False
+                elif child1_val == False:
+                    val = node._replace_with(node._child2)
+                else:
+                    val = node._replace_with(node._child1)
+
+            elif nodetype is NodeType.IMPLIES:
+                if child1_val == False or child2_val == True:
+                    val = True
+                elif child1_val == True and child2_val == False:
+                    val = False
+                elif child1_val == True:
+                    val = node._replace_with(node._child2)
+                else:
+                    node._type = NodeType.NOT
+                    node._child2 = None
+                    val = None
 
-        if self._type._arity == 0:
-            return None
-        elif self._type._arity == 1:
-            val = self._child1.evaluate_constant_subtrees()
             if val is not None:
-                if val == True:
-                    self._type = NodeType.TRUE
-                    self._child1 = None
-                    self._child2 = None
-                elif val == False:
-                    self._type = NodeType.FALSE
-                    self._child1 = None
-                    self._child2 = None
-            else:
-                return None
+                node._set_constant(val)
+            values.append(val)
 
-        elif self._type.arity == 2:
-            child1_val = self._child1.evaluate_constant_subtrees()
-            child2_val = self._child2.evaluate_constant_subtrees()
-            child1_copy = copy.deepcopy(self._child1)
-            child2_copy = copy.deepcopy(self._child2)
+        return values.pop()
 
-            if child1_val == None and child2_val == None:
-                return None
+    def _set_constant(self, val):
+        self._type = NodeType.TRUE if val else NodeType.FALSE
+        self._child1 = None
+        self._child2 = None
 
-            elif child1_val == True and child2_val == True:
-                self._type = NodeType.TRUE
-                self._child1 = None
-                self._child2 = None
-                
+    def _replace_with(self, child):
+        '''
+            Take over the contents (type and children) of another node
 
-            elif self._type == NodeType.AND:
-                if child1_val == False or child2_val == False:
-                    self._type = NodeType.FALSE
-                    self._child1 = None
-                    self._child2 = None
-                    
+        '''
+        self._type = child._type
+        self._child1 = child._child1
+        self._child2 = child._child2
+        return None
 
-                elif child1_val == True:
+    def cnf_size(self):
+        '''
+            Count the clauses and literals reduce_to_CNF() would produce, in a single cheap
+            traversal and without modifying the tree
+
+            @Return: (number of clauses, number of literals)
 
-                    self._type = child2_copy._type
-                    self._child1 = child2_copy._child1
-                    self._child2 = child2_copy._child2
-
-                elif child2_val == True:
-                    self._type = child1_copy._type
-                    self._child1 = child1_copy._child1
-                    self._child2 = child1_copy._child2
-
-            elif child1_val == True:
-
-                if child2_val == False:
-                    if self._type == NodeType.OR:
-                        self._type = NodeType.TRUE
-                        self._child1 = None
-                        self._child2 = None
-                        
-                    elif self._type == NodeType.IMPLIES:
-                        self._type = NodeType.FALSE
-                        self._child1 = None
-                        self._child2 = None
-
-                if child2_val is None:
-                    if self._type == NodeType.OR:
-                        self._type = NodeType.TRUE
-                        self._child1 = None
-                        self._child2 = None
-                        
-                    elif self._type == NodeType.IMPLIES:
-                        self._type = child2_copy._type
-                        self._child1 = child2_copy._child1
-                        self._child2 = child2_copy._child2
-
-            elif child1_val == False:
-                if child2_val == True:
-                    # input()
-                    self._type = NodeType.TRUE
-                    self._child1 = None
-                    self._child2 = None
-                    
-
-                elif child2_val == False:
-                    if self._type == NodeType.OR:
-                        self._type = NodeType.FALSE
-                        self._child1 = None
-                        self._child2 = None
-                        
-                    elif self._type == NodeType.IMPLIES:
-                        self._type = NodeType.TRUE
-                        self._child1 = None
-                        self._child2 = None
-                elif child2_val is None:
-                    if self._type == NodeType.OR:
-                        self._type = child2_copy._type
-                        self._child1 = child2_copy._child1
-                        self._child2 = child2_copy._child2
-
-                    elif self._type == NodeType.IMPLIES:
-                        self._type = NodeType.TRUE
-                        self._child1 = None
-                        self._child2 = None
-
-            elif child1_val is None:
-                if child2_val == True:
-                    self._type = NodeType.TRUE
-                    self._child1 = None
-                    self._child2 = None
-                    
-                elif child2_val == False:
-                    self._type = child1_copy._type
-                    self._child1 = child1_copy._child1
-                    self._child2 = child1_copy._child2
-
-                elif child2_val is None:
-                    self._type = NodeType.NOT
-                    self._child1 = child1_copy
-
-        return self.evaluate_constant_subtrees()
-
-    def reduce_to_CNF(self):
+        '''
+        from plt_src.cnf_engine import cnf_size
+        return cnf_size(self)
+
+    @timed("reduce_to_CNF")
+    def reduce_to_CNF(self, mode = "distribute", polarity_aware = False, output = "tree", budget = None, on_budget = "raise",
+                      simplify = False, cache = None):
         '''
             This takes the tree and executes all steps in
             the correct order to reduce it to Conjunctive Normal Form (CNF)
-            
+
             Note that it does NOT call evaluateConstantSubtrees(). This does not change the fact that
             the result is in CNF, it just means that it is perhaps larger than it need be. Feel free to call
             it at any time to simplify the results.
-            
-            Note that if you call the contained methods below in a different order, you are not guaranteed
-            to end up with an expression in CNF     
+
+            The "distribute" mode gives the same result as calling eliminate_implies, push_not_down,
+            push_or_below_and and make_and_or_right_deep in that order, but does all of it in a single
+            traversal (see cnf_engine.py). Note that if you call those methods in a different order, you
+            are not guaranteed to end up with an expression in CNF
+
+            @Args:
+                mode            : "distribute" (default) produces an equivalent CNF by distributing
+                                  OR over AND, which can grow exponentially.
+                                  "tseitin" produces an equisatisfiable CNF, linear in the size of
+                                  the tree, by introducing auxiliary variables (see tseitin.py)
+                polarity_aware  : Only used by "tseitin": use the Plaisted-Greenbaum encoding,
+                                  which emits fewer clauses
+                output          : "tree" (default) rewrites this tree in place. "clauses" leaves
+                                  the tree unchanged and returns a ClauseDatabase of the clauses
+                                  instead (see clause_database.py), whose auxiliary attribute
+                                  holds the auxiliary variable dict
+                budget          : Only used by "distribute": optional number of literals, whose
+                                  meaning depends on on_budget
+                on_budget       : "raise" (default): budget is the maximum number of literals of
+                                  the whole CNF (see cnf_size), and a ValueError is raised before
+                                  converting anything when it would be exceeded.
+                                  "tseitin": budget is the maximum number of literals produced by
+                                  distributing any one disjunction. The operands of a disjunction
+                                  that would exceed it are replaced by auxiliary variables, giving
+                                  an equisatisfiable CNF (see cnf_engine.budgeted_cnf_clauses);
+                                  budget must then be at least 2.
+                                  The whole CNF, conjunctions and definitions included, can still
+                                  hold many more than budget literals
+                simplify        : If True, or a dict receiving the reduction statistics, remove
+                                  duplicate literals and clauses, tautologies and subsumed clauses
+                                  and apply self-subsuming resolution (see clause_simplifier.py)
+                cache           : Optional CNFCache: the result is looked up by the structure of
+                                  the tree and the options, and stored after a conversion (see
+                                  cnf_cache.py)
+
+            @Return:
+                    For output "tree", a dict mapping each auxiliary variable (NodeType)
+                    introduced to the PLDagNode of the sub-formula it stands for; empty for
+                    "distribute" unless the budget was exceeded. For output "clauses", the
+                    ClauseDatabase
 
         '''
-        self.eliminate_implies()
-        self.push_not_down()
-        self.push_or_below_and()
-        self.make_and_or_right_deep()
+        if budget is not None and mode != "distribute":
+            raise ValueError("A CNF budget only applies to the distribute mode, not %s" % mode)
+
+        if cache is not None:
+            return cache.reduce_to_CNF(self, mode, polarity_aware, output, budget, on_budget, simplify)
+
+        if mode == "distribute" and budget is not None:
+            from plt_src.cnf_engine import cnf_size
+
+            if on_budget == "raise":
+                with metrics.timer("reduce_to_CNF.size_check"):
+                    num_clauses, num_literals = cnf_size(self)
+                if num_literals > budget:
+                    raise ValueError("CNF of %d clauses and %d literals exceeds the budget of %d literals" %
+                                     (num_clauses, num_literals, budget))
+                budget = None
+            elif on_budget != "tseitin":
+                raise ValueError("Unknown CNF budget action %s" % on_budget)
+
+        stats = {} if metrics.enabled else None
+
+        if output == "clauses":
+            if mode == "distribute":
+                from plt_src.cnf_engine import cnf_clause_database
+
+                with metrics.timer("reduce_to_CNF.distribute"):
+                    database = cnf_clause_database(self, stats, budget)
+
+            elif mode == "tseitin":
+                from plt_src.clause_database import ClauseDatabase
+                from plt_src.tseitin import tseitin_clauses
+
+                with metrics.timer("reduce_to_CNF.tseitin"):
+                    clauses, auxiliary = tseitin_clauses(self, polarity_aware)
+                    database = ClauseDatabase.from_clauses(clauses, auxiliary)
+
+            else:
+                raise ValueError("Unknown CNF mode %s" % mode)
+
+            if simplify is not False:
+                database = _simplify(database, simplify, stats)
+            _count_stats(stats)
+            return database
+
+        elif output != "tree":
+            raise ValueError("Unknown CNF output %s" % output)
+
+        if mode == "distribute":
+            from plt_src.cnf_engine import cnf_clauses, budgeted_cnf_clauses
+
+            with metrics.timer("reduce_to_CNF.distribute"):
+                if budget is None:
+                    clauses, auxiliary = cnf_clauses(self, stats = stats), {}
+                else:
+                    clauses, auxiliary = budgeted_cnf_clauses(self, budget, stats = stats)
+
+        elif mode == "tseitin":
+            from plt_src.tseitin import tseitin_clauses
+
+            with metrics.timer("reduce_to_CNF.tseitin"):
+                clauses, auxiliary = tseitin_clauses(self, polarity_aware)
+
+        else:
+            raise ValueError("Unknown CNF mode %s" % mode)
+
+        if simplify is not False:
+            clauses = _simplify(clauses, simplify, stats)
+
+        with metrics.timer("reduce_to_CNF.build"):
+            self._replace_with(PLTreeNode.build_from_clauses(clauses))
+        _count_stats(stats)
+        return auxiliary
 
 
 
@@ -529,7 +728,77 @@ class PLTreeNode:
         return str(self._type)
 
     def __eq__(self,other):
-        return self.__dict__ == other.__dict__
+        return self.get_reverse_polish() == other.get_reverse_polish()
+
+    def __deepcopy__(self, memo):
+        return self.copy()
+
+
+def _simplify(clauses, simplify, stats):
+    '''
+        Simplify the clauses of reduce_to_CNF, recording the statistics in the simplify dict
+        if one was given and, prefixed with "simplify.", in stats
+
+    '''
+    from plt_src.clause_simplifier import simplify_clauses
+
+    simplify_stats = simplify if isinstance(simplify, dict) else ({} if stats is not None else None)
+    before = dict(simplify_stats) if simplify_stats is not None else None
+
+    with metrics.timer("reduce_to_CNF.simplify"):
+        clauses = simplify_clauses(clauses, simplify_stats)
+
+    if stats is not None:
+        for key, value in simplify_stats.items():
+            stats["simplify." + key] = value - before.get(key, 0)
+    return clauses
+
+
+def _count_stats(stats):
+    if stats is not None:
+        for key, value in stats.items():
+            metrics.count(key if "." in key else "cnf_engine." + key, value)
+
+
+def _constant_node(val):
+    return (PLTreeNode(NodeType.TRUE if val else NodeType.FALSE), val)
+
+
+def _fold_binary(node, child1, val1, child2, val2):
+    '''
+        Fold the binary node with (possibly new) children of known or unknown (None) value,
+        reusing node itself when its children are unchanged
+
+    '''
+    nodetype = node._type
+
+    if val1 is None and val2 is None:
+        if child1 is node._child1 and child2 is node._child2:
+            return (node, None)
+        return (PLTreeNode(nodetype, child1, child2), None)
+
+    if nodetype is NodeType.AND:
+        if val1 is False or val2 is False:
+            return _constant_node(False)
+        if val1 is True and val2 is True:
+            return _constant_node(True)
+        return (child2, None) if val1 is True else (child1, None)
+
+    if nodetype is NodeType.OR:
+        if val1 is True or val2 is True:
+            return _constant_node(True)
+        if val1 is False and val2 is False:
+            return _constant_node(False)
+        return (child2, None) if val1 is False else (child1, None)
+
+    # ----- IMPLIES
+    if val1 is False or val2 is True:
+        return _constant_node(True)
+    if val1 is True and val2 is False:
+        return _constant_node(False)
+    if val1 is True:
+        return (child2, None)
+    return (PLTreeNode(NodeType.NOT, child1), None)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,585 @@
+'''
+    Conflict-driven clause learning (CDCL) SAT solver.
+
+    SATSolver works on DIMACS style integer literals (v or -v for variable v >= 1), with
+    two-watched-literal unit propagation, first-UIP clause learning with clause
+    minimisation, VSIDS branching with phase saving, Luby restarts and activity based
+    deletion of learnt clauses.
+
+    clauses_from_cnf() and find_model() connect it to PLTreeNode: they read the clauses
+    of a tree produced by reduce_to_CNF and return models as (NodeType, bool) bindings
+    that can be given to apply_variable_bindings.
+
+'''
+import heapq
+
+from plt_src import NodeType
+from plt_src.clause_database import ClauseDatabase
+from plt_src.traversal import post_order
+
+UNASSIGNED = -1
+
+
+class _Clause:
+
+    __slots__ = ('lits', 'learnt', 'activity', 'deleted')
+
+    def __init__(self, lits, learnt):
+        self.lits = lits
+        self.learnt = learnt
+        self.activity = 0.0
+        self.deleted = False
+
+
+def luby(i):
+    '''
+        Return the i-th element (from 0) of the Luby sequence 1 1 2 1 1 2 4 1 1 2 ...
+
+    '''
+    size, seq = 1, 0
+    while size < i + 1:
+        seq += 1
+        size = 2 * size + 1
+    while size - 1 != i:
+        size = (size - 1) >> 1
+        seq -= 1
+        i = i % size
+    return 1 << seq
+
+
+class SATSolver:
+
+    def __init__(self, restart_base = 100, var_decay = 0.95, clause_decay = 0.999):
+        '''
+            Create an empty solver
+
+            @Args:
+                restart_base    : Number of conflicts per unit of the Luby restart sequence
+                var_decay       : VSIDS decay factor of variable activities
+                clause_decay    : Decay factor of learnt clause activities
+
+        '''
+        self._restart_base = restart_base
+        self._var_decay = var_decay
+        self._clause_decay = clause_decay
+
+        # ----- per literal (2 * var + sign): 1 true, 0 false, UNASSIGNED
+        self._values = []
+        self._watches = []
+
+        # ----- per variable (0 based)
+        self._level = []
+        self._reason = []
+        self._activity = []
+        self._polarity = []
+        self._seen = []
+
+        self._clauses = []
+        self._learnts = []
+        self._trail = []
+        self._trail_lim = []
+        self._qhead = 0
+        self._heap = []
+        self._var_inc = 1.0
+        self._cla_inc = 1.0
+        self._max_learnts = 0
+        self._ok = True
+        self._model = None
+
+        self.stats = {"decisions": 0, "propagations": 0, "conflicts": 0, "restarts": 0,
+                      "learnt_clauses": 0, "deleted_clauses": 0}
+
+    @property
+    def num_variables(self):
+        return len(self._level)
+
+    def new_variable(self):
+        '''
+            Add a variable and return its (1 based) DIMACS number
+
+        '''
+        self._values += [UNASSIGNED, UNASSIGNED]
+        self._watches += [[], []]
+        self._level.append(0)
+        self._reason.append(None)
+        self._activity.append(0.0)
+        self._polarity.append(False)
+        self._seen.append(False)
+        heapq.heappush(self._heap, (0.0, len(self._level) - 1))
+        return len(self._level)
+
+    def add_clause(self, literals):
+        '''
+            Add a clause of DIMACS literals, creating variables as needed
+
+            @Return: False if the solver is now known to be unsatisfiable, True otherwise
+
+        '''
+        if not self._ok:
+            return False
+
+        self._cancel_until(0)
+        values = self._values
+
+        lits = []
+        for literal in literals:
+            if literal == 0:
+                raise ValueError("0 is not a valid literal")
+            while abs(literal) > self.num_variables:
+                self.new_variable()
+
+            lit = 2 * (abs(literal) - 1) + (literal < 0)
+            if values[lit] == 1 or (lit ^ 1) in lits:
+                return True
+            if values[lit] == UNASSIGNED and lit not in lits:
+                lits.append(lit)
+
+        if len(lits) == 0:
+            self._ok = False
+        elif len(lits) == 1:
+            self._enqueue(lits[0], None)
+            self._ok = self._propagate() is None
+        else:
+            clause = _Clause(lits, False)
+            self._clauses.append(clause)
+            self._attach(clause)
+
+        return self._ok
+
+    def add_clauses(self, clauses):
+        '''
+            Add every clause of an iterable of DIMACS literal clauses, such as a ClauseDatabase
+
+            @Return: False if the solver is now known to be unsatisfiable, True otherwise
+
+        '''
+        num_variables = getattr(clauses, "num_variables", 0)
+        while self.num_variables < num_variables:
+            self.new_variable()
+
+        for clause in clauses:
+            if not self.add_clause(clause):
+                return False
+        return True
+
+    def solve(self, max_conflicts = None):
+        '''
+            Decide satisfiability of the clauses added so far
+
+            @Args: max_conflicts    : Optional conflict budget
+
+            @Return: True (satisfiable, see model()), False (unsatisfiable), or None if the
+                     conflict budget ran out
+
+        '''
+        self._model = None
+        if not self._ok:
+            return False
+
+        self._max_learnts = max(len(self._clauses) / 3.0, 100.0)
+        start_conflicts = self.stats["conflicts"]
+        restarts = 0
+
+        while True:
+            budget = luby(restarts) * self._restart_base
+            if max_conflicts is not None:
+                budget = min(budget, start_conflicts + max_conflicts - self.stats["conflicts"])
+                if budget <= 0:
+                    return None
+
+            status = self._search(budget)
+            if status is not None:
+                return status
+
+            restarts += 1
+            self.stats["restarts"] += 1
+
+    def model(self):
+        '''
+            Return the last model found, as a list with one bool per variable (index 0 is variable 1)
+
+        '''
+        return self._model
+
+    def value(self, variable):
+        '''
+            Return the value of a (1 based) variable in the last model found
+
+        '''
+        return self._model[variable - 1]
+
+    # ----- internals
+
+    def _attach(self, clause):
+        self._watches[clause.lits[0]].append(clause)
+        self._watches[clause.lits[1]].append(clause)
+
+    def _enqueue(self, lit, reason):
+        values = self._values
+        values[lit] = 1
+        values[lit ^ 1] = 0
+        var = lit >> 1
+        self._level[var] = len(self._trail_lim)
+        self._reason[var] = reason
+        self._trail.append(lit)
+
+    def _propagate(self):
+        '''
+            Unit propagation over the watched literals
+
+            @Return: the conflicting clause, or None
+
+        '''
+        values = self._values
+        watches = self._watches
+        trail = self._trail
+        propagations = 0
+
+        while self._qhead < len(trail):
+            false_lit = trail[self._qhead] ^ 1
+            self._qhead += 1
+            propagations += 1
+
+            watchers = watches[false_lit]
+            i = j = 0
+            end = len(watchers)
+
+            while i < end:
+                clause = watchers[i]
+                i += 1
+                if clause.deleted:
+                    continue
+
+                lits = clause.lits
+                if lits[0] == false_lit:
+                    lits[0] = lits[1]
+                    lits[1] = false_lit
+
+                first = lits[0]
+                if values[first] == 1:
+                    watchers[j] = clause
+                    j += 1
+                    continue
+
+                # ----- look for another literal to watch
+                for k in range(2, len(lits)):
+                    if values[lits[k]] != 0:
+                        lits[1] = lits[k]
+                        lits[k] = false_lit
+                        watches[lits[1]].append(clause)
+                        break
+                else:
+                    watchers[j] = clause
+                    j += 1
+
+                    if values[first] == 0:
+                        while i < end:
+                            watchers[j] = watchers[i]
+                            j += 1
+                            i += 1
+                        del watchers[j:]
+                        self._qhead = len(trail)
+                        self.stats["propagations"] += propagations
+                        return clause
+
+                    values[first] = 1
+                    values[first ^ 1] = 0
+                    self._level[first >> 1] = len(self._trail_lim)
+                    self._reason[first >> 1] = clause
+                    trail.append(first)
+
+            del watchers[j:]
+
+        self.stats["propagations"] += propagations
+        return None
+
+    def _analyze(self, conflict):
+        '''
+            First-UIP conflict analysis
+
+            @Return: (learnt clause with the asserting literal first, backtrack level)
+
+        '''
+        seen = self._seen
+        level = self._level
+        reason = self._reason
+        trail = self._trail
+        current_level = len(self._trail_lim)
+
+        learnt = [None]
+        pending = 0
+        lit = None
+        index = len(trail) - 1
+
+        while True:
+            if conflict.learnt:
+                self._bump_clause(conflict)
+
+            lits = conflict.lits
+            for q in (lits if lit is None else lits[1:]):
+                var = q >> 1
+                if not seen[var] and level[var] > 0:
+                    self._bump_variable(var)
+                    seen[var] = True
+                    if level[var] >= current_level:
+                        pending += 1
+                    else:
+                        learnt.append(q)
+
+            while not seen[trail[index] >> 1]:
+                index -= 1
+            lit = trail[index]
+            index -= 1
+            conflict = reason[lit >> 1]
+            seen[lit >> 1] = False
+            pending -= 1
+            if pending == 0:
+                break
+
+        learnt[0] = lit ^ 1
+
+        # ----- drop literals implied by the other literals of the clause
+        kept = [learnt[0]]
+        for q in learnt[1:]:
+            clause = reason[q >> 1]
+            if clause is None or any(not seen[r >> 1] and level[r >> 1] > 0 for r in clause.lits[1:]):
+                kept.append(q)
+        for q in learnt[1:]:
+            seen[q >> 1] = False
+        learnt = kept
+
+        if len(learnt) == 1:
+            return learnt, 0
+
+        best = 1
+        for k in range(2, len(learnt)):
+            if level[learnt[k] >> 1] > level[learnt[best] >> 1]:
+                best = k
+        learnt[1], learnt[best] = learnt[best], learnt[1]
+
+        return learnt, level[learnt[1] >> 1]
+
+    def _cancel_until(self, target_level):
+        if len(self._trail_lim) <= target_level:
+            return
+
+        values = self._values
+        activity = self._activity
+        heap = self._heap
+        trail = self._trail
+        stop = self._trail_lim[target_level]
+
+        for k in range(len(trail) - 1, stop - 1, -1):
+            lit = trail[k]
+            var = lit >> 1
+            self._polarity[var] = not (lit & 1)
+            values[lit] = values[lit ^ 1] = UNASSIGNED
+            self._reason[var] = None
+            heapq.heappush(heap, (-activity[var], var))
+
+        del trail[stop:]
+        del self._trail_lim[target_level:]
+        self._qhead = len(trail)
+
+    def _bump_variable(self, var):
+        activity = self._activity
+        activity[var] += self._var_inc
+
+        if activity[var] > 1e100:
+            for v in range(len(activity)):
+                activity[v] *= 1e-100
+            self._var_inc *= 1e-100
+            self._rebuild_heap()
+        elif self._values[2 * var] == UNASSIGNED:
+            heapq.heappush(self._heap, (-activity[var], var))
+
+    def _bump_clause(self, clause):
+        clause.activity += self._cla_inc
+        if clause.activity > 1e20:
+            for learnt in self._learnts:
+                learnt.activity *= 1e-20
+            self._cla_inc *= 1e-20
+
+    def _rebuild_heap(self):
+        values = self._values
+        self._heap = [(-self._activity[var], var) for var in range(self.num_variables) if values[2 * var] == UNASSIGNED]
+        heapq.heapify(self._heap)
+
+    def _pick_branch_literal(self):
+        heap = self._heap
+        values = self._values
+
+        # ----- the heap is lazy: it may hold stale or assigned entries
+        if len(heap) > 4 * self.num_variables + 1000:
+            self._rebuild_heap()
+            heap = self._heap
+
+        while heap:
+            _, var = heapq.heappop(heap)
+            if values[2 * var] == UNASSIGNED:
+                return 2 * var + (not self._polarity[var])
+
+        return None
+
+    def _reduce_learnts(self):
+        '''
+            Delete the less active half of the learnt clauses, keeping binary clauses and
+            clauses that are the reason of a current assignment
+
+        '''
+        values = self._values
+        reason = self._reason
+        learnts = sorted(self._learnts, key = lambda clause: clause.activity)
+        limit = self._cla_inc / len(learnts)
+        kept = []
+
+        for k, clause in enumerate(learnts):
+            first = clause.lits[0]
+            locked = reason[first >> 1] is clause and values[first] == 1
+            if not locked and len(clause.lits) > 2 and (k < len(learnts) // 2 or clause.activity < limit):
+                clause.deleted = True
+                self.stats["deleted_clauses"] += 1
+            else:
+                kept.append(clause)
+
+        self._learnts = kept
+
+    def _search(self, max_conflicts):
+        conflicts = 0
+
+        while True:
+            conflict = self._propagate()
+
+            if conflict is not None:
+                self.stats["conflicts"] += 1
+                conflicts += 1
+
+                if len(self._trail_lim) == 0:
+                    self._ok = False
+                    return False
+
+                learnt, backtrack_level = self._analyze(conflict)
+                self._cancel_until(backtrack_level)
+
+                if len(learnt) == 1:
+                    self._enqueue(learnt[0], None)
+                else:
+                    clause = _Clause(learnt, True)
+                    self._learnts.append(clause)
+                    self._attach(clause)
+                    self._bump_clause(clause)
+                    self._enqueue(learnt[0], clause)
+                    self.stats["learnt_clauses"] += 1
+
+                self._var_inc /= self._var_decay
+                self._cla_inc /= self._clause_decay
+                continue
+
+            if conflicts >= max_conflicts:
+                self._cancel_until(0)
+                return None
+
+            if len(self._learnts) - len(self._trail) >= self._max_learnts:
+                self._reduce_learnts()
+                self._max_learnts *= 1.1
+
+            lit = self._pick_branch_literal()
+            if lit is None:
+                self._model = [self._values[2 * var] == 1 for var in range(self.num_variables)]
+                self._cancel_until(0)
+                return True
+
+            self.stats["decisions"] += 1
+            self._trail_lim.append(len(self._trail))
+            self._enqueue(lit, None)
+
+
+def _literal_of(node):
+    '''
+        Return (NodeType, bool) for a literal node (leaf or negated leaf), or None
+
+    '''
+    if node._type.arity == 0:
+        return (node._type, True)
+    if node._type is NodeType.NOT and node._child1._type.arity == 0:
+        return (node._child1._type, False)
+    return None
+
+
+def clauses_from_cnf(pltree):
+    '''
+        Read the clauses of a formula in Conjunctive Normal Form, such as a tree produced by
+        reduce_to_CNF. Any nesting of conjunctions of disjunctions of literals is accepted.
+
+        @Args: pltree   : PLTreeNode (or PLDagNode) in CNF
+
+        @Return: list of clauses, each a list of (NodeType, bool) literals, where (P, False)
+                 stands for ¬P. Constants are kept as literals of NodeType.TRUE / FALSE
+
+    '''
+    clauses = []
+    stack = [pltree]
+
+    while stack:
+        node = stack.pop()
+
+        if node._type is NodeType.AND:
+            stack.append(node._child2)
+            stack.append(node._child1)
+            continue
+
+        clause = []
+        for leaf in post_order(node, children = lambda n: (n._child1, n._child2) if n._type is NodeType.OR else ()):
+            if leaf._type is NodeType.OR:
+                continue
+            literal = _literal_of(leaf)
+            if literal is None:
+                raise ValueError("Formula is not in CNF: %s"%leaf.in_prefix_notation())
+            clause.append(literal)
+        clauses.append(clause)
+
+    return clauses
+
+
+def find_model(formula):
+    '''
+        Find a satisfying assignment of a formula with the CDCL solver
+
+        @Args: formula  : A PLTreeNode or PLDagNode (converted through the Tseitin encoding if
+                          it is not already in CNF), a ClauseDatabase, or a list of clauses of
+                          (NodeType, bool) literals
+
+        @Return: a list of (NodeType, bool) bindings of every variable of the formula (auxiliary
+                 variables excluded), usable with apply_variable_bindings, or None if the
+                 formula is unsatisfiable
+
+    '''
+    if isinstance(formula, ClauseDatabase):
+        database = formula
+    elif isinstance(formula, list):
+        database = ClauseDatabase.from_clauses(formula)
+    else:
+        variables = []
+        seen = set()
+        for nodetype in formula.get_reverse_polish():
+            if nodetype.is_var() and nodetype not in seen:
+                seen.add(nodetype)
+                variables.append(nodetype)
+
+        database = ClauseDatabase(variables)
+        try:
+            clauses = clauses_from_cnf(formula)
+        except ValueError:
+            from plt_src.tseitin import tseitin_clauses
+            clauses, database.auxiliary = tseitin_clauses(formula, polarity_aware = True)
+
+        for clause in clauses:
+            database.add_literal_clause(clause)
+
+    solver = SATSolver()
+    solver.add_clauses(database)
+    if not solver.solve():
+        return None
+
+    variables = [database.variable(number) for number in range(1, database.num_variables + 1)]
+    return [(variable, solver.value(number)) for number, variable in enumerate(variables, 1) if variable not in database.auxiliary]
@@ -0,0 +1,644 @@
+'''
+    Local asyncio service answering CNF, evaluation and satisfiability requests.
+
+    Clients connect over a Unix socket or TCP (meant for localhost) and exchange
+    newline-delimited JSON. Every request line gets one response line carrying the same
+    id; responses come back as soon as they are ready, so a client may pipeline many
+    requests on one connection:
+
+        {"id": 1, "op": "cnf", "formula": "(A & B) | C"}
+        {"id": 1, "result": "and(or(A,C),or(B,C))"}
+
+        {"id": 2, "op": "evaluate", "formula": "A -> B", "bindings": {"A": true, "B": false}}
+        {"id": 2, "result": false}
+
+        {"id": 3, "op": "solve", "formula": "A & ~B"}
+        {"id": 3, "result": {"satisfiable": true, "model": {"A": true, "B": false}}}
+
+        {"id": 4, "op": "stats"}
+
+        {"id": 5, "op": "cnf", "formula": "A &"}
+        {"id": 5, "error": "ValueError: Incomplete formula A &"}
+
+    Options: "format" ("text" or "rpn", as in batch.py), "notation" of formula results
+    ("prefix", "infix" or "rpn"), "mode" of cnf ("distribute" or "tseitin"). Evaluation
+    with bindings that leave variables unbound gives the simplified formula.
+
+    The event loop only parses JSON and routes requests; the CPU work runs on a process
+    pool. Concurrent requests identical but for their id are coalesced into a single
+    computation. Evaluation requests are batched: they are queued for up to batch_delay
+    seconds (or until batch_size are waiting) and sent to a worker together, which parses
+    each distinct formula once and evaluates complete bindings with a compiled function
+    (see compiler.py). With cache_path, workers share a persistent CNFCache.
+
+    A distributed CNF may grow exponentially: conversions beyond cnf_budget literals are
+    refused with an error, and memory_limit caps the address space of each worker as in
+    batch.py. A worker that dies all the same breaks the pool: the requests it held get an
+    error response and a new pool takes over.
+
+    The stats request (or FormulaService.report()) returns request counts, throughput
+    and latency percentiles per operation.
+
+        python -m plt_src.service --unix /tmp/plt.sock --workers 4
+        python -m plt_src.service --port 8765 --cache cnf_cache.sqlite
+
+'''
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from plt_src.batch import FORMATS, NOTATIONS, parse_bindings
+
+OPERATIONS = ("cnf", "evaluate", "solve", "stats")
+CNF_MODES = ("distribute", "tseitin")
+
+# ----- latencies kept per operation for the percentiles
+LATENCY_WINDOW = 10000
+
+# ----- longest request line accepted
+MAX_LINE_BYTES = 1 << 24
+
+# ----- literals of the largest CNF produced by distribution
+DEFAULT_CNF_BUDGET = 1 << 20
+
+# ----- CNFCache of the current worker process, set by _initialize_worker
+_cache = None
+
+
+# ----- work done in the worker processes
+
+def _initialize_worker(cache_path, memory_limit = None):
+    global _cache
+    if cache_path:
+        from plt_src.cnf_cache import CNFCache
+        _cache = CNFCache(cache_path)
+
+    if memory_limit:
+        import resource
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+
+
+def _parse(text, input_format):
+    from plt_src import PLTreeNode
+    from plt_src.parser import parse_reverse_polish, parse_rpn
+    if input_format == "rpn":
+        return PLTreeNode.build_from_reverse_polish(parse_rpn(text))
+    return PLTreeNode.build_from_reverse_polish(parse_reverse_polish(text))
+
+
+def _print(pltree, notation):
+    if notation == "infix":
+        return pltree.in_infix_notation()
+    if notation == "rpn":
+        return " ".join(nodetype.prefix_name for nodetype in pltree.get_reverse_polish())
+    return pltree.in_prefix_notation()
+
+
+def _error(error):
+    message = str(error).splitlines()[0] if str(error) else ""
+    return "%s: %s" % (error.__class__.__name__, message)
+
+
+def cnf_request(text, input_format = "text", mode = "distribute", notation = "prefix", budget = None):
+    '''
+        Convert a formula to CNF, through the worker's CNFCache if there is one. By
+        distribution, a CNF of more than budget literals raises a ValueError
+
+    '''
+    pltree = _parse(text, input_format)
+    pltree.reduce_to_CNF(mode = mode, polarity_aware = mode == "tseitin", budget = budget if mode == "distribute" else None,
+                         cache = _cache)
+    return _print(pltree, notation)
+
+
+def solve_request(text, input_format = "text"):
+    '''
+        Decide satisfiability of a formula
+
+        @Return: {"satisfiable": bool, "model": {variable name: bool}} (model only if satisfiable)
+
+    '''
+    from plt_src.sat_solver import find_model
+    model = find_model(_parse(text, input_format))
+    if model is None:
+        return {"satisfiable": False}
+    return {"satisfiable": True, "model": {variable.prefix_name: value for variable, value in model}}
+
+
+def evaluate_requests(items):
+    '''
+        Evaluate a batch of formulas under bindings, parsing each distinct formula once
+
+        @Args: items    : List of (formula text, input_format, bindings, notation) where
+                          bindings is a list of (variable name, bool) pairs
+
+        @Return: list of ("result", value) or ("error", message), value being a bool, or
+                 the simplified formula printed in notation when variables remain unbound
+
+    '''
+    from plt_src import NodeType
+    from plt_src.binding_index import BindingIndex
+    from plt_src.compiler import compile_formula
+    from plt_src.node_type import variable_named
+
+    formulas = {}
+    results = []
+
+    for text, input_format, bindings, notation in items:
+        try:
+            key = (text, input_format)
+            formula = formulas.get(key)
+            if formula is None:
+                pltree = _parse(text, input_format)
+                formula = formulas[key] = (pltree, compile_formula(pltree))
+            pltree, function = formula
+
+            values = {variable_named(name): value for name, value in bindings}
+            if all(variable in values for variable in function.variables):
+                results.append(("result", function([values[variable] for variable in function.variables])))
+                continue
+
+            # ----- with_variable_bindings folds the constants: a fully bound formula is a leaf
+            bound = pltree.with_variable_bindings(BindingIndex(list(values.items())))
+            if bound._type is NodeType.TRUE or bound._type is NodeType.FALSE:
+                results.append(("result", bound._type is NodeType.TRUE))
+            else:
+                results.append(("result", _print(bound, notation)))
+        except Exception as error:
+            results.append(("error", _error(error)))
+
+    return results
+
+
+def _run(function, *args):
+    '''
+        Run a request in a worker, returning ("result", value) or ("error", message)
+
+    '''
+    try:
+        return ("result", function(*args))
+    except Exception as error:
+        # ----- near the memory limit even the interpreter fails, e.g. with SystemError
+        return ("error", _error(error))
+
+
+# ----- the service
+
+class ServiceStats:
+
+    def __init__(self):
+        '''
+            Request counters and latencies, per operation
+
+        '''
+        self.start = time.perf_counter()
+        self.requests = {}
+        self.errors = {}
+        self.latencies = {}
+        self.coalesced = 0
+        self.batches = 0
+        self.batched = 0
+
+    def record(self, operation, seconds, error):
+        self.requests[operation] = self.requests.get(operation, 0) + 1
+        if error:
+            self.errors[operation] = self.errors.get(operation, 0) + 1
+        window = self.latencies.get(operation)
+        if window is None:
+            window = self.latencies[operation] = deque(maxlen = LATENCY_WINDOW)
+        window.append(seconds)
+
+    def report(self):
+        '''
+            Return the statistics as a JSON-ready dict. Latencies are in milliseconds, over
+            the last LATENCY_WINDOW requests of each operation
+
+        '''
+        seconds = time.perf_counter() - self.start
+        total = sum(self.requests.values())
+        operations = {}
+        for operation, count in self.requests.items():
+            window = sorted(self.latencies[operation])
+            operations[operation] = {
+                "requests": count,
+                "errors": self.errors.get(operation, 0),
+                "mean_ms": 1000.0 * sum(window) / len(window),
+                "p50_ms": 1000.0 * _percentile(window, 0.50),
+                "p90_ms": 1000.0 * _percentile(window, 0.90),
+                "p99_ms": 1000.0 * _percentile(window, 0.99),
+                "max_ms": 1000.0 * window[-1],
+            }
+        return {
+            "uptime_seconds": seconds,
+            "requests": total,
+            "requests_per_second": total / seconds if seconds > 0 else 0.0,
+            "coalesced": self.coalesced,
+            "evaluation_batches": self.batches,
+            "mean_batch_size": self.batched / self.batches if self.batches else 0.0,
+            "operations": operations,
+        }
+
+
+def _percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class FormulaService:
+
+    def __init__(self, workers = None, batch_size = 64, batch_delay = 0.002, cache_path = None,
+                 cnf_budget = DEFAULT_CNF_BUDGET, memory_limit = None):
+        '''
+            Create the service. Call start() (or use it as an async context manager) before
+            serving
+
+            @Args:
+                workers     : Number of worker processes, os.cpu_count() by default. With 1,
+                              requests run on a thread of the current process instead
+                batch_size  : Evaluation requests sent to a worker at most at a time
+                batch_delay : Seconds an evaluation request may wait for others to batch with
+                cache_path  : Optional SQLite file of a CNFCache shared by the workers
+                cnf_budget  : Maximum number of literals of a CNF by distribution, None for
+                              no limit
+                memory_limit: Optional address space limit of each worker process, in bytes
+                              (Unix only)
+
+        '''
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.cache_path = cache_path
+        self.cnf_budget = cnf_budget
+        self.memory_limit = memory_limit
+        self.stats = ServiceStats()
+
+        self._executor = None
+        self._servers = []
+        self._connections = set()
+        self._in_flight = {}
+        self._batch = []
+        self._batch_timer = None
+
+    async def start(self):
+        if self.workers == 1:
+            from concurrent.futures import ThreadPoolExecutor
+            _initialize_worker(self.cache_path)
+            self._executor = ThreadPoolExecutor(1)
+        else:
+            self._executor = self._process_pool()
+        self.stats = ServiceStats()
+        return self
+
+    def _process_pool(self):
+        return ProcessPoolExecutor(self.workers, initializer = _initialize_worker, initargs = (self.cache_path, self.memory_limit))
+
+    def _replace_broken(self, executor):
+        '''
+            Replace a process pool broken by the death of a worker, unless already done
+
+        '''
+        if self._executor is executor:
+            executor.shutdown(wait = False)
+            self._executor = self._process_pool()
+
+    async def listen_unix(self, path):
+        '''
+            Accept connections on a Unix socket
+
+        '''
+        server = await asyncio.start_unix_server(self._connection, path, limit = MAX_LINE_BYTES)
+        self._servers.append(server)
+        return server
+
+    async def listen_tcp(self, host = "127.0.0.1", port = 0):
+        '''
+            Accept connections on a TCP port (0 picks a free one, see the server's sockets)
+
+        '''
+        server = await asyncio.start_server(self._connection, host, port, limit = MAX_LINE_BYTES)
+        self._servers.append(server)
+        return server
+
+    async def close(self):
+        for server in self._servers:
+            server.close()
+            await server.wait_closed()
+        self._servers = []
+        for task in list(self._connections):
+            task.cancel()
+        if self._connections:
+            await asyncio.gather(*self._connections, return_exceptions = True)
+        if self._executor is not None:
+            self._executor.shutdown(wait = True)
+            self._executor = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    def report(self):
+        return self.stats.report()
+
+    # ----- requests
+
+    async def handle(self, request):
+        '''
+            Answer one request (a dict as described above)
+
+            @Return: the response dict, without the id
+
+        '''
+        operation = request.get("op")
+        if operation == "stats":
+            return {"result": self.report()}
+        if operation not in OPERATIONS:
+            raise ValueError("Unknown operation %s" % operation)
+
+        formula = request.get("formula")
+        if not isinstance(formula, str):
+            raise ValueError("formula must be a string")
+        input_format = request.get("format", "text")
+        if input_format not in FORMATS:
+            raise ValueError("Unknown input format %s" % input_format)
+        notation = request.get("notation", "prefix")
+        if notation not in NOTATIONS:
+            raise ValueError("Unknown notation %s" % notation)
+
+        if operation == "cnf":
+            mode = request.get("mode", "distribute")
+            if mode not in CNF_MODES:
+                raise ValueError("Unknown CNF mode %s" % mode)
+            key = ("cnf", formula, input_format, mode, notation)
+            return await self._coalesce(key, lambda: self._submit(_run, cnf_request, formula, input_format, mode, notation,
+                                                                  self.cnf_budget))
+
+        if operation == "solve":
+            key = ("solve", formula, input_format)
+            return await self._coalesce(key, lambda: self._submit(_run, solve_request, formula, input_format))
+
+        bindings = _bindings(request.get("bindings", {}))
+        key = ("evaluate", formula, input_format, tuple(bindings), notation)
+        return await self._coalesce(key, lambda: self._evaluate((formula, input_format, bindings, notation)))
+
+    async def _coalesce(self, key, start):
+        '''
+            Share the computation of identical concurrent requests
+
+        '''
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.stats.coalesced += 1
+            return _response(await asyncio.shield(future))
+
+        future = asyncio.ensure_future(start())
+        self._in_flight[key] = future
+        try:
+            return _response(await asyncio.shield(future))
+        finally:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+
+    def _submit(self, function, *args):
+        loop = asyncio.get_running_loop()
+        executor = self._executor
+        try:
+            future = loop.run_in_executor(executor, function, *args)
+        except BrokenProcessPool:
+            self._replace_broken(executor)
+            executor = self._executor
+            future = loop.run_in_executor(executor, function, *args)
+
+        def done(future):
+            if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+                self._replace_broken(executor)
+
+        future.add_done_callback(done)
+        return future
+
+    def _evaluate(self, item):
+        future = asyncio.get_running_loop().create_future()
+        self._batch.append((item, future))
+        if len(self._batch) >= self.batch_size:
+            self._flush()
+        elif self._batch_timer is None:
+            self._batch_timer = asyncio.get_running_loop().call_later(self.batch_delay, self._flush)
+        return future
+
+    def _flush(self):
+        if self._batch_timer is not None:
+            self._batch_timer.cancel()
+            self._batch_timer = None
+        batch, self._batch = self._batch, []
+        if not batch:
+            return
+
+        self.stats.batches += 1
+        self.stats.batched += len(batch)
+        try:
+            work = self._submit(evaluate_requests, [item for item, _ in batch])
+        except Exception as error:
+            # ----- e.g. the service is closing: the batch must still be answered
+            for _, future in batch:
+                if not future.done():
+                    future.set_result(("error", _error(error)))
+            return
+
+        def done(work):
+            error = work.exception() if not work.cancelled() else asyncio.CancelledError()
+            for k, (_, future) in enumerate(batch):
+                if future.done():
+                    continue
+                if error is not None:
+                    future.set_result(("error", _error(error)))
+                else:
+                    future.set_result(work.result()[k])
+
+        work.add_done_callback(done)
+
+    # ----- connections
+
+    async def _connection(self, reader, writer):
+        connection = asyncio.current_task()
+        self._connections.add(connection)
+        lock = asyncio.Lock()
+        tasks = set()
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, asyncio.LimitOverrunError):
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                task = asyncio.ensure_future(self._answer(line, writer, lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions = True)
+        except (ConnectionError, asyncio.CancelledError):
+            # ----- client gone, or the service is closing
+            for task in tasks:
+                task.cancel()
+        finally:
+            self._connections.discard(connection)
+            writer.close()
+
+    async def _answer(self, line, writer, lock):
+        start = time.perf_counter()
+        request_id = None
+        operation = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("A request must be a JSON object")
+            request_id = request.get("id")
+            operation = request.get("op")
+            response = await self.handle(request)
+        except Exception as error:
+            # ----- every request line gets its response, whatever went wrong
+            response = {"error": _error(error)}
+
+        response["id"] = request_id
+        data = (json.dumps(response) + "\n").encode()
+        async with lock:
+            writer.write(data)
+            await writer.drain()
+        self.stats.record(operation if operation in OPERATIONS else "invalid", time.perf_counter() - start, "error" in response)
+
+
+def _bindings(bindings):
+    '''
+        Bindings of a request, a {"A": true} object or an "A=1,B=0" string, as a sorted list
+        of (name, bool) pairs
+
+    '''
+    if isinstance(bindings, str):
+        return sorted((variable.prefix_name, value) for variable, value in parse_bindings(bindings))
+    if not isinstance(bindings, dict) or not all(isinstance(value, bool) for value in bindings.values()):
+        raise ValueError("bindings must map variable names to true or false")
+    return sorted(bindings.items())
+
+
+def _response(outcome):
+    kind, value = outcome
+    return {kind: value}
+
+
+# ----- client
+
+class ServiceClient:
+
+    def __init__(self, reader, writer):
+        '''
+            Connection to a FormulaService. Use connect_unix() or connect_tcp()
+
+        '''
+        self._reader = reader
+        self._writer = writer
+        self._pending = {}
+        self._next_id = 0
+        self._receiver = asyncio.ensure_future(self._receive())
+
+    @classmethod
+    async def connect_unix(cls, path):
+        reader, writer = await asyncio.open_unix_connection(path, limit = MAX_LINE_BYTES)
+        return cls(reader, writer)
+
+    @classmethod
+    async def connect_tcp(cls, host = "127.0.0.1", port = 8765):
+        reader, writer = await asyncio.open_connection(host, port, limit = MAX_LINE_BYTES)
+        return cls(reader, writer)
+
+    async def request(self, op, **fields):
+        '''
+            Send a request and wait for its response
+
+            @Return: the response dict ("result" or "error")
+
+        '''
+        self._next_id += 1
+        request_id = self._next_id
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        fields["id"] = request_id
+        fields["op"] = op
+        self._writer.write((json.dumps(fields) + "\n").encode())
+        await self._writer.drain()
+        return await future
+
+    async def _receive(self):
+        try:
+            while True:
+                line = await self._reader.readline()
+                if not line:
+                    break
+                response = json.loads(line)
+                future = self._pending.pop(response.get("id"), None)
+                if future is not None and not future.done():
+                    future.set_result(response)
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("connection closed"))
+            self._pending.clear()
+
+    async def close(self):
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except ConnectionError:
+            pass
+        await asyncio.gather(self._receiver, return_exceptions = True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+
+async def serve(unix_path = None, host = "127.0.0.1", port = 8765, **options):
+    '''
+        Run a FormulaService until cancelled
+
+    '''
+    async with FormulaService(**options) as service:
+        server = await (service.listen_unix(unix_path) if unix_path else service.listen_tcp(host, port))
+        for sock in server.sockets:
+            sys.stderr.write("listening on %s\n" % (sock.getsockname(),))
+        await server.serve_forever()
+
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(prog = "python -m plt_src.service", description = "Local CNF / evaluation / SAT service")
+    parser.add_argument("--unix", help = "Unix socket path (default: TCP)")
+    parser.add_argument("--host", default = "127.0.0.1")
+    parser.add_argument("--port", type = int, default = 8765)
+    parser.add_argument("--workers", type = int, default = None, help = "worker processes (default: number of CPUs)")
+    parser.add_argument("--batch-size", type = int, default = 64, help = "evaluation requests per work unit")
+    parser.add_argument("--batch-delay", type = float, default = 0.002, help = "seconds an evaluation waits for a batch")
+    parser.add_argument("--cache", help = "SQLite file of a CNF cache shared by the workers")
+    parser.add_argument("--cnf-budget", type = int, default = DEFAULT_CNF_BUDGET, help = "literals of the largest distributed CNF")
+    parser.add_argument("--memory-limit", type = int, default = None, help = "address space limit per worker, in MB")
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(serve(args.unix, args.host, args.port, workers = args.workers, batch_size = args.batch_size,
+                          batch_delay = args.batch_delay, cache_path = args.cache, cnf_budget = args.cnf_budget,
+                          memory_limit = args.memory_limit * 1024 * 1024 if args.memory_limit else None))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
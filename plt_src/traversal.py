@@ -0,0 +1,150 @@
+'''
+    Explicit-stack traversal core shared by PLTreeNode and PLDagNode.
+
+    Nothing in here recurses on the Python call stack, so formulas of any depth can be
+    walked without hitting the interpreter recursion limit. Nodes are expected to expose
+    _type, _child1 and _child2, as both node classes do.
+
+'''
+
+
+def post_order(root, children = None, distinct = False):
+    '''
+        Yield every node below and including root, each one after all of its children
+
+        @Args:
+            root            : The node to start from
+            children        : Optional function mapping a node to a tuple of its children.
+                              By default the _child1 and _child2 attributes are used
+            distinct        : If True, each (hashable) node is yielded only once, which
+                              walks a DAG in time linear in its number of distinct nodes
+
+    '''
+    seen = set() if distinct else None
+    stack = [root]
+    expanded = [False]
+
+    while stack:
+        node = stack.pop()
+
+        if expanded.pop():
+            yield node
+            continue
+
+        if seen is not None:
+            if node in seen:
+                continue
+            seen.add(node)
+
+        stack.append(node)
+        expanded.append(True)
+
+        if children is None:
+            child2 = node._child2
+            if child2 is not None:
+                stack.append(child2)
+                expanded.append(False)
+            child1 = node._child1
+            if child1 is not None:
+                stack.append(child1)
+                expanded.append(False)
+        else:
+            for child in reversed(children(node)):
+                stack.append(child)
+                expanded.append(False)
+
+
+def pre_order(root):
+    '''
+        Yield every node below and including root, each one before its children.
+
+        The children of a node are only read once the consumer resumes the generator,
+        so the consumer may rewrite a node in place and the traversal continues into
+        its new children.
+
+    '''
+    stack = [root]
+
+    while stack:
+        node = stack.pop()
+        yield node
+
+        child2 = node._child2
+        if child2 is not None:
+            stack.append(child2)
+        child1 = node._child1
+        if child1 is not None:
+            stack.append(child1)
+
+
+def prefix_tokens(root):
+    '''
+        Return the list of string pieces that make up root in prefix notation
+
+    '''
+    out = []
+    stack = [root]
+
+    while stack:
+        item = stack.pop()
+
+        if item.__class__ is str:
+            out.append(item)
+            continue
+
+        nodetype = item._type
+        arity = nodetype.arity
+
+        if arity == 0:
+            out.append(nodetype.prefix_name)
+        elif arity == 1:
+            out.append(nodetype.prefix_name)
+            out.append("(")
+            stack.append(")")
+            stack.append(item._child1)
+        elif arity == 2:
+            out.append(nodetype.prefix_name)
+            out.append("(")
+            stack.append(")")
+            stack.append(item._child2)
+            stack.append(",")
+            stack.append(item._child1)
+        else:
+            raise ValueError("Invalid Arity")
+
+    return out
+
+
+def infix_tokens(root):
+    '''
+        Return the list of string pieces that make up root in infix notation
+
+    '''
+    out = []
+    stack = [root]
+
+    while stack:
+        item = stack.pop()
+
+        if item.__class__ is str:
+            out.append(item)
+            continue
+
+        nodetype = item._type
+        arity = nodetype.arity
+
+        if arity == 0:
+            out.append(nodetype.infix_name)
+        elif arity == 1:
+            out.append(nodetype.infix_name)
+            stack.append(item._child1)
+        elif arity == 2:
+            out.append("(")
+            stack.append(")")
+            stack.append(item._child2)
+            stack.append(nodetype.infix_name)
+            stack.append(item._child1)
+        else:
+            raise ValueError("Invalid Arity")
+
+    return out
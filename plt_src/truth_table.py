@@ -0,0 +1,177 @@
+'''
+    Bit-parallel truth tables.
+
+    The truth table of a formula over n variables is held in a single Python integer of
+    2^n bits: bit k is the value of the formula under assignment k, in which the j-th
+    variable is True exactly when bit j of k is set. Each operator then costs one big
+    integer operation (&, |, ^) covering all 2^n assignments at once.
+
+'''
+from plt_src.pl_flat_formula import PLFlatFormula, OP_IMPLIES, OP_AND, OP_OR, OP_NOT, OP_TRUE, OP_FALSE, OP_VAR
+
+# ----- 2^24 bits is 2MB per intermediate value
+MAX_VARIABLES = 24
+
+
+def _variable_mask(j, num_variables):
+    '''
+        Bits set for the assignments in which variable j is True: blocks of 2^j zeros
+        followed by 2^j ones, repeated over the 2^num_variables assignments
+
+    '''
+    width = 1 << j
+    mask = ((1 << width) - 1) << width
+    width <<= 1
+    total = 1 << num_variables
+
+    while width < total:
+        mask |= mask << width
+        width <<= 1
+
+    return mask
+
+
+class TruthTable:
+
+    def __init__(self, formula, variables = None):
+        '''
+            Compute the full truth table of a formula
+
+            @Args:
+                formula     : A PLTreeNode, PLDagNode or PLFlatFormula
+                variables   : List of the variable NodeTypes spanning the table, which must
+                              include every variable of the formula. Defaults to the variables
+                              of the formula in order of first appearance
+
+        '''
+        if not isinstance(formula, PLFlatFormula):
+            formula = PLFlatFormula.from_tree(formula)
+
+        variables = list(formula.variables) if variables is None else list(variables)
+        if len(variables) > MAX_VARIABLES:
+            raise ValueError("Truth tables are limited to %d variables, got %d"%(MAX_VARIABLES, len(variables)))
+
+        position = {variable: j for j, variable in enumerate(variables)}
+        for variable in formula.variables:
+            if variable not in position:
+                raise ValueError("Variable %s missing from the table variables"%variable)
+
+        self._variables = variables
+        self._all = (1 << (1 << len(variables))) - 1
+
+        masks = [_variable_mask(position[variable], len(variables)) for variable in formula.variables]
+        self._bits = self._evaluate(formula, masks)
+
+    def _evaluate(self, formula, masks):
+        all_bits = self._all
+        child1 = formula.child1
+        child2 = formula.child2
+        values = [0] * len(formula)
+
+        for i, opcode in enumerate(formula.opcodes):
+            if opcode == OP_VAR:
+                values[i] = masks[child1[i]]
+            elif opcode == OP_TRUE:
+                values[i] = all_bits
+            elif opcode == OP_FALSE:
+                values[i] = 0
+            elif opcode == OP_NOT:
+                values[i] = all_bits ^ values[child1[i]]
+            elif opcode == OP_AND:
+                values[i] = values[child1[i]] & values[child2[i]]
+            elif opcode == OP_OR:
+                values[i] = values[child1[i]] | values[child2[i]]
+            elif opcode == OP_IMPLIES:
+                values[i] = (all_bits ^ values[child1[i]]) | values[child2[i]]
+
+            # ----- each node has a single parent: release the children's tables
+            if opcode < OP_TRUE:
+                values[child1[i]] = 0
+                if opcode != OP_NOT:
+                    values[child2[i]] = 0
+
+        return values[-1]
+
+    @property
+    def variables(self):
+        return self._variables
+
+    @property
+    def bits(self):
+        return self._bits
+
+    def count_models(self):
+        '''
+            Return the number of assignments of the table variables satisfying the formula
+
+        '''
+        return bin(self._bits).count("1")
+
+    def is_tautology(self):
+        return self._bits == self._all
+
+    def is_satisfiable(self):
+        return self._bits != 0
+
+    def value(self, val_bindings_map):
+        '''
+            Return the value of the formula under a complete assignment
+
+            @Args: val_bindings_map    : A dict or list of (NodeType, bool) pairs binding every table variable
+
+        '''
+        bindings = dict(val_bindings_map)
+        index = sum(1 << j for j, variable in enumerate(self._variables) if bindings[variable])
+        return bool((self._bits >> index) & 1)
+
+    def models(self):
+        '''
+            Yield every satisfying assignment as a list of (NodeType, bool) bindings
+
+        '''
+        bits = self._bits
+        while bits:
+            lowest = bits & -bits
+            index = lowest.bit_length() - 1
+            bits ^= lowest
+            yield [(variable, bool((index >> j) & 1)) for j, variable in enumerate(self._variables)]
+
+
+def is_tautology(formula):
+    '''
+        Return True if the formula is true under every assignment
+
+    '''
+    return TruthTable(formula).is_tautology()
+
+
+def is_satisfiable(formula):
+    '''
+        Return True if the formula is true under at least one assignment
+
+    '''
+    return TruthTable(formula).is_satisfiable()
+
+
+def are_equivalent(formula1, formula2):
+    '''
+        Return True if both formulas have the same value under every assignment of their variables
+
+    '''
+    flat1 = formula1 if isinstance(formula1, PLFlatFormula) else PLFlatFormula.from_tree(formula1)
+    flat2 = formula2 if isinstance(formula2, PLFlatFormula) else PLFlatFormula.from_tree(formula2)
+
+    variables = list(flat1.variables)
+    seen = set(variables)
+    variables += [variable for variable in flat2.variables if variable not in seen]
+
+    return TruthTable(flat1, variables).bits == TruthTable(flat2, variables).bits
+
+
+def count_models(formula, variables = None):
+    '''
+        Return the number of satisfying assignments of the formula over its variables
+        (or over the given list of variables, which must include them)
+
+    '''
+    return TruthTable(formula, variables).count_models()
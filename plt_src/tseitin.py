@@ -0,0 +1,136 @@
+'''
+    Tseitin and Plaisted-Greenbaum conversion to Conjunctive Normal Form.
+
+    Instead of distributing OR over AND, every distinct compound sub-formula gets an
+    auxiliary variable together with a few clauses defining it. The result is only
+    equisatisfiable with the input, but its size is linear in the size of the input.
+
+'''
+from plt_src import NodeType
+from plt_src.node_type import symbols
+from plt_src.pl_dag_node import PLDagNode
+from plt_src.traversal import post_order
+
+POSITIVE = 1
+NEGATIVE = 2
+
+
+def auxiliary_variable(index):
+    '''
+        Create the NodeType of the index-th auxiliary variable, printed as aux<index>
+
+    '''
+    return symbols.variable("aux%d" % index)
+
+
+def tseitin_clauses(pltree, polarity_aware = False):
+    '''
+        Compute an equisatisfiable set of clauses for the formula rooted at pltree.
+        The tree is not modified.
+
+        @Args:
+            pltree          : The PLTreeNode (or PLDagNode) to convert
+            polarity_aware  : If True, use the Plaisted-Greenbaum encoding, which only emits
+                              the direction of each definition required by the polarity of
+                              the sub-formula, giving fewer clauses
+
+        @Return: (clauses, auxiliary) where clauses is a list of clauses, each a list of
+                 (NodeType, bool) literals (False meaning negated), and auxiliary maps each
+                 auxiliary NodeType to the PLDagNode of the sub-formula it stands for
+
+    '''
+    root = pltree if isinstance(pltree, PLDagNode) else PLDagNode.from_tree(pltree)
+    nodes = list(post_order(root, distinct = True))
+
+    # ----- fresh names must not clash with variables of the formula itself
+    used_names = set(node._type.prefix_name for node in nodes if node._type.is_var())
+
+    # ----- polarity of every distinct sub-formula, parents before children
+    polarity = {root: POSITIVE}
+    for node in reversed(nodes):
+        node_polarity = polarity[node] if polarity_aware else POSITIVE | NEGATIVE
+        nodetype = node._type
+
+        if nodetype is NodeType.NOT:
+            children = ((node._child1, _flip(node_polarity)),)
+        elif nodetype is NodeType.IMPLIES:
+            children = ((node._child1, _flip(node_polarity)), (node._child2, node_polarity))
+        elif nodetype.arity == 2:
+            children = ((node._child1, node_polarity), (node._child2, node_polarity))
+        else:
+            children = ()
+
+        for child, child_polarity in children:
+            polarity[child] = polarity.get(child, 0) | child_polarity
+
+    clauses = []
+    auxiliary = {}
+    literals = {}
+    index = 0
+
+    for node in nodes:
+        nodetype = node._type
+
+        if nodetype.arity == 0:
+            literals[node] = (nodetype, True)
+            continue
+
+        if nodetype is NodeType.NOT:
+            literals[node] = _negate(literals[node._child1])
+            continue
+
+        index += 1
+        while "aux%d" % index in used_names:
+            index += 1
+
+        aux = auxiliary_variable(index)
+        auxiliary[aux] = node
+        literals[node] = (aux, True)
+
+        node_polarity = polarity[node] if polarity_aware else POSITIVE | NEGATIVE
+        clauses.extend(_definition(nodetype, (aux, True), literals[node._child1], literals[node._child2], node_polarity))
+
+    clauses.insert(0, [literals[root]])
+
+    return clauses, auxiliary
+
+
+def _definition(nodetype, x, a, b, polarity):
+    '''
+        Clauses of x ↔ (a op b), restricted to x → (a op b) for POSITIVE and
+        (a op b) → x for NEGATIVE polarity
+
+    '''
+    not_x, not_a, not_b = _negate(x), _negate(a), _negate(b)
+    clauses = []
+
+    if nodetype is NodeType.AND:
+        if polarity & POSITIVE:
+            clauses += [[not_x, a], [not_x, b]]
+        if polarity & NEGATIVE:
+            clauses += [[x, not_a, not_b]]
+
+    elif nodetype is NodeType.OR:
+        if polarity & POSITIVE:
+            clauses += [[not_x, a, b]]
+        if polarity & NEGATIVE:
+            clauses += [[x, not_a], [x, not_b]]
+
+    elif nodetype is NodeType.IMPLIES:
+        if polarity & POSITIVE:
+            clauses += [[not_x, not_a, b]]
+        if polarity & NEGATIVE:
+            clauses += [[x, a], [x, not_b]]
+
+    else:
+        raise ValueError("Invalid NodeType %s" % nodetype)
+
+    return clauses
+
+
+def _negate(literal):
+    return (literal[0], not literal[1])
+
+
+def _flip(polarity):
+    return ((polarity & POSITIVE) << 1) | ((polarity & NEGATIVE) >> 1)
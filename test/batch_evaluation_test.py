@@ -0,0 +1,44 @@
+import itertools
+import unittest
+from plt_src import NodeType, PLTreeNode, PLFlatFormula
+
+try:
+    import numpy as np
+    from plt_src.batch_evaluation import evaluate_batch
+except ImportError:
+    np = None
+
+import logging
+
+fmt = '[%(levelname)s] -- %(lineno)d: %(message)s\n'
+logging.basicConfig(format=fmt, level=logging.DEBUG)
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class BatchEvaluationUnitTest(unittest.TestCase):
+
+    def test_evaluate_batch(self):
+        typeList = [ NodeType.R, NodeType.P, NodeType.OR, NodeType.TRUE, NodeType.Q, NodeType.NOT, NodeType.AND, NodeType.IMPLIES ]
+        pltree = PLTreeNode.build_from_reverse_polish(typeList)
+
+        variables = [NodeType.P, NodeType.Q, NodeType.R]
+        assignments = np.array(list(itertools.product([False, True], repeat = 3)))
+
+        results = evaluate_batch(pltree, assignments, variables)
+
+        expected = [PLFlatFormula.from_tree(pltree).evaluate(list(zip(variables, row))) for row in assignments.tolist()]
+        self.assertEqual(results.tolist(), expected)
+        self.assertEqual(pltree.in_prefix_notation(), "implies(or(R,P),and(true,not(Q)))")
+
+    def test_constant_formula(self):
+        pltree = PLTreeNode.build_from_reverse_polish([NodeType.FALSE, NodeType.NOT])
+        results = evaluate_batch(pltree, np.zeros((4, 0), dtype = bool), [])
+        self.assertEqual(results.tolist(), [True] * 4)
+
+    def test_missing_variable(self):
+        pltree = PLTreeNode.build_from_reverse_polish([NodeType.A, NodeType.B, NodeType.AND])
+        with self.assertRaises(ValueError):
+            evaluate_batch(pltree, np.zeros((4, 1), dtype = bool), [NodeType.A])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+import io
+import multiprocessing
+import os
+import signal
+import tempfile
+import unittest
+from unittest import mock
+from plt_src import NodeType, symbols, batch
+from plt_src.batch import BatchReport, process_batch, process_formula, run_batch, parse_bindings
+from plt_src.__main__ import main
+
+import logging
+
+fmt = '[%(levelname)s] -- %(lineno)d: %(message)s\n'
+logging.basicConfig(format=fmt, level=logging.DEBUG)
+
+FORMULAS = ["implies(or(R,P),and(true,not(Q)))", "", "A & ~A", "(A | B) -> C", "bogus(", "not(not(P))"]
+
+class BatchUnitTest(unittest.TestCase):
+
+    def test_process_formula(self):
+        self.assertEqual(process_formula("implies(or(R,P),and(true,not(Q)))", ["cnf"], notation = "infix"),
+                         "((¬R∨⊤)∧((¬R∨¬Q)∧((¬P∨⊤)∧(¬P∨¬Q))))")
+        self.assertEqual(process_formula("R P or true Q not and implies", ["simplify", "cnf"], input_format = "rpn", notation = "rpn"),
+                         "R not Q not or P not Q not or and")
+        self.assertEqual(process_formula("A -> B", ["evaluate"], bindings = parse_bindings("A=1, B=false")), "false")
+        self.assertEqual(process_formula("A & ~B", ["solve"]), "sat A=1 B=0")
+        self.assertEqual(process_formula("A & ~A", ["solve"]), "unsat")
+
+        with self.assertRaises(ValueError):
+            parse_bindings("A=2")
+
+    def test_order_and_errors(self):
+        expected = [process_formula(line, ["simplify", "cnf"]) for line in FORMULAS if line and line != "bogus("]
+        expected.insert(3, "error: ValueError: Unknown operator bogus")
+
+        for workers in (1, 3):
+            report = BatchReport()
+            results = list(process_batch(FORMULAS * 10, ["simplify", "cnf"], workers = workers, chunk_size = 2, report = report))
+            self.assertEqual(results, expected * 10)
+            self.assertEqual((report.formulas, report.errors, report.chunks), (50, 10, 25))
+
+        with self.assertRaises(ValueError):
+            list(process_batch(FORMULAS, ["solve", "cnf"]))
+
+    def test_bindings_in_workers(self):
+        # ----- batch_pump gets a var_id here that spawned workers number differently
+        for k in range(50):
+            symbols.variable("batch_filler%d" % k)
+        bindings = parse_bindings("batch_pump=1")
+        lines = ["batch_other & batch_pump", "batch_pump"] * 3
+
+        for workers, context in ((1, None), (2, multiprocessing.get_context("spawn"))):
+            results = list(process_batch(lines, ["evaluate"], bindings = bindings, workers = workers, chunk_size = 1, mp_context = context))
+            self.assertEqual(results, ["batch_other", "true"] * 3)
+
+    def test_backpressure(self):
+        consumed = []
+
+        def lines():
+            for k in range(100):
+                consumed.append(k)
+                yield "A | B"
+
+        results = process_batch(lines(), ["cnf"], workers = 2, chunk_size = 1, max_pending = 3)
+        next(results)
+        self.assertEqual(len(consumed), 3)
+        self.assertEqual(len(list(results)), 99)
+
+    def test_dead_workers(self):
+        # ----- a "poison" line kills its worker, inherited from this process by fork
+        def process_or_die(line, *args):
+            if line == "poison":
+                os._exit(1)
+            return process_formula(line, *args)
+
+        lines = ["A | B"] * 20 + ["poison"] + ["A & B"] * 19
+        expected = ["or(A,B)"] * 20 + [None] * 5 + ["and(A,B)"] * 15
+        context = multiprocessing.get_context("fork")
+
+        with mock.patch.object(batch, "process_formula", process_or_die):
+            report = BatchReport()
+            results = list(process_batch(lines, [], workers = 2, chunk_size = 5, mp_context = context, report = report))
+        self.assertEqual([None if result.startswith("error: BrokenProcessPool") else result for result in results], expected)
+        self.assertEqual((report.formulas, report.errors, report.chunks), (40, 5, 8))
+
+        # ----- workers killed from outside: every chunk is run again
+        results = process_batch(["A | B"] * 200, [], workers = 2, chunk_size = 5, max_pending = 2, mp_context = context)
+        first = next(results)
+        for child in multiprocessing.active_children():
+            os.kill(child.pid, signal.SIGKILL)
+        self.assertEqual([first] + list(results), ["or(A,B)"] * 200)
+
+        # ----- any exception fails its own line only
+        self.assertEqual(batch.process_chunk(["A", "B"], ((), "text", "infix", 5))[1], 0)
+        self.assertEqual(batch.process_chunk(["A", "B"], (("evaluate",), "text", "infix", 5)),
+                         (["error: TypeError: 'int' object is not iterable"] * 2, 2))
+
+    def test_command_line(self):
+        handle, source = tempfile.mkstemp(suffix = ".txt")
+        os.close(handle)
+        target = source + ".out"
+        try:
+            with open(source, "w") as file:
+                file.write("\n".join(FORMULAS) + "\n")
+
+            main([source, "-o", target, "--ops", "simplify,cnf", "--workers", "2", "--quiet"])
+            with open(target) as file:
+                self.assertEqual(file.read().splitlines(), list(process_batch(FORMULAS, ["simplify", "cnf"], workers = 1)))
+        finally:
+            os.remove(source)
+            if os.path.exists(target):
+                os.remove(target)
+
+    def test_run_batch(self):
+        output = io.StringIO()
+        progress = io.StringIO()
+        report = run_batch(FORMULAS, output, ["solve"], progress = progress, workers = 1, chunk_size = 2)
+
+        self.assertEqual(output.getvalue().splitlines()[:2], ["sat R=0 P=0 Q=0", "unsat"])
+        self.assertEqual(report.formulas, 5)
+        self.assertTrue(progress.getvalue().endswith("%s\n" % report))
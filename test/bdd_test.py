@@ -0,0 +1,183 @@
+import itertools
+import random
+import unittest
+from plt_src import NodeType, PLTreeNode, symbols
+from plt_src.bdd import BDDManager, static_order
+from plt_src.formula_generator import formula_variables, random_formula
+from plt_src.pl_dag_node import PLDagNode
+from plt_src.truth_table import are_equivalent, count_models
+
+import logging
+
+fmt = '[%(levelname)s] -- %(lineno)d: %(message)s\n'
+logging.basicConfig(format=fmt, level=logging.DEBUG)
+
+DEPTH = 2000
+
+def assignments(variables):
+    for values in itertools.product([False, True], repeat = len(variables)):
+        yield list(zip(variables, values))
+
+def expected_value(pltree, bindings):
+    return pltree.with_variable_bindings(bindings).evaluate_constant_subtrees()
+
+class BDDUnitTest(unittest.TestCase):
+
+    def test_equivalence(self):
+        manager = BDDManager()
+        f = manager.from_tree(PLTreeNode.build_from_text("A -> B"))
+        g = manager.from_tree(PLTreeNode.build_from_text("~A | B"))
+        self.assertEqual(f, g)
+        self.assertNotEqual(f, manager.from_tree(PLTreeNode.build_from_text("B -> A")))
+
+        self.assertTrue(manager.equivalent(PLTreeNode.build_from_text("~(A & B)"), PLTreeNode.build_from_text("~A | ~B")))
+        self.assertIs(manager.from_tree(PLTreeNode.build_from_text("A | ~A")).value, True)
+        self.assertIs(manager.from_tree(PLTreeNode.build_from_text("A & ~A")).value, False)
+
+        # ----- operators on BDDs
+        a = manager.variable(NodeType.A)
+        b = manager.variable(NodeType.B)
+        self.assertEqual(a.implies(b), f)
+        self.assertEqual(~a | b, f)
+        self.assertEqual(a ^ b, (a | b) & ~(a & b))
+        self.assertEqual(a.ite(b, manager.true), f)
+        self.assertEqual(a & True, a)
+
+        with self.assertRaises(ValueError):
+            a & BDDManager().variable(NodeType.A)
+
+    def test_random_formulas(self):
+        rng = random.Random(21)
+        manager = BDDManager()
+        for _ in range(200):
+            shape = rng.choice(["balanced", "left-deep", "right-deep", "random"])
+            typeList = random_formula(rng.randint(1, 20), num_variables = 5, shape = shape, negation = 0.3, constants = 0.1, rng = rng)
+            pltree = PLTreeNode.build_from_reverse_polish(typeList)
+            bdd = manager.from_tree(pltree)
+
+            variables = formula_variables(5)
+            self.assertEqual(bdd.sat_count(variables), count_models(pltree, variables))
+            self.assertEqual(manager.from_tree(PLDagNode.from_tree(pltree)), bdd)
+
+            other = PLTreeNode.build_from_reverse_polish(random_formula(rng.randint(1, 6), num_variables = 3, rng = rng))
+            self.assertEqual(manager.from_tree(other) == bdd, are_equivalent(other, pltree))
+
+    def test_restrict(self):
+        rng = random.Random(5)
+        manager = BDDManager()
+        variables = formula_variables(4)
+        for _ in range(50):
+            pltree = PLTreeNode.build_from_reverse_polish(random_formula(12, num_variables = 4, negation = 0.3, rng = rng))
+            bdd = manager.from_tree(pltree)
+            for bindings in assignments(variables):
+                self.assertIs(bdd.restrict(bindings).value, expected_value(pltree, bindings))
+
+            # ----- partial bindings give the BDD of the partially evaluated formula
+            partial = [(NodeType.A, True), (NodeType.C, False)]
+            expected = pltree.with_variable_bindings(partial)
+            expected.evaluate_constant_subtrees()
+            self.assertEqual(bdd.restrict(partial), manager.from_tree(expected))
+
+    def test_sat_count(self):
+        manager = BDDManager([NodeType.A, NodeType.B, NodeType.C])
+        bdd = manager.from_tree(PLTreeNode.build_from_text("B | C"))
+        self.assertEqual(bdd.sat_count(), 6)
+        self.assertEqual(bdd.sat_count([NodeType.B, NodeType.C]), 3)
+        self.assertEqual(bdd.sat_count([NodeType.B, NodeType.C, NodeType.Z]), 6)
+        self.assertEqual(bdd.support(), [NodeType.B, NodeType.C])
+        self.assertEqual(manager.false.sat_count(), 0)
+        self.assertEqual(manager.true.sat_count([]), 1)
+
+        with self.assertRaises(ValueError):
+            bdd.sat_count([NodeType.B])
+
+    def test_garbage_collection(self):
+        manager = BDDManager()
+        kept = manager.from_tree(PLTreeNode.build_from_text("(A & B) | (C & D)"))
+        dropped = manager.from_tree(PLTreeNode.build_from_text("(A | E) & (F -> B)"))
+        nodes = manager.num_nodes
+
+        del dropped
+        freed = manager.collect_garbage()
+        self.assertGreater(freed, 0)
+        self.assertEqual(manager.num_nodes, nodes - freed)
+        self.assertEqual(manager.num_nodes, kept.node_count() - 2)
+
+        # ----- freed nodes are reused, and the kept BDD is still canonical
+        again = manager.from_tree(PLTreeNode.build_from_text("(C & D) | (B & A)"))
+        self.assertEqual(again, kept)
+        self.assertEqual(manager.from_tree(PLTreeNode.build_from_text("(A | E) & (F -> B)")).sat_count(
+            [NodeType.A, NodeType.B, NodeType.E, NodeType.F]), 9)
+
+    def test_cache_bound(self):
+        manager = BDDManager(cache_size = 8)
+        manager.from_tree(PLTreeNode.build_from_reverse_polish(random_formula(40, num_variables = 8, seed = 1)))
+        self.assertLessEqual(len(manager._cache), 8)
+
+    def test_reorder(self):
+        # ----- (x0∧y0)∨(x1∧y1)∨... is linear with xk next to yk, exponential with all x first
+        n = 5
+        xs = [symbols.variable("bdd_x%d" % k) for k in range(n)]
+        ys = [symbols.variable("bdd_y%d" % k) for k in range(n)]
+        text = " | ".join("(bdd_x%d & bdd_y%d)" % (k, k) for k in range(n))
+        pltree = PLTreeNode.build_from_text(text)
+
+        manager = BDDManager(xs + ys)
+        bdd = manager.from_tree(pltree)
+        manager.collect_garbage()
+        bad_size = manager.num_nodes
+        count = bdd.sat_count()
+
+        manager.reorder([variable for pair in zip(xs, ys) for variable in pair])
+        self.assertEqual(manager.num_nodes, 2 * n)
+        self.assertEqual(bdd.sat_count(), count)
+        self.assertEqual(manager.from_tree(pltree), bdd)
+
+        manager.reorder(xs + ys)
+        self.assertEqual(manager.num_nodes, bad_size)
+
+        size = manager.sift()
+        self.assertEqual(size, manager.num_nodes)
+        self.assertLess(size, bad_size)
+        self.assertEqual(manager.from_tree(pltree), bdd)
+        self.assertEqual(bdd.sat_count(), count)
+
+        self.assertEqual(static_order(pltree), [variable for pair in zip(xs, ys) for variable in pair])
+
+    def test_sift_random(self):
+        rng = random.Random(3)
+        manager = BDDManager()
+        variables = formula_variables(6)
+        trees = [PLTreeNode.build_from_reverse_polish(random_formula(16, num_variables = 6, negation = 0.3, rng = rng))
+                 for _ in range(10)]
+        bdds = [manager.from_tree(pltree) for pltree in trees]
+        manager.sift()
+
+        for pltree, bdd in zip(trees, bdds):
+            self.assertEqual(manager.from_tree(pltree), bdd)
+            for bindings in assignments(variables[:3]):
+                self.assertEqual(bdd.restrict(bindings).sat_count(variables), count_models(pltree.with_variable_bindings(bindings), variables))
+
+    def test_static_order(self):
+        pltree = PLTreeNode.build_from_text("(C & A) | (B & (A -> C)) | A")
+        self.assertEqual(static_order(pltree), [NodeType.C, NodeType.A, NodeType.B])
+        self.assertEqual(static_order(pltree, "frequency"), [NodeType.A, NodeType.C, NodeType.B])
+        self.assertEqual(pltree.to_bdd().manager.order, [NodeType.C, NodeType.A, NodeType.B])
+
+        with self.assertRaises(ValueError):
+            static_order(pltree, "weight")
+
+    def test_many_variables(self):
+        # ----- more levels than the recursion limit
+        variables = [symbols.variable("bdd_v%d" % k) for k in range(DEPTH)]
+        # ----- right deep, so that each conjunction puts one node above the previous ones
+        typeList = variables + [NodeType.AND] * (DEPTH - 1)
+        pltree = PLTreeNode.build_from_reverse_polish(typeList)
+
+        bdd = pltree.to_bdd()
+        self.assertEqual(bdd.node_count(), DEPTH + 2)
+        self.assertEqual(bdd.sat_count(), 1)
+        self.assertIs(bdd.restrict([(variables[-1], False)]).value, False)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import multiprocessing
+import os
+import pickle
+import random
+import tempfile
+import unittest
+from plt_src import NodeType, PLTreeNode, PLFlatFormula, symbols
+from plt_src.binary_corpus import Corpus, CorpusWriter, decode, encode, write_corpus
+from plt_src.formula_generator import random_formula
+from plt_src.parser import parse_lines
+
+import logging
+
+fmt = '[%(levelname)s] -- %(lineno)d: %(message)s\n'
+logging.basicConfig(format=fmt, level=logging.DEBUG)
+
+DEPTH = 20000
+
+def prefix_in_process(args):
+    corpus, index = args
+    return corpus[index].in_prefix_notation()
+
+class BinaryCorpusUnitTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "formulas.plc")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_encoding(self):
+        typeList = [ NodeType.R, NodeType.P, NodeType.OR, NodeType.TRUE, NodeType.Q, NodeType.NOT, NodeType.AND, NodeType.IMPLIES ]
+        variable_index = {}
+        data = encode(typeList, variable_index)
+
+        # ----- one byte per node, plus one per variable index below 128
+        self.assertEqual(len(data), len(typeList) + 3)
+        self.assertEqual(variable_index, {NodeType.R: 0, NodeType.P: 1, NodeType.Q: 2})
+        self.assertEqual(decode(data, 0, len(data), [NodeType.R, NodeType.P, NodeType.Q]), typeList)
+
+        # ----- multi byte varints
+        variables = [symbols.variable("bc_v%d" % k) for k in range(20000)]
+        variable_index = {variable: k for k, variable in enumerate(variables)}
+        typeList = [variables[127], variables[128], NodeType.AND, variables[19999], NodeType.OR]
+        data = encode(typeList, variable_index)
+        self.assertEqual(len(data), len(typeList) + 1 + 2 + 3)
+        self.assertEqual(decode(data, 0, len(data), variables), typeList)
+
+    def test_corpus(self):
+        rng = random.Random(24)
+        formulas = [random_formula(rng.randint(1, 40), num_variables = rng.choice([3, 30, 300]), negation = 0.3, constants = 0.1, rng = rng)
+                    for _ in range(300)]
+
+        with CorpusWriter(self.path) as writer:
+            for k, typeList in enumerate(formulas):
+                formula = typeList if k % 3 == 0 else PLTreeNode.build_from_reverse_polish(typeList)
+                self.assertEqual(writer.add(formula), k)
+
+        with Corpus(self.path) as corpus:
+            self.assertEqual(len(corpus), len(formulas))
+            for k in rng.sample(range(len(formulas)), 100):
+                self.assertEqual(corpus.reverse_polish(k), formulas[k])
+                self.assertEqual(corpus[k].get_reverse_polish(), formulas[k])
+            self.assertEqual(corpus.tree(-1, PLFlatFormula).get_reverse_polish(), formulas[-1])
+            self.assertEqual([pltree.get_reverse_polish() for pltree in corpus], formulas)
+            self.assertEqual(corpus.raw(0), bytes(encode(formulas[0], {})))
+
+            with self.assertRaises(IndexError):
+                corpus[len(formulas)]
+
+    def test_text(self):
+        lines = ["implies(or(R,P),and(true,not(Q)))", "", "pump_3.on & ~valve[2] -> alarm"]
+        self.assertEqual(write_corpus(self.path, parse_lines(lines)), 2)
+        with Corpus(self.path) as corpus:
+            self.assertEqual([pltree.in_prefix_notation() for pltree in corpus],
+                             [pltree.in_prefix_notation() for pltree in parse_lines(lines)])
+            self.assertEqual(corpus.variables[-1], symbols.variable("alarm"))
+
+    def test_errors(self):
+        with open(self.path, "wb") as file:
+            file.write(b"not a corpus")
+        with open(self.path + ".idx", "wb") as file:
+            file.write(b"\0" * 64)
+        with self.assertRaises(ValueError):
+            Corpus(self.path)
+
+        with CorpusWriter(self.path) as writer:
+            with self.assertRaises(ValueError):
+                writer.add([])
+
+    def test_deep(self):
+        typeList = [NodeType.A] + [NodeType.B, NodeType.AND] * DEPTH
+        write_corpus(self.path, [typeList])
+        with Corpus(self.path) as corpus:
+            self.assertEqual(corpus.reverse_polish(0), typeList)
+            self.assertEqual(len(corpus.raw(0)), 3 * DEPTH + 2)
+
+    def test_processes(self):
+        formulas = [random_formula(10, num_variables = 5, seed = k) for k in range(20)]
+        write_corpus(self.path, formulas)
+
+        with Corpus(self.path) as corpus:
+            self.assertEqual(pickle.loads(pickle.dumps(corpus)).path, self.path)
+            with multiprocessing.get_context("spawn").Pool(2) as pool:
+                results = pool.map(prefix_in_process, [(corpus, k) for k in range(len(formulas))])
+
+        self.assertEqual(results, [PLTreeNode.build_from_reverse_polish(typeList).in_prefix_notation() for typeList in formulas])
+
+if __name__ == '__main__':
+    unittest.main()
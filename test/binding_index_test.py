@@ -0,0 +1,74 @@
+import multiprocessing
+import pickle
+import unittest
+from plt_src import NodeType, PLTreeNode, PLDagNode, BindingIndex, symbols
+
+import logging
+
+fmt = '[%(levelname)s] -- %(lineno)d: %(message)s\n'
+logging.basicConfig(format=fmt, level=logging.DEBUG)
+
+def bind_in_process(args):
+    index, text = args
+    return PLTreeNode.build_from_text(text).with_variable_bindings(index).in_prefix_notation()
+
+class BindingIndexUnitTest(unittest.TestCase):
+
+    def test_binding_index(self):
+        index = BindingIndex([(NodeType.P, True), (NodeType.AND, True), (NodeType.P, False), (NodeType.R, False)])
+
+        self.assertEqual(len(index), 2)
+        self.assertTrue(index.get(NodeType.P))
+        self.assertFalse(index.get(NodeType.R))
+        self.assertIsNone(index.get(NodeType.Q))
+        self.assertIs(BindingIndex.of(index), index)
+        self.assertEqual(list(BindingIndex({NodeType.Q: True})), [(NodeType.Q, True)])
+
+    def test_with_variable_bindings(self):
+        typeList = [ NodeType.R, NodeType.P, NodeType.OR, NodeType.TRUE, NodeType.Q, NodeType.NOT, NodeType.AND, NodeType.IMPLIES ]
+        pltree = PLTreeNode.build_from_reverse_polish(typeList)
+
+        bound = pltree.with_variable_bindings({NodeType.P: True, NodeType.R: False})
+
+        self.assertEqual(bound.in_prefix_notation(), "not(Q)")
+        self.assertEqual(pltree.in_prefix_notation(), "implies(or(R,P),and(true,not(Q)))")
+
+        # ----- the unaffected sub-tree ¬Q is shared, not copied
+        self.assertIs(bound, pltree._child2._child2)
+
+        # ----- same result as binding in place and folding
+        for bindings in ([(NodeType.Q, True)], [(NodeType.Q, False)], [(NodeType.R, True)], []):
+            expected = pltree.copy()
+            expected.apply_variable_bindings(bindings)
+            expected.evaluate_constant_subtrees()
+
+            self.assertEqual(pltree.with_variable_bindings(BindingIndex(bindings)).in_prefix_notation(), expected.in_prefix_notation())
+
+        # ----- constant sub-trees already present are folded too
+        self.assertEqual(pltree.with_variable_bindings([]).in_prefix_notation(), "implies(or(R,P),not(Q))")
+
+        unaffected = PLTreeNode.build_from_reverse_polish([NodeType.A, NodeType.B, NodeType.OR])
+        self.assertIs(unaffected.with_variable_bindings([(NodeType.C, True)]), unaffected)
+
+    def test_dag_with_variable_bindings(self):
+        typeList = [NodeType.A, NodeType.B, NodeType.AND, NodeType.C, NodeType.IMPLIES, NodeType.A, NodeType.B, NodeType.AND, NodeType.OR]
+        dag = PLDagNode.build_from_reverse_polish(typeList)
+
+        self.assertEqual(dag.with_variable_bindings({NodeType.C: False}).in_prefix_notation(), "or(not(and(A,B)),and(A,B))")
+        self.assertEqual(dag.with_variable_bindings({NodeType.A: True, NodeType.B: True}).in_prefix_notation(), "true")
+        self.assertIs(dag.with_variable_bindings({NodeType.D: True}), dag)
+
+    def test_pickle(self):
+        # ----- bi_pump gets a var_id in this process that a fresh process numbers differently
+        for k in range(50):
+            symbols.variable("bi_filler%d" % k)
+        index = BindingIndex({symbols.variable("bi_pump"): True, NodeType.B: False})
+        self.assertEqual(list(pickle.loads(pickle.dumps(index))), list(index))
+
+        texts = ["bi_other & bi_pump", "bi_pump", "B | bi_other"]
+        with multiprocessing.get_context("spawn").Pool(2) as pool:
+            results = pool.map(bind_in_process, [(index, text) for text in texts])
+        self.assertEqual(results, ["bi_other", "true", "bi_other"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import io
+import os
+import tempfile
+import unittest
+from plt_src import NodeType, PLTreeNode
+from plt_src.clause_database import ClauseDatabase, DimacsWriter, DimacsReader
+from plt_src.sat_solver import clauses_from_cnf, find_model
+from plt_src.truth_table import are_equivalent
+
+import logging
+
+fmt = '[%(levelname)s] -- %(lineno)d: %(message)s\n'
+logging.basicConfig(format=fmt, level=logging.DEBUG)
+
+class ClauseDatabaseUnitTest(unittest.TestCase):
+
+    def test_reduce_to_clauses(self):
+        typeList = [NodeType.R, NodeType.P, NodeType.IMPLIES, NodeType.S, NodeType.IMPLIES, NodeType.NOT, NodeType.Q, NodeType.IMPLIES]
+        pltree = PLTreeNode.build_from_reverse_polish(typeList)
+
+        database = pltree.reduce_to_CNF(output = "clauses")
+        self.assertEqual(pltree.get_reverse_polish(), typeList)
+        self.assertEqual(database.variables, [NodeType.R, NodeType.P, NodeType.S, NodeType.Q])
+        self.assertEqual(list(database), [[1, 3, 4], [-2, 3, 4]])
+        self.assertEqual(database.memory_size(), 6 * 4 + 3 * 8)
+
+        cnf = pltree.copy()
+        cnf.reduce_to_CNF()
+        self.assertEqual(database.to_clauses(), clauses_from_cnf(cnf))
+        self.assertEqual(database.to_tree(), cnf)
+
+    def test_constants(self):
+        typeList = [NodeType.P, NodeType.FALSE, NodeType.OR, NodeType.Q, NodeType.TRUE, NodeType.OR, NodeType.AND]
+        database = PLTreeNode.build_from_reverse_polish(typeList).reduce_to_CNF(output = "clauses")
+        self.assertEqual(list(database), [[1]])
+
+    def test_tseitin_clauses(self):
+        typeList = [NodeType.A, NodeType.B, NodeType.AND, NodeType.C, NodeType.D, NodeType.AND, NodeType.OR]
+        pltree = PLTreeNode.build_from_reverse_polish(typeList)
+
+        database = pltree.reduce_to_CNF(mode = "tseitin", polarity_aware = True, output = "clauses")
+        self.assertEqual(pltree.get_reverse_polish(), typeList)
+        self.assertEqual(len(database.auxiliary), 3)
+        self.assertEqual(database.num_variables, 7)
+
+        model = find_model(database)
+        self.assertEqual([variable for variable, _ in model], [NodeType.A, NodeType.B, NodeType.C, NodeType.D])
+        pltree.apply_variable_bindings(model)
+        pltree.evaluate_constant_subtrees()
+        self.assertEqual(pltree.in_prefix_notation(), "true")
+
+    def test_dimacs_round_trip(self):
+        typeList = [NodeType.R, NodeType.P, NodeType.IMPLIES, NodeType.S, NodeType.IMPLIES, NodeType.NOT, NodeType.Q, NodeType.IMPLIES]
+        database = PLTreeNode.build_from_reverse_polish(typeList).reduce_to_CNF(mode = "tseitin", output = "clauses")
+
+        stream = io.StringIO()
+        database.write_dimacs(stream)
+        text = stream.getvalue()
+        self.assertTrue(text.startswith("c var 1 %s\n" % database.variables[0]))
+        self.assertIn("p cnf %d %d\n" % (database.num_variables, len(database)), text)
+
+        stream.seek(0)
+        copy = ClauseDatabase.read_dimacs(stream)
+        self.assertEqual(list(copy), list(database))
+        self.assertEqual(copy.variables, database.variables)
+        self.assertTrue(are_equivalent(copy.to_tree(), database.to_tree()))
+
+    def test_streaming(self):
+        handle, path = tempfile.mkstemp(suffix = ".cnf")
+        os.close(handle)
+        try:
+            # ----- counts unknown up front: the header is filled in on close
+            with DimacsWriter(path) as writer:
+                for k in range(1, 10001):
+                    writer.write_clause([k, -(k + 1)])
+                writer.write_comment("done")
+
+            reader = DimacsReader(path)
+            count = 0
+            for clause in reader:
+                count += 1
+                self.assertEqual(clause, [count, -(count + 1)])
+            self.assertEqual((reader.num_variables, reader.num_clauses, count), (10001, 10000, 10000))
+        finally:
+            os.remove(path)
+
+        with self.assertRaises(ValueError):
+            with DimacsWriter(io.StringIO(), 2, 2) as writer:
+                writer.write_clause([1, 2])
+
+    def test_reader(self):
+        text = "c example\np cnf 3 3\n1 -2\n 3 0 -1 0\n2 3 0\n%\n0\n"
+        database = ClauseDatabase.read_dimacs(io.StringIO(text))
+        self.assertEqual(list(database), [[1, -2, 3], [-1], [2, 3]])
+        self.assertEqual(database.variable(2).prefix_name, "x2")
+        self.assertEqual(find_model(database), [(database.variable(1), False), (database.variable(2), False), (database.variable(3), True)])
+
+        # ----- an unnamed variable whose default name is taken by another one
+        database = ClauseDatabase.read_dimacs(io.StringIO("c var 1 x2\np cnf 2 1\n1 2 0\n"))
+        self.assertEqual([[(nodetype.prefix_name, value) for nodetype, value in clause] for clause in database.to_clauses()],
+                         [[("x2", True), ("x2_1", True)]])
+
+        # ----- the header declares the variables
+        database = ClauseDatabase.read_dimacs(io.StringIO("p cnf 5 1\n1 -2 0\n"))
+        self.assertEqual((database.num_variables, len(database.variables)), (5, 5))
+        with self.assertRaises(ValueError):
+            ClauseDatabase.read_dimacs(io.StringIO("p cnf 2 1\n1 -3 0\n"))
+        with self.assertRaises(ValueError):
+            ClauseDatabase.read_dimacs(io.StringIO("c var 1 A\nc var 2 A\np cnf 2 1\n1 2 0\n"))
@@ -0,0 +1,91 @@
+import itertools
+import random
+import unittest
+from plt_src import NodeType, PLTreeNode
+from plt_src.clause_database import ClauseDatabase
+from plt_src.clause_simplifier import simplify_clauses
+from plt_src.formula_generator import random_formula
+from plt_src.truth_table import are_equivalent
+
+import logging
+
+fmt = '[%(levelname)s] -- %(lineno)d: %(message)s\n'
+logging.basicConfig(format=fmt, level=logging.DEBUG)
+
+SHARED = 50000
+
+def models(clauses, num_variables):
+    return [values for values in itertools.product([False, True], repeat = num_variables)
+            if all(any(values[abs(literal) - 1] == (literal > 0) for literal in clause) for clause in clauses)]
+
+class ClauseSimplifierUnitTest(unittest.TestCase):
+
+    def test_reductions(self):
+        clauses = [[1, 2, 3], [-1, 2], [2, 2, 4], [4, -4], [2, 4], [4, 2], [3, 5, 2, 1]]
+        stats = {}
+
+        self.assertEqual(simplify_clauses(clauses, stats), [[2, 3], [-1, 2], [2, 4]])
+        self.assertEqual(stats["clauses_in"], 7)
+        self.assertEqual(stats["clauses_out"], 3)
+        self.assertEqual(stats["literals_out"], 6)
+        self.assertEqual(stats["duplicate_literals"], 1)
+        self.assertEqual(stats["tautologies"], 1)
+        self.assertEqual(stats["duplicate_clauses"], 2)
+        # ----- ¬1∨2 strengthens 1∨2∨3 into 2∨3 and 3∨5∨2∨1 into 3∨5∨2, which 2∨3 subsumes
+        self.assertEqual(stats["subsumed"], 1)
+        self.assertEqual(stats["strengthened"], 2)
+
+        # ----- a literal shared by all the clauses: quadratic candidate scans would take minutes
+        clauses = [[1, k + 2, k + 3] for k in range(SHARED)]
+        self.assertEqual(simplify_clauses(clauses), clauses)
+
+        # ----- A and ¬A leave the empty clause
+        self.assertEqual(simplify_clauses([[1, 2], [1], [-1], [3]]), [[]])
+
+    def test_equivalence(self):
+        rng = random.Random(17)
+        for _ in range(2000):
+            num_variables = rng.randint(1, 5)
+            clauses = [[rng.choice([1, -1]) * rng.randint(1, num_variables) for _ in range(rng.randint(1, 4))]
+                       for _ in range(rng.randint(0, 12))]
+            simplified = simplify_clauses(clauses)
+            self.assertEqual(models(simplified, num_variables), models(clauses, num_variables))
+
+            # ----- nothing left to remove
+            for clause in simplified:
+                self.assertEqual(len(set(clause)), len(clause))
+                self.assertFalse(any(-literal in clause for literal in clause))
+                for other in simplified:
+                    if other is not clause:
+                        self.assertFalse(set(clause) <= set(other))
+
+    def test_kinds(self):
+        # ----- (¬Q∨Q)∧(P∨P)∧(P∨R)∧⊤
+        clauses = [[(NodeType.Q, False), (NodeType.Q, True)], [(NodeType.P, True), (NodeType.P, True)],
+                   [(NodeType.P, True), (NodeType.R, True)], [(NodeType.TRUE, True)]]
+        self.assertEqual(simplify_clauses(clauses), [[(NodeType.P, True)]])
+
+        database = ClauseDatabase.from_clauses(clauses)
+        simplified = simplify_clauses(database)
+        self.assertIsInstance(simplified, ClauseDatabase)
+        self.assertEqual(list(simplified), [[2]])
+        self.assertEqual(simplified.variables, database.variables)
+
+    def test_reduce_to_CNF(self):
+        rng = random.Random(18)
+        for _ in range(500):
+            typeList = random_formula(rng.randint(1, 16), num_variables = 4, shape = "random", negation = 0.3, constants = 0.3, rng = rng)
+            original = PLTreeNode.build_from_reverse_polish(typeList)
+
+            plain = PLTreeNode.build_from_reverse_polish(typeList)
+            plain.reduce_to_CNF()
+            stats = {}
+            simplified = PLTreeNode.build_from_reverse_polish(typeList)
+            simplified.reduce_to_CNF(simplify = stats)
+
+            self.assertTrue(are_equivalent(simplified, original))
+            self.assertLessEqual(len(simplified.get_reverse_polish()), len(plain.get_reverse_polish()))
+            self.assertEqual(stats["clauses_out"], len(simplified.reduce_to_CNF(output = "clauses", simplify = True)))
+
+if __name__ == '__main__':
+    unittest.main()
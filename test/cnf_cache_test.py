@@ -0,0 +1,142 @@
+import multiprocessing
+import os
+import random
+import tempfile
+import unittest
+from plt_src import NodeType, PLTreeNode
+from plt_src.cnf_cache import CNFCache, formula_key
+from plt_src.formula_generator import random_formula
+from plt_src.instrumentation import metrics
+
+import logging
+
+fmt = '[%(levelname)s] -- %(lineno)d: %(message)s\n'
+logging.basicConfig(format=fmt, level=logging.DEBUG)
+
+def convert_in_process(args):
+    path, seed = args
+    cache = CNFCache(path)
+    pltree = PLTreeNode.build_from_reverse_polish(random_formula(10, num_variables = 4, seed = seed))
+    pltree.reduce_to_CNF(cache = cache)
+    return pltree.in_prefix_notation()
+
+class CNFCacheUnitTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "cnf.sqlite")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_key(self):
+        pltree = PLTreeNode.build_from_text("(A & B) | ~C")
+        self.assertEqual(formula_key(pltree), formula_key(PLTreeNode.build_from_text("or(and(A,B),not(C))")))
+        self.assertNotEqual(formula_key(pltree), formula_key(PLTreeNode.build_from_text("(A | B) & ~C")))
+        self.assertNotEqual(formula_key(pltree), formula_key(pltree, {"mode": "tseitin"}))
+
+    def test_same_results(self):
+        rng = random.Random(23)
+        cache = CNFCache(memory_entries = 8)
+        for _ in range(100):
+            typeList = random_formula(rng.randint(1, 12), num_variables = 5, negation = 0.3, constants = 0.1, rng = rng)
+            for options in ({}, {"mode": "tseitin"}, {"mode": "tseitin", "polarity_aware": True}, {"simplify": True},
+                            {"budget": 8, "on_budget": "tseitin"}):
+                for _ in range(2):
+                    expected = PLTreeNode.build_from_reverse_polish(typeList)
+                    expected_auxiliary = expected.reduce_to_CNF(**options)
+                    pltree = PLTreeNode.build_from_reverse_polish(typeList)
+                    auxiliary = pltree.reduce_to_CNF(cache = cache, **options)
+                    self.assertEqual(pltree.in_prefix_notation(), expected.in_prefix_notation())
+                    self.assertEqual({variable: node.in_prefix_notation() for variable, node in auxiliary.items()},
+                                     {variable: node.in_prefix_notation() for variable, node in expected_auxiliary.items()})
+
+                    expected = PLTreeNode.build_from_reverse_polish(typeList).reduce_to_CNF(output = "clauses", **options)
+                    database = PLTreeNode.build_from_reverse_polish(typeList).reduce_to_CNF(output = "clauses", cache = cache, **options)
+                    self.assertEqual(database.to_clauses(), expected.to_clauses())
+                    self.assertEqual(set(database.auxiliary), set(expected.auxiliary))
+
+        self.assertGreater(cache.stats["memory_hits"], 0)
+        self.assertGreater(cache.stats["memory_evictions"], 0)
+        self.assertEqual(len(cache), 8)
+
+    def test_disk(self):
+        with CNFCache(self.path) as cache:
+            pltree = PLTreeNode.build_from_text("(A & B) | (C -> D)")
+            pltree.reduce_to_CNF(cache = cache)
+            self.assertEqual(cache.stats["misses"], 1)
+
+        # ----- a later run finds it on disk, then in memory
+        with CNFCache(self.path) as cache:
+            for _ in range(2):
+                other = PLTreeNode.build_from_text("or(and(A,B),implies(C,D))")
+                other.reduce_to_CNF(cache = cache)
+                self.assertEqual(other, pltree)
+            self.assertEqual(cache.stats["disk_hits"], 1)
+            self.assertEqual(cache.stats["memory_hits"], 1)
+            self.assertEqual(cache.stats["misses"], 0)
+
+            with metrics:
+                metrics.reset()
+                PLTreeNode.build_from_text("A | (B & C)").reduce_to_CNF(cache = cache)
+                self.assertEqual(metrics.counters["cnf_cache.misses"], 1)
+
+            cache.clear()
+            self.assertEqual(len(cache), 0)
+
+    def test_disk_limit(self):
+        with CNFCache(self.path, memory_entries = 1, max_disk_bytes = 2000) as cache:
+            for k in range(20):
+                PLTreeNode.build_from_reverse_polish(random_formula(12, num_variables = 6, seed = k)).reduce_to_CNF(cache = cache)
+                self.assertLessEqual(cache.disk_bytes(), 2000)
+            self.assertGreater(cache.stats["disk_evictions"], 0)
+
+            # ----- the most recent result is kept
+            PLTreeNode.build_from_reverse_polish(random_formula(12, num_variables = 6, seed = 19)).reduce_to_CNF(cache = cache)
+            self.assertEqual(cache.stats["memory_hits"], 1)
+
+    def test_disk_bookkeeping(self):
+        formulas = [PLTreeNode.build_from_reverse_polish(random_formula(12, num_variables = 6, seed = k)) for k in range(10)]
+        with CNFCache(self.path, memory_entries = 1, max_disk_bytes = 3000) as cache:
+            for pltree in formulas + formulas[:3]:
+                pltree.copy().reduce_to_CNF(cache = cache)
+            cache.put(formula_key(formulas[0]), ({"rpn": "A B or", "auxiliary": {}}, None, None))
+            cache.put(formula_key(formulas[0]), ({"rpn": "A", "auxiliary": {}}, None, None))
+
+            # ----- the running total follows replacements and evictions
+            connection = cache._connect()
+            self.assertEqual(cache.disk_bytes(), connection.execute("SELECT SUM(size) FROM cnf").fetchone()[0])
+            plan = connection.execute("EXPLAIN QUERY PLAN SELECT key, size FROM cnf ORDER BY accessed").fetchall()
+            self.assertIn("cnf_accessed", str(plan))
+
+        # ----- disk hits are not written until close, or a later store
+        with CNFCache(self.path, memory_entries = 1) as cache:
+            keys = [key for key, in cache._connect().execute("SELECT key FROM cnf")]
+            before = dict(cache._connect().execute("SELECT key, accessed FROM cnf"))
+            self.assertGreater(len(keys), 1)
+            for key in keys:
+                self.assertIsNotNone(cache.get(key))
+            self.assertEqual(dict(cache._connect().execute("SELECT key, accessed FROM cnf")), before)
+
+        with CNFCache(self.path) as cache:
+            after = dict(cache._connect().execute("SELECT key, accessed FROM cnf"))
+            self.assertTrue(all(after[key] > before[key] for key in keys))
+
+            cache.clear()
+            self.assertEqual(cache.disk_bytes(), 0)
+
+    def test_processes(self):
+        seeds = [k % 5 for k in range(20)]
+        with multiprocessing.get_context("spawn").Pool(4) as pool:
+            results = pool.map(convert_in_process, [(self.path, seed) for seed in seeds])
+
+        for seed, result in zip(seeds, results):
+            pltree = PLTreeNode.build_from_reverse_polish(random_formula(10, num_variables = 4, seed = seed))
+            pltree.reduce_to_CNF()
+            self.assertEqual(result, pltree.in_prefix_notation())
+
+        with CNFCache(self.path) as cache:
+            self.assertEqual(len(cache), 5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+import random
+import unittest
+from plt_src import NodeType, PLTreeNode
+from plt_src.cnf_engine import cnf_clauses, cnf_clause_database, cnf_size, budgeted_cnf_clauses
+from plt_src.formula_generator import random_formula
+from plt_src.node_type import symbols
+from plt_src.sat_solver import find_model
+
+import logging
+
+fmt = '[%(levelname)s] -- %(lineno)d: %(message)s\n'
+logging.basicConfig(format=fmt, level=logging.DEBUG)
+
+DEPTH = 100000
+
+FORMULAS = {"num_variables": 4, "shape": "random", "negation": 0.3, "constants": 0.3}
+
+def four_pass_CNF(typeList):
+    pltree = PLTreeNode.build_from_reverse_polish(typeList)
+    pltree.eliminate_implies()
+    pltree.push_not_down()
+    pltree.push_or_below_and()
+    pltree.make_and_or_right_deep()
+    return pltree
+
+def disjunction_of_conjunctions(count):
+    # ----- (x1∧y1)∨(x2∧y2)∨... distributes into 2^count clauses of count literals
+    typeList = []
+    for k in range(count):
+        typeList += [symbols.variable("x%d" % k), symbols.variable("y%d" % k), NodeType.AND]
+        if k > 0:
+            typeList.append(NodeType.OR)
+    return typeList
+
+class CNFEngineUnitTest(unittest.TestCase):
+
+    def test_clauses(self):
+        # ----- ¬((R∨P)→(Q∧¬S)) is (R∨P)∧(¬Q∨S)
+        typeList = [ NodeType.R, NodeType.P, NodeType.OR, NodeType.Q, NodeType.S, NodeType.NOT, NodeType.AND, NodeType.IMPLIES, NodeType.NOT ]
+        pltree = PLTreeNode.build_from_reverse_polish(typeList)
+        variables = []
+        stats = {}
+
+        clauses = cnf_clauses(pltree, variables, stats)
+        self.assertEqual(clauses, [[(NodeType.R, True), (NodeType.P, True)], [(NodeType.Q, False), (NodeType.S, True)]])
+        self.assertEqual(variables, [NodeType.R, NodeType.P, NodeType.Q, NodeType.S])
+        self.assertEqual(stats["nodes_visited"], len(typeList))
+
+        # ----- the tree is untouched
+        self.assertEqual(pltree.get_reverse_polish(), typeList)
+
+        database = cnf_clause_database(pltree)
+        self.assertEqual(list(database), [[1, 2], [-3, 4]])
+
+    def test_same_as_four_passes(self):
+        rng = random.Random(15)
+        for _ in range(2000):
+            typeList = random_formula(rng.randint(1, 16), **FORMULAS, rng = rng)
+            pltree = PLTreeNode.build_from_reverse_polish(typeList)
+            pltree.reduce_to_CNF()
+            self.assertEqual(pltree.get_reverse_polish(), four_pass_CNF(typeList).get_reverse_polish())
+
+    def test_deep_formula(self):
+        # ----- ¬¬...¬A deeper than the recursion limit
+        typeList = [NodeType.A] + [NodeType.NOT] * DEPTH + [NodeType.B, NodeType.OR]
+        pltree = PLTreeNode.build_from_reverse_polish(typeList)
+        self.assertEqual(cnf_clauses(pltree), [[(NodeType.A, True), (NodeType.B, True)]])
+
+    def test_chains(self):
+        variables = [symbols.variable("x%d" % k) for k in range(DEPTH)]
+        negated = [[variable, NodeType.NOT] if k % 2 else [variable] for k, variable in enumerate(variables)]
+
+        def chains(count):
+            for operator in (NodeType.AND, NodeType.OR, NodeType.IMPLIES):
+                yield [variables[0]] + [nodetype for k in range(1, count) for nodetype in (variables[k], operator)]
+                yield [nodetype for k in range(count) for nodetype in negated[k]] + [operator, NodeType.NOT, NodeType.NOT] * (count - 1)
+
+        # ----- left and right deep chains, in the same clause and literal order as the four passes
+        for typeList in chains(40):
+            pltree = PLTreeNode.build_from_reverse_polish(typeList)
+            pltree.reduce_to_CNF()
+            self.assertEqual(pltree.get_reverse_polish(), four_pass_CNF(typeList).get_reverse_polish())
+
+        # ----- and in linear time: the left deep implications excepted, whose CNF is exponential
+        for k, typeList in enumerate(chains(DEPTH // 5)):
+            if k != 4:
+                self.assertEqual(sum(len(clause) for clause in cnf_clauses(PLTreeNode.build_from_reverse_polish(typeList))), DEPTH // 5)
+
+    def test_size(self):
+        rng = random.Random(16)
+        for _ in range(1000):
+            pltree = PLTreeNode.build_from_reverse_polish(random_formula(rng.randint(1, 20), **FORMULAS, rng = rng))
+            clauses = cnf_clauses(pltree)
+            self.assertEqual(pltree.cnf_size(), (len(clauses), sum(len(clause) for clause in clauses)))
+
+        # ----- counted without being produced
+        pltree = PLTreeNode.build_from_reverse_polish(disjunction_of_conjunctions(200))
+        self.assertEqual(cnf_size(pltree), (2 ** 200, 200 * 2 ** 200))
+
+    def test_budget_raises(self):
+        typeList = disjunction_of_conjunctions(40)
+        pltree = PLTreeNode.build_from_reverse_polish(typeList)
+        with self.assertRaises(ValueError):
+            pltree.reduce_to_CNF(budget = 10 ** 6)
+        self.assertEqual(pltree.get_reverse_polish(), typeList)
+
+        # ----- within budget, the result is unchanged
+        typeList = disjunction_of_conjunctions(3)
+        pltree = PLTreeNode.build_from_reverse_polish(typeList)
+        self.assertEqual(pltree.reduce_to_CNF(budget = 24), {})
+        self.assertEqual(pltree.get_reverse_polish(), four_pass_CNF(typeList).get_reverse_polish())
+
+    def test_budget_fallback(self):
+        typeList = disjunction_of_conjunctions(40)
+        pltree = PLTreeNode.build_from_reverse_polish(typeList)
+        original = PLTreeNode.build_from_reverse_polish(typeList)
+
+        auxiliary = pltree.reduce_to_CNF(budget = 100, on_budget = "tseitin")
+        self.assertTrue(auxiliary)
+        self.assertLess(len(pltree.get_reverse_polish()), 2000)
+
+        # ----- equisatisfiable, and models of the CNF are models of the formula
+        model = find_model(pltree)
+        self.assertIsNotNone(model)
+        original.apply_variable_bindings(model)
+        original.evaluate_constant_subtrees()
+        self.assertEqual(original.get_reverse_polish(), [NodeType.TRUE])
+
+        database = PLTreeNode.build_from_reverse_polish(typeList).reduce_to_CNF(output = "clauses", budget = 100, on_budget = "tseitin")
+        self.assertEqual(set(database.auxiliary), set(auxiliary))
+
+    def test_budget_satisfiability(self):
+        rng = random.Random(17)
+        for _ in range(500):
+            pltree = PLTreeNode.build_from_reverse_polish(random_formula(rng.randint(1, 20), **FORMULAS, rng = rng))
+            for budget in (2, 4, 16):
+                clauses, auxiliary = budgeted_cnf_clauses(pltree, budget)
+                self.assertEqual(find_model(clauses) is None, find_model(pltree) is None)
+
+        with self.assertRaises(ValueError):
+            budgeted_cnf_clauses(pltree, 1)
+        with self.assertRaises(ValueError):
+            pltree.reduce_to_CNF(mode = "tseitin", budget = 100)
+
+if __name__ == '__main__':
+    unittest.main()
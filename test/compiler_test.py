@@ -0,0 +1,84 @@
+import itertools
+import random
+import unittest
+from array import array
+from plt_src import NodeType, PLTreeNode, symbols
+from plt_src.binding_index import BindingIndex
+from plt_src.compiler import compile_formula, clear_compile_cache, NESTING_LIMIT
+from plt_src.formula_generator import random_formula
+
+import logging
+
+fmt = '[%(levelname)s] -- %(lineno)d: %(message)s\n'
+logging.basicConfig(format=fmt, level=logging.DEBUG)
+
+DEPTH = 20000
+
+def expected_value(pltree, variables, values):
+    return pltree.with_variable_bindings(list(zip(variables, values))).evaluate_constant_subtrees()
+
+class CompilerUnitTest(unittest.TestCase):
+
+    def test_compile(self):
+        typeList = [ NodeType.R, NodeType.P, NodeType.OR, NodeType.TRUE, NodeType.Q, NodeType.NOT, NodeType.AND, NodeType.IMPLIES ]
+        pltree = PLTreeNode.build_from_reverse_polish(typeList)
+        function = pltree.compile()
+
+        self.assertEqual(function.variables, [NodeType.R, NodeType.P, NodeType.Q])
+        self.assertIs(function((True, False, True)), False)
+        self.assertIs(function([False, False, True]), True)
+        self.assertIs(function(array('b', [0, 1, 0])), True)
+
+        # ----- explicit positions, e.g. indexed by var_id
+        function = pltree.compile(list(symbols))
+        index = BindingIndex([(NodeType.R, True), (NodeType.P, True), (NodeType.Q, False)])
+        self.assertIs(function(index.values), True)
+
+        with self.assertRaises(ValueError):
+            pltree.compile([NodeType.R])
+
+    def test_random_formulas(self):
+        rng = random.Random(20)
+        for _ in range(300):
+            shape = rng.choice(["balanced", "left-deep", "right-deep", "random"])
+            typeList = random_formula(rng.randint(1, 30), num_variables = 4, shape = shape, negation = 0.4, constants = 0.1, rng = rng)
+            pltree = PLTreeNode.build_from_reverse_polish(typeList)
+            function = pltree.compile()
+
+            for values in itertools.product([False, True], repeat = len(function.variables)):
+                self.assertIs(function(values), expected_value(pltree, function.variables, values))
+
+    def test_short_circuit(self):
+        # ----- A∨B never looks at B when A holds
+        function = PLTreeNode.build_from_text("A | B").compile()
+        self.assertIs(function((True,)), True)
+
+    def test_cache(self):
+        clear_compile_cache()
+        first = PLTreeNode.build_from_text("and(A,or(B,not(C)))").compile()
+        self.assertIs(PLTreeNode.build_from_text("(A ∧ (B ∨ ¬C))").compile(), first)
+        self.assertIsNot(PLTreeNode.build_from_text("and(A,or(B,C))").compile(), first)
+        self.assertIsNot(PLTreeNode.build_from_text("and(A,or(B,not(C)))").compile([NodeType.C, NodeType.B, NodeType.A]), first)
+
+    def test_deep_formulas(self):
+        # ----- a long chain is emitted flat
+        typeList = [NodeType.A] + [NodeType.B, NodeType.AND] * DEPTH
+        function = PLTreeNode.build_from_reverse_polish(typeList).compile()
+        self.assertIs(function((True, True)), True)
+        self.assertIs(function((True, False)), False)
+
+        # ----- alternating operators nest, and are split into local variables
+        for shape in ("left-deep", "right-deep"):
+            typeList = random_formula(DEPTH, num_variables = 3, shape = shape, seed = 21)
+            pltree = PLTreeNode.build_from_reverse_polish(typeList)
+            function = pltree.compile()
+            self.assertGreater(function.source.count("\n"), DEPTH // (10 * NESTING_LIMIT))
+            for values in itertools.product([False, True], repeat = 3):
+                self.assertIs(function(values), expected_value(pltree, function.variables, values))
+
+        # ----- double negations cancel
+        typeList = [NodeType.A] + [NodeType.NOT] * (DEPTH + 1)
+        self.assertIs(PLTreeNode.build_from_reverse_polish(typeList).compile()((True,)), False)
+
+if __name__ == '__main__':
+    unittest.main()
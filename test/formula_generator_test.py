@@ -0,0 +1,70 @@
+import unittest
+from plt_src import NodeType, PLTreeNode
+from plt_src.formula_generator import random_formula, formula_variables
+
+import logging
+
+fmt = '[%(levelname)s] -- %(lineno)d: %(message)s\n'
+logging.basicConfig(format=fmt, level=logging.DEBUG)
+
+DEPTH = 100000
+
+def depth_of(typeList):
+    # ----- number of binary operator levels, negations not counted
+    depths = []
+    for nodetype in typeList:
+        if nodetype.arity == 0:
+            depths.append(0)
+        elif nodetype.arity == 2:
+            depth2 = depths.pop()
+            depths.append(max(depths.pop(), depth2) + 1)
+    return depths[0]
+
+class FormulaGeneratorUnitTest(unittest.TestCase):
+
+    def test_seeded(self):
+        typeList = random_formula(50, seed = 3)
+        self.assertEqual(typeList, random_formula(50, seed = 3))
+        self.assertNotEqual(typeList, random_formula(50, seed = 4))
+
+        # ----- always a single valid formula
+        pltree = PLTreeNode.build_from_reverse_polish(typeList)
+        self.assertEqual(pltree.get_reverse_polish(), typeList)
+
+    def test_shapes(self):
+        self.assertEqual(depth_of(random_formula(depth = 6, seed = 1)), 6)
+        self.assertEqual(sum(1 for nodetype in random_formula(depth = 6, seed = 1) if nodetype.arity == 0), 64)
+
+        left = random_formula(depth = 5, shape = "left-deep", negation = 0, seed = 1)
+        self.assertEqual(depth_of(left), 5)
+        self.assertEqual([nodetype.arity for nodetype in left], [0, 0] + [2, 0] * 4 + [2])
+
+        right = random_formula(depth = 5, shape = "right-deep", negation = 0, seed = 1)
+        self.assertEqual([nodetype.arity for nodetype in right], [0] * 6 + [2] * 5)
+
+        self.assertEqual(sum(1 for nodetype in random_formula(37, shape = "random", seed = 1) if nodetype.arity == 0), 37)
+
+    def test_mix(self):
+        typeList = random_formula(200, num_variables = 3, operators = {NodeType.AND: 1}, negation = 0, seed = 2)
+        self.assertEqual(set(nodetype for nodetype in typeList if nodetype.arity == 2), {NodeType.AND})
+        self.assertEqual(set(nodetype for nodetype in typeList if nodetype.arity == 0), {NodeType.A, NodeType.B, NodeType.C})
+
+        typeList = random_formula(200, constants = 1.0, seed = 2)
+        self.assertTrue(set(nodetype for nodetype in typeList if nodetype.arity == 0) <= {NodeType.TRUE, NodeType.FALSE})
+
+        self.assertEqual(len(formula_variables(30)), 30)
+        self.assertEqual(formula_variables(2), [NodeType.A, NodeType.B])
+
+        with self.assertRaises(ValueError):
+            random_formula(10, operators = {NodeType.NOT: 1})
+        with self.assertRaises(ValueError):
+            random_formula(10, shape = "zigzag")
+        with self.assertRaises(ValueError):
+            random_formula(10, depth = 3)
+
+    def test_deep(self):
+        typeList = random_formula(depth = DEPTH, shape = "left-deep", seed = 5)
+        self.assertEqual(depth_of(typeList), DEPTH)
+
+if __name__ == '__main__':
+    unittest.main()
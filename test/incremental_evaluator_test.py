@@ -0,0 +1,75 @@
+import random
+import unittest
+from plt_src import NodeType, PLTreeNode, PLFlatFormula
+from plt_src.formula_generator import formula_variables, random_formula
+from plt_src.incremental_evaluator import IncrementalEvaluator
+
+import logging
+
+fmt = '[%(levelname)s] -- %(lineno)d: %(message)s\n'
+logging.basicConfig(format=fmt, level=logging.DEBUG)
+
+DEPTH = 20000
+
+class IncrementalEvaluatorUnitTest(unittest.TestCase):
+
+    def test_updates(self):
+        typeList = [ NodeType.R, NodeType.P, NodeType.OR, NodeType.TRUE, NodeType.Q, NodeType.NOT, NodeType.AND, NodeType.IMPLIES ]
+        pltree = PLTreeNode.build_from_reverse_polish(typeList)
+        evaluator = IncrementalEvaluator(pltree)
+
+        self.assertIsNone(evaluator.value)
+        self.assertEqual(evaluator.set(NodeType.Q, False), True)
+        self.assertEqual(evaluator.set(NodeType.Q, True), None)
+        self.assertEqual(evaluator.update([(NodeType.R, False), (NodeType.P, False)]), True)
+        self.assertEqual(evaluator.set(NodeType.P, True), False)
+        self.assertEqual(evaluator.bindings(), [(NodeType.R, False), (NodeType.P, True), (NodeType.Q, True)])
+        self.assertEqual(evaluator.set(NodeType.Q, None), None)
+        self.assertEqual(evaluator.set(NodeType.Z, True), None)
+
+        # ----- the tree is untouched
+        self.assertEqual(pltree.get_reverse_polish(), typeList)
+
+    def test_random_updates(self):
+        rng = random.Random(12)
+        for _ in range(50):
+            flat = PLFlatFormula.build_from_reverse_polish(random_formula(rng.randint(1, 30), num_variables = 6, negation = 0.3, constants = 0.15, rng = rng))
+            bindings = {NodeType.A: True}
+            evaluator = IncrementalEvaluator(flat, bindings)
+
+            for _ in range(30):
+                variable = rng.choice(formula_variables(6))
+                value = rng.choice([True, False, None])
+                if value is None:
+                    bindings.pop(variable, None)
+                else:
+                    bindings[variable] = value
+
+                self.assertEqual(evaluator.set(variable, value), flat.evaluate(bindings))
+
+    def test_cost(self):
+        # ----- balanced tree of 2^12 distinct leaves: an update touches one root path
+        variables = [NodeType.A, NodeType.B]
+        level = [[variables[0]] if k == 0 else [variables[1]] for k in range(4096)]
+        while len(level) > 1:
+            level = [level[i] + level[i + 1] + [NodeType.AND] for i in range(0, len(level), 2)]
+        evaluator = IncrementalEvaluator(PLFlatFormula.build_from_reverse_polish(level[0]), {NodeType.B: True})
+
+        self.assertEqual(evaluator.set(NodeType.A, True), True)
+        self.assertEqual(evaluator.nodes_evaluated, 13)
+        self.assertEqual(evaluator.set(NodeType.A, False), False)
+        self.assertEqual(evaluator.nodes_evaluated, 13)
+
+        # ----- an update that does not change a value stops early
+        evaluator.set(NodeType.B, None)
+        self.assertLess(evaluator.nodes_evaluated, 3 * 4095)
+        self.assertEqual(evaluator.value, False)
+
+    def test_deep(self):
+        typeList = [NodeType.P] + [NodeType.Q, NodeType.OR, NodeType.NOT] * DEPTH
+        evaluator = IncrementalEvaluator(PLTreeNode.build_from_reverse_polish(typeList), {NodeType.Q: False})
+
+        self.assertIsNone(evaluator.value)
+        # ----- with Q false every level negates, and DEPTH is even
+        self.assertEqual(evaluator.set(NodeType.P, True), True)
+        self.assertEqual(evaluator.set(NodeType.Q, True), False)
@@ -0,0 +1,113 @@
+import unittest
+from plt_src import NodeType, PLTreeNode
+from plt_src.instrumentation import metrics, Metrics
+
+import logging
+
+fmt = '[%(levelname)s] -- %(lineno)d: %(message)s\n'
+logging.basicConfig(format=fmt, level=logging.DEBUG)
+
+class InstrumentationUnitTest(unittest.TestCase):
+
+    def setUp(self):
+        metrics.reset()
+
+    def tearDown(self):
+        metrics.disable()
+        metrics.reset()
+
+    def test_disabled(self):
+        pltree = PLTreeNode.build_from_text("not(implies(or(R,P),and(true,not(Q))))")
+        pltree.reduce_to_CNF()
+        pltree.copy().evaluate_constant_subtrees()
+        self.assertEqual(metrics.snapshot(), {"counters": {}, "timers": {}})
+
+    def test_pass_counters(self):
+        # ----- ¬((R∨P)→(⊤∧¬Q))
+        pltree = PLTreeNode.build_from_text("not(implies(or(R,P),and(true,not(Q))))")
+
+        with metrics:
+            pltree.eliminate_implies()
+            pltree.push_not_down()
+            pltree.push_or_below_and()
+            pltree.make_and_or_right_deep()
+        self.assertFalse(metrics.enabled)
+
+        counters = metrics.counters
+        self.assertEqual(counters["eliminate_implies.nodes_visited"], 9)
+        self.assertEqual(counters["eliminate_implies.implication"], 1)
+        self.assertEqual(counters["push_not_down.double_negation"], 2)
+        self.assertEqual(counters["push_not_down.de_morgan"], 2)
+        self.assertEqual(counters["nodes_allocated"], 5)
+        self.assertEqual(set(metrics.timers), {"eliminate_implies", "push_not_down", "push_or_below_and", "make_and_or_right_deep"})
+
+        # ----- (A∧B)∨C: one distribution, copying C
+        metrics.reset()
+        pltree = PLTreeNode.build_from_text("or(and(A,B),C)")
+        with metrics:
+            pltree.push_or_below_and()
+            pltree.make_and_or_right_deep()
+        self.assertEqual(metrics.counters["push_or_below_and.distribution"], 1)
+        self.assertEqual(metrics.counters["push_or_below_and.nodes_visited"], 7)
+        self.assertEqual(metrics.counters["copies"], 1)
+        self.assertEqual(metrics.counters["nodes_copied"], 1)
+
+        pltree = PLTreeNode.build_from_text("or(or(or(A,B),C),D)")
+        with metrics:
+            pltree.make_and_or_right_deep()
+        self.assertEqual(metrics.counters["make_and_or_right_deep.rotation"], 2)
+
+    def test_reduce_to_CNF_stages(self):
+        pltree = PLTreeNode.build_from_text("or(and(A,B),or(C,not(C)))")
+        stats = {}
+
+        with metrics:
+            pltree.reduce_to_CNF(simplify = stats)
+        timers = metrics.snapshot()["timers"]
+        for stage in ("reduce_to_CNF", "reduce_to_CNF.distribute", "reduce_to_CNF.simplify", "reduce_to_CNF.build"):
+            self.assertEqual(timers[stage]["calls"], 1)
+
+        self.assertEqual(metrics.counters["cnf_engine.nodes_visited"], 8)
+        self.assertEqual(metrics.counters["simplify.tautologies"], 2)
+        self.assertEqual(stats["tautologies"], 2)
+        self.assertEqual(pltree.get_reverse_polish(), [NodeType.TRUE])
+
+    def test_reduce_to_CNF_rule_counters(self):
+        # ----- the single pass counts the rewrites of the separate passes
+        rules = ("push_not_down.double_negation", "push_not_down.de_morgan", "push_or_below_and.distribution")
+        text = "~((A->B)&(C|D)) | (E&F)"
+
+        pltree = PLTreeNode.build_from_text(text)
+        with metrics:
+            pltree.eliminate_implies()
+            pltree.push_not_down()
+            pltree.push_or_below_and()
+        expected = [metrics.counters.get(rule, 0) for rule in rules]
+
+        metrics.reset()
+        with metrics:
+            PLTreeNode.build_from_text(text).reduce_to_CNF()
+        self.assertEqual([metrics.counters.get(rule, 0) for rule in rules], expected)
+        self.assertEqual(expected, [1, 3, 10])
+
+    def test_callbacks(self):
+        recorder = Metrics()
+        events = []
+        recorder.add_callback(lambda kind, name, value: events.append((kind, name, value)))
+
+        recorder.count("ignored")
+        with recorder:
+            recorder.count("rule", 3)
+            recorder.count("rule", 0)
+            with recorder.timer("stage"):
+                pass
+        recorder.count("ignored")
+
+        self.assertEqual(events[0], ("count", "rule", 3))
+        self.assertEqual(events[1][:2], ("time", "stage"))
+        self.assertEqual(len(events), 2)
+        self.assertEqual(recorder.counters, {"rule": 3})
+        self.assertEqual(recorder.timers["stage"][0], 1)
+
+if __name__ == '__main__':
+    unittest.main()
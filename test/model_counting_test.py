@@ -0,0 +1,143 @@
+import itertools
+import random
+import unittest
+from plt_src import NodeType, PLTreeNode, symbols
+from plt_src.clause_database import ClauseDatabase
+from plt_src.formula_generator import formula_variables, random_formula
+from plt_src.model_counting import count_models, iter_models
+from plt_src.pl_dag_node import PLDagNode
+from plt_src.truth_table import TruthTable
+
+import logging
+
+fmt = '[%(levelname)s] -- %(lineno)d: %(message)s\n'
+logging.basicConfig(format=fmt, level=logging.DEBUG)
+
+DEPTH = 2000
+
+def models_of_cubes(cubes, variables):
+    models = []
+    for cube in cubes:
+        bound = dict(cube)
+        free = [variable for variable in variables if variable not in bound]
+        for values in itertools.product([False, True], repeat = len(free)):
+            bound.update(zip(free, values))
+            models.append(tuple(bound[variable] for variable in variables))
+    return models
+
+class ModelCountingUnitTest(unittest.TestCase):
+
+    def test_cubes(self):
+        pltree = PLTreeNode.build_from_text("A | (B & C)")
+        self.assertEqual(list(pltree.iter_models()), [[(NodeType.A, True)], [(NodeType.A, False), (NodeType.B, True), (NodeType.C, True)]])
+        self.assertEqual(len(list(pltree.iter_models(cubes = False))), 5)
+        self.assertEqual(pltree.count_models(), 5)
+
+        # ----- a tautological clause is one empty cube, a contradiction none
+        self.assertEqual(list(iter_models(PLTreeNode.build_from_text("A | ~A"))), [[]])
+        self.assertEqual(list(iter_models(PLTreeNode.build_from_text("A & ~A"))), [])
+        self.assertEqual(count_models(PLTreeNode.build_from_text("A & ~A")), 0)
+
+        # ----- complete models are listed in the order of the variables given
+        models = list(iter_models(PLTreeNode.build_from_text("A -> B"), variables = [NodeType.C, NodeType.B, NodeType.A], cubes = False))
+        self.assertEqual(len(models), 6)
+        self.assertTrue(all([variable for variable, _ in model] == [NodeType.C, NodeType.B, NodeType.A] for model in models))
+
+        with self.assertRaises(ValueError):
+            iter_models(pltree, variables = [NodeType.A])
+
+    def test_random_formulas(self):
+        rng = random.Random(22)
+        variables = formula_variables(6)
+        for _ in range(200):
+            shape = rng.choice(["balanced", "left-deep", "right-deep", "random"])
+            typeList = random_formula(rng.randint(1, 24), num_variables = 6, shape = shape, negation = 0.3, constants = 0.1, rng = rng)
+            pltree = PLTreeNode.build_from_reverse_polish(typeList)
+            table = TruthTable(pltree, variables)
+            expected = sorted(tuple(value for _, value in model) for model in table.models())
+
+            # ----- tree search, then DPLL on the CNF
+            cubes = list(iter_models(pltree, variables))
+            self.assertEqual(sorted(models_of_cubes(cubes, variables)), expected)
+            self.assertEqual(count_models(pltree, variables), len(expected))
+            self.assertEqual(count_models(PLDagNode.from_tree(pltree), variables), len(expected))
+
+            cnf = pltree.copy()
+            cnf.reduce_to_CNF()
+            cubes = list(iter_models(cnf, variables))
+            self.assertEqual(sorted(models_of_cubes(cubes, variables)), expected)
+            self.assertEqual(count_models(cnf, variables), len(expected))
+
+    def test_clauses(self):
+        clauses = [[(NodeType.A, True), (NodeType.B, False)], [(NodeType.C, True)], [(NodeType.TRUE, False), (NodeType.D, True)]]
+        self.assertEqual(count_models(clauses), 3)
+        self.assertEqual(count_models(ClauseDatabase.from_clauses(clauses), [NodeType.A, NodeType.B, NodeType.C, NodeType.D, NodeType.E]), 6)
+        self.assertEqual(sorted(models_of_cubes(iter_models(clauses), [NodeType.A, NodeType.B, NodeType.C, NodeType.D])),
+                         [(False, False, True, True), (True, False, True, True), (True, True, True, True)])
+        self.assertEqual(count_models([[(NodeType.A, True)], []]), 0)
+
+    def test_auxiliary(self):
+        # ----- (A∧B)∨(C∧D) has 7 models, whatever the auxiliary variables of its encoding
+        pltree = PLTreeNode.build_from_text("(A & B) | (C & D)")
+        for options in ({"mode": "tseitin"}, {"mode": "tseitin", "polarity_aware": True}, {"budget": 2, "on_budget": "tseitin"}):
+            database = pltree.copy().reduce_to_CNF(output = "clauses", **options)
+            self.assertTrue(database.auxiliary)
+            self.assertEqual(count_models(database), 7)
+            self.assertEqual(len(set(tuple(model) for model in iter_models(database, cubes = False))), 7)
+            self.assertEqual(len(list(iter_models(database, cubes = False))), 7)
+
+        rng = random.Random(24)
+        variables = formula_variables(5)
+        for _ in range(200):
+            typeList = random_formula(rng.randint(1, 16), num_variables = 5, shape = "random", negation = 0.3, rng = rng)
+            pltree = PLTreeNode.build_from_reverse_polish(typeList)
+            expected = sorted(tuple(value for _, value in model) for model in TruthTable(pltree, variables).models())
+
+            for options in ({"mode": "tseitin", "polarity_aware": True}, {"budget": 4, "on_budget": "tseitin"}):
+                database = pltree.copy().reduce_to_CNF(output = "clauses", **options)
+                self.assertEqual(count_models(database, variables), len(expected))
+                self.assertEqual(sorted(models_of_cubes(iter_models(database, variables), variables)), expected)
+
+    def test_components(self):
+        # ----- 100 independent clauses (xk ∨ yk): 3^100 models, far beyond enumeration
+        n = 100
+        text = " & ".join("(mc_x%d | mc_y%d)" % (k, k) for k in range(n))
+        pltree = PLTreeNode.build_from_text(text)
+        stats = {}
+        self.assertEqual(count_models(pltree, stats = stats), 3 ** n)
+        self.assertEqual(stats["components"], n)
+
+        # ----- a chain of implications x0 → x1 → ... → xn has n + 2 models
+        text = " & ".join("(mc_x%d -> mc_x%d)" % (k, k + 1) for k in range(n))
+        self.assertEqual(count_models(PLTreeNode.build_from_text(text)), n + 2)
+
+    def test_cache(self):
+        # ----- whatever x is, (y ∨ z) is left to count: the second time from the cache
+        pltree = PLTreeNode.build_from_text("(X | Y | Z) & (~X | Y | Z) & (X | U) & (~X | U)")
+        stats = {}
+        self.assertEqual(count_models(pltree, stats = stats), 6)
+        self.assertEqual(stats["cache_hits"], 1)
+
+    def test_lazy(self):
+        # ----- 2^40 models, the first cubes come at once
+        text = " | ".join("mc_z%d" % k for k in range(40))
+        models = iter_models(PLTreeNode.build_from_text(text), cubes = False)
+        first = [next(models) for _ in range(100)]
+        self.assertEqual(len(first), 100)
+        self.assertEqual(len(set(tuple(model) for model in first)), 100)
+
+    def test_many_variables(self):
+        variables = [symbols.variable("mc_v%d" % k) for k in range(DEPTH)]
+        typeList = [variables[0]]
+        for variable in variables[1:]:
+            typeList += [variable, NodeType.IMPLIES]
+        pltree = PLTreeNode.build_from_reverse_polish(typeList)
+
+        self.assertEqual(len(next(pltree.iter_models())), 1)
+
+        # ----- v0 ∧ (v1 ∧ ... (v1998 ∨ v1999)), decided by propagation
+        typeList = variables + [NodeType.OR] + [NodeType.AND] * (DEPTH - 2)
+        self.assertEqual(PLTreeNode.build_from_reverse_polish(typeList).count_models(), 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import copy
+import pickle
+import unittest
+from plt_src import NodeType, PLTreeNode
+from plt_src.node_type import NodeTypeBase, variable_named, OP_AND, OP_NOT, OP_TRUE, OP_VAR
+
+import logging
+
+fmt = '[%(levelname)s] -- %(lineno)d: %(message)s\n'
+logging.basicConfig(format=fmt, level=logging.DEBUG)
+
+class NodeTypeUnitTest(unittest.TestCase):
+
+    def test_interned(self):
+        self.assertIs(NodeType.a, NodeType.A)
+        self.assertIs(NodeTypeBase.Variable("q"), NodeType.Q)
+        self.assertIs(NodeTypeBase("and", u"∧", 2), NodeType.AND)
+        self.assertIs(variable_named("aux1"), variable_named("aux1"))
+
+        with self.assertRaises(ValueError):
+            variable_named("and")
+
+        self.assertEqual(NodeType.A, NodeType.a)
+        self.assertNotEqual(NodeType.A, NodeType.B)
+        self.assertNotEqual(NodeType.AND, NodeType.OR)
+
+        with self.assertRaises(AttributeError):
+            NodeType.A.color = "red"
+
+    def test_opcodes(self):
+        self.assertEqual(NodeType.AND.opcode, OP_AND)
+        self.assertEqual(NodeType.NOT.opcode, OP_NOT)
+        self.assertEqual(NodeType.TRUE.opcode, OP_TRUE)
+        self.assertEqual(NodeType.Z.opcode, OP_VAR)
+        self.assertEqual(variable_named("x12").opcode, OP_VAR)
+
+    def test_copy_and_pickle(self):
+        self.assertIs(copy.deepcopy(NodeType.OR), NodeType.OR)
+        self.assertIs(pickle.loads(pickle.dumps(NodeType.OR)), NodeType.OR)
+        self.assertIs(pickle.loads(pickle.dumps(variable_named("aux7"))), variable_named("aux7"))
+
+        pltree = PLTreeNode.build_from_text("A & ~aux2")
+        self.assertEqual(pickle.loads(pickle.dumps(pltree)).get_reverse_polish(), pltree.get_reverse_polish())
+
+    def test_dict_keys(self):
+        table = {NodeType.AND: "and", NodeType.a: "a"}
+        self.assertEqual(table[NodeType.AND], "and")
+        self.assertEqual(table[NodeType.A], "a")
+        self.assertEqual(len({NodeType.A, NodeType.a, NodeTypeBase.Variable("A")}), 1)
@@ -0,0 +1,73 @@
+import io
+import random
+import unittest
+from plt_src import NodeType, PLTreeNode, PLFlatFormula, symbols
+from plt_src import parser
+from plt_src.formula_generator import random_formula
+from plt_src.parser import parse, parse_reverse_polish, parse_lines, parse_rpn
+
+import logging
+
+fmt = '[%(levelname)s] -- %(lineno)d: %(message)s\n'
+logging.basicConfig(format=fmt, level=logging.DEBUG)
+
+DEPTH = 100000
+
+class ParserUnitTest(unittest.TestCase):
+
+    def test_notations(self):
+        typeList = [ NodeType.R, NodeType.P, NodeType.OR, NodeType.TRUE, NodeType.Q, NodeType.NOT, NodeType.AND, NodeType.IMPLIES ]
+
+        self.assertEqual(parse_reverse_polish("implies(or(R,P),and(true,not(Q)))"), typeList)
+        self.assertEqual(parse_reverse_polish("((R∨P)→(⊤∧¬Q))"), typeList)
+        self.assertEqual(parse_reverse_polish(" ( (R | P) -> (true & ~Q) ) "), typeList)
+        self.assertEqual(parse_reverse_polish("R | P -> true & ~Q"), typeList)
+        self.assertEqual(PLTreeNode.build_from_text("or(R, P) -> and(⊤, ¬Q)").get_reverse_polish(), typeList)
+
+    def test_round_trip(self):
+        rng = random.Random(10)
+        for _ in range(200):
+            typeList = random_formula(rng.randint(1, 20), num_variables = 4, negation = 0.3, constants = 0.3, rng = rng)
+            pltree = PLTreeNode.build_from_reverse_polish(typeList)
+
+            self.assertEqual(parse_reverse_polish(pltree.in_prefix_notation()), typeList)
+            self.assertEqual(parse_reverse_polish(pltree.in_infix_notation()), typeList)
+
+    def test_precedence(self):
+        self.assertEqual(parse("A -> B & C | D").in_infix_notation(), "(A→((B∧C)∨D))")
+        self.assertEqual(parse("A -> B -> C").in_infix_notation(), "(A→(B→C))")
+        self.assertEqual(parse("A & B & C").in_infix_notation(), "((A∧B)∧C)")
+        self.assertEqual(parse("~~A | ~(B & C)").in_infix_notation(), "(¬¬A∨¬(B∧C))")
+        self.assertEqual(parse("aux1 & x_2").in_infix_notation(), "(aux1∧x_2)")
+
+    def test_errors(self):
+        for text in ["", "A B", "&A", "A &", "(A", "A)", "and(A)", "and(A,B,C)", "not(A,B)",
+                     "foo(A)", "A # B", "or", "(A,B)", "A(B)"]:
+            with self.assertRaises(ValueError, msg = text):
+                parse_reverse_polish(text)
+
+    def test_deep(self):
+        pltree = parse("¬" * DEPTH + "Q")
+        self.assertEqual(len(pltree.get_reverse_polish()), DEPTH + 1)
+
+        typeList = parse_reverse_polish("(" * DEPTH + "P" + "∧Q)" * DEPTH)
+        self.assertEqual(len(typeList), 2 * DEPTH + 1)
+
+        typeList = parse_reverse_polish("not(" * DEPTH + "P" + ")" * DEPTH)
+        self.assertEqual(typeList, [NodeType.P] + [NodeType.NOT] * DEPTH)
+
+    def test_names(self):
+        # ----- names resolve through the symbol table and do not accumulate in the parser
+        actions = len(parser._ACTIONS)
+        for k in range(1000):
+            self.assertEqual(parse_reverse_polish("parser_v%d & a" % k), [symbols.variable("parser_v%d" % k), NodeType.A, NodeType.AND])
+        self.assertEqual(parse_rpn("parser_v1 b or"), [symbols.variable("parser_v1"), NodeType.B, NodeType.OR])
+        self.assertEqual(len(parser._ACTIONS), actions)
+
+        with self.assertRaises(ValueError):
+            parse_reverse_polish("and & P")
+
+    def test_lines(self):
+        text = "or(P,Q)\n\n  P -> Q\n(P∧¬Q)\n"
+        formulas = list(parse_lines(io.StringIO(text), PLFlatFormula))
+        self.assertEqual([str(formula) for formula in formulas], ["or(P,Q)", "implies(P,Q)", "and(P,not(Q))"])
@@ -0,0 +1,76 @@
+import unittest
+from plt_src import NodeType, PLTreeNode, PLDagNode, PLDagNodeTable
+
+import logging
+
+fmt = '[%(levelname)s] -- %(lineno)d: %(message)s\n'
+logging.basicConfig(format=fmt, level=logging.DEBUG)
+
+class PLDagNodeUnitTest(unittest.TestCase):
+
+    def test_hash_consing(self):
+        table = PLDagNodeTable()
+
+        typeList = [ NodeType.A, NodeType.B, NodeType.AND, NodeType.A, NodeType.B, NodeType.AND, NodeType.OR ]
+        dag = table.build_from_reverse_polish(typeList)
+
+        self.assertIs(dag.child1, dag.child2)
+        self.assertIs(table.make(NodeType.A), dag.child1.child1)
+        self.assertEqual(len(table), 4)
+
+        self.assertEqual(dag.in_prefix_notation(), "or(and(A,B),and(A,B))")
+        self.assertEqual(dag.to_tree().in_prefix_notation(), "or(and(A,B),and(A,B))")
+
+    def test_passes_match_tree(self):
+        table = PLDagNodeTable()
+
+        typeList = [ NodeType.R, NodeType.P, NodeType.OR, NodeType.TRUE, NodeType.Q, NodeType.NOT, NodeType.AND, NodeType.IMPLIES ]
+        pltree = PLTreeNode.build_from_reverse_polish(typeList)
+        dag = PLDagNode.from_tree(pltree, table)
+
+        self.assertEqual(dag.in_infix_notation(), "((R∨P)→(⊤∧¬Q))")
+
+        for step in ["eliminate_implies", "push_not_down", "push_or_below_and", "make_and_or_right_deep"]:
+            getattr(pltree, step)()
+            dag = getattr(dag, step)()
+
+            logging.debug("%s: %s"%(step, dag.in_prefix_notation()))
+            self.assertEqual(dag.in_prefix_notation(), pltree.in_prefix_notation())
+            self.assertEqual(dag.get_reverse_polish(), pltree.get_reverse_polish())
+
+        evaluated = dag.evaluate_constant_subtrees()
+        self.assertEqual(evaluated.in_prefix_notation(), "and(or(not(R),not(Q)),or(not(P),not(Q)))")
+        self.assertIs(evaluated.child1.child2, evaluated.child2.child2)
+
+    def test_reduce_to_CNF(self):
+        typeList = [NodeType.R, NodeType.P, NodeType.IMPLIES, NodeType.S, NodeType.IMPLIES, NodeType.NOT, NodeType.Q, NodeType.IMPLIES]
+
+        pltree = PLTreeNode.build_from_reverse_polish(typeList)
+        dag = PLDagNode.from_tree(pltree)
+        cnf = dag.reduce_to_CNF()
+        pltree.reduce_to_CNF()
+
+        self.assertEqual(cnf.in_prefix_notation(), "and(or(R,or(S,Q)),or(not(P),or(S,Q)))")
+        self.assertEqual(cnf.in_prefix_notation(), pltree.in_prefix_notation())
+
+        # ----- the repeated clause tail (S∨Q) is a single shared node
+        self.assertIs(cnf.child1.child2, cnf.child2.child2)
+
+        # ----- the original DAG is immutable
+        self.assertEqual(dag.in_prefix_notation(), "implies(not(implies(implies(R,P),S)),Q)")
+
+    def test_evaluate_constant_subtrees(self):
+        table = PLDagNodeTable()
+
+        dag = table.build_from_reverse_polish([NodeType.TRUE, NodeType.NOT, NodeType.A, NodeType.OR])
+        self.assertEqual(dag.evaluate_constant_subtrees().in_prefix_notation(), "A")
+
+        dag = table.build_from_reverse_polish([NodeType.A, NodeType.FALSE, NodeType.IMPLIES])
+        self.assertEqual(dag.evaluate_constant_subtrees().in_prefix_notation(), "not(A)")
+
+        dag = table.build_from_reverse_polish([NodeType.FALSE, NodeType.A, NodeType.B, NodeType.OR, NodeType.AND])
+        self.assertEqual(dag.evaluate_constant_subtrees().in_prefix_notation(), "false")
+
+
+if __name__ == '__main__':
+    unittest.main()
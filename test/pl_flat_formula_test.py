@@ -0,0 +1,79 @@
+import tracemalloc
+import unittest
+from plt_src import NodeType, PLTreeNode, PLFlatFormula, symbols
+
+import logging
+
+fmt = '[%(levelname)s] -- %(lineno)d: %(message)s\n'
+logging.basicConfig(format=fmt, level=logging.DEBUG)
+
+DEPTH = 20000
+
+class PLFlatFormulaUnitTest(unittest.TestCase):
+
+    def test_flat_formula(self):
+        typeList = [ NodeType.R, NodeType.P, NodeType.OR, NodeType.TRUE, NodeType.Q, NodeType.NOT, NodeType.AND, NodeType.IMPLIES ]
+
+        formula = PLFlatFormula.build_from_reverse_polish(typeList)
+
+        self.assertEqual(len(formula), 8)
+        self.assertEqual(formula.in_prefix_notation(), "implies(or(R,P),and(true,not(Q)))")
+        self.assertEqual(formula.in_infix_notation(), "((R∨P)→(⊤∧¬Q))")
+        self.assertEqual(formula.get_reverse_polish(), typeList)
+        self.assertEqual(formula.to_tree().in_prefix_notation(), "implies(or(R,P),and(true,not(Q)))")
+
+        self.assertIsNone(formula.evaluate([(NodeType.P, True), (NodeType.R, False)]))
+        self.assertEqual(formula.evaluate({NodeType.P: True, NodeType.Q: True}), False)
+        self.assertEqual(formula.evaluate({NodeType.P: False, NodeType.R: False}), True)
+
+    def test_reduce_to_CNF(self):
+        typeLists = [
+            [ NodeType.R, NodeType.P, NodeType.OR, NodeType.TRUE, NodeType.Q, NodeType.NOT, NodeType.AND, NodeType.IMPLIES ],
+            [ NodeType.R, NodeType.P, NodeType.IMPLIES, NodeType.S, NodeType.IMPLIES, NodeType.NOT, NodeType.Q, NodeType.IMPLIES ],
+            [ NodeType.A, NodeType.B, NodeType.AND, NodeType.C, NodeType.AND, NodeType.D, NodeType.OR, NodeType.E, NodeType.OR ],
+            [ NodeType.A, NodeType.B, NodeType.AND, NodeType.C, NodeType.D, NodeType.AND, NodeType.OR, NodeType.NOT, NodeType.NOT, NodeType.NOT ],
+        ]
+
+        for typeList in typeLists:
+            pltree = PLTreeNode.build_from_reverse_polish(typeList)
+            formula = PLFlatFormula.from_tree(pltree)
+
+            cnf = formula.reduce_to_CNF()
+            pltree.reduce_to_CNF()
+
+            logging.debug("Reduced to CNF: " + cnf.in_prefix_notation())
+            self.assertEqual(cnf.in_prefix_notation(), pltree.in_prefix_notation())
+            self.assertEqual(cnf.get_reverse_polish(), pltree.get_reverse_polish())
+
+    def test_chains(self):
+        variables = [symbols.variable("x%d" % k) for k in range(DEPTH)]
+        for count in (30, DEPTH):
+            for typeList in ([variables[0]] + [nodetype for variable in variables[1:count] for nodetype in (variable, NodeType.AND)],
+                             variables[:count] + [NodeType.OR] * (count - 1),
+                             variables[:count] + [NodeType.IMPLIES, NodeType.NOT, NodeType.NOT] * (count - 1)):
+                cnf = PLFlatFormula.build_from_reverse_polish(typeList).reduce_to_CNF()
+                pltree = PLTreeNode.build_from_reverse_polish(typeList)
+                pltree.reduce_to_CNF()
+                self.assertEqual(cnf.get_reverse_polish(), pltree.get_reverse_polish())
+
+    def test_memory(self):
+        typeList = [NodeType.A]
+        for i in range(10000):
+            typeList += [NodeType.B if i % 3 else NodeType.C, NodeType.NOT, NodeType.AND if i % 2 else NodeType.OR]
+
+        tracemalloc.start()
+        start = tracemalloc.get_traced_memory()[0]
+        pltree = PLTreeNode.build_from_reverse_polish(typeList)
+        tree_size = tracemalloc.get_traced_memory()[0] - start
+
+        start = tracemalloc.get_traced_memory()[0]
+        formula = PLFlatFormula.build_from_reverse_polish(typeList)
+        flat_size = tracemalloc.get_traced_memory()[0] - start
+        tracemalloc.stop()
+
+        logging.debug("Bytes per node: PLTreeNode %.1f, PLFlatFormula %.1f"%(tree_size / len(typeList), flat_size / len(typeList)))
+        self.assertGreaterEqual(tree_size, 5 * flat_size)
+
+
+if __name__ == '__main__':
+    unittest.main()
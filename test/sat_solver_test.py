@@ -0,0 +1,85 @@
+import random
+import unittest
+from plt_src import NodeType, PLTreeNode
+from plt_src.formula_generator import random_formula
+from plt_src.sat_solver import SATSolver, clauses_from_cnf, find_model, luby
+from plt_src.truth_table import is_satisfiable
+
+import logging
+
+fmt = '[%(levelname)s] -- %(lineno)d: %(message)s\n'
+logging.basicConfig(format=fmt, level=logging.DEBUG)
+
+class SATSolverUnitTest(unittest.TestCase):
+
+    def test_clauses_from_cnf(self):
+        typeList = [NodeType.R, NodeType.P, NodeType.IMPLIES, NodeType.S, NodeType.IMPLIES, NodeType.NOT, NodeType.Q, NodeType.IMPLIES]
+        pltree = PLTreeNode.build_from_reverse_polish(typeList)
+        pltree.reduce_to_CNF()
+
+        clauses = clauses_from_cnf(pltree)
+        self.assertEqual(clauses, [[(NodeType.R, True), (NodeType.S, True), (NodeType.Q, True)],
+                                   [(NodeType.P, False), (NodeType.S, True), (NodeType.Q, True)]])
+
+        with self.assertRaises(ValueError):
+            clauses_from_cnf(PLTreeNode.build_from_reverse_polish([NodeType.P, NodeType.Q, NodeType.AND, NodeType.NOT]))
+
+    def test_model(self):
+        typeList = [NodeType.R, NodeType.P, NodeType.IMPLIES, NodeType.S, NodeType.IMPLIES, NodeType.NOT, NodeType.Q, NodeType.IMPLIES]
+        pltree = PLTreeNode.build_from_reverse_polish(typeList)
+        cnf = pltree.copy()
+        cnf.reduce_to_CNF()
+
+        model = find_model(cnf)
+        self.assertEqual([variable for variable, _ in model], [NodeType.R, NodeType.S, NodeType.Q, NodeType.P])
+
+        pltree.apply_variable_bindings(model)
+        pltree.evaluate_constant_subtrees()
+        self.assertEqual(pltree.in_prefix_notation(), "true")
+
+        contradiction = PLTreeNode.build_from_reverse_polish([NodeType.A, NodeType.A, NodeType.NOT, NodeType.AND])
+        self.assertIsNone(find_model(contradiction))
+
+    def test_random_formulas(self):
+        rng = random.Random(8)
+        for _ in range(200):
+            typeList = random_formula(rng.randint(2, 14), num_variables = 6, negation = 0.4, rng = rng)
+            pltree = PLTreeNode.build_from_reverse_polish(typeList)
+            model = find_model(pltree)
+
+            self.assertEqual(model is not None, is_satisfiable(pltree))
+            if model is not None:
+                pltree.apply_variable_bindings(model)
+                pltree.evaluate_constant_subtrees()
+                self.assertEqual(pltree.in_prefix_notation(), "true")
+
+    def test_pigeonhole(self):
+        # ----- 6 pigeons in 5 holes: unsatisfiable, needs many conflicts
+        pigeons, holes = 6, 5
+        var = lambda p, h: p * holes + h + 1
+        solver = SATSolver()
+        for p in range(pigeons):
+            solver.add_clause([var(p, h) for h in range(holes)])
+        for h in range(holes):
+            for p in range(pigeons):
+                for q in range(p + 1, pigeons):
+                    solver.add_clause([-var(p, h), -var(q, h)])
+
+        self.assertFalse(solver.solve())
+        self.assertGreater(solver.stats["learnt_clauses"], 0)
+
+    def test_random_3sat(self):
+        rng = random.Random(3)
+        for _ in range(20):
+            num_variables = 40
+            clauses = [[rng.choice([-1, 1]) * v for v in rng.sample(range(1, num_variables + 1), 3)] for _ in range(170)]
+            solver = SATSolver()
+            for clause in clauses:
+                solver.add_clause(clause)
+
+            if solver.solve():
+                model = solver.model()
+                self.assertTrue(all(any(model[abs(l) - 1] == (l > 0) for l in clause) for clause in clauses))
+
+    def test_luby(self):
+        self.assertEqual([luby(i) for i in range(15)], [1, 1, 2, 1, 1, 2, 4, 1, 1, 2, 1, 1, 2, 4, 8])
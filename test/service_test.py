@@ -0,0 +1,148 @@
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import signal
+import tempfile
+import unittest
+from plt_src import PLTreeNode
+from plt_src.formula_generator import random_formula
+from plt_src.service import FormulaService, ServiceClient, evaluate_requests
+
+import logging
+
+fmt = '[%(levelname)s] -- %(lineno)d: %(message)s\n'
+logging.basicConfig(format=fmt, level=logging.DEBUG)
+
+def run(coroutine):
+    return asyncio.run(asyncio.wait_for(coroutine, 60))
+
+class ServiceUnitTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_requests(self):
+        async def requests():
+            async with FormulaService(workers = 2) as service:
+                server = await service.listen_tcp("127.0.0.1", 0)
+                port = server.sockets[0].getsockname()[1]
+                async with await ServiceClient.connect_tcp("127.0.0.1", port) as client:
+                    return await asyncio.gather(
+                        client.request("cnf", formula = "(A & B) | C"),
+                        client.request("cnf", formula = "or(and(A,B),C)", notation = "infix"),
+                        client.request("cnf", formula = "A B and C or", format = "rpn", mode = "tseitin"),
+                        client.request("evaluate", formula = "A -> B", bindings = {"A": True, "B": False}),
+                        client.request("evaluate", formula = "A -> B", bindings = "A=0"),
+                        client.request("evaluate", formula = "A & (B | C)", bindings = {"A": True}),
+                        client.request("solve", formula = "A & ~B"),
+                        client.request("solve", formula = "A & ~A"),
+                        client.request("cnf", formula = "A &"),
+                        client.request("launch", formula = "A"),
+                        client.request("evaluate", formula = "A", bindings = {"A": 1}),
+                    )
+
+        responses = run(requests())
+        self.assertEqual(responses[0]["result"], "and(or(A,C),or(B,C))")
+        self.assertEqual(responses[1]["result"], PLTreeNode.build_from_text("and(or(A,C),or(B,C))").in_infix_notation())
+        self.assertIn("result", responses[2])
+        self.assertEqual([response.get("result") for response in responses[3:6]], [False, True, "or(B,C)"])
+        self.assertEqual(responses[6]["result"], {"satisfiable": True, "model": {"A": True, "B": False}})
+        self.assertEqual(responses[7]["result"], {"satisfiable": False})
+        for response in responses[8:]:
+            self.assertIn("error", response)
+        self.assertEqual([response["id"] for response in responses], list(range(1, len(responses) + 1)))
+
+    def test_coalescing_and_batching(self):
+        rng = random.Random(25)
+        formulas = [PLTreeNode.build_from_reverse_polish(random_formula(12, num_variables = 4, rng = rng)).in_prefix_notation()
+                    for _ in range(10)]
+        bindings = [{name: rng.random() < 0.5 for name in "ABCD"} for _ in range(100)]
+        path = os.path.join(self.directory.name, "service.sock")
+
+        async def requests():
+            async with FormulaService(workers = 2, batch_size = 16, batch_delay = 0.05) as service:
+                await service.listen_unix(path)
+                async with await ServiceClient.connect_unix(path) as client:
+                    cnf = await asyncio.gather(*[client.request("cnf", formula = formulas[k % 10]) for k in range(50)])
+                    values = await asyncio.gather(*[client.request("evaluate", formula = formulas[k % 10], bindings = bindings[k])
+                                                    for k in range(100)])
+                    stats = await client.request("stats")
+            return cnf, values, stats["result"], service.report()
+
+        cnf, values, stats, report = run(requests())
+
+        for k, response in enumerate(cnf):
+            pltree = PLTreeNode.build_from_text(formulas[k % 10])
+            pltree.reduce_to_CNF()
+            self.assertEqual(response["result"], pltree.in_prefix_notation())
+
+        expected = evaluate_requests([(formulas[k % 10], "text", sorted(bindings[k].items()), "prefix") for k in range(100)])
+        self.assertEqual([("result", response["result"]) for response in values], expected)
+        self.assertTrue(all(isinstance(response["result"], bool) for response in values))
+
+        self.assertGreaterEqual(stats["coalesced"], 40)
+        self.assertLess(stats["evaluation_batches"], 100)
+        self.assertGreater(stats["mean_batch_size"], 1)
+        self.assertEqual(stats["operations"]["cnf"]["requests"], 50)
+        self.assertEqual(report["operations"]["stats"]["requests"], 1)
+        self.assertLessEqual(stats["operations"]["evaluate"]["p50_ms"], stats["operations"]["evaluate"]["p99_ms"])
+
+    def test_evaluate_requests(self):
+        results = evaluate_requests([("A & ~B", "text", [("A", True), ("B", False)], "prefix"),
+                                     ("A & ~B", "text", [("A", True)], "prefix"),
+                                     ("A & ~B", "text", [("B", True)], "prefix"),
+                                     ("true | A", "text", [], "prefix"),
+                                     ("A &", "text", [], "prefix")])
+        self.assertEqual(results[:4], [("result", True), ("result", "not(B)"), ("result", False), ("result", True)])
+        self.assertEqual(results[4][0], "error")
+
+    def test_dead_workers(self):
+        # ----- 2^30 clauses by distribution: refused, where it used to exhaust a worker's memory
+        exponential = " | ".join("(sv_a%d & sv_b%d)" % (k, k) for k in range(30))
+
+        async def requests():
+            async with FormulaService(workers = 2, memory_limit = 1 << 31) as service:
+                server = await service.listen_tcp("127.0.0.1", 0)
+                port = server.sockets[0].getsockname()[1]
+                async with await ServiceClient.connect_tcp("127.0.0.1", port) as client:
+                    budget = await asyncio.gather(client.request("cnf", formula = exponential),
+                                                  client.request("cnf", formula = exponential, mode = "tseitin"))
+
+                    for child in multiprocessing.active_children():
+                        os.kill(child.pid, signal.SIGKILL)
+                    lost = await asyncio.gather(client.request("solve", formula = "A | B"),
+                                                client.request("evaluate", formula = "A | B", bindings = {"A": False, "B": True}))
+                    answered = await asyncio.gather(client.request("cnf", formula = "(A & B) | C"),
+                                                    client.request("evaluate", formula = "A & B", bindings = {"A": True, "B": True}))
+                    return budget, lost, answered
+
+        budget, lost, answered = run(requests())
+        self.assertIn("exceeds the budget", budget[0]["error"])
+        self.assertIn("result", budget[1])
+        for response in lost:
+            self.assertTrue("result" in response or response["error"].startswith("BrokenProcessPool"))
+        self.assertEqual([response.get("result") for response in answered], ["and(or(A,C),or(B,C))", True])
+
+    def test_protocol(self):
+        async def requests():
+            async with FormulaService(workers = 1) as service:
+                server = await service.listen_tcp("127.0.0.1", 0)
+                port = server.sockets[0].getsockname()[1]
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+                writer.write(b'not json\n\n[1, 2]\n{"id": "x", "op": "solve", "formula": "A | B"}\n')
+                await writer.drain()
+                lines = [json.loads(await reader.readline()) for _ in range(3)]
+                writer.close()
+                return lines
+
+        lines = run(requests())
+        self.assertEqual([line["id"] for line in lines if "error" in line], [None, None])
+        self.assertEqual([line["result"]["satisfiable"] for line in lines if line["id"] == "x"], [True])
+
+if __name__ == '__main__':
+    unittest.main()
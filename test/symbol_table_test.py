@@ -0,0 +1,69 @@
+import unittest
+from plt_src import NodeType, PLTreeNode, PLFlatFormula, BindingIndex, symbols
+from plt_src.incremental_evaluator import IncrementalEvaluator
+from plt_src.sat_solver import find_model
+
+import logging
+
+fmt = '[%(levelname)s] -- %(lineno)d: %(message)s\n'
+logging.basicConfig(format=fmt, level=logging.DEBUG)
+
+NUM_VARIABLES = 20000
+
+class SymbolTableUnitTest(unittest.TestCase):
+
+    def test_symbols(self):
+        self.assertIs(symbols.variable("A"), NodeType.A)
+        self.assertIs(symbols["a"], NodeType.A)
+        self.assertIs(symbols[NodeType.Q.var_id], NodeType.Q)
+        self.assertEqual([symbols[k] for k in range(3)], [NodeType.A, NodeType.B, NodeType.C])
+        self.assertIsNone(NodeType.AND.var_id)
+
+        pump = symbols.variable("pump_3.on")
+        self.assertIs(symbols["pump_3.on"], pump)
+        self.assertIs(symbols[pump.var_id], pump)
+        self.assertIn("pump_3.on", symbols)
+        self.assertNotIn("no_such_variable", symbols)
+
+        fresh = symbols.fresh("pump_3.on")
+        self.assertEqual(fresh.prefix_name, "pump_3.on1")
+
+        for name in ["", "1x", "a b", "f(x)", "or", "true"]:
+            with self.assertRaises(ValueError, msg = name):
+                symbols.variable(name)
+
+    def test_many_variables(self):
+        names = ["p%d" % k for k in range(NUM_VARIABLES)]
+        variables = [symbols.variable(name) for name in names]
+        self.assertEqual(len(set(variable.var_id for variable in variables)), NUM_VARIABLES)
+
+        # ----- a chain of implications p0 → p1 → ... as a conjunction of clauses
+        text = " & ".join("(%s -> %s)" % (names[k], names[k + 1]) for k in range(NUM_VARIABLES - 1))
+        pltree = PLTreeNode.build_from_text(text)
+        self.assertEqual(PLTreeNode.build_from_text(pltree.in_infix_notation()), pltree)
+
+        cnf = pltree.copy()
+        cnf.reduce_to_CNF()
+
+        # ----- p0 true forces every other variable
+        model = find_model(PLTreeNode(NodeType.AND, PLTreeNode(variables[0]), cnf))
+        self.assertTrue(all(value for _, value in model))
+        self.assertEqual(len(model), NUM_VARIABLES)
+
+        bound = cnf.copy()
+        bound.apply_variable_bindings([(variable, True) for variable in variables])
+        self.assertEqual(bound.evaluate_constant_subtrees(), True)
+
+        values = [None] * len(symbols)
+        values[variables[-1].var_id] = False
+        index = BindingIndex.from_values(values)
+        flat = PLFlatFormula.from_tree(pltree)
+        self.assertIsNone(flat.evaluate(index))
+        self.assertEqual(flat.variable_ids()[0], variables[0].var_id)
+
+        evaluator = IncrementalEvaluator(flat, index)
+        self.assertEqual(evaluator.set(variables[-2], True), False)
+        self.assertEqual(pltree.with_variable_bindings(index).in_infix_notation().count("¬"), 1)
+
+        aux = pltree.reduce_to_CNF(mode = "tseitin", polarity_aware = True)
+        self.assertEqual(len(aux), NUM_VARIABLES - 1 + NUM_VARIABLES - 2)
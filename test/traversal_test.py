@@ -0,0 +1,59 @@
+import unittest
+from plt_src import NodeType, PLTreeNode, PLDagNode
+
+import logging
+
+fmt = '[%(levelname)s] -- %(lineno)d: %(message)s\n'
+logging.basicConfig(format=fmt, level=logging.DEBUG)
+
+DEPTH = 20000
+
+class TraversalUnitTest(unittest.TestCase):
+
+    def test_deep_disjunction(self):
+        typeList = [NodeType.A, NodeType.B, NodeType.AND, NodeType.C, NodeType.IMPLIES]
+        for i in range(DEPTH):
+            typeList += [NodeType.D if i % 2 else NodeType.E, NodeType.OR]
+
+        pltree = PLTreeNode.build_from_reverse_polish(typeList)
+
+        self.assertEqual(pltree.get_reverse_polish(), typeList)
+        self.assertTrue(pltree.in_prefix_notation().startswith("or(or(or("))
+        self.assertTrue(pltree.in_infix_notation().endswith("∨E)∨D)"))
+
+        dag = PLDagNode.from_tree(pltree)
+        pltree.reduce_to_CNF()
+
+        self.assertTrue(pltree.in_prefix_notation().startswith("or(not(A),or(not(B),or(C,or(E,or(D,"))
+        self.assertEqual(dag.reduce_to_CNF().get_reverse_polish(), pltree.get_reverse_polish())
+
+        pltree.apply_variable_bindings([(NodeType.D, False), (NodeType.E, False), (NodeType.C, False)])
+        self.assertIsNone(pltree.evaluate_constant_subtrees())
+        self.assertEqual(pltree.in_prefix_notation(), "or(not(A),not(B))")
+
+    def test_deep_negation(self):
+        pltree = PLTreeNode.build_from_reverse_polish([NodeType.A] + [NodeType.NOT] * DEPTH)
+        pltree.push_not_down()
+        self.assertEqual(pltree.in_prefix_notation(), "A")
+
+        pltree = PLTreeNode.build_from_reverse_polish([NodeType.A, NodeType.B, NodeType.AND] + [NodeType.NOT] * 5)
+        pltree.push_not_down()
+        self.assertEqual(pltree.in_prefix_notation(), "or(not(A),not(B))")
+
+    def test_right_deep(self):
+        pltree = PLTreeNode.build_from_reverse_polish([NodeType.A, NodeType.B, NodeType.OR, NodeType.C, NodeType.OR, NodeType.D, NodeType.OR])
+        pltree.make_and_or_right_deep()
+        self.assertEqual(pltree.in_prefix_notation(), "or(A,or(B,or(C,D)))")
+
+    def test_evaluate_negated_constant(self):
+        pltree = PLTreeNode.build_from_reverse_polish([NodeType.TRUE, NodeType.NOT, NodeType.A, NodeType.OR])
+        self.assertIsNone(pltree.evaluate_constant_subtrees())
+        self.assertEqual(pltree.in_prefix_notation(), "A")
+
+        pltree = PLTreeNode.build_from_reverse_polish([NodeType.A, NodeType.FALSE, NodeType.IMPLIES])
+        self.assertIsNone(pltree.evaluate_constant_subtrees())
+        self.assertEqual(pltree.in_prefix_notation(), "not(A)")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import itertools
+import unittest
+from plt_src import NodeType, PLTreeNode, PLFlatFormula
+from plt_src.truth_table import TruthTable, is_tautology, is_satisfiable, are_equivalent, count_models
+
+import logging
+
+fmt = '[%(levelname)s] -- %(lineno)d: %(message)s\n'
+logging.basicConfig(format=fmt, level=logging.DEBUG)
+
+class TruthTableUnitTest(unittest.TestCase):
+
+    def test_truth_table(self):
+        typeList = [ NodeType.R, NodeType.P, NodeType.OR, NodeType.TRUE, NodeType.Q, NodeType.NOT, NodeType.AND, NodeType.IMPLIES ]
+        pltree = PLTreeNode.build_from_reverse_polish(typeList)
+        table = TruthTable(pltree)
+
+        self.assertEqual(table.variables, [NodeType.R, NodeType.P, NodeType.Q])
+
+        flat = PLFlatFormula.from_tree(pltree)
+        for values in itertools.product([True, False], repeat = 3):
+            bindings = list(zip(table.variables, values))
+            self.assertEqual(table.value(bindings), flat.evaluate(bindings))
+
+        # ----- false only when Q holds and one of R, P holds
+        self.assertEqual(table.count_models(), 5)
+        self.assertEqual(len(list(table.models())), 5)
+        self.assertTrue(all(flat.evaluate(model) for model in table.models()))
+
+    def test_queries(self):
+        excluded_middle = PLTreeNode.build_from_reverse_polish([NodeType.A, NodeType.A, NodeType.NOT, NodeType.OR])
+        contradiction = PLTreeNode.build_from_reverse_polish([NodeType.A, NodeType.A, NodeType.NOT, NodeType.AND])
+
+        self.assertTrue(is_tautology(excluded_middle))
+        self.assertFalse(is_satisfiable(contradiction))
+        self.assertTrue(is_satisfiable(excluded_middle))
+        self.assertEqual(count_models(contradiction), 0)
+        self.assertEqual(count_models(excluded_middle, [NodeType.A, NodeType.B]), 4)
+
+    def test_equivalence(self):
+        typeList = [NodeType.R, NodeType.P, NodeType.IMPLIES, NodeType.S, NodeType.IMPLIES, NodeType.NOT, NodeType.Q, NodeType.IMPLIES]
+        pltree = PLTreeNode.build_from_reverse_polish(typeList)
+        cnf = pltree.copy()
+        cnf.reduce_to_CNF()
+
+        self.assertTrue(are_equivalent(pltree, cnf))
+        self.assertFalse(are_equivalent(pltree, PLTreeNode.build_from_reverse_polish([NodeType.Q])))
+
+    def test_many_variables(self):
+        letters = "ABCDEFGHIJKLMNOPQRST"
+        typeList = [getattr(NodeType, letters[0])]
+        for letter in letters[1:]:
+            typeList += [getattr(NodeType, letter), NodeType.OR]
+
+        self.assertEqual(count_models(PLTreeNode.build_from_reverse_polish(typeList)), 2 ** 20 - 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import itertools
+import unittest
+from plt_src import NodeType, PLTreeNode
+
+import logging
+
+fmt = '[%(levelname)s] -- %(lineno)d: %(message)s\n'
+logging.basicConfig(format=fmt, level=logging.DEBUG)
+
+def evaluate(pltree, bindings):
+    pltree = pltree.copy()
+    pltree.apply_variable_bindings(bindings)
+    return pltree.evaluate_constant_subtrees()
+
+def satisfiable_with(cnf, variables, bindings):
+    for values in itertools.product([True, False], repeat = len(variables)):
+        if evaluate(cnf, bindings + list(zip(variables, values))):
+            return True
+    return False
+
+class TseitinUnitTest(unittest.TestCase):
+
+    def check_equisatisfiable(self, typeList, polarity_aware):
+        pltree = PLTreeNode.build_from_reverse_polish(typeList)
+        variables = sorted(set(t for t in typeList if t.is_var()), key = str)
+
+        cnf = pltree.copy()
+        auxiliary = cnf.reduce_to_CNF(mode = "tseitin", polarity_aware = polarity_aware)
+        logging.debug("Tseitin (polarity aware: %s): %s"%(polarity_aware, cnf.in_infix_notation()))
+
+        for aux, subformula in auxiliary.items():
+            self.assertTrue(aux.is_var())
+            self.assertNotIn(aux, variables)
+
+        for values in itertools.product([True, False], repeat = len(variables)):
+            bindings = list(zip(variables, values))
+            self.assertEqual(bool(evaluate(pltree, bindings)), satisfiable_with(cnf, list(auxiliary), bindings))
+
+        return cnf, auxiliary
+
+    def test_equisatisfiable(self):
+        typeList = [ NodeType.R, NodeType.P, NodeType.OR, NodeType.TRUE, NodeType.Q, NodeType.NOT, NodeType.AND, NodeType.IMPLIES ]
+        self.check_equisatisfiable(typeList, False)
+        self.check_equisatisfiable(typeList, True)
+
+        typeList = [NodeType.R, NodeType.P, NodeType.IMPLIES, NodeType.S, NodeType.IMPLIES, NodeType.NOT, NodeType.Q, NodeType.IMPLIES]
+        self.check_equisatisfiable(typeList, False)
+        self.check_equisatisfiable(typeList, True)
+
+    def test_auxiliary_map(self):
+        typeList = [NodeType.A, NodeType.B, NodeType.AND, NodeType.C, NodeType.D, NodeType.AND, NodeType.OR]
+        cnf, auxiliary = self.check_equisatisfiable(typeList, False)
+
+        self.assertEqual(sorted(str(aux) for aux in auxiliary), ["aux1", "aux2", "aux3"])
+        self.assertEqual(sorted(subformula.in_prefix_notation() for subformula in auxiliary.values()),
+                         ["and(A,B)", "and(C,D)", "or(and(A,B),and(C,D))"])
+        self.assertEqual(cnf.in_prefix_notation().split(",")[0], "and(aux3")
+
+    def test_linear_size(self):
+        # ----- (A∧B)∨(C∧D)∨... has 2^n clauses once OR is distributed over AND
+        pairs = [NodeType.A, NodeType.B, NodeType.C, NodeType.D, NodeType.E, NodeType.F, NodeType.G, NodeType.H] * 4
+        typeList = [pairs[0], pairs[1], NodeType.AND]
+        for i in range(2, len(pairs), 2):
+            typeList += [pairs[i], pairs[i + 1], NodeType.AND, NodeType.OR]
+
+        sizes = {}
+        for polarity_aware in (False, True):
+            pltree = PLTreeNode.build_from_reverse_polish(typeList)
+            pltree.reduce_to_CNF(mode = "tseitin", polarity_aware = polarity_aware)
+            sizes[polarity_aware] = pltree.get_reverse_polish().count(NodeType.AND) + 1
+
+        # ----- the 16 conjunctions are only 4 distinct sub-formulas, each defined once
+        self.assertEqual(sizes[False], 1 + 4 * 3 + 15 * 3)
+        self.assertEqual(sizes[True], 1 + 4 * 2 + 15)
+
+
+if __name__ == '__main__':
+    unittest.main()